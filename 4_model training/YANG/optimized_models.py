@@ -1,4 +1,6 @@
-import pandas as pd
+import sys
+from pathlib import Path
+
 from sklearn.model_selection import GridSearchCV, StratifiedKFold
 from sklearn.metrics import f1_score, make_scorer, classification_report
 from sklearn.ensemble import RandomForestClassifier
@@ -6,11 +8,18 @@ from lightgbm import LGBMClassifier
 from imblearn.over_sampling import SMOTE
 from imblearn.pipeline import Pipeline
 
+ROOT = Path(__file__).resolve().parents[2]
+sys.path.append(str(ROOT / 'src'))
+
+from feature_store import open_panel
+
+DATA_DIR = ROOT / '3_Post-Feature Engineering' / 'YANG'
+
 
 def load_data():
-    """Load training and validation sets."""
-    train = pd.read_csv('../../3_Post-Feature Engineering/YANG/train_data_with_smote.csv')
-    val = pd.read_csv('../../3_Post-Feature Engineering/YANG/val_data.csv')
+    """Load training and validation sets (float32, memory-mapped after the first run)."""
+    train = open_panel(DATA_DIR / 'train_data_with_smote.csv').read()
+    val = open_panel(DATA_DIR / 'val_data.csv').read()
     X_train = train.drop(columns='is_defaulted')
     y_train = train['is_defaulted']
     X_val = val.drop(columns='is_defaulted')
@@ -0,0 +1,430 @@
+"""DART 다운로더 오프라인 부하 테스트
+
+로컬 모의 서버(``dart_mock_server.py``)를 띄우고 다운로더별 시나리오를 각각
+별도 프로세스에서 실행해 다음 값을 비교합니다.
+
+* 처리량: 초당 처리한 (기업, 연도) 작업 수와 초당 HTTP 요청 수
+* 지연 시간: 클라이언트에서 잰 요청별 p50/p95/p99
+* 메모리: 시나리오 실행 중 최대 RSS (준비 단계 대비 증가분 포함)
+* 한도 효율: 한도에 잡힌 요청 중 실제 데이터를 돌려받은 요청의 비율
+
+시나리오
+    corp-codes   CORPCODE.zip 다운로드 + 인덱스 갱신 (``--repeat``회)
+    bulk         fetch_bulk_statements, 단일회사 API
+    bulk-multi   fetch_bulk_statements, 다중회사 API
+    bulk-warm    응답 캐시와 재무제표 구분 기록을 채운 뒤 다시 실행한 두 번째 실행
+    dart-api     src/dart_api.fetch_statements (스레드 풀 + requests)
+
+    python benchmark_downloaders.py --corps 200 --latency 0.03 --rate-429 0.01
+    python benchmark_downloaders.py --scenarios bulk bulk-multi --output logs/bench.json
+
+캐시·인덱스는 모두 임시 디렉터리에 만들어 실제 ``data/cache``를 건드리지 않습니다.
+"""
+
+import argparse
+import asyncio
+import json
+import os
+import sys
+import tempfile
+import time
+from dataclasses import asdict, dataclass, field
+from pathlib import Path
+from typing import Any, Dict, List, Optional
+
+import numpy as np
+
+from dart_mock_server import (
+    FixtureStore,
+    MockDart,
+    add_server_arguments,
+    build_store,
+    faults_from_args,
+    start_mock_server,
+)
+
+try:
+    import resource
+except ImportError:  # Windows에서는 최대 RSS를 측정하지 않는다
+    resource = None
+
+SCENARIOS = ["corp-codes", "bulk", "bulk-multi", "bulk-warm", "dart-api"]
+RESULT_MARKER = "BENCH_RESULT "
+# 모의 서버는 키를 검사하지 않는다. 실제 키와 속도 제한 상태가 섞이지 않도록 별도 값을 쓴다.
+BENCHMARK_API_KEY = "mock-benchmark-key"
+
+
+def peak_rss_mb() -> Optional[float]:
+    if resource is None:
+        return None
+    peak = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+    # 리눅스는 KB, macOS는 바이트 단위
+    return peak / (1024 * 1024) if sys.platform == "darwin" else peak / 1024
+
+
+@dataclass
+class BenchResult:
+    scenario: str
+    jobs: int = 0
+    rows: int = 0
+    seconds: float = 0.0
+    latencies: List[float] = field(default_factory=list)
+    errors: int = 0
+    failure: Optional[str] = None
+    baseline_rss_mb: Optional[float] = None
+    peak_rss_mb: Optional[float] = None
+    server: Dict[str, Any] = field(default_factory=dict)
+
+    @property
+    def requests(self) -> int:
+        return len(self.latencies) + self.errors
+
+    def percentile(self, q: float) -> Optional[float]:
+        return float(np.percentile(self.latencies, q)) if self.latencies else None
+
+    @property
+    def quota_efficiency(self) -> Optional[float]:
+        counted = self.server.get("quota_counted", 0)
+        return self.server.get("useful", 0) / counted if counted else None
+
+    def summary(self) -> Dict[str, Any]:
+        return {
+            "scenario": self.scenario,
+            "jobs": self.jobs,
+            "rows": self.rows,
+            "seconds": round(self.seconds, 3),
+            "jobs_per_sec": round(self.jobs / self.seconds, 2) if self.seconds else None,
+            "requests": self.requests,
+            "requests_per_sec": round(self.requests / self.seconds, 2) if self.seconds else None,
+            "request_errors": self.errors,
+            "failure": self.failure,
+            "p50_ms": _ms(self.percentile(50)),
+            "p95_ms": _ms(self.percentile(95)),
+            "p99_ms": _ms(self.percentile(99)),
+            "peak_rss_mb": _round(self.peak_rss_mb),
+            "rss_growth_mb": _round(
+                self.peak_rss_mb - self.baseline_rss_mb
+                if self.peak_rss_mb is not None and self.baseline_rss_mb is not None
+                else None
+            ),
+            "quota_efficiency": _round(self.quota_efficiency, 3),
+            "server": self.server,
+        }
+
+
+def _ms(seconds: Optional[float]) -> Optional[float]:
+    return None if seconds is None else round(seconds * 1000, 1)
+
+
+def _round(value: Optional[float], digits: int = 1) -> Optional[float]:
+    return None if value is None else round(value, digits)
+
+
+# ---------------------------------------------------------------------------
+# 시나리오 (자식 프로세스에서 실행)
+# ---------------------------------------------------------------------------
+
+def _latency_trace(result: BenchResult):
+    import aiohttp
+
+    trace = aiohttp.TraceConfig()
+
+    async def on_start(session, ctx, params):
+        ctx.started = time.perf_counter()
+
+    async def on_end(session, ctx, params):
+        result.latencies.append(time.perf_counter() - ctx.started)
+
+    async def on_error(session, ctx, params):
+        result.errors += 1
+
+    trace.on_request_start.append(on_start)
+    trace.on_request_end.append(on_end)
+    trace.on_request_exception.append(on_error)
+    return trace
+
+
+async def _listed_corps(base_url: str, limit: int) -> List[str]:
+    import aiohttp
+
+    root = base_url.rsplit("/api", 1)[0]
+    async with aiohttp.ClientSession() as session:
+        async with session.get(f"{root}/_mock/corps", params={"limit": limit}) as resp:
+            return await resp.json()
+
+
+async def _reset_server(base_url: str) -> None:
+    import aiohttp
+
+    root = base_url.rsplit("/api", 1)[0]
+    async with aiohttp.ClientSession() as session:
+        async with session.post(f"{root}/_mock/reset") as resp:
+            resp.raise_for_status()
+
+
+async def run_corp_codes(args: argparse.Namespace, workdir: Path, result: BenchResult) -> None:
+    from dart_bulk_downloader import download_corp_code_zip
+    from corp_code_index import CorpCodeIndex
+
+    result.baseline_rss_mb = peak_rss_mb()
+    started = time.perf_counter()
+    for i in range(args.repeat):
+        call_started = time.perf_counter()
+        try:
+            buffer = await download_corp_code_zip(BENCHMARK_API_KEY)
+            with buffer:
+                result.rows += CorpCodeIndex(workdir / f"corp_codes_{i}.parquet").update(buffer)
+        except RuntimeError:
+            result.errors += 1
+            continue
+        result.latencies.append(time.perf_counter() - call_started)
+        result.jobs += 1
+    result.seconds = time.perf_counter() - started
+
+
+async def run_bulk(args: argparse.Namespace, workdir: Path, result: BenchResult, multi: bool = False, warm: bool = False) -> None:
+    from dart_bulk_downloader import fetch_bulk_statements
+    from dart_cache import ResponseCache
+    from fs_div_profile import FsDivProfile
+    from http_client import create_session
+
+    corps = await _listed_corps(args.base_url, args.corps)
+    years = list(range(args.start_year, args.end_year + 1))
+    cache = ResponseCache(workdir / "responses.sqlite") if warm else None
+    profile = FsDivProfile(workdir / "fs_div_profile.sqlite") if warm else None
+
+    def count_rows(df) -> None:
+        result.rows += len(df)
+
+    async def run_once() -> None:
+        # 다운로더가 쓰는 것과 같은 연결 풀 설정에 지연 측정 트레이스만 붙인다.
+        async with create_session(trace_configs=[_latency_trace(result)]) as session:
+            await fetch_bulk_statements(
+                BENCHMARK_API_KEY,
+                corps,
+                years,
+                workers=args.workers,
+                include_corp_names=False,
+                max_calls_per_minute=args.rate,
+                daily_limit=None,
+                cache=cache,
+                use_cache=warm,
+                sink=count_rows,
+                multi_company=multi,
+                profile=profile,
+                session=session,
+            )
+
+    try:
+        if warm:
+            # 첫 실행으로 캐시를 채우고, 두 번째 실행만 측정한다.
+            await run_once()
+            profile.flush()
+            await _reset_server(args.base_url)
+            result.latencies.clear()
+            result.errors = 0
+            result.rows = 0
+        result.baseline_rss_mb = peak_rss_mb()
+        started = time.perf_counter()
+        await run_once()
+        result.seconds = time.perf_counter() - started
+        result.jobs = len(corps) * len(years)
+    finally:
+        if cache is not None:
+            cache.close()
+        if profile is not None:
+            profile.close()
+
+
+async def run_dart_api(args: argparse.Namespace, workdir: Path, result: BenchResult) -> None:
+    from dart_api import CorpLookup, DART_CORPCODE_URL, fetch_statements, make_session
+    from corp_code_index import CorpCodeIndex
+    from rate_limiter import RateLimiter
+
+    corps = await _listed_corps(args.base_url, args.corps)
+    years = list(range(args.start_year, args.end_year + 1))
+
+    session = make_session(args.workers)
+    index = CorpCodeIndex(workdir / "corp_codes.parquet")
+    with tempfile.SpooledTemporaryFile() as buffer:
+        buffer.write(session.get(DART_CORPCODE_URL, params={"crtfc_key": BENCHMARK_API_KEY}, timeout=60).content)
+        buffer.seek(0)
+        index.update(buffer)
+    lookup = CorpLookup(index.frame())
+    await _reset_server(args.base_url)
+
+    session.hooks["response"].append(lambda resp, *a, **kw: result.latencies.append(resp.elapsed.total_seconds()))
+    result.baseline_rss_mb = peak_rss_mb()
+    result.jobs = len(corps) * len(years)
+    started = time.perf_counter()
+    try:
+        df = await asyncio.to_thread(
+            fetch_statements,
+            BENCHMARK_API_KEY,
+            corps,
+            years,
+            max_workers=args.workers,
+            session=session,
+            rate_limiter=RateLimiter(args.rate, 60.0, daily_limit=None),
+            lookup=lookup,
+        )
+    except Exception as e:
+        # 재시도 후에도 실패한 요청이 있으면 받은 행은 e.result에 담겨 올라온다.
+        result.failure = f"{type(e).__name__}: {e}"
+        df = getattr(e, "result", None)
+    finally:
+        session.close()
+    result.seconds = time.perf_counter() - started
+    result.rows = 0 if df is None else len(df)
+
+
+async def run_child(args: argparse.Namespace) -> None:
+    result = BenchResult(args.child)
+    with tempfile.TemporaryDirectory(prefix="dart-bench-") as tmp:
+        workdir = Path(tmp)
+        if args.child == "corp-codes":
+            await run_corp_codes(args, workdir, result)
+        elif args.child in ("bulk", "bulk-multi", "bulk-warm"):
+            await run_bulk(args, workdir, result, multi=args.child == "bulk-multi", warm=args.child == "bulk-warm")
+        elif args.child == "dart-api":
+            await run_dart_api(args, workdir, result)
+        else:
+            raise SystemExit(f"알 수 없는 시나리오: {args.child}")
+    result.peak_rss_mb = peak_rss_mb()
+    print(RESULT_MARKER + json.dumps(asdict(result)), flush=True)
+
+
+# ---------------------------------------------------------------------------
+# 실행 관리 (부모 프로세스)
+# ---------------------------------------------------------------------------
+
+async def run_scenario(mock: MockDart, base_url: str, scenario: str, args: argparse.Namespace) -> Optional[BenchResult]:
+    mock.reset_stats()
+    env = dict(os.environ, DART_API_BASE=base_url, PYTHONUNBUFFERED="1")
+    command = [
+        sys.executable, str(Path(__file__).resolve()),
+        "--child", scenario,
+        "--base-url", base_url,
+        "--corps", str(args.corps),
+        "--start-year", str(args.start_year),
+        "--end-year", str(args.end_year),
+        "--workers", str(args.workers),
+        "--rate", str(args.rate),
+        "--repeat", str(args.repeat),
+    ]
+    process = await asyncio.create_subprocess_exec(
+        *command,
+        stdout=asyncio.subprocess.PIPE,
+        stderr=asyncio.subprocess.STDOUT,
+        env=env,
+        cwd=str(Path(__file__).resolve().parent),
+    )
+    payload = None
+    async for raw in process.stdout:
+        line = raw.decode("utf-8", errors="replace").rstrip()
+        if line.startswith(RESULT_MARKER):
+            payload = json.loads(line[len(RESULT_MARKER):])
+        elif args.verbose:
+            print(f"  [{scenario}] {line}")
+    await process.wait()
+    if payload is None:
+        print(f"❌ {scenario}: 결과를 받지 못했습니다 (종료 코드 {process.returncode}, --verbose로 출력 확인)")
+        return None
+    result = BenchResult(**payload)
+    result.server = mock.stats.to_dict()
+    return result
+
+
+def print_table(results: List[BenchResult]) -> None:
+    header = (
+        f"{'scenario':<11} {'jobs':>6} {'sec':>7} {'jobs/s':>8} {'req/s':>8} "
+        f"{'p50ms':>7} {'p95ms':>7} {'p99ms':>7} {'peakMB':>7} {'quota':>6} {'429':>5} {'020':>5}"
+    )
+    print(header)
+    print("-" * len(header))
+    for result in results:
+        s = result.summary()
+        outcomes = s["server"].get("outcomes", {})
+        cells = [
+            f"{s['scenario']:<11}",
+            f"{s['jobs']:>6}",
+            f"{s['seconds']:>7.2f}",
+            _cell(s["jobs_per_sec"], 8),
+            _cell(s["requests_per_sec"], 8),
+            _cell(s["p50_ms"], 7),
+            _cell(s["p95_ms"], 7),
+            _cell(s["p99_ms"], 7),
+            _cell(s["peak_rss_mb"], 7),
+            _cell(s["quota_efficiency"], 6, ".0%"),
+            f"{outcomes.get('429', 0):>5}",
+            f"{outcomes.get('020', 0):>5}",
+        ]
+        print(" ".join(cells))
+        if s["failure"]:
+            print(f"{'':<11} ⚠️ 중단됨: {s['failure']}")
+
+
+def _cell(value: Optional[float], width: int, spec: str = ".1f") -> str:
+    return f"{'-':>{width}}" if value is None else f"{value:>{width}{spec}}"
+
+
+async def run_benchmark(args: argparse.Namespace) -> None:
+    store: FixtureStore = build_store(args)
+    mock = MockDart(store, faults_from_args(args))
+    runner, base_url = await start_mock_server(mock)
+    print(f"🧪 모의 서버: {base_url} · 장애 주입 {asdict(mock.faults)}")
+    results = []
+    try:
+        for scenario in args.scenarios:
+            print(f"▶ {scenario} 실행 중...")
+            result = await run_scenario(mock, base_url, scenario, args)
+            if result is not None:
+                results.append(result)
+    finally:
+        await runner.cleanup()
+
+    print()
+    print_table(results)
+    if args.output:
+        args.output.parent.mkdir(parents=True, exist_ok=True)
+        report = {
+            "created_at": time.strftime("%Y-%m-%dT%H:%M:%S"),
+            "settings": {
+                "corps": args.corps,
+                "years": [args.start_year, args.end_year],
+                "workers": args.workers,
+                "rate": args.rate,
+                "faults": asdict(mock.faults),
+            },
+            "results": [r.summary() for r in results],
+        }
+        args.output.write_text(json.dumps(report, ensure_ascii=False, indent=2), encoding="utf-8")
+        print(f"📁 결과 저장: {args.output}")
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description="DART 다운로더 오프라인 부하 테스트")
+    parser.add_argument("--scenarios", nargs="+", choices=SCENARIOS, default=SCENARIOS)
+    parser.add_argument("--start-year", type=int, default=2015)
+    parser.add_argument("--end-year", type=int, default=2023)
+    parser.add_argument("--workers", type=int, default=5, help="초기 동시 요청 수")
+    parser.add_argument("--rate", type=int, default=100_000, help="분당 요청 한도 (실제 DART는 600 내외)")
+    parser.add_argument("--repeat", type=int, default=5, help="corp-codes 반복 횟수")
+    parser.add_argument("--output", type=Path, help="결과 JSON 저장 경로")
+    parser.add_argument("--verbose", action="store_true", help="다운로더 출력도 표시")
+    parser.add_argument("--child", help=argparse.SUPPRESS)
+    parser.add_argument("--base-url", help=argparse.SUPPRESS)
+    add_server_arguments(parser)
+    parser.set_defaults(corps=200)
+    args = parser.parse_args()
+
+    if args.child:
+        from http_client import run_with_session
+
+        run_with_session(run_child(args))
+    else:
+        asyncio.run(run_benchmark(args))
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,80 @@
+import sys
+import time
+import argparse
+from pathlib import Path
+from typing import Optional, Sequence
+
+SRC_PATH = Path(__file__).resolve().parent.parent / "src"
+sys.path.append(str(SRC_PATH))
+
+import pyarrow.dataset as ds
+
+from dart_financial_splitter import latest_filings
+from dart_sink import open_dataset
+from feature_engine import FEATURES_V1, FeatureEngine, build_wide, to_features_v1_layout
+from feature_materializer import IncrementalMaterializer
+from feature_store import FEATURE_STORE_DIR, FeatureStore
+
+DATASET_DIR = Path(__file__).resolve().parent.parent / "data" / "raw" / "financial_statements"
+# 수작업으로 만든 features_v1.csv를 덮어쓰지 않도록 별도 파일에 기록한다.
+OUTPUT_PATH = Path(__file__).resolve().parent.parent / "data" / "processed" / "features_v1_dart.csv"
+COLUMNS = [
+    "corp_code", "corp_name", "bsns_year", "reprt_code", "fs_div", "sj_div",
+    "rcept_no", "account_id", "account_nm", "ord", "thstrm_amount",
+]
+
+
+def load_statements(dataset_dir: Path, corp_codes: Optional[Sequence[str]] = None):
+    """Latest-filing statement rows, optionally only for ``corp_codes``."""
+    dataset = open_dataset(dataset_dir, partition_cols=("bsns_year", "fs_div", "sj_div"))
+    columns = [c for c in COLUMNS if c in dataset.schema.names]
+    condition = ds.field("corp_code").isin(list(corp_codes)) if corp_codes else None
+    # 정정 공시는 최신 접수번호만 남긴다.
+    return latest_filings(dataset.to_table(columns=columns, filter=condition)).to_pandas()
+
+
+def materialize(
+    dataset_dir: Path = DATASET_DIR,
+    store_dir: Path = FEATURE_STORE_DIR,
+    corp_codes: Optional[Sequence[str]] = None,
+    full: bool = False,
+) -> None:
+    """Upsert only the features whose input accounts changed into the feature store."""
+    statements = load_statements(dataset_dir, corp_codes)
+    print(f"📥 재무제표 {len(statements):,}행 로드")
+    result = IncrementalMaterializer(FeatureStore(store_dir)).materialize(statements, full=full)
+    print(f"✅ {result} -> {store_dir}")
+
+
+def main(dataset_dir: Path = DATASET_DIR, output: Path = OUTPUT_PATH) -> None:
+    start = time.perf_counter()
+    statements = load_statements(dataset_dir)
+    print(f"📥 재무제표 {len(statements):,}행 로드")
+
+    engine = FeatureEngine(FEATURES_V1)
+    wide = build_wide(statements)
+    features = to_features_v1_layout(engine.compute(wide))
+    output.parent.mkdir(parents=True, exist_ok=True)
+    features.to_csv(output, encoding="utf-8-sig")
+    print(f"✅ {len(features):,}개 기업-연도 × {len(engine.names)}개 피처 -> {output} ({time.perf_counter() - start:.1f}s)")
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Build the features_v1 ratios from downloaded DART statements")
+    parser.add_argument("--dataset", type=Path, default=DATASET_DIR, help="Financial statements dataset directory")
+    parser.add_argument("--output", type=Path, default=OUTPUT_PATH, help="Output CSV path")
+    parser.add_argument(
+        "--store",
+        action="store_true",
+        help="Incrementally update the feature store instead of writing a CSV",
+    )
+    parser.add_argument("--store-dir", type=Path, default=FEATURE_STORE_DIR, help="Feature store directory")
+    parser.add_argument("--corp-codes", nargs="+", help="With --store, only read these companies (e.g. today's delta)")
+    parser.add_argument("--full", action="store_true", help="With --store, recompute every feature regardless of hashes")
+    args = parser.parse_args()
+    if not args.dataset.exists():
+        print(f"❌ 재무제표 데이터셋이 없습니다: {args.dataset}")
+    elif args.store:
+        materialize(args.dataset, args.store_dir, args.corp_codes, args.full)
+    else:
+        main(args.dataset, args.output)
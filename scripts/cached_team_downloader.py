@@ -1,10 +1,16 @@
 """캐시를 활용한 안정적인 DART 팀 다운로더"""
 
-import asyncio
-import os
-import pickle
 from pathlib import Path
-from dart_bulk_downloader import fetch_corp_codes, filter_kospi_kosdaq_non_financial, fetch_bulk_statements, save_to_excel
+from dart_bulk_downloader import (
+    fetch_corp_codes,
+    filter_kospi_kosdaq_non_financial,
+    fetch_bulk_statements,
+    ColumnarSink,
+    export_excel,
+)
+from http_client import run_with_session
+from corp_code_index import DEFAULT_INDEX_PATH
+from key_pool import load_api_keys
 from dotenv import load_dotenv
 import logging
 
@@ -15,48 +21,22 @@ load_dotenv(Path(__file__).resolve().parent.parent / ".env")
 logging.basicConfig(level=logging.INFO, format='%(asctime)s - %(levelname)s - %(message)s')
 logger = logging.getLogger(__name__)
 
-async def get_corp_codes_with_cache(api_key: str, force_refresh: bool = False):
-    """캐시를 사용한 기업 코드 가져오기"""
-    cache_file = Path(__file__).resolve().parent.parent / "data" / "corp_codes_cache.pkl"
-    cache_file.parent.mkdir(parents=True, exist_ok=True)
-    
-    # 캐시 파일이 있고 강제 새로고침이 아닌 경우
-    if cache_file.exists() and not force_refresh:
-        try:
-            logger.info("💾 캐시된 기업 코드 목록 로드 중...")
-            with open(cache_file, 'rb') as f:
-                corp_df = pickle.load(f)
-            
-            logger.info(f"✅ 캐시에서 {len(corp_df)}개 기업 로드 완료")
-            return corp_df
-            
-        except Exception as e:
-            logger.warning(f"⚠️ 캐시 파일 로드 실패: {e}, API에서 다시 다운로드합니다")
-    
-    # API에서 새로 다운로드
-    logger.info("🌐 API에서 기업 코드 목록 다운로드 중...")
-    corp_df = await fetch_corp_codes(api_key)
-    
-    # 캐시에 저장
-    try:
-        with open(cache_file, 'wb') as f:
-            pickle.dump(corp_df, f)
-        logger.info(f"💾 기업 코드 목록을 캐시에 저장: {cache_file}")
-    except Exception as e:
-        logger.warning(f"⚠️ 캐시 저장 실패: {e}")
-    
-    return corp_df
-
-async def cached_team_download(team_num: int, skip_validation: bool = True, use_cache: bool = True):
+async def cached_team_download(
+    team_num: int,
+    skip_validation: bool = True,
+    use_cache: bool = True,
+    excel: bool = False,
+):
     """캐시를 활용한 팀 다운로드"""
-    api_key = os.getenv("DART_API_KEY")
-    if not api_key:
-        logger.error("❌ DART_API_KEY 환경변수가 설정되지 않았습니다.")
+    try:
+        api_keys = load_api_keys()
+    except EnvironmentError as e:
+        logger.error(f"❌ {e}")
         return False
     
     try:
         # 캐시를 사용한 기업 코드 가져오기
-        corp_df = await get_corp_codes_with_cache(api_key, force_refresh=not use_cache)
+        corp_df = await fetch_corp_codes(api_keys[0], force_refresh=not use_cache)
         target_df = filter_kospi_kosdaq_non_financial(corp_df)
         
         # 주식코드로 정렬
@@ -86,27 +66,33 @@ async def cached_team_download(team_num: int, skip_validation: bool = True, use_
         sample_names = team_corps['corp_name'].head(3).tolist()
         logger.info(f"- 샘플 기업: {', '.join(sample_names)}")
         
-        # 다운로드 실행 (속도 제한 강화)
-        statements = await fetch_bulk_statements(
-            api_key, 
-            corp_codes, 
-            years, 
-            workers=3,  # 워커 수 대폭 감소 (10→3)
-            include_corp_names=True
-        )
+        # 다운로드 실행 (동시 요청 수는 3에서 시작해 AIMD로 자동 조정)
+        # 결과는 수집되는 즉시 팀 공용 Parquet 데이터셋에 추가된다.
+        output_dir = Path(__file__).resolve().parent.parent / "data" / "team_downloads" / "statements"
+        sink = ColumnarSink(output_dir, basename=f"team-{team_num:02d}")
+        try:
+            await fetch_bulk_statements(
+                api_keys, 
+                corp_codes, 
+                years, 
+                workers=3,
+                include_corp_names=True,
+                sink=sink,
+            )
+        except BaseException:
+            # 실패한 실행의 부분 파일은 지워, 다시 실행할 때 같은 기업-연도가 중복되지 않게 한다.
+            sink.discard()
+            raise
+        sink.close()
         
-        if not statements.empty:
-            # 파일 저장
-            output_dir = Path(__file__).resolve().parent.parent / "data" / "team_downloads"
-            output_dir.mkdir(parents=True, exist_ok=True)
-            output_path = output_dir / f"dart_statements_team_{team_num:02d}.xlsx"
-            
-            save_to_excel(statements, output_path)
-            
+        if sink.rows_written:
             logger.info(f"✅ 팀 {team_num} 다운로드 완료")
-            logger.info(f"📊 수집된 데이터: {len(statements):,}행")
-            logger.info(f"📈 기업당 평균: {len(statements)//len(corp_codes):.0f}행")
-            logger.info(f"💾 저장 위치: {output_path}")
+            logger.info(f"📊 수집된 데이터: {sink.rows_written:,}행")
+            logger.info(f"📈 기업당 평균: {sink.rows_written//len(corp_codes):.0f}행")
+            logger.info(f"💾 저장 위치: {output_dir}")
+            if excel:
+                excel_path = output_dir.parent / f"dart_statements_team_{team_num:02d}.xlsx"
+                export_excel(output_dir, excel_path, filters={"corp_code": corp_codes})
             return True
         else:
             logger.error(f"❌ 팀 {team_num}: 데이터 수집 실패")
@@ -117,8 +103,8 @@ async def cached_team_download(team_num: int, skip_validation: bool = True, use_
         return False
 
 def clear_cache():
-    """캐시 파일 삭제"""
-    cache_file = Path(__file__).resolve().parent.parent / "data" / "corp_codes_cache.pkl"
+    """기업 코드 인덱스 파일 삭제"""
+    cache_file = DEFAULT_INDEX_PATH
     if cache_file.exists():
         cache_file.unlink()
         print(f"🗑️ 캐시 파일 삭제: {cache_file}")
@@ -132,6 +118,7 @@ async def main():
     parser.add_argument("--skip-validation", action="store_true", help="유효성 검증 스킵")
     parser.add_argument("--no-cache", action="store_true", help="캐시 사용하지 않음")
     parser.add_argument("--clear-cache", action="store_true", help="캐시 파일 삭제")
+    parser.add_argument("--excel", action="store_true", help="팀 결과를 엑셀로도 내보내기")
     args = parser.parse_args()
     
     if args.clear_cache:
@@ -143,7 +130,8 @@ async def main():
     success = await cached_team_download(
         args.team, 
         args.skip_validation, 
-        use_cache=not args.no_cache
+        use_cache=not args.no_cache,
+        excel=args.excel,
     )
     
     if success:
@@ -153,4 +141,4 @@ async def main():
         exit(1)
 
 if __name__ == "__main__":
-    asyncio.run(main())
+    run_with_session(main())
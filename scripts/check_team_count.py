@@ -1,20 +1,11 @@
 """실제 팀 수 확인 스크립트"""
-import asyncio
-import os
 from dart_bulk_downloader import fetch_corp_codes, filter_kospi_kosdaq_non_financial
-
-def split_corps_for_teams(corp_codes, chunk_size=100):
-    chunks = []
-    for i in range(0, len(corp_codes), chunk_size):
-        team_num = i // chunk_size + 1
-        chunk = corp_codes[i:i + chunk_size]
-        chunks.append((team_num, chunk))
-    return chunks
+from http_client import run_with_session
+from key_pool import load_api_keys
+from utils import split_corps_for_teams
 
 async def check_actual_teams():
-    api_key = os.getenv("DART_API_KEY") 
-    if not api_key:
-        api_key = "ea93b96a1c65f8122dc6a71957dbf871655ef780"
+    api_key = load_api_keys()[0]
     
     print("📋 실제 팀 수 확인 중...")
     corp_df = await fetch_corp_codes(api_key)
@@ -30,4 +21,4 @@ async def check_actual_teams():
     return len(team_chunks)
 
 if __name__ == "__main__":
-    actual_teams = asyncio.run(check_actual_teams())
+    actual_teams = run_with_session(check_actual_teams())
@@ -1,8 +1,12 @@
 # DART 다운로드 설정 파일
 # 이 파일을 config.py로 저장하고 각 스크립트에서 import해서 사용하세요
 
+import os
+
 # API 설정
-DART_SINGLE_ACCOUNT_URL = "https://opendart.fss.or.kr/api/fnlttSinglAcnt.json"
+# DART_API_BASE 환경변수로 로컬 모의 서버(dart_mock_server.py) 주소를 지정할 수 있습니다
+DART_API_BASE = os.environ.get("DART_API_BASE", "https://opendart.fss.or.kr/api").rstrip("/")
+DART_SINGLE_ACCOUNT_URL = f"{DART_API_BASE}/fnlttSinglAcnt.json"
 DEFAULT_WORKERS = 10
 DEFAULT_CHUNK_SIZE = 100
 API_RATE_LIMIT = 800  # 분당 요청 수
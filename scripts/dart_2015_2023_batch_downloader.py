@@ -1,5 +1,4 @@
 import asyncio
-import os
 from pathlib import Path
 import argparse
 from typing import List
@@ -8,8 +7,12 @@ from dart_bulk_downloader import (
     fetch_corp_codes,
     filter_kospi_kosdaq_non_financial,
     fetch_bulk_statements,
-    save_to_excel,
+    ColumnarSink,
 )
+from http_client import run_with_session
+from key_pool import load_api_keys
+from rate_limiter import QuotaExceededError
+from retry_policy import RetryPolicy, classify, retry_cause
 
 BATCH_SIZE = 100
 SAFE_CALLS_PER_SECOND = 5  # 초당 5회 이하로 제한
@@ -17,38 +20,65 @@ CALL_INTERVAL = 1 / SAFE_CALLS_PER_SECOND  # = 0.2초
 MAX_CONCURRENT_TASKS = 3  # 동시에 실행되는 작업 수 제한
 
 semaphore = asyncio.Semaphore(MAX_CONCURRENT_TASKS)
+# 요청 단위 재시도와 회로 차단기로도 넘기지 못한 일시적 오류는 배치 전체를 다시 받는다.
+BATCH_RETRY = RetryPolicy(max_attempts=3, base_delay=30.0, max_delay=300.0)
 
 
 async def download_batch(
-    api_key: str,
+    api_keys: List[str],
     batch_num: int,
     corp_codes: List[str],
     years: range,
     output_dir: Path,
     workers: int,
+    multi_company: bool = False,
 ) -> None:
-    output_path = output_dir / f"dart_statements_2015_2023_batch_{batch_num:02d}.xlsx"
-    if output_path.exists():
+    done_marker = output_dir / f"batch_{batch_num:02d}.done"
+    legacy_path = output_dir / f"dart_statements_2015_2023_batch_{batch_num:02d}.xlsx"
+    if done_marker.exists() or legacy_path.exists():
         print(f"[SKIP] Batch {batch_num} already downloaded. Skipping.")
         return
 
+    async def attempt() -> int:
+        # 모든 배치가 하나의 Parquet 데이터셋에 각자 part 파일로 기록된다.
+        sink = ColumnarSink(output_dir / "statements", basename=f"batch-{batch_num:02d}")
+        try:
+            async with semaphore:
+                await asyncio.sleep(CALL_INTERVAL)  # 호출 간 간격 확보 (초당 5회 제한)
+                await fetch_bulk_statements(
+                    api_keys,
+                    corp_codes,
+                    years,
+                    workers=workers,
+                    include_corp_names=True,
+                    max_calls_per_minute=int(SAFE_CALLS_PER_SECOND * 60),  # = 300
+                    multi_company=multi_company,
+                    sink=sink,
+                )
+        except BaseException:
+            # 실패한 시도의 부분 파일은 지워 재시도 시 행이 중복되지 않게 한다.
+            sink.discard()
+            raise
+        sink.close()
+        return sink.rows_written
+
+    def on_retry(attempt_no: int, error: BaseException, delay: float) -> None:
+        print(f"[WARN] Batch {batch_num} failed ({retry_cause(error)}): {error}; retrying in {delay:.0f}s")
+
     try:
-        async with semaphore:
-            await asyncio.sleep(CALL_INTERVAL)  # 호출 간 간격 확보 (초당 5회 제한)
-            df = await fetch_bulk_statements(
-                api_key,
-                corp_codes,
-                years,
-                workers=workers,
-                include_corp_names=True,
-                max_calls_per_minute=int(SAFE_CALLS_PER_SECOND * 60),  # = 300
-            )
+        # 응답 캐시 덕분에 재시도는 이미 받은 요청을 다시 보내지 않는다.
+        rows_written = await BATCH_RETRY.call(attempt, on_retry=on_retry)
+    except QuotaExceededError:
+        raise
     except Exception as e:
-        print(f"[ERROR] API server unresponsive during batch {batch_num}: {e}")
-        raise SystemExit(1)
+        # 한 배치의 실패로 전체 실행을 멈추지 않는다. 완료 표시가 없으므로 다음 실행에서 다시 받는다.
+        print(f"[ERROR] Batch {batch_num} failed ({classify(e)}): {e}")
+        return
 
-    if not df.empty:
-        save_to_excel(df, output_path)
+    # 실패한 키가 있으면 fetch_bulk_statements가 FetchFailedError를 올리므로, 완료 표시는 모든 키를 받은 배치에만 남는다.
+    if rows_written:
+        done_marker.write_text(f"{rows_written}\n", encoding="utf-8")
+        print(f"[INFO] Batch {batch_num}: {rows_written:,} rows")
     else:
         print(f"[WARN] Batch {batch_num} returned no data")
 
@@ -62,18 +92,20 @@ async def main() -> None:
     parser.add_argument(
         "--workers", type=int, default=MAX_CONCURRENT_TASKS, help="Number of concurrent workers"
     )
+    parser.add_argument(
+        "--multi", action="store_true", help="Pack corp codes into multi-company requests"
+    )
     args = parser.parse_args()
 
-    api_key = os.getenv("DART_API_KEY")
-    if not api_key:
-        raise EnvironmentError("Set DART_API_KEY in your environment or .env file")
+    # Several keys in DART_API_KEYS are pooled; DART_API_KEY still works alone.
+    api_keys = load_api_keys()
 
     base_dir = Path(__file__).resolve().parent.parent
     output_dir = base_dir / "data" / "batches_2015_2023"
     output_dir.mkdir(parents=True, exist_ok=True)
 
     print("[INFO] Fetching corporation codes...")
-    corp_df = await fetch_corp_codes(api_key)
+    corp_df = await fetch_corp_codes(api_keys[0])
     target_df = filter_kospi_kosdaq_non_financial(corp_df).sort_values("stock_code")
     corp_codes = target_df["corp_code"].tolist()
 
@@ -91,9 +123,13 @@ async def main() -> None:
     for batch_num in range(start, end + 1):
         batch_codes = batches[batch_num - 1]
         print(f"[INFO] Starting batch {batch_num} ({len(batch_codes)} corps)...")
-        await download_batch(
-            api_key, batch_num, batch_codes, years, output_dir, args.workers
-        )
+        try:
+            await download_batch(
+                api_keys, batch_num, batch_codes, years, output_dir, args.workers, args.multi
+            )
+        except QuotaExceededError as e:
+            print(f"[INFO] {e}. Resume from batch {batch_num} after the quota resets.")
+            break
         await asyncio.sleep(1.5)  # 각 배치 간 추가 딜레이로 안정성 확보
 
     print(
@@ -102,4 +138,4 @@ async def main() -> None:
 
 
 if __name__ == "__main__":
-    asyncio.run(main())
+    run_with_session(main())
@@ -4,124 +4,163 @@ from __future__ import annotations
 
 import asyncio
 import io
+import re
+import sys
+import tempfile
+import time
 import zipfile
-from collections import deque
 from pathlib import Path
-from typing import Iterable, List
-import xml.etree.ElementTree as ET
+from typing import IO, Any, Callable, Dict, Iterable, List, Mapping, Optional, Sequence, Tuple, Union
 
 import aiohttp
 import pandas as pd
+import pyarrow as pa
 from dotenv import load_dotenv
 import argparse
 import os
 
+SRC_PATH = Path(__file__).resolve().parent.parent / "src"
+if str(SRC_PATH) not in sys.path:
+    sys.path.append(str(SRC_PATH))
+
+from dart_cache import ResponseCache
+from dart_metrics import (
+    REGISTRY,
+    REQUEST_SECONDS,
+    RESPONSE_BYTES,
+    RETRIES,
+    ROWS_PARSED,
+    endpoint_name,
+)
+from fs_div_profile import FsDivProfile
+from http_client import DOWNLOAD_TIMEOUT, get_session, run_with_session
+from rate_limiter import (
+    DEFAULT_DAILY_LIMIT,
+    QuotaExceededError,
+    RateLimiter,
+    shared_state_path,
+)
+from adaptive_concurrency import AdaptiveConcurrency
+from corp_code_index import DEFAULT_MAX_AGE, get_corp_code_index
+from key_pool import ApiKeyPool, load_api_keys
+from dart_pipeline import Pipeline
+from dart_sink import STATEMENTS_DIR, ColumnarSink, export_excel, read_statements
+from record_batches import RecordBatchBuilder, decode_json, offload
+from retry_policy import (
+    QUOTA,
+    TRANSIENT,
+    DartStatusError,
+    FetchFailedError,
+    RetryPolicy,
+    classify,
+    classify_status,
+    get_breaker,
+    retry_cause,
+)
+
 # Load API key from .env at project root
 load_dotenv(Path(__file__).resolve().parent.parent / ".env")
 
-DART_CORPCODE_URL = "https://opendart.fss.or.kr/api/corpCode.xml"
-DART_SINGLE_ACCOUNT_URL = "https://opendart.fss.or.kr/api/fnlttSinglAcnt.json"
-
-class RateLimiter:
-    """Simple asyncio rate limiter for API calls."""
-
-    def __init__(self, max_calls: int, period: float) -> None:
-        self.max_calls = max_calls
-        self.period = period
-        self.calls: deque[float] = deque()
-        self._lock = asyncio.Lock()
-
-    async def wait(self) -> None:
-        async with self._lock:
-            now = asyncio.get_event_loop().time()
-            while self.calls and self.calls[0] <= now - self.period:
-                self.calls.popleft()
-            if len(self.calls) >= self.max_calls:
-                wait_for = self.period - (now - self.calls[0])
-                await asyncio.sleep(wait_for)
-                now = asyncio.get_event_loop().time()
-                while self.calls and self.calls[0] <= now - self.period:
-                    self.calls.popleft()
-            self.calls.append(now)
-
-async def fetch_corp_codes(api_key: str) -> pd.DataFrame:
-    """Download and parse DART corp code list with error handling."""
+# 로컬 모의 서버(scripts/dart_mock_server.py) 등으로 바꾸려면 DART_API_BASE 환경변수를 지정한다.
+DART_API_BASE = os.environ.get("DART_API_BASE", "https://opendart.fss.or.kr/api").rstrip("/")
+DART_CORPCODE_URL = f"{DART_API_BASE}/corpCode.xml"
+DART_SINGLE_ACCOUNT_URL = f"{DART_API_BASE}/fnlttSinglAcnt.json"
+DART_MULTI_ACCOUNT_URL = f"{DART_API_BASE}/fnlttMultiAcnt.json"
+# 다중회사 주요계정 API 한 번에 조회할 수 있는 최대 기업 수
+MULTI_ACCOUNT_MAX_CORPS = 100
+# 이만큼 행이 모이면 Arrow 레코드 배치로 묶어 저장소에 넘긴다.
+RECORD_BATCH_ROWS = 10_000
+# 같은 API 주소로 가는 모든 요청이 하나의 회로 차단기를 공유한다.
+DART_BREAKER = get_breaker(DART_API_BASE)
+REQUEST_RETRY = RetryPolicy(max_attempts=3, base_delay=1.0, max_delay=30.0, breaker=DART_BREAKER)
+CORP_CODE_RETRY = RetryPolicy(max_attempts=3, base_delay=5.0, max_delay=60.0, breaker=DART_BREAKER)
+
+async def _download_corp_code_once(url: str) -> IO[bytes]:
+    """Download CORPCODE.zip once into a spooled temporary file."""
+    # 응답 전체를 메모리에 올리지 않고 조각 단위로 임시 파일에 기록한다.
+    # 공유 연결 풀을 쓰고, 큰 ZIP이므로 타임아웃만 요청 단위로 늘린다.
+    buffer = tempfile.SpooledTemporaryFile(max_size=8 * 1024 * 1024)
+    try:
+        started = time.perf_counter()
+        async with get_session().get(url, timeout=DOWNLOAD_TIMEOUT) as resp:
+            print(f"HTTP 상태 코드: {resp.status}")
+            print(f"Content-Type: {resp.headers.get('Content-Type', 'Unknown')}")
+
+            resp.raise_for_status()
+            async for chunk in resp.content.iter_chunked(64 * 1024):
+                buffer.write(chunk)
+        size = buffer.tell()
+        buffer.seek(0)
+        REQUEST_SECONDS.observe(time.perf_counter() - started, endpoint="corpCode", status=str(resp.status))
+        RESPONSE_BYTES.inc(size, endpoint="corpCode")
+        print(f"응답 데이터 크기: {size} bytes")
+
+        # 응답이 ZIP 파일인지 확인
+        if size < 10:
+            raise ValueError(f"응답 데이터가 너무 짧습니다: {size} bytes")
+
+        # ZIP 파일 매직 넘버 확인 (PK)
+        head = buffer.read(500)
+        buffer.seek(0)
+        if not head.startswith(b'PK'):
+            # DART는 오류를 <status>/<message> XML로 돌려준다.
+            text_response = head.decode('utf-8', errors='replace')
+            print(f"비ZIP 응답 내용 (처음 500자): {text_response}")
+            status = re.search(r"<status>\s*(\w+)\s*</status>", text_response)
+            message = re.search(r"<message>\s*(.*?)\s*</message>", text_response, re.S)
+            if status:
+                error = DartStatusError(status.group(1), message.group(1) if message else "")
+                if classify(error) == QUOTA:
+                    raise QuotaExceededError(f"API daily request limit reached: {error.message}")
+                raise error
+            raise zipfile.BadZipFile("ZIP 파일 형식이 아닌 응답을 받았습니다")
+
+        zipfile.ZipFile(buffer).close()  # 중앙 디렉터리까지 온전한지 확인
+        buffer.seek(0)
+        return buffer
+    except BaseException:
+        buffer.close()
+        raise
+
+async def download_corp_code_zip(api_key: str) -> IO[bytes]:
+    """Download CORPCODE.zip into a spooled temporary file.
+
+    Transient failures (timeouts, network errors, broken ZIPs) are retried
+    with :data:`CORP_CODE_RETRY`; an invalid key or exhausted quota is not.
+    """
     url = f"{DART_CORPCODE_URL}?crtfc_key={api_key}"
-    
-    max_retries = 3
-    for attempt in range(max_retries):
-        try:
-            print(f"기업 코드 다운로드 시도 {attempt + 1}/{max_retries}...")
-            
-            # 타임아웃과 헤더 설정
-            timeout = aiohttp.ClientTimeout(total=120, connect=30)
-            headers = {
-                'User-Agent': 'Mozilla/5.0 (Windows NT 10.0; Win64; x64) AppleWebKit/537.36 (KHTML, like Gecko) Chrome/91.0.4472.124 Safari/537.36'
-            }
-            
-            async with aiohttp.ClientSession(timeout=timeout, headers=headers) as session:
-                async with session.get(url) as resp:
-                    print(f"HTTP 상태 코드: {resp.status}")
-                    print(f"Content-Type: {resp.headers.get('Content-Type', 'Unknown')}")
-                    
-                    resp.raise_for_status()
-                    data = await resp.read()
-                    print(f"응답 데이터 크기: {len(data)} bytes")
-                    
-                    # 응답이 ZIP 파일인지 확인
-                    if len(data) < 10:
-                        raise ValueError(f"응답 데이터가 너무 짧습니다: {len(data)} bytes")
-                    
-                    # ZIP 파일 매직 넘버 확인 (PK)
-                    if not data.startswith(b'PK'):
-                        # 텍스트 응답인 경우 내용 확인
-                        try:
-                            text_response = data.decode('utf-8')[:500]
-                            print(f"비ZIP 응답 내용 (처음 500자): {text_response}")
-                        except:
-                            print(f"비ZIP 응답 내용 (hex): {data[:50].hex()}")
-                        
-                        if attempt < max_retries - 1:
-                            wait_time = (attempt + 1) * 5
-                            print(f"ZIP 파일이 아닙니다. {wait_time}초 후 재시도...")
-                            await asyncio.sleep(wait_time)
-                            continue
-                        else:
-                            raise ValueError("ZIP 파일 형식이 아닌 응답을 받았습니다")
-
-            # ZIP 파일 처리
-            with zipfile.ZipFile(io.BytesIO(data)) as zf:
-                xml_data = zf.read("CORPCODE.xml").decode("utf-8")
-            
-            root = ET.fromstring(xml_data)
-            data_list = []
-            
-            for corp in root.findall('.//list'):
-                corp_dict = {}
-                for child in corp:
-                    corp_dict[child.tag] = child.text
-                data_list.append(corp_dict)
-            
-            df = pd.DataFrame(data_list)
-            print(f"Available columns: {list(df.columns)}")
-            print(f"✅ 기업 코드 다운로드 성공: {len(df)}개 기업")
-            return df
-            
-        except asyncio.TimeoutError:
-            print(f"❌ 시도 {attempt + 1}: 타임아웃 (120초)")
-        except aiohttp.ClientError as e:
-            print(f"❌ 시도 {attempt + 1}: 네트워크 오류 - {e}")
-        except zipfile.BadZipFile as e:
-            print(f"❌ 시도 {attempt + 1}: ZIP 파일 오류 - {e}")
-        except Exception as e:
-            print(f"❌ 시도 {attempt + 1}: 기타 오류 - {e}")
-        
-        if attempt < max_retries - 1:
-            wait_time = (attempt + 1) * 10  # 점진적으로 대기 시간 증가
-            print(f"⏳ {wait_time}초 대기 후 재시도...")
-            await asyncio.sleep(wait_time)
-    
-    raise RuntimeError(f"기업 코드 다운로드가 {max_retries}번 모두 실패했습니다")
+
+    def on_retry(attempt: int, error: BaseException, delay: float) -> None:
+        print(f"❌ 시도 {attempt + 1}/{CORP_CODE_RETRY.max_attempts}: {retry_cause(error)} - {error}")
+        print(f"⏳ {delay:.1f}초 대기 후 재시도...")
+
+    try:
+        return await CORP_CODE_RETRY.call(_download_corp_code_once, url, on_retry=on_retry)
+    except (QuotaExceededError, DartStatusError):
+        raise
+    except Exception as e:
+        raise RuntimeError(f"기업 코드 다운로드 실패 ({classify(e)}): {e}") from e
+
+async def fetch_corp_codes(
+    api_key: str,
+    force_refresh: bool = False,
+    max_age: float = DEFAULT_MAX_AGE,
+) -> pd.DataFrame:
+    """Return the DART corp code list from the shared index.
+
+    The index is downloaded only when it is missing, older than
+    ``max_age`` seconds, or ``force_refresh`` is set; otherwise the
+    memoized copy is returned without any network access.
+    """
+    index = get_corp_code_index()
+    if force_refresh or index.is_stale(max_age):
+        buffer = await download_corp_code_zip(api_key)
+        with buffer:
+            changed = index.update(buffer)
+        print(f"✅ 기업 코드 인덱스 갱신: 변경 {changed:,}개 (기준일 {index.watermark})")
+    df = index.frame()
+    print(f"✅ 기업 코드 로드: {len(df)}개 기업")
+    return df
 
 def filter_kospi_kosdaq_non_financial(df: pd.DataFrame) -> pd.DataFrame:
     if "stock_code" not in df.columns:
@@ -147,18 +186,105 @@ def filter_kospi_kosdaq_non_financial(df: pd.DataFrame) -> pd.DataFrame:
     else:
         return df[valid_stock]
 
-async def fetch_single_statement(
+async def _get_json(
+    session: aiohttp.ClientSession,
+    url: str,
+    params: Dict[str, object],
+    rate_limiter: RateLimiter,
+    concurrency: Optional[AdaptiveConcurrency] = None,
+    key_pool: Optional[ApiKeyPool] = None,
+) -> Dict[str, object]:
+    """Rate-limited GET that feeds the AIMD controller.
+
+    With a ``key_pool`` each request goes out with the key that has the most
+    headroom, and a key DART reports as over quota is retired and the
+    request is repeated with the next one. Without one, a quota answer
+    raises :class:`QuotaExceededError`. DART system errors (status 800/900)
+    raise :class:`DartStatusError` so callers can retry them.
+
+    Every request goes through :data:`DART_BREAKER`: while DART keeps
+    failing, requests wait for the circuit instead of piling on.
+    """
+    while True:
+        endpoint = endpoint_name(url)
+        async with DART_BREAKER.guard():
+            if key_pool is not None:
+                params["crtfc_key"] = await key_pool.acquire()
+            else:
+                await rate_limiter.wait()
+            started = time.perf_counter()
+            try:
+                async with session.get(url, params=params) as resp:
+                    if resp.status == 429 and concurrency:
+                        concurrency.record_overload()
+                    resp.raise_for_status()
+                    body = await resp.read()
+            except aiohttp.ClientResponseError as e:
+                REQUEST_SECONDS.observe(time.perf_counter() - started, endpoint=endpoint, status=f"http_{e.status}")
+                raise
+            except (aiohttp.ClientError, asyncio.TimeoutError):
+                REQUEST_SECONDS.observe(time.perf_counter() - started, endpoint=endpoint, status="error")
+                raise
+            RESPONSE_BYTES.inc(len(body), endpoint=endpoint)
+            # 큰 응답은 디코딩 스레드 풀에서 파싱해 다른 요청의 I/O를 막지 않는다.
+            data = await decode_json(body)
+            status = data.get("status")
+            REQUEST_SECONDS.observe(time.perf_counter() - started, endpoint=endpoint, status=str(status))
+            kind = classify_status(status, data.get("message", ""))
+            if kind == TRANSIENT:
+                # 점검·시스템 오류는 회로 차단기에 실패로 기록되고 호출자가 재시도한다.
+                raise DartStatusError(status, data.get("message", ""))
+        over_quota = kind == QUOTA
+        if concurrency:
+            # 사용량 초과 메시지는 과부하 신호로, 그 외 응답은 정상 지연으로 기록
+            if over_quota:
+                concurrency.record_overload()
+            else:
+                concurrency.record_success(time.perf_counter() - started)
+        if over_quota:
+            if key_pool is None:
+                raise QuotaExceededError(f"API daily request limit reached: {data.get('message', '')}")
+            key_pool.retire(params["crtfc_key"], data.get("message", ""))
+            RETRIES.inc(cause="quota_key_rotation")
+            continue
+        return data
+
+async def fetch_single_records(
     session: aiohttp.ClientSession,
     rate_limiter: RateLimiter,
     api_key: str,
     corp_code: str,
     year: int,
-    max_retries: int = 2,
-) -> pd.DataFrame:
-    # 연결재무제표와 개별재무제표 모두 시도
-    fs_types = [("CFS", "연결"), ("OFS", "개별")]
-    
-    for fs_div, fs_name in fs_types:
+    max_retries: int = REQUEST_RETRY.max_attempts,
+    cache: Optional[ResponseCache] = None,
+    concurrency: Optional[AdaptiveConcurrency] = None,
+    fs_divs: Sequence[str] = ("CFS", "OFS"),
+    key_pool: Optional[ApiKeyPool] = None,
+    profile: Optional[FsDivProfile] = None,
+) -> Tuple[Optional[str], List[Dict[str, Any]]]:
+    """Fetch key accounts for one company and year as raw records.
+
+    ``fs_divs`` are tried in order and the first one with data is returned
+    as ``(fs_div, records)``; by default consolidated (CFS) statements,
+    then separate (OFS) ones. ``(None, [])`` means DART answered "no data"
+    (status 013, or 000 with an empty list) for every variant. With
+    ``key_pool`` the request key is picked from the pool instead of
+    ``api_key``. With ``profile`` variants known to be empty are skipped,
+    the one the company usually files is tried first, and every answer is
+    recorded for later runs.
+
+    Transient failures are retried up to ``max_retries`` attempts with the
+    jittered backoff of :data:`REQUEST_RETRY`; permanent API errors are not.
+    Failures are raised rather than reported as no data, so callers can
+    mark the key as failed: :class:`DartStatusError` for any other API
+    status, and the last HTTP or network error once retries run out.
+    """
+    fs_names = {"CFS": "연결", "OFS": "개별"}
+    if profile is not None:
+        fs_divs = profile.order(corp_code, year, fs_divs)
+
+    for fs_div in fs_divs:
+        fs_name = fs_names.get(fs_div, fs_div)
         params = {
             "crtfc_key": api_key,
             "corp_code": corp_code,
@@ -168,107 +294,430 @@ async def fetch_single_statement(
         }
         
         for attempt in range(max_retries):
-            await rate_limiter.wait()
-            
+            # 캐시를 속도 제한보다 먼저 확인해 캐시 적중 시 API 호출을 하지 않는다.
+            data = cache.get(DART_SINGLE_ACCOUNT_URL, params) if cache else None
+
             try:
-                async with session.get(DART_SINGLE_ACCOUNT_URL, params=params) as resp:
-                    resp.raise_for_status()
-                    data = await resp.json()
+                if data is None:
+                    data = await _get_json(
+                        session, DART_SINGLE_ACCOUNT_URL, params, rate_limiter, concurrency, key_pool
+                    )
+                    if cache:
+                        cache.put(DART_SINGLE_ACCOUNT_URL, params, data)
 
-                if data.get("status") == "000":
+                status = data.get("status")
+                if profile is not None and status in ("000", "013"):
+                    profile.record(corp_code, year, fs_div, status == "000" and bool(data.get("list")))
+                if status == "013":
+                    break  # 조회된 데이터 없음: 재시도하지 않고 다음 구분으로 넘어간다
+                if status == "000":
                     list_data = data.get("list", [])
                     if list_data:  # 데이터가 있으면 바로 반환
-                        df = pd.DataFrame(list_data)
-                        # API 응답에 corp_code와 bsns_year가 없으면 추가
-                        if 'corp_code' not in df.columns:
-                            df['corp_code'] = corp_code
-                        if 'bsns_year' not in df.columns:
-                            df['bsns_year'] = year
-                        df['fs_div'] = fs_div  # 재무제표 구분 추가
-                        return df
-                else:
-                    if attempt == max_retries - 1:  # 마지막 시도에서만 로그
-                        if fetch_single_statement.error_count < fetch_single_statement.MAX_ERROR_LOGS:
-                            msg = data.get("message", "")
-                            print(f"API error {data.get('status')} for {corp_code} {year} {fs_name}: {msg}")
-                            fetch_single_statement.error_count += 1
+                        ROWS_PARSED.inc(len(list_data), endpoint="fnlttSinglAcnt")
+                        return fs_div, list_data
+                    break
+            except QuotaExceededError:
+                raise
             except Exception as e:
-                if attempt == max_retries - 1:  # 마지막 시도에서만 로그
-                    if fetch_single_statement.error_count < fetch_single_statement.MAX_ERROR_LOGS:
-                        print(f"Request error for {corp_code} {year} {fs_name}: {e}")
-                        fetch_single_statement.error_count += 1
-                else:
-                    await asyncio.sleep(1)  # 재시도 전 대기
-    
-    return pd.DataFrame()
+                if concurrency:
+                    if isinstance(e, asyncio.TimeoutError):
+                        concurrency.record_overload()
+                    elif not (isinstance(e, aiohttp.ClientResponseError) and e.status == 429):
+                        concurrency.record_error()
+                if not REQUEST_RETRY.should_retry(e, attempt) or attempt == max_retries - 1:
+                    if fetch_single_records.error_count < fetch_single_records.MAX_ERROR_LOGS:
+                        print(f"Request error for {corp_code} {year} {fs_name} ({classify(e)}): {e}")
+                        fetch_single_records.error_count += 1
+                    # 빈 결과로 돌려주면 호출자가 '데이터 없음'으로 기록하므로 마지막 오류를 그대로 올린다.
+                    raise
+                await REQUEST_RETRY.backoff(attempt, retry_cause(e))  # 지수 백오프 + 지터
+                continue
 
-fetch_single_statement.error_count = 0
-fetch_single_statement.MAX_ERROR_LOGS = 5
+            # 키·파라미터 오류 등 영구 오류는 다시 요청해도 같은 답이므로 재시도하지 않는다.
+            msg = data.get("message", "")
+            if fetch_single_records.error_count < fetch_single_records.MAX_ERROR_LOGS:
+                print(f"API error {status} for {corp_code} {year} {fs_name}: {msg}")
+                fetch_single_records.error_count += 1
+            raise DartStatusError(status, msg)
 
-async def fetch_bulk_statements(
+    return None, []
+
+fetch_single_records.error_count = 0
+fetch_single_records.MAX_ERROR_LOGS = 5
+
+async def fetch_single_statement(
+    session: aiohttp.ClientSession,
+    rate_limiter: RateLimiter,
     api_key: str,
+    corp_code: str,
+    year: int,
+    **kwargs: Any,
+) -> pd.DataFrame:
+    """DataFrame wrapper around :func:`fetch_single_records` for one-off callers.
+
+    Bulk downloads should use :class:`RecordBatchBuilder` instead of one
+    DataFrame per request.
+    """
+    fs_div, records = await fetch_single_records(session, rate_limiter, api_key, corp_code, year, **kwargs)
+    if not records:
+        return pd.DataFrame()
+    df = pd.DataFrame(records)
+    # API 응답에 corp_code와 bsns_year가 없으면 추가
+    if 'corp_code' not in df.columns:
+        df['corp_code'] = corp_code
+    if 'bsns_year' not in df.columns:
+        df['bsns_year'] = year
+    df['fs_div'] = fs_div  # 재무제표 구분 추가
+    return df
+
+async def fetch_multi_statements(
+    session: aiohttp.ClientSession,
+    rate_limiter: RateLimiter,
+    api_key: str,
+    corp_codes: List[str],
+    year: int,
+    cache: Optional[ResponseCache] = None,
+    concurrency: Optional[AdaptiveConcurrency] = None,
+    stock_to_corp: Optional[Mapping[str, str]] = None,
+    key_pool: Optional[ApiKeyPool] = None,
+    profile: Optional[FsDivProfile] = None,
+) -> Optional[Dict[str, List[Dict[str, Any]]]]:
+    """Fetch key accounts for many companies with one fnlttMultiAcnt call.
+
+    Returns a mapping of corp_code to its raw records, choosing CFS over OFS
+    like :func:`fetch_single_records`. Companies without data are absent from
+    the mapping. Returns None if the request failed or the response could
+    not be split per company, in which case callers should fall back to
+    single-company requests. With ``profile`` the CFS/OFS presence of every
+    requested company is recorded.
+    """
+    params = {
+        "crtfc_key": api_key,
+        "corp_code": ",".join(corp_codes),
+        "bsns_year": year,
+        "reprt_code": "11011",
+    }
+    data = cache.get(DART_MULTI_ACCOUNT_URL, params) if cache else None
+    try:
+        if data is None:
+            data = await _get_json(
+                session, DART_MULTI_ACCOUNT_URL, params, rate_limiter, concurrency, key_pool
+            )
+            if cache:
+                cache.put(DART_MULTI_ACCOUNT_URL, params, data)
+    except QuotaExceededError:
+        raise
+    except Exception as e:
+        if concurrency:
+            if isinstance(e, asyncio.TimeoutError):
+                concurrency.record_overload()
+            else:
+                concurrency.record_error()
+        print(f"Multi-account request error for {len(corp_codes)} corps {year}: {e}")
+        return None
+
+    status = data.get("status")
+    if status == "013":  # 조회된 데이터 없음
+        if profile is not None:
+            for corp in corp_codes:
+                for fs_div in ("CFS", "OFS"):
+                    profile.record(corp, year, fs_div, False)
+        return {}
+    if status != "000":
+        print(f"Multi-account API error {status} for {len(corp_codes)} corps {year}: {data.get('message', '')}")
+        return None
+
+    rows = data.get("list") or []
+    if not rows:
+        return {}
+    ROWS_PARSED.inc(len(rows), endpoint="fnlttMultiAcnt")
+    # 기업별 분리는 응답 크기에 비례하는 CPU 작업이라 디코딩 스레드 풀에서 한다.
+    split = await offload(_split_multi_records, rows, corp_codes, stock_to_corp)
+    if split is None:
+        return None
+    result, filed, unmapped = split
+    if profile is not None and filed is not None:
+        # 응답에 없는 기업도 두 구분 모두 '데이터 없음'으로 기록한다. 기업을 알 수 없는 행이
+        # 있으면 그 행이 누구의 것인지 모르므로 '데이터 있음'만 기록한다.
+        for corp in corp_codes:
+            for fs_div in ("CFS", "OFS"):
+                present = (corp, fs_div) in filed
+                if present or not unmapped:
+                    profile.record(corp, year, fs_div, present)
+    return result
+
+def _split_multi_records(
+    rows: List[Dict[str, Any]],
+    corp_codes: Sequence[str],
+    stock_to_corp: Optional[Mapping[str, str]],
+) -> Optional[Tuple[Dict[str, List[Dict[str, Any]]], Optional[set], int]]:
+    """Group multi-company records by corp and pick CFS over OFS.
+
+    Returns ``(records_by_corp, filed, unmapped)`` where ``filed`` holds the
+    ``(corp_code, fs_div)`` pairs present in the response (None when the
+    response has no fs_div) and ``unmapped`` counts rows whose company
+    could not be determined, or None if rows cannot be mapped to corps.
+    """
+    has_corp_code = "corp_code" in rows[0]
+    if not has_corp_code and (not stock_to_corp or "stock_code" not in rows[0]):
+        return None
+    by_corp: Dict[str, Dict[Optional[str], List[Dict[str, Any]]]] = {}
+    unmapped = 0
+    for row in rows:
+        if has_corp_code:
+            corp = row.get("corp_code")
+        else:
+            corp = stock_to_corp.get(str(row.get("stock_code", "")).strip())
+            row["corp_code"] = corp
+        if corp is not None:
+            by_corp.setdefault(corp, {}).setdefault(row.get("fs_div"), []).append(row)
+        else:
+            unmapped += 1
+    filed = None
+    if "fs_div" in rows[0]:
+        filed = {(corp, fs_div) for corp, groups in by_corp.items() for fs_div in groups}
+    result: Dict[str, List[Dict[str, Any]]] = {}
+    for corp in dict.fromkeys(corp_codes):
+        groups = by_corp.get(corp)
+        if not groups:
+            continue
+        # 단일 조회와 동일하게 연결재무제표를 우선하고, 없으면 개별재무제표를 사용
+        chosen = groups.get("CFS") or groups.get("OFS") or groups.get(None)
+        if chosen:
+            result[corp] = chosen
+    return result, filed, unmapped
+
+async def fetch_bulk_statements(
+    api_key: Union[str, Sequence[str]],
     corp_codes: Iterable[str],
     years: Iterable[int],
     workers: int = 5,
     include_corp_names: bool = True,
     max_calls_per_minute: int = 600,
+    daily_limit: Optional[int] = DEFAULT_DAILY_LIMIT,
+    cache: Optional[ResponseCache] = None,
+    use_cache: bool = True,
+    max_workers: Optional[int] = None,
+    sink: Optional[Callable[[pd.DataFrame], None]] = None,
+    multi_company: bool = False,
+    multi_batch_size: int = MULTI_ACCOUNT_MAX_CORPS,
+    profile: Optional[FsDivProfile] = None,
+    session: Optional[aiohttp.ClientSession] = None,
 ) -> pd.DataFrame:
-    """Download statements for multiple companies in parallel."""
-    rate_limiter = RateLimiter(max_calls_per_minute, 60.0)
-    results: List[pd.DataFrame] = []
-    sem = asyncio.Semaphore(workers)
+    """Download statements for multiple companies in parallel.
+
+    Responses are served from ``cache`` when possible. If no cache is given
+    and ``use_cache`` is True, the default on-disk cache is used.
+
+    ``workers`` is only the starting number of in-flight requests; it is
+    adjusted with AIMD between 1 and ``max_workers`` (default ``4 * workers``).
+    Pass ``max_workers=workers`` to pin the concurrency.
+
+    Requests stream through a bounded queue into a fixed pool of workers.
+    Responses are decoded and their records appended to a
+    :class:`RecordBatchBuilder` in a thread pool, so no DataFrame is built
+    per request. If ``sink`` is given, every full Arrow record batch is
+    handed to ``sink.write_batch`` (e.g. :class:`ColumnarSink`), or to
+    ``sink`` itself as a DataFrame, and an empty DataFrame is returned;
+    otherwise the batches are concatenated into one DataFrame.
+
+    With ``multi_company=True`` corp codes are packed ``multi_batch_size`` at
+    a time into fnlttMultiAcnt requests; only companies whose batch request
+    fails are fetched again one by one.
+
+    A company-year that still fails after its retries does not stop the
+    run. Once every other request is done, :class:`FetchFailedError` is
+    raised with the failed ``(corp_code, year)`` keys, after the rows that
+    were fetched have been handed to ``sink``. Callers must therefore not
+    treat the run as complete; with the response cache a rerun only
+    requests the failed keys again.
+
+    ``api_key`` may also be a list of keys. Each key then gets its own
+    ``max_calls_per_minute`` bucket and ``daily_limit``; requests go to the
+    key with the most headroom, and keys that run out are retired while the
+    run continues on the others.
+
+    ``profile`` remembers which fs_div variants each company files so empty
+    variants are not requested again. Like the cache, a default on-disk
+    profile is used when none is given and ``use_cache`` is True.
+    """
+    api_keys = [api_key] if isinstance(api_key, str) else list(dict.fromkeys(api_key))
+    api_key = api_keys[0]
+    key_pool = (
+        ApiKeyPool(api_keys, max_calls_per_minute, 60.0, daily_limit=daily_limit)
+        if len(api_keys) > 1
+        else None
+    )
+    # 같은 API 키를 쓰는 모든 프로세스가 하나의 토큰 버킷을 공유한다.
+    rate_limiter = RateLimiter(
+        max_calls_per_minute,
+        60.0,
+        daily_limit=daily_limit,
+        state_path=shared_state_path(api_key),
+    )
+    batches: List[pa.RecordBatch] = []
+    builder = RecordBatchBuilder(batch_rows=RECORD_BATCH_ROWS)
+    concurrency = AdaptiveConcurrency(
+        initial=workers,
+        min_limit=1 if max_workers is None or max_workers > workers else workers,
+        max_limit=max_workers if max_workers is not None else max(workers * 4, 10),
+    )
     
     corp_list = list(corp_codes)
     year_list = list(years)
-    total_requests = len(corp_list) * len(year_list)
-    completed = 0
+    batch_size = max(1, min(multi_batch_size, MULTI_ACCOUNT_MAX_CORPS))
+    corp_batches = [corp_list[i:i + batch_size] for i in range(0, len(corp_list), batch_size)]
+    total_requests = len(year_list) * (len(corp_batches) if multi_company else len(corp_list))
     
-    # 기업명 매핑을 위한 기업코드 데이터 가져오기
-    corp_name_map = {}
-    if include_corp_names:
+    # 기업명 매핑은 프로세스 내에서 한 번만 읽어 두는 공유 인덱스를 사용한다.
+    corp_name_map: Dict[str, str] = {}
+    stock_to_corp: Dict[str, str] = {}
+    # 다중회사 응답에 corp_code가 없으면 종목코드로 기업을 찾으므로 기업명 없이도 인덱스를 읽는다.
+    if include_corp_names or multi_company:
         try:
-            corp_df = await fetch_corp_codes(api_key)
-            corp_name_map = dict(zip(corp_df['corp_code'], corp_df['corp_name']))
-            print(f"기업명 매핑: {len(corp_name_map)}개 기업")
+            await fetch_corp_codes(api_key)
+            index = get_corp_code_index()
+            stock_to_corp = index.stock_map()
+            if include_corp_names:
+                corp_name_map = index.name_map()
+                print(f"기업명 매핑: {len(corp_name_map)}개 기업")
         except Exception as e:
-            print(f"기업명 매핑 실패: {e}, 기업명 없이 진행")
+            print(f"기업 코드 인덱스 로드 실패: {e}, 기업명 없이 진행")
             include_corp_names = False
 
-    async with aiohttp.ClientSession() as session:
-        async def worker(corp: str, year: int) -> None:
-            nonlocal completed
-            async with sem:
-                df = await fetch_single_statement(session, rate_limiter, api_key, corp, year)
-                if not df.empty:
-                    # 기업명 추가
-                    if include_corp_names and corp in corp_name_map:
-                        df['corp_name'] = corp_name_map[corp]
-                    
-                    results.append(df)
-                
-                completed += 1
-                if completed % 50 == 0:  # 더 자주 진행률 표시
-                    print(f"Progress: {completed}/{total_requests} ({completed/total_requests*100:.1f}%)")
-
-        tasks = [worker(corp, year) for corp in corp_list for year in year_list]
-        await asyncio.gather(*tasks)
-
-    if results:
-        final_df = pd.concat(results, ignore_index=True)
-        
-        # 컬럼 순서 정리 (기업 정보를 앞쪽으로)
-        if include_corp_names and 'corp_name' in final_df.columns:
-            cols = final_df.columns.tolist()
-            # 기업 관련 컬럼들을 앞으로 이동
-            priority_cols = ['corp_code', 'corp_name', 'stock_code', 'bsns_year']
-            other_cols = [col for col in cols if col not in priority_cols]
-            reordered_cols = [col for col in priority_cols if col in cols] + other_cols
-            final_df = final_df[reordered_cols]
-        
-        return final_df
+    owns_cache = cache is None and use_cache
+    if owns_cache:
+        cache = ResponseCache()
+    owns_profile = profile is None and use_cache
+    if owns_profile:
+        profile = FsDivProfile()
+
+    def emit(batch: pa.RecordBatch) -> None:
+        if hasattr(sink, "write_batch"):
+            sink.write_batch(batch)
+        elif sink is not None:
+            sink(batch.to_pandas())
+        else:
+            batches.append(batch)
+
+    def write(full: List[pa.RecordBatch]) -> None:
+        for batch in full:
+            emit(batch)
+
+    failures: Dict[Tuple[str, int], BaseException] = {}
+    # 세션을 넘기지 않으면 프로세스가 공유하는 연결 풀을 쓴다.
+    session = session or get_session()
+    try:
+        def overrides(corp: str, fs_div: Optional[str] = None) -> Dict[str, str]:
+            values = {"fs_div": fs_div} if fs_div else {}
+            # 기업명 추가
+            if include_corp_names and corp in corp_name_map:
+                values["corp_name"] = corp_name_map[corp]
+            return values
+
+        async def fetch_one(corp: str, year: int) -> List[pa.RecordBatch]:
+            async with concurrency.slot():
+                try:
+                    fs_div, records = await fetch_single_records(
+                        session,
+                        rate_limiter,
+                        api_key,
+                        corp,
+                        year,
+                        cache=cache,
+                        concurrency=concurrency,
+                        key_pool=key_pool,
+                        profile=profile,
+                    )
+                except QuotaExceededError:
+                    raise
+                except Exception as e:
+                    # 실패한 키는 '데이터 없음'과 구분해 모아 두고, 나머지 키는 계속 받는다.
+                    failures[(corp, year)] = e
+                    return []
+            if not records:
+                return []
+            batch = await offload(
+                builder.append, records, overrides(corp, fs_div), {"corp_code": corp, "bsns_year": year}
+            )
+            return [batch] if batch is not None else []
+
+        async def handle(job: tuple) -> Optional[List[pa.RecordBatch]]:
+            corp, year = job
+            return await fetch_one(corp, year) or None
+
+        def append_found(found: Dict[str, List[Dict[str, Any]]], year: int) -> List[pa.RecordBatch]:
+            full = [
+                builder.append(records, overrides(corp), {"corp_code": corp, "bsns_year": year})
+                for corp, records in found.items()
+            ]
+            return [batch for batch in full if batch is not None]
+
+        async def handle_multi(job: tuple) -> Optional[List[pa.RecordBatch]]:
+            corps, year = job
+            async with concurrency.slot():
+                found = await fetch_multi_statements(
+                    session,
+                    rate_limiter,
+                    api_key,
+                    corps,
+                    year,
+                    cache=cache,
+                    concurrency=concurrency,
+                    stock_to_corp=stock_to_corp,
+                    key_pool=key_pool,
+                    profile=profile,
+                )
+            if found is None:
+                # 다중 조회가 실패한 경우에만 기업별 단일 조회로 대체
+                full = await asyncio.gather(*(fetch_one(corp, year) for corp in corps))
+                return [batch for group in full for batch in group] or None
+            return await offload(append_found, found, year) or None
+
+        def report(stats) -> None:
+            if stats.completed % 50 == 0:  # 더 자주 진행률 표시
+                print(f"Progress: {stats.completed}/{total_requests} ({stats.completed/total_requests*100:.1f}%)")
+
+        # 작업자 수는 AIMD 상한으로 고정하고, 실제 동시 요청 수는 controller가 제한한다.
+        pipeline = Pipeline(
+            handle_multi if multi_company else handle,
+            write,
+            workers=concurrency.max_limit,
+            on_progress=report,
+        )
+        if multi_company:
+            jobs = ((batch, year) for batch in corp_batches for year in year_list)
+        else:
+            jobs = ((corp, year) for corp in corp_list for year in year_list)
+        await pipeline.run(jobs)
+    finally:
+        # 한도 초과 등으로 중단돼도 이미 받은 행은 넘긴다.
+        rest = builder.flush()
+        if rest is not None:
+            emit(rest)
+        print(f"동시 요청 수(AIMD): {concurrency.report()}")
+        if key_pool is not None:
+            print(f"API 키 사용량: {key_pool.report()}")
+        if cache is not None:
+            print(f"응답 캐시: {cache.stats}")
+        if owns_cache:
+            cache.close()
+        if profile is not None:
+            print(f"재무제표 구분 예측: {profile.stats}")
+        if owns_profile:
+            profile.close()
+
+    if failures:
+        print(f"실패한 요청: {len(failures):,}개 (기업·연도)")
+        raise FetchFailedError(failures)
+    if batches:
+        final_df = pa.Table.from_batches(batches, schema=builder.schema).to_pandas()
+        # 응답에 없던 컬럼(모두 비어 있음)은 제외한다.
+        return final_df.dropna(axis=1, how="all")
     return pd.DataFrame()
 
 def save_to_excel(df: pd.DataFrame, path: Path) -> None:
+    """Write a DataFrame to Excel. Prefer :class:`ColumnarSink` for bulk runs."""
     path.parent.mkdir(parents=True, exist_ok=True)
     df.to_excel(path, index=False, engine="openpyxl")
     print(f"Saved {len(df):,} rows to {path}")
@@ -277,7 +726,12 @@ __all__ = [
     "fetch_corp_codes",
     "filter_kospi_kosdaq_non_financial",
     "fetch_bulk_statements",
+    "fetch_multi_statements",
+    "fetch_single_records",
     "save_to_excel",
+    "ColumnarSink",
+    "export_excel",
+    "read_statements",
 ]
 
 def main() -> None:
@@ -286,15 +740,17 @@ def main() -> None:
     parser.add_argument("--start-year", type=int, default=2022)
     parser.add_argument("--end-year", type=int, default=2023)
     parser.add_argument("--workers", type=int, default=5)
-    parser.add_argument("--output", type=Path, default=Path("dart_test.xlsx"))
+    parser.add_argument("--output-dir", type=Path, default=STATEMENTS_DIR, help="Parquet 데이터셋 저장 위치")
+    parser.add_argument("--excel", type=Path, help="수집 후 엑셀로도 내보낼 경로 (선택)")
+    parser.add_argument("--no-cache", action="store_true", help="응답 캐시를 사용하지 않음")
+    parser.add_argument("--multi", action="store_true", help="다중회사 주요계정 API로 묶어서 조회")
     args = parser.parse_args()
 
-    api_key = os.getenv("DART_API_KEY")
-    if not api_key:
-        raise EnvironmentError("Set the DART_API_KEY environment variable")
+    # DART_API_KEYS에 여러 키를 쉼표로 지정하면 한도를 합쳐서 사용한다.
+    api_keys = load_api_keys()
 
     print("\n📥 DART 기업 코드 목록 수집 중...")
-    corp_df = asyncio.run(fetch_corp_codes(api_key))
+    corp_df = run_with_session(fetch_corp_codes(api_keys[0]))
     print(f"\n📊 총 기업 수: {len(corp_df):,}개")
 
     target_df = filter_kospi_kosdaq_non_financial(corp_df)
@@ -317,13 +773,31 @@ def main() -> None:
     )
     print("기업 리스트:", names)
 
-    statements = asyncio.run(
-        fetch_bulk_statements(api_key, corp_codes, years, workers=args.workers)
-    )
+    sink = ColumnarSink(args.output_dir)
+    try:
+        run_with_session(
+            fetch_bulk_statements(
+                api_keys,
+                corp_codes,
+                years,
+                workers=args.workers,
+                use_cache=not args.no_cache,
+                multi_company=args.multi,
+                sink=sink,
+            )
+        )
+    except BaseException:
+        # 실패한 실행의 부분 파일은 지워, 다시 실행할 때 행이 중복되지 않게 한다.
+        sink.discard()
+        raise
+    sink.close()
+
+    REGISTRY.write_run_summary("dart_bulk_downloader")
 
-    if not statements.empty:
-        out_path = Path(__file__).resolve().parent.parent / "data" / args.output
-        save_to_excel(statements, out_path)
+    if sink.rows_written:
+        print(f"Saved {sink.rows_written:,} rows to {args.output_dir}")
+        if args.excel:
+            export_excel(args.output_dir, args.excel, filters={"bsns_year": list(years)})
         print("✅ Test completed successfully!")
     else:
         print("❌ No data retrieved in test")
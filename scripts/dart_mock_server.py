@@ -0,0 +1,471 @@
+"""로컬 DART API 모의 서버
+
+실제 OpenDART 서비스와 API 키 없이 수집 코드를 실행해 볼 수 있도록
+``corpCode.xml``(CORPCODE.zip), ``fnlttSinglAcnt.json``,
+``fnlttMultiAcnt.json``, ``fnlttSinglAcntAll.json``을 흉내 내는 aiohttp 서버입니다. 응답은 다음 순서로
+찾습니다.
+
+1. ``--fixtures`` 디렉터리에 저장된 응답
+   (``CORPCODE.xml`` 또는 ``corpCode.zip``,
+   ``fnlttSinglAcnt/<corp_code>_<bsns_year>_<reprt_code>_<fs_div>.json``)
+2. ``--from-cache``로 지정한 응답 캐시(``data/cache/dart_responses.sqlite``)에
+   실제로 기록된 응답
+3. 시드로 재현 가능한 합성 응답 (기업 수는 ``--corps``)
+
+지연 시간, HTTP 429, 사용한도 초과 메시지(020), 일일 한도, 깨진 ZIP을 설정한
+비율로 주입할 수 있습니다. 수집 스크립트는 ``DART_API_BASE`` 환경변수로
+이 서버를 가리키면 됩니다.
+
+    python dart_mock_server.py --port 8089 --latency 0.05 --rate-429 0.01
+    DART_API_BASE=http://127.0.0.1:8089/api python dart_bulk_downloader.py
+
+``GET /_mock/stats``는 요청·응답 통계를, ``POST /_mock/reset``은 통계 초기화를,
+``POST /_mock/config``는 JSON으로 장애 주입 설정 변경을 처리합니다.
+"""
+
+import argparse
+import asyncio
+import io
+import json
+import logging
+import random
+import sys
+import zipfile
+from collections import Counter
+from dataclasses import asdict, dataclass, field, fields
+from pathlib import Path
+from typing import Any, Dict, Iterable, List, Optional, Tuple
+from xml.sax.saxutils import escape
+
+from aiohttp import web
+
+SRC_PATH = Path(__file__).resolve().parent.parent / "src"
+if str(SRC_PATH) not in sys.path:
+    sys.path.append(str(SRC_PATH))
+
+from corp_code_index import iter_corp_codes
+from dart_cache import ResponseCache
+
+logging.basicConfig(level=logging.INFO, format='%(asctime)s - %(levelname)s - %(message)s')
+logger = logging.getLogger(__name__)
+
+StatementKey = Tuple[str, int, str, str]  # corp_code, bsns_year, reprt_code, fs_div
+
+NO_DATA = {"status": "013", "message": "조회된 데이타가 없습니다."}
+QUOTA_EXCEEDED = {"status": "020", "message": "요청 제한을 초과하였습니다."}
+INVALID_KEY = {"status": "010", "message": "등록되지 않은 키입니다."}
+
+# 합성 응답에 쓰는 주요계정 (재무제표 구분, 계정명)
+_SYNTHETIC_ACCOUNTS = [
+    ("BS", "유동자산"),
+    ("BS", "비유동자산"),
+    ("BS", "자산총계"),
+    ("BS", "유동부채"),
+    ("BS", "비유동부채"),
+    ("BS", "부채총계"),
+    ("BS", "이익잉여금"),
+    ("BS", "자본총계"),
+    ("IS", "매출액"),
+    ("IS", "영업이익"),
+    ("IS", "법인세차감전 순이익"),
+    ("IS", "당기순이익"),
+]
+_SJ_NAMES = {"BS": "재무상태표", "IS": "손익계산서"}
+_FS_NAMES = {"CFS": "연결재무제표", "OFS": "재무제표"}
+
+
+@dataclass
+class FaultConfig:
+    """Fault injection settings (probabilities are per request)."""
+
+    latency: float = 0.0
+    jitter: float = 0.0
+    rate_429: float = 0.0
+    rate_quota: float = 0.0
+    rate_bad_zip: float = 0.0
+    daily_limit: Optional[int] = None
+    seed: Optional[int] = None
+
+    def update(self, values: Dict[str, Any]) -> None:
+        known = {f.name for f in fields(self)}
+        for name, value in values.items():
+            if name not in known:
+                raise ValueError(f"알 수 없는 설정: {name}")
+            setattr(self, name, value)
+
+
+@dataclass
+class MockStats:
+    requests: int = 0
+    quota_counted: int = 0
+    useful: int = 0
+    rows: int = 0
+    bytes_sent: int = 0
+    endpoints: Counter = field(default_factory=Counter)
+    outcomes: Counter = field(default_factory=Counter)
+
+    def to_dict(self) -> Dict[str, Any]:
+        data = asdict(self)
+        data["endpoints"] = dict(self.endpoints)
+        data["outcomes"] = dict(self.outcomes)
+        return data
+
+
+class FixtureStore:
+    """Corp list and statement responses served by the mock.
+
+    Recorded responses take precedence; keys without one fall back to
+    deterministic synthetic data when ``synthetic_corps`` is set.
+    """
+
+    def __init__(self, synthetic_corps: int = 0, seed: int = 0, cfs_share: float = 0.6, missing_share: float = 0.05):
+        self.seed = seed
+        self.cfs_share = cfs_share
+        self.missing_share = missing_share
+        self.corps: Dict[str, Dict[str, Optional[str]]] = {}
+        self.statements: Dict[StatementKey, Dict[str, Any]] = {}
+        self.synthetic = synthetic_corps > 0
+        for i in range(synthetic_corps):
+            corp_code = f"{90000000 + i:08d}"
+            # 실제 목록처럼 일부는 비상장 기업으로 둔다.
+            stock_code = f"{900000 + i:06d}" if i % 5 else None
+            self.corps[corp_code] = {
+                "corp_code": corp_code,
+                "corp_name": f"모의기업{i:05d}",
+                "corp_eng_name": f"Mock Corp {i:05d}",
+                "stock_code": stock_code,
+                "modify_date": "20240101",
+            }
+
+    def load_dir(self, path: Path) -> None:
+        path = Path(path)
+        for name in ("corpCode.zip", "CORPCODE.zip"):
+            if (path / name).exists():
+                self.add_corps(iter_corp_codes(path / name))
+                break
+        else:
+            if (path / "CORPCODE.xml").exists():
+                buffer = io.BytesIO()
+                with zipfile.ZipFile(buffer, "w") as zf:
+                    zf.write(path / "CORPCODE.xml", "CORPCODE.xml")
+                self.add_corps(iter_corp_codes(buffer.getvalue()))
+        for file in sorted((path / "fnlttSinglAcnt").glob("*.json")):
+            corp_code, year, reprt_code, fs_div = file.stem.split("_")
+            data = json.loads(file.read_text(encoding="utf-8"))
+            self.statements[(corp_code, int(year), reprt_code, fs_div)] = data
+        logger.info(f"📂 픽스처 로드: 기업 {len(self.corps):,}개, 응답 {len(self.statements):,}건 ({path})")
+
+    def load_response_cache(self, path: Path) -> None:
+        with ResponseCache(path) as cache:
+            for _, params, data in cache.iter_responses("fnlttSinglAcnt.json"):
+                key = (
+                    params["corp_code"],
+                    int(params["bsns_year"]),
+                    params.get("reprt_code", "11011"),
+                    params.get("fs_div", ""),
+                )
+                self.statements[key] = data
+                self.corps.setdefault(params["corp_code"], {
+                    "corp_code": params["corp_code"],
+                    "corp_name": params["corp_code"],
+                    "stock_code": None,
+                    "modify_date": None,
+                })
+                for row in data.get("list") or []:
+                    if row.get("stock_code"):
+                        self.corps[params["corp_code"]]["stock_code"] = row["stock_code"].strip()
+                        break
+        logger.info(f"💾 응답 캐시 재생: 응답 {len(self.statements):,}건 ({path})")
+
+    def add_corps(self, records: Iterable[Dict[str, Optional[str]]]) -> None:
+        for record in records:
+            self.corps[record["corp_code"]] = record
+
+    def listed_corp_codes(self) -> List[str]:
+        return [code for code, record in self.corps.items() if record.get("stock_code")]
+
+    def corp_code_zip(self) -> bytes:
+        parts = ["<?xml version=\"1.0\" encoding=\"UTF-8\"?>\n<result>\n"]
+        for record in self.corps.values():
+            parts.append("<list>")
+            for column in ("corp_code", "corp_name", "corp_eng_name", "stock_code", "modify_date"):
+                parts.append(f"<{column}>{escape(record.get(column) or ' ')}</{column}>")
+            parts.append("</list>\n")
+        parts.append("</result>\n")
+        buffer = io.BytesIO()
+        with zipfile.ZipFile(buffer, "w", zipfile.ZIP_DEFLATED) as zf:
+            zf.writestr("CORPCODE.xml", "".join(parts).encode("utf-8"))
+        return buffer.getvalue()
+
+    def _rows(self, corp_code: str, year: int, reprt_code: str, fs_div: str) -> List[Dict[str, str]]:
+        recorded = self.statements.get((corp_code, year, reprt_code, fs_div))
+        if recorded is not None:
+            return recorded.get("list") or []
+        if not self.synthetic or corp_code not in self.corps:
+            return []
+        if random.Random(f"{self.seed}:{corp_code}:{year}").random() < self.missing_share:
+            return []
+        if fs_div == "CFS" and random.Random(f"{self.seed}:{corp_code}").random() >= self.cfs_share:
+            return []  # 연결재무제표를 제출하지 않는 기업
+        rng = random.Random(f"{self.seed}:{corp_code}:{year}:{fs_div}")
+        scale = 10 ** rng.randint(9, 12)
+        current = int(scale * rng.uniform(0.2, 0.8))
+        non_current = int(scale * rng.uniform(0.2, 0.8))
+        current_liab = int(current * rng.uniform(0.3, 1.2))
+        non_current_liab = int(non_current * rng.uniform(0.1, 0.6))
+        assets = current + non_current
+        liabilities = current_liab + non_current_liab
+        sales = int(assets * rng.uniform(0.3, 1.5))
+        operating = int(sales * rng.uniform(-0.15, 0.2))
+        pretax = int(operating * rng.uniform(0.6, 1.1))
+        amounts = {
+            "유동자산": current,
+            "비유동자산": non_current,
+            "자산총계": assets,
+            "유동부채": current_liab,
+            "비유동부채": non_current_liab,
+            "부채총계": liabilities,
+            "이익잉여금": int((assets - liabilities) * rng.uniform(-0.5, 0.8)),
+            "자본총계": assets - liabilities,
+            "매출액": sales,
+            "영업이익": operating,
+            "법인세차감전 순이익": pretax,
+            "당기순이익": int(pretax * 0.78),
+        }
+        stock_code = self.corps[corp_code].get("stock_code") or " "
+        rows = []
+        for order, (sj_div, account_nm) in enumerate(_SYNTHETIC_ACCOUNTS, start=1):
+            amount = amounts[account_nm]
+            rows.append({
+                "rcept_no": f"{year + 1}0330{int(corp_code) % 1_000_000:06d}",
+                "bsns_year": str(year),
+                "corp_code": corp_code,
+                "stock_code": stock_code,
+                "reprt_code": reprt_code,
+                "account_nm": account_nm,
+                "fs_div": fs_div,
+                "fs_nm": _FS_NAMES.get(fs_div, fs_div),
+                "sj_div": sj_div,
+                "sj_nm": _SJ_NAMES[sj_div],
+                "thstrm_nm": f"제 {year - 1990} 기",
+                "thstrm_dt": f"{year}.12.31 현재" if sj_div == "BS" else f"{year}.01.01 ~ {year}.12.31",
+                "thstrm_amount": f"{amount:,}",
+                "frmtrm_nm": f"제 {year - 1991} 기",
+                "frmtrm_amount": f"{int(amount * rng.uniform(0.8, 1.1)):,}",
+                "ord": str(order),
+                "currency": "KRW",
+            })
+        return rows
+
+    def single(self, corp_code: str, year: int, reprt_code: str, fs_div: Optional[str]) -> Dict[str, Any]:
+        recorded = self.statements.get((corp_code, year, reprt_code, fs_div or ""))
+        if recorded is not None:
+            return recorded
+        # fs_div가 없으면 실제 API처럼 연결·개별 행을 모두 돌려준다.
+        rows = []
+        for variant in [fs_div] if fs_div else ["CFS", "OFS"]:
+            rows.extend(self._rows(corp_code, year, reprt_code, variant))
+        return {"status": "000", "message": "정상", "list": rows} if rows else dict(NO_DATA)
+
+    def multi(self, corp_codes: List[str], year: int, reprt_code: str) -> Dict[str, Any]:
+        rows = []
+        for corp_code in corp_codes:
+            for fs_div in ("CFS", "OFS"):
+                rows.extend(self._rows(corp_code, year, reprt_code, fs_div))
+        return {"status": "000", "message": "정상", "list": rows} if rows else dict(NO_DATA)
+
+
+class MockDart:
+    """aiohttp handlers that serve a :class:`FixtureStore` with injected faults."""
+
+    def __init__(self, store: FixtureStore, faults: Optional[FaultConfig] = None) -> None:
+        self.store = store
+        self.faults = faults or FaultConfig()
+        self.stats = MockStats()
+        self._rng = random.Random(self.faults.seed)
+        self._corp_zip: Optional[bytes] = None
+
+    def app(self) -> web.Application:
+        app = web.Application()
+        app.router.add_get("/api/corpCode.xml", self.corp_code)
+        app.router.add_get("/api/fnlttSinglAcnt.json", self.single_account)
+        app.router.add_get("/api/fnlttMultiAcnt.json", self.multi_account)
+        app.router.add_get("/api/fnlttSinglAcntAll.json", self.full_account)
+        app.router.add_get("/_mock/stats", self.get_stats)
+        app.router.add_get("/_mock/corps", self.get_corps)
+        app.router.add_post("/_mock/reset", self.reset)
+        app.router.add_post("/_mock/config", self.configure)
+        return app
+
+    def reset_stats(self) -> None:
+        self.stats = MockStats()
+        self._rng = random.Random(self.faults.seed)
+
+    async def _inject(self, endpoint: str, request: web.Request) -> Optional[web.StreamResponse]:
+        """Apply latency and request-level faults; return a response to short-circuit."""
+        self.stats.requests += 1
+        self.stats.endpoints[endpoint] += 1
+        faults = self.faults
+        delay = faults.latency + self._rng.uniform(-faults.jitter, faults.jitter)
+        if delay > 0:
+            await asyncio.sleep(delay)
+        if self._rng.random() < faults.rate_429:
+            self.stats.outcomes["429"] += 1
+            return web.Response(status=429, text="Too Many Requests")
+        self.stats.quota_counted += 1
+        if not request.query.get("crtfc_key"):
+            return self._json(INVALID_KEY)
+        over_limit = faults.daily_limit is not None and self.stats.quota_counted > faults.daily_limit
+        if over_limit or self._rng.random() < faults.rate_quota:
+            return self._json(QUOTA_EXCEEDED)
+        return None
+
+    def _json(self, data: Dict[str, Any]) -> web.Response:
+        body = json.dumps(data, ensure_ascii=False).encode("utf-8")
+        status = data.get("status")
+        rows = len(data.get("list") or [])
+        self.stats.outcomes[status] += 1
+        if status == "000" and rows:
+            self.stats.useful += 1
+            self.stats.rows += rows
+        self.stats.bytes_sent += len(body)
+        return web.Response(body=body, content_type="application/json", charset="utf-8")
+
+    async def corp_code(self, request: web.Request) -> web.StreamResponse:
+        injected = await self._inject("corpCode", request)
+        if injected is not None:
+            return injected
+        if self._corp_zip is None:
+            self._corp_zip = self.store.corp_code_zip()
+        body = self._corp_zip
+        if self._rng.random() < self.faults.rate_bad_zip:
+            # 중앙 디렉터리가 잘린 ZIP (매직 넘버는 그대로라 내용 검증에서만 걸린다)
+            body = body[: max(10, len(body) // 2)]
+            self.stats.outcomes["bad_zip"] += 1
+        else:
+            self.stats.outcomes["zip"] += 1
+            self.stats.useful += 1
+        self.stats.bytes_sent += len(body)
+        return web.Response(body=body, content_type="application/x-msdownload")
+
+    async def single_account(self, request: web.Request) -> web.StreamResponse:
+        injected = await self._inject("fnlttSinglAcnt", request)
+        if injected is not None:
+            return injected
+        query = request.query
+        return self._json(self.store.single(
+            query.get("corp_code", ""),
+            int(query.get("bsns_year", 0)),
+            query.get("reprt_code", "11011"),
+            query.get("fs_div"),
+        ))
+
+    async def multi_account(self, request: web.Request) -> web.StreamResponse:
+        injected = await self._inject("fnlttMultiAcnt", request)
+        if injected is not None:
+            return injected
+        query = request.query
+        corp_codes = [c for c in query.get("corp_code", "").split(",") if c]
+        return self._json(self.store.multi(corp_codes, int(query.get("bsns_year", 0)), query.get("reprt_code", "11011")))
+
+    async def full_account(self, request: web.Request) -> web.StreamResponse:
+        injected = await self._inject("fnlttSinglAcntAll", request)
+        if injected is not None:
+            return injected
+        query = request.query
+        # 전체 재무제표는 fs_div가 필수이며, 합성 응답은 주요계정과 같은 계정을 쓴다.
+        if not query.get("fs_div"):
+            return self._json({"status": "100", "message": "필드의 부적절한 값입니다."})
+        return self._json(self.store.single(
+            query.get("corp_code", ""),
+            int(query.get("bsns_year", 0)),
+            query.get("reprt_code", "11011"),
+            query["fs_div"],
+        ))
+
+    async def get_stats(self, request: web.Request) -> web.Response:
+        return web.json_response(self.stats.to_dict())
+
+    async def get_corps(self, request: web.Request) -> web.Response:
+        limit = int(request.query.get("limit", 0)) or None
+        return web.json_response(self.store.listed_corp_codes()[:limit])
+
+    async def reset(self, request: web.Request) -> web.Response:
+        self.reset_stats()
+        return web.json_response({"ok": True})
+
+    async def configure(self, request: web.Request) -> web.Response:
+        try:
+            self.faults.update(await request.json())
+        except ValueError as e:
+            return web.json_response({"ok": False, "error": str(e)}, status=400)
+        self.reset_stats()
+        return web.json_response(asdict(self.faults))
+
+
+async def start_mock_server(mock: MockDart, host: str = "127.0.0.1", port: int = 0) -> Tuple[web.AppRunner, str]:
+    """Start ``mock`` in the running loop; return the runner and its API base URL."""
+    runner = web.AppRunner(mock.app(), access_log=None)
+    await runner.setup()
+    site = web.TCPSite(runner, host, port)
+    await site.start()
+    bound_port = runner.addresses[0][1]
+    return runner, f"http://{host}:{bound_port}/api"
+
+
+def build_store(args: argparse.Namespace) -> FixtureStore:
+    store = FixtureStore(synthetic_corps=args.corps, seed=args.seed or 0)
+    if args.from_cache:
+        store.load_response_cache(args.from_cache)
+    if args.fixtures:
+        store.load_dir(args.fixtures)
+    return store
+
+
+def add_server_arguments(parser: argparse.ArgumentParser) -> None:
+    parser.add_argument("--fixtures", type=Path, help="기록된 응답 디렉터리")
+    parser.add_argument("--from-cache", type=Path, help="응답 캐시 SQLite 파일에 기록된 응답을 재생")
+    parser.add_argument("--corps", type=int, default=500, help="합성 기업 수 (0이면 기록된 응답만 사용)")
+    parser.add_argument("--latency", type=float, default=0.0, help="응답 지연(초)")
+    parser.add_argument("--jitter", type=float, default=0.0, help="응답 지연 편차(초, ±)")
+    parser.add_argument("--rate-429", type=float, default=0.0, help="HTTP 429 비율")
+    parser.add_argument("--rate-quota", type=float, default=0.0, help="사용한도 초과(020) 응답 비율")
+    parser.add_argument("--rate-bad-zip", type=float, default=0.0, help="깨진 CORPCODE.zip 비율")
+    parser.add_argument("--daily-limit", type=int, help="이 횟수 이후 모든 요청에 020 응답")
+    parser.add_argument("--seed", type=int, help="장애 주입·합성 데이터 시드")
+
+
+def faults_from_args(args: argparse.Namespace) -> FaultConfig:
+    return FaultConfig(
+        latency=args.latency,
+        jitter=args.jitter,
+        rate_429=args.rate_429,
+        rate_quota=args.rate_quota,
+        rate_bad_zip=args.rate_bad_zip,
+        daily_limit=args.daily_limit,
+        seed=args.seed,
+    )
+
+
+async def main():
+    parser = argparse.ArgumentParser(description="로컬 DART API 모의 서버")
+    parser.add_argument("--host", default="127.0.0.1")
+    parser.add_argument("--port", type=int, default=8089)
+    add_server_arguments(parser)
+    args = parser.parse_args()
+
+    mock = MockDart(build_store(args), faults_from_args(args))
+    runner, base_url = await start_mock_server(mock, args.host, args.port)
+    logger.info(f"🧪 DART 모의 서버 실행 중: DART_API_BASE={base_url}")
+    logger.info(f"⚙️ 장애 주입 설정: {asdict(mock.faults)}")
+    try:
+        await asyncio.Event().wait()
+    finally:
+        await runner.cleanup()
+
+
+if __name__ == "__main__":
+    try:
+        asyncio.run(main())
+    except KeyboardInterrupt:
+        pass
@@ -1,19 +1,21 @@
 #!/bin/bash
 
-# 담당자별 팀 다운로드 스크립트
+# 공유 작업 큐 기반 분산 다운로드 스크립트
+# 담당자마다 팀 번호를 나눌 필요 없이, 각자 이 스크립트를 실행하면
+# 남은 작업 단위를 알아서 나눠 가져갑니다.
 
-echo "🚀 DART 전체 데이터 다운로드 - 4명 분산 처리"
+echo "🚀 DART 전체 데이터 다운로드 - 작업 큐 분산 처리"
 echo "====================================================="
 
-# 담당자 1: 팀 1-7
-echo "👤 담당자 1: 팀 1-7 처리 중..."
-for team in {1..7}; do
-    echo "📊 팀 $team 다운로드..."
-    python cached_team_downloader.py --team $team --skip-validation
-    if [ $? -ne 0 ]; then
-        echo "❌ 팀 $team 실패, 재시도..."
-        python cached_team_downloader.py --team $team --skip-validation
-    fi
+# 작업 단위 등록 (이미 등록된 단위는 건너뜀)
+python queue_worker.py --init
+
+# 작업자 실행 (WORKERS 개수만큼 동시에 실행)
+WORKERS=${WORKERS:-2}
+for i in $(seq 1 $WORKERS); do
+    python queue_worker.py &
 done
+wait
 
-echo "✅ 담당자 1 완료!"
+python queue_worker.py --progress
+echo "✅ 처리 완료!"
@@ -1,12 +1,12 @@
 import os
 import sys
 import asyncio
-import aiohttp
 import pandas as pd
 from pathlib import Path
-from tqdm.asyncio import tqdm
+from tqdm import tqdm
 import argparse
-import pickle
+import shutil
+from datetime import datetime
 
 SRC_PATH = Path(__file__).resolve().parent.parent / "src"
 sys.path.append(str(SRC_PATH))
@@ -14,167 +14,324 @@ sys.path.append(str(SRC_PATH))
 from dart_bulk_downloader import (
     fetch_corp_codes,
     filter_kospi_kosdaq_non_financial,
-    fetch_single_statement,
+    fetch_single_records,
     RateLimiter,
 )
+from backfill_planner import load_delisted_corp_codes, plan_backfill, wait_for_quota_reset
+from checkpoint_store import DONE, EMPTY, FAILED, PENDING, CheckpointStore
+from corp_code_index import get_corp_code_index
+from dart_cache import ResponseCache
+from dart_metrics import REGISTRY
+from dart_pipeline import Pipeline
+from dart_financial_splitter import SPLIT_DIR, csv_name, split_statements
+from dart_sink import ColumnarSink
+from delta_sync import commit_watermark, plan_delta_sync
+from fs_div_profile import FsDivProfile
+from http_client import get_session, run_with_session
+from key_pool import ApiKeyPool, load_api_keys
+from rate_limiter import DEFAULT_DAILY_LIMIT, QuotaExceededError, shared_state_path
+from record_batches import RecordBatchBuilder, offload
+from retry_policy import DartStatusError
 
+# 이전 버전의 CSV 진행 파일 (있으면 한 번만 데이터셋으로 옮긴다)
 PROGRESS_PATH = Path(__file__).resolve().parent.parent / "data" / "raw" / "financial_statements_progress.csv"
-CACHE_FILE = Path(__file__).resolve().parent.parent / "data" / "corp_codes_cache.pkl"
-BATCH_SIZE = 100
+RAW_DIR = Path(__file__).resolve().parent.parent / "data" / "raw"
+DATASET_DIR = Path(__file__).resolve().parent.parent / "data" / "raw" / "financial_statements"
+CHECKPOINT_PATH = Path(__file__).resolve().parent.parent / "data" / "raw" / "financial_statements_checkpoint.sqlite"
+WORKERS = 10
+REPRT_CODE = "11011"
+# 이 개수만큼 결과가 쌓이면 데이터셋을 flush한 뒤 체크포인트에 완료로 기록한다.
+COMMIT_EVERY = 200
+# 백필 계획과 같이 키 하나를 요청 한 번으로 본다.
+REQUESTS_PER_KEY = 1
+# 키 미등록·사용 중지·IP 차단·계정 만료: 다른 키를 받아도 같은 답이므로 수집을 멈춘다.
+FATAL_STATUSES = frozenset({"010", "011", "012", "901"})
 
-async def get_corp_codes_with_cache(api_key: str, force_refresh: bool = False) -> pd.DataFrame:
-    CACHE_FILE.parent.mkdir(parents=True, exist_ok=True)
-    if CACHE_FILE.exists() and not force_refresh:
-        try:
-            print("💾 캐시된 기업 코드 로드 중...")
-            with open(CACHE_FILE, "rb") as f:
-                corp_df = pickle.load(f)
-            print(f"✅ 캐시에서 {len(corp_df)}개 기업 로드")
-            return corp_df
-        except Exception as e:
-            print(f"⚠️ 캐시 로드 실패: {e}, API에서 다시 다운로드합니다")
+def migrate_progress_csv(store: CheckpointStore, sink: ColumnarSink) -> None:
+    """Move rows and keys from the legacy progress CSV into the new stores."""
+    if not PROGRESS_PATH.exists():
+        return
+    print(f"📦 기존 진행 파일을 데이터셋으로 옮기는 중: {PROGRESS_PATH}")
+    keys = set()
+    for chunk in pd.read_csv(PROGRESS_PATH, dtype=str, chunksize=100_000):
+        sink.write(chunk)
+        keys.update(zip(chunk["corp_code"], chunk["bsns_year"], chunk["fs_div"]))
+    sink.flush()
+    for corp_code, year, fs_div in keys:
+        store.mark((corp_code, int(year), REPRT_CODE, fs_div), DONE)
+    store.flush()
+    PROGRESS_PATH.rename(PROGRESS_PATH.with_suffix(".csv.migrated"))
+    print(f"✅ {len(keys):,}개 작업을 체크포인트로 옮겼습니다")
 
-    corp_df = await fetch_corp_codes(api_key)
-    try:
-        with open(CACHE_FILE, "wb") as f:
-            pickle.dump(corp_df, f)
-        print(f"💾 기업 코드 목록을 캐시에 저장: {CACHE_FILE}")
-    except Exception as e:
-        print(f"⚠️ 캐시 저장 실패: {e}")
-    return corp_df
-
-def save_csv(df: pd.DataFrame, filename: str) -> None:
-    out_dir = Path(__file__).resolve().parent.parent / "data" / "raw"
-    out_dir.mkdir(parents=True, exist_ok=True)
-    path = out_dir / filename
-    df.to_csv(path, index=False, encoding="utf-8-sig")
-    print(f"📁 Saved {len(df):,} rows -> {path}")
-
-async def main(reset: bool = False, use_cache: bool = True):
-    api_key = os.getenv("DART_API_KEY")
-    if not api_key:
-        raise EnvironmentError("DART_API_KEY 환경변수가 설정되지 않았습니다.")
-
-    if reset and PROGRESS_PATH.exists():
-        PROGRESS_PATH.unlink()
-        print("🗑️ 기존 진행 파일을 삭제했습니다. 새로 수집을 시작합니다.")
+async def main(
+    reset: bool = False,
+    use_cache: bool = True,
+    use_response_cache: bool = True,
+    sync: bool = False,
+    since: str = None,
+    wait_for_reset: bool = True,
+    metrics_port: int = None,
+    write_csv: bool = True,
+):
+    # DART_API_KEYS에 여러 키를 지정하면 키별 한도를 합쳐서 사용한다.
+    api_keys = load_api_keys()
+    api_key = api_keys[0]
+    metrics_runner = await REGISTRY.serve(port=metrics_port) if metrics_port else None
+
+    store = CheckpointStore(CHECKPOINT_PATH)
+    if reset:
+        store.reset()
+        shutil.rmtree(DATASET_DIR, ignore_errors=True)
+        print("🗑️ 기존 체크포인트와 데이터셋을 삭제했습니다. 새로 수집을 시작합니다.")
 
     print("📥 기업 코드 수집 중...")
-    corp_df = await get_corp_codes_with_cache(api_key, force_refresh=not use_cache)
+    corp_df = await fetch_corp_codes(api_key, force_refresh=not use_cache)
     target_df = filter_kospi_kosdaq_non_financial(corp_df)
     corp_codes = target_df["corp_code"].unique().tolist()
     corp_name_map = dict(zip(target_df["corp_code"], target_df["corp_name"]))
     print(f"✅ 비금융 상장기업 수: {len(corp_codes)}")
 
+    # 상장폐지 기업은 현재 상장사 필터에 걸리지 않아도 최우선으로 수집한다.
+    delisted = load_delisted_corp_codes()
+    index_names = get_corp_code_index().name_map()
+    for corp_code in sorted(delisted - set(corp_codes)):
+        corp_codes.append(corp_code)
+        corp_name_map[corp_code] = index_names.get(corp_code, "")
+    print(f"✅ 상장폐지 기업: {len(delisted)}개")
+
     years = list(range(2015, 2024))
-    collected = []
-    collected_keys = set()
-
-    if PROGRESS_PATH.exists():
-        collected_df = pd.read_csv(PROGRESS_PATH, dtype=str)
-        collected_keys = set(zip(collected_df["corp_code"], collected_df["bsns_year"], collected_df["fs_div"]))
-        collected = [collected_df]
-        print(f"📋 기존 수집된 데이터: {len(collected_keys):,}개 작업 완료")
-    else:
-        print("📋 새로운 수집 시작")
-
-    sem = asyncio.Semaphore(10)
-    rate_limiter = RateLimiter(max_calls=500, period=60)
+    sink = ColumnarSink(DATASET_DIR)
+    # 응답 행은 요청마다 DataFrame을 만들지 않고 컬럼 버퍼에 모아 Arrow 배치로 기록한다.
+    builder = RecordBatchBuilder()
+    migrate_progress_csv(store, sink)
+
+    # 새 기업/연도만 pending으로 등록되고, 이미 아는 키는 그대로 둔다.
+    store.seed(
+        (corp_code, year, REPRT_CODE, fs_div)
+        for corp_code in corp_codes
+        for year in years
+        for fs_div in ["CFS", "OFS"]
+    )
+    rate_limiter = RateLimiter(
+        max_calls=500,
+        period=60,
+        daily_limit=DEFAULT_DAILY_LIMIT,
+        state_path=shared_state_path(api_key),
+    )
+    key_pool = ApiKeyPool(api_keys, 500, 60, daily_limit=DEFAULT_DAILY_LIMIT) if len(api_keys) > 1 else None
+    budget_source = key_pool or rate_limiter
     stop_event = asyncio.Event()
+    fatal_error = None
+    response_cache = ResponseCache() if use_response_cache else None
+    # 기업별로 어떤 재무제표 구분이 제출되는지 기억해 빈 응답 요청을 줄인다.
+    profile = FsDivProfile() if use_response_cache else None
+    uncommitted = []
 
-    pending_tasks = []
-    total_tasks = len(corp_codes) * len(years) * 2
+    plan = None
+    if sync:
+        # 마지막 동기화 이후 제출·정정된 사업보고서만 다시 받는다.
+        print("🔄 공시 목록으로 변경된 보고서 확인 중...")
+        plan = await plan_delta_sync(
+            get_session(),
+            api_key,
+            store,
+            cache=response_cache,
+            rate_limiter=rate_limiter,
+            since=datetime.strptime(since, "%Y%m%d").date() if since else None,
+            reprt_codes=(REPRT_CODE,),
+            profile=profile,
+        )
+        print(f"🔄 {plan}")
 
-    for corp_code in corp_codes:
-        for year in years:
-            for fs_div in ["CFS", "OFS"]:
-                key = (corp_code, str(year), fs_div)
-                if key not in collected_keys:
-                    pending_tasks.append((corp_code, year, fs_div))
+    counts = store.counts()
+    total_tasks = sum(counts.values())
+    pending_count = counts.get("pending", 0) + counts.get(FAILED, 0)
+    completed_tasks = total_tasks - pending_count
+    print(f"📊 전체 작업: {total_tasks:,}개 / 완료: {completed_tasks:,}개 / 남은 작업: {pending_count:,}개")
 
-    completed_tasks = total_tasks - len(pending_tasks)
-    print(f"📊 전체 작업: {total_tasks:,}개 / 완료: {completed_tasks:,}개 / 남은 작업: {len(pending_tasks):,}개")
-    if not pending_tasks:
-        print("✅ 모든 작업이 이미 완료되었습니다.")
-    else:
-        print("🚀 병렬 수집 시작...")
+    async def handle(session, key):
+        nonlocal fatal_error
+        corp_code, year, _, fs_div = key
+        try:
+            _, records = await fetch_single_records(
+                session,
+                rate_limiter,
+                api_key,
+                corp_code,
+                year,
+                cache=response_cache,
+                fs_divs=(fs_div,),
+                key_pool=key_pool,
+                profile=profile,
+            )
+        except QuotaExceededError:
+            # 한도 초과 시 키는 pending으로 남겨 두고 다음 날 이어서 받는다.
+            stop_event.set()
+            return None
+        except Exception as e:
+            # 재시도가 끝난 오류나 013 외의 응답은 '데이터 없음'이 아니므로 실패로 남겨 다시 받는다.
+            store.mark(key, FAILED)
+            if isinstance(e, DartStatusError) and e.status in FATAL_STATUSES:
+                print(f"❌ 치명적 에러 발생: {e}")
+                fatal_error = e
+                stop_event.set()
+            return None
 
-    async def worker(session, corp_code, year, fs_div):
         if stop_event.is_set():
-            return
-        async with sem:
-            try:
-                print(f"🔍 요청: {corp_code}, {year}, {fs_div}")
-                df = await fetch_single_statement(session, rate_limiter, api_key, corp_code, year)
-                print(f"📊 결과: {corp_code} {year} {fs_div} → df.empty={df.empty}, columns={list(df.columns)}")
-            except RuntimeError as e:
-                error_msg = str(e)
-                if "조회된 데이타가 없습니다" in error_msg:
-                    return
-                else:
-                    print(f"❌ 치명적 에러 발생: {e}")
-                    stop_event.set()
-                    return
-
-        if stop_event.is_set() or df.empty:
-            return
-
-        print(f"✅ 데이터 수집됨: {corp_code} {year} {fs_div}, 행 수: {len(df)}")
-        df["corp_name"] = corp_name_map.get(corp_code, "")
-        df["corp_code"] = corp_code
-        df["bsns_year"] = year
-        df["fs_div"] = fs_div
-        collected.append(df)
-
-        header = not PROGRESS_PATH.exists()
-        df.to_csv(PROGRESS_PATH, mode="a", header=header, index=False, encoding="utf-8-sig")
-        collected_keys.add((corp_code, str(year), fs_div))
-
-    if pending_tasks:
-        async with aiohttp.ClientSession() as session:
-            for start in range(0, len(pending_tasks), BATCH_SIZE):
-                if stop_event.is_set():
+            return None
+        if not records:
+            store.mark(key, EMPTY)
+            return None
+
+        batch = await offload(
+            builder.append,
+            records,
+            {"corp_name": corp_name_map.get(corp_code, ""), "corp_code": corp_code, "bsns_year": year, "fs_div": fs_div},
+        )
+        return key, len(records), batch
+
+    def commit():
+        # 데이터가 디스크에 기록된 뒤에만 완료로 표시해 중단 시 유실을 막는다.
+        rest = builder.flush()
+        if rest is not None:
+            sink.write_batch(rest)
+        sink.flush()
+        for key, rows in uncommitted:
+            store.mark(key, DONE, rows)
+        uncommitted.clear()
+
+    def write(result):
+        key, rows, batch = result
+        if batch is not None:
+            sink.write_batch(batch)
+        uncommitted.append((key, rows))
+        if len(uncommitted) >= COMMIT_EVERY:
+            commit()
+
+    def unfinished():
+        counts = store.counts()
+        return counts.get(PENDING, 0) + counts.get(FAILED, 0)
+
+    try:
+        while True:
+            before = unfinished()
+            # 남은 비용을 추정하고 오늘 한도 안에서 우선순위가 높은 키부터 배정한다.
+            schedule = plan_backfill(
+                store,
+                budget_source.remaining_today(),
+                DEFAULT_DAILY_LIMIT * len(api_keys),
+                years=years,
+                delisted=delisted,
+                profile=profile,
+            )
+            if not schedule.pending:
+                print("✅ 모든 작업이 완료되었습니다.")
+                break
+            print(f"🗓️ {schedule}")
+
+            quota_hit = False
+            if schedule.scheduled:
+                print("🚀 병렬 수집 시작...")
+                stop_event.clear()
+                progress = tqdm(total=len(schedule.scheduled), desc="오늘 배정된 작업")
+                session = get_session()
+                pipeline = Pipeline(
+                    lambda key: handle(session, key),
+                    write,
+                    workers=WORKERS,
+                    on_progress=lambda stats: progress.update(1),
+                    stop_event=stop_event,
+                )
+                await pipeline.run(schedule.scheduled)
+                progress.close()
+                commit()
+                if fatal_error is not None:
                     print("📉 중단 조건 발생. 수집 종료.")
                     break
+                quota_hit = stop_event.is_set()
 
-                batch = pending_tasks[start:start + BATCH_SIZE]
-                tasks = [asyncio.create_task(worker(session, corp_code, year, fs_div)) for corp_code, year, fs_div in batch]
-                progress_desc = f"진행률 ({completed_tasks:,}/{total_tasks:,} 완료)"
-
-                for f in tqdm(asyncio.as_completed(tasks), total=len(tasks), desc=progress_desc):
-                    try:
-                        await f
-                    except asyncio.CancelledError:
-                        pass
-                    if stop_event.is_set():
-                        for t in tasks:
-                            t.cancel()
-                        await asyncio.gather(*tasks, return_exceptions=True)
-                        break
-
-                if stop_event.is_set():
-                    break
-                completed_tasks += len(batch)
+            left = unfinished()
+            if not left:
+                continue  # 다음 계획에서 완료를 확인한다
+            budget = budget_source.remaining_today()
+            if not quota_hit and left < before and (budget is None or budget >= REQUESTS_PER_KEY):
+                # 한도가 남아 있으면 자정까지 기다리지 않고 실패한 키까지 바로 다시 계획한다.
+                # 진척이 없는 라운드 뒤에는 같은 실패를 반복하지 않도록 다음 날로 넘긴다.
+                continue
+            if not wait_for_reset:
+                exhausted = quota_hit or (budget is not None and budget < REQUESTS_PER_KEY)
+                reason = "오늘 한도를 모두 사용했습니다" if exhausted else "실패한 작업이 남았습니다"
+                print(f"📉 {reason}. 남은 작업은 다음 실행에서 이어서 받습니다.")
+                break
+            await wait_for_quota_reset()
+            if key_pool is not None:
+                key_pool.revive()
+        if plan is not None and fatal_error is None and not store.counts().get(PENDING, 0):
+            commit_watermark(store, plan)
+    finally:
+        commit()
+        sink.close()
+        store.close()
+        if response_cache is not None:
+            print(f"💾 응답 캐시: {response_cache.stats}")
+            response_cache.close()
+        if profile is not None:
+            print(f"🔮 재무제표 구분 예측: {profile.stats}")
+            profile.close()
+        REGISTRY.write_run_summary("fetch_financial_statements")
+        if metrics_runner is not None:
+            await metrics_runner.cleanup()
 
-    if not collected:
+    if not DATASET_DIR.exists():
         print("❌ 수집된 데이터가 없습니다.")
         return
 
-    final_df = pd.concat(collected, ignore_index=True)
-    cfs_bs = final_df[(final_df["fs_div"] == "CFS") & (final_df["sj_div"] == "BS")]
-    cfs_is = final_df[(final_df["fs_div"] == "CFS") & (final_df["sj_div"] == "IS")]
-    ofs_bs = final_df[(final_df["fs_div"] == "OFS") & (final_df["sj_div"] == "BS")]
-    ofs_is = final_df[(final_df["fs_div"] == "OFS") & (final_df["sj_div"] == "IS")]
-
-    save_csv(cfs_bs, "연결재무제표_재무상태표.csv")
-    save_csv(cfs_is, "연결재무제표_손익계산서.csv")
-    save_csv(ofs_bs, "재무제표_재무상태표.csv")
-    save_csv(ofs_is, "재무제표_손익계산서.csv")
+    # 정정 공시로 다시 받은 보고서는 최신 접수번호의 행만 남기고, 연도 파티션별로 한 번의
+    # group-by로 연결/개별 × 모든 재무제표 종류(BS·IS·CIS·CF·SCE)를 나눠 병렬로 기록한다.
+    print("✂️ 재무제표 종류별 분할 중...")
+    counts = split_statements(
+        DATASET_DIR,
+        SPLIT_DIR,
+        formats=("parquet", "csv") if write_csv else ("parquet",),
+        csv_dir=RAW_DIR,
+    )
+    for (fs_div, sj_div), rows in sorted(counts.items()):
+        print(f"📁 {csv_name(fs_div, sj_div)}: {rows:,} rows")
+    print(f"📁 Parquet 분할 결과 -> {SPLIT_DIR}")
     print("✅ 전체 수집 및 저장 완료.")
 
 if __name__ == "__main__":
     parser = argparse.ArgumentParser(description="Download financial statements from DART")
-    parser.add_argument("--reset", action="store_true", help="Ignore progress and download from scratch")
+    parser.add_argument("--reset", action="store_true", help="Delete the checkpoint and dataset and download from scratch")
     parser.add_argument("--no-cache", action="store_true", help="Do not use cached corp codes")
+    parser.add_argument("--no-response-cache", action="store_true", help="Do not use the on-disk API response cache")
+    parser.add_argument(
+        "--sync",
+        action="store_true",
+        help="Re-fetch only reports filed or amended since the last sync (DART disclosure list)",
+    )
+    parser.add_argument("--since", help="Start date for --sync (YYYYMMDD); defaults to the stored watermark")
+    parser.add_argument(
+        "--no-wait",
+        action="store_true",
+        help="Exit when today's quota is used up instead of resuming after the KST midnight reset",
+    )
+    parser.add_argument("--metrics-port", type=int, help="Serve Prometheus metrics on http://127.0.0.1:PORT/metrics")
+    parser.add_argument(
+        "--no-csv",
+        action="store_true",
+        help="Only write the Parquet split, not the per-statement CSV files in data/raw",
+    )
     args = parser.parse_args()
-    asyncio.run(main(reset=args.reset, use_cache=not args.no_cache))
+    run_with_session(
+        main(
+            reset=args.reset,
+            use_cache=not args.no_cache,
+            use_response_cache=not args.no_response_cache,
+            sync=args.sync,
+            since=args.since,
+            wait_for_reset=not args.no_wait,
+            metrics_port=args.metrics_port,
+            write_csv=not args.no_csv,
+        )
+    )
@@ -0,0 +1,203 @@
+"""전체 재무제표(fnlttSinglAcntAll) 수집
+
+주요계정 API와 달리 모든 계정(재무상태표, 손익계산서, 포괄손익계산서,
+현금흐름표, 자본변동표)을 받아 기업·연도·계정별 한 행짜리 long 테이블로
+저장합니다. 응답이 주요계정보다 수십 배 크기 때문에 JSON을 스트리밍으로
+읽으면서 곧바로 컬럼 배치에 쌓고, 연도별 Parquet 파티션에 기록합니다.
+
+    python fetch_full_statements.py                   # 2015~2023 수집
+    python fetch_full_statements.py --years 2022 2023 # 일부 연도만
+    python fetch_full_statements.py --compact-only    # 중복 제거·정렬만 다시 실행
+"""
+
+import argparse
+import asyncio
+import shutil
+import sys
+from pathlib import Path
+
+import aiohttp
+from tqdm import tqdm
+
+SRC_PATH = Path(__file__).resolve().parent.parent / "src"
+sys.path.append(str(SRC_PATH))
+
+from dart_bulk_downloader import fetch_corp_codes, filter_kospi_kosdaq_non_financial
+from checkpoint_store import DONE, EMPTY, FAILED, PENDING, CheckpointStore
+from dart_metrics import REGISTRY
+from dart_pipeline import Pipeline
+from fs_div_profile import FsDivProfile
+from http_client import get_session, run_with_session
+from full_statements import FULL_STATEMENTS_DIR, LongTableWriter, compact, stream_full_statement
+from key_pool import ApiKeyPool, load_api_keys
+from rate_limiter import DEFAULT_DAILY_LIMIT, QuotaExceededError, RateLimiter, shared_state_path
+from retry_policy import DartStatusError
+
+CHECKPOINT_PATH = Path(__file__).resolve().parent.parent / "data" / "raw" / "full_statements_checkpoint.sqlite"
+WORKERS = 6
+REPRT_CODE = "11011"
+# 이 개수만큼 요청이 쌓이면 Parquet에 기록한 뒤 체크포인트에 완료로 표시한다.
+COMMIT_EVERY = 100
+
+
+async def main(
+    years,
+    reset: bool = False,
+    use_cache: bool = True,
+    use_profile: bool = True,
+    workers: int = WORKERS,
+    sample: int = None,
+    metrics_port: int = None,
+):
+    api_keys = load_api_keys()
+    api_key = api_keys[0]
+    metrics_runner = await REGISTRY.serve(port=metrics_port) if metrics_port else None
+
+    store = CheckpointStore(CHECKPOINT_PATH)
+    if reset:
+        store.reset()
+        shutil.rmtree(FULL_STATEMENTS_DIR, ignore_errors=True)
+        print("🗑️ 기존 체크포인트와 전체 재무제표 데이터를 삭제했습니다.")
+
+    print("📥 기업 코드 수집 중...")
+    corp_df = await fetch_corp_codes(api_key, force_refresh=not use_cache)
+    corp_codes = filter_kospi_kosdaq_non_financial(corp_df)["corp_code"].unique().tolist()
+    if sample:
+        corp_codes = corp_codes[:sample]
+    print(f"✅ 대상 기업 수: {len(corp_codes):,}")
+
+    store.seed(
+        (corp_code, year, REPRT_CODE, fs_div)
+        for corp_code in corp_codes
+        for year in years
+        for fs_div in ["CFS", "OFS"]
+    )
+    counts = store.counts()
+    print(f"📊 작업 상태: {counts}")
+
+    rate_limiter = RateLimiter(
+        max_calls=500,
+        period=60,
+        daily_limit=DEFAULT_DAILY_LIMIT,
+        state_path=shared_state_path(api_key),
+    )
+    key_pool = ApiKeyPool(api_keys, 500, 60, daily_limit=DEFAULT_DAILY_LIMIT) if len(api_keys) > 1 else None
+    # 주요계정 수집과 같은 관측을 공유해 연결재무제표가 없는 기업의 요청을 건너뛴다.
+    profile = FsDivProfile() if use_profile else None
+    writer = LongTableWriter(FULL_STATEMENTS_DIR)
+    stop_event = asyncio.Event()
+    uncommitted = []
+
+    async def handle(session, key):
+        corp_code, year, reprt_code, fs_div = key
+        if profile is not None and profile.is_known_empty(corp_code, year, fs_div, reprt_code):
+            profile.stats.skipped += 1
+            store.mark(key, EMPTY)
+            return None
+        try:
+            if key_pool is not None:
+                status, batch = await stream_full_statement(
+                    session, await key_pool.acquire(), corp_code, year, fs_div, reprt_code
+                )
+            else:
+                status, batch = await stream_full_statement(
+                    session, api_key, corp_code, year, fs_div, reprt_code, rate_limiter
+                )
+        except QuotaExceededError:
+            # 남은 키는 pending으로 두고 다음 실행에서 이어서 받는다.
+            stop_event.set()
+            return None
+        except (aiohttp.ClientError, asyncio.TimeoutError, ValueError, DartStatusError) as e:
+            # 재시도(회로 차단기 포함)로도 받지 못한 키만 실패로 남는다.
+            print(f"⚠️ {corp_code} {year} {fs_div} 실패: {e}")
+            store.mark(key, FAILED)
+            return None
+
+        if status == "013" or (status == "000" and not len(batch)):
+            if profile is not None:
+                profile.record(corp_code, year, fs_div, False, reprt_code)
+            store.mark(key, EMPTY)
+            return None
+        if status != "000":
+            store.mark(key, FAILED)
+            return None
+        if profile is not None:
+            profile.record(corp_code, year, fs_div, True, reprt_code)
+        return key, batch
+
+    def commit():
+        # Parquet에 기록된 뒤에만 완료로 표시해 중단 시 유실을 막는다.
+        writer.flush()
+        for key, rows in uncommitted:
+            store.mark(key, DONE, rows)
+        uncommitted.clear()
+
+    def write(result):
+        key, batch = result
+        writer.add(batch)
+        uncommitted.append((key, len(batch)))
+        if len(uncommitted) >= COMMIT_EVERY:
+            commit()
+
+    try:
+        pending = list(store.pending(years=years))
+        if pending:
+            print(f"🚀 전체 재무제표 {len(pending):,}건 수집 시작...")
+            progress = tqdm(total=len(pending), desc="전체 재무제표")
+            session = get_session()
+            pipeline = Pipeline(
+                lambda key: handle(session, key),
+                write,
+                workers=workers,
+                on_progress=lambda stats: progress.update(1),
+                stop_event=stop_event,
+            )
+            await pipeline.run(pending)
+            progress.close()
+            if stop_event.is_set():
+                print("📉 API 한도를 모두 사용했습니다. 남은 작업은 다음 실행에서 이어서 받습니다.")
+    finally:
+        commit()
+        writer.close()
+        print(f"💾 기록한 행: {writer.rows_written:,}개")
+        remaining = store.counts()
+        store.close()
+        if profile is not None:
+            print(f"🔮 재무제표 구분 예측: {profile.stats}")
+            profile.close()
+        REGISTRY.write_run_summary("fetch_full_statements")
+        if metrics_runner is not None:
+            await metrics_runner.cleanup()
+
+    print(f"📊 작업 상태: {remaining}")
+    if not remaining.get(PENDING, 0):
+        print("🧹 연도 파티션 정리 중 (정정 공시·중복 제거, 기업별 정렬)...")
+        rows = compact(FULL_STATEMENTS_DIR, years)
+        print(f"✅ 정리 완료: {rows:,}행 -> {FULL_STATEMENTS_DIR}")
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Download full financial statements (fnlttSinglAcntAll) from DART")
+    parser.add_argument("--years", type=int, nargs="+", default=list(range(2015, 2024)), help="Business years to fetch")
+    parser.add_argument("--reset", action="store_true", help="Delete the checkpoint and dataset and download from scratch")
+    parser.add_argument("--no-cache", action="store_true", help="Do not use cached corp codes")
+    parser.add_argument("--no-profile", action="store_true", help="Do not skip fs_div variants known to be empty")
+    parser.add_argument("--workers", type=int, default=WORKERS, help="Concurrent requests")
+    parser.add_argument("--sample", type=int, help="Only fetch the first N companies")
+    parser.add_argument("--compact-only", action="store_true", help="Only deduplicate and sort the stored partitions")
+    parser.add_argument("--metrics-port", type=int, help="Serve Prometheus metrics on http://127.0.0.1:PORT/metrics")
+    args = parser.parse_args()
+    if args.compact_only:
+        print(f"✅ 정리 완료: {compact(FULL_STATEMENTS_DIR, args.years):,}행")
+    else:
+        run_with_session(
+            main(
+                years=args.years,
+                reset=args.reset,
+                use_cache=not args.no_cache,
+                use_profile=not args.no_profile,
+                workers=args.workers,
+                sample=args.sample,
+                metrics_port=args.metrics_port,
+            )
+        )
@@ -4,8 +4,7 @@ echo DART 2023-2024 Data Merge Script
 echo ============================================
 echo.
 
-set DART_API_KEY=ea93b96a1c65f8122dc6a71957dbf871655ef780
-echo [INFO] API Key set successfully
+rem API 키는 프로젝트 루트의 .env 파일(DART_API_KEY 또는 DART_API_KEYS)에서 읽습니다.
 
 echo [INFO] Step 1: Merging 2023-2024 team files...
 python dart_2023_2024_downloader.py --merge-only
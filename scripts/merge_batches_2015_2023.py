@@ -2,24 +2,35 @@ import argparse
 from pathlib import Path
 import pandas as pd
 
-from dart_bulk_downloader import save_to_excel
+from dart_bulk_downloader import ColumnarSink, export_excel
 
 
-def merge_batches(input_dir: Path, output_path: Path) -> None:
-    """Merge all batch Excel files into a single dataset."""
+def import_legacy_batches(input_dir: Path, dataset_dir: Path) -> None:
+    """Append batch Excel files from older runs to the Parquet dataset."""
     batch_files = sorted(input_dir.glob("dart_statements_2015_2023_batch_*.xlsx"))
-    if not batch_files:
-        print(f"No batch files found in {input_dir}")
-        return
-
-    all_data = []
     for f in batch_files:
-        df = pd.read_excel(f, engine="openpyxl")
-        all_data.append(df)
-        print(f"Loaded {len(df):,} rows from {f.name}")
+        marker = input_dir / f"{f.stem}.imported"
+        if marker.exists():
+            continue
+        df = pd.read_excel(f, engine="openpyxl", dtype=str)
+        with ColumnarSink(dataset_dir, basename=f.stem) as sink:
+            sink.write(df)
+        marker.write_text(f"{len(df)}\n", encoding="utf-8")
+        print(f"Imported {len(df):,} rows from {f.name}")
 
-    merged_df = pd.concat(all_data, ignore_index=True)
-    save_to_excel(merged_df, output_path)
+
+def merge_batches(input_dir: Path, output_path: Path) -> None:
+    """Export all downloaded batches as a single Excel workbook.
+
+    Batches are already stored in one partitioned Parquet dataset, so
+    "merging" only means importing legacy Excel batches and exporting.
+    """
+    dataset_dir = input_dir / "statements"
+    import_legacy_batches(input_dir, dataset_dir)
+    if not dataset_dir.exists():
+        print(f"No batch data found in {input_dir}")
+        return
+    export_excel(dataset_dir, output_path)
 
 
 if __name__ == "__main__":
@@ -28,7 +39,7 @@ if __name__ == "__main__":
         "--input-dir",
         type=Path,
         default=Path(__file__).resolve().parent.parent / "data" / "batches_2015_2023",
-        help="Directory containing batch Excel files",
+        help="Directory containing the batch dataset (and any legacy batch Excel files)",
     )
     parser.add_argument(
         "--output",
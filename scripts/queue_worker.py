@@ -0,0 +1,153 @@
+"""공유 작업 큐 기반 DART 다운로드 작업자
+
+고정된 100개 기업 팀 대신, 작은 작업 단위(기업 몇 개 × 연도 범위)를
+SQLite 작업 큐에 등록하고 작업자가 하나씩 임대(lease)해서 처리합니다.
+작업자는 몇 개든 동시에 띄울 수 있고, 중간에 죽은 작업자의 단위는
+임대가 만료되면 다른 작업자가 이어서 처리합니다.
+
+    python queue_worker.py --init            # 작업 단위 등록 (한 번만)
+    python queue_worker.py                   # 작업자 실행 (여러 개 가능)
+    python queue_worker.py --progress        # 전체 진행 상황
+"""
+
+import argparse
+import asyncio
+import logging
+from pathlib import Path
+from typing import List
+
+from dotenv import load_dotenv
+
+from dart_bulk_downloader import (
+    ColumnarSink,
+    fetch_bulk_statements,
+    fetch_corp_codes,
+    filter_kospi_kosdaq_non_financial,
+)
+from http_client import run_with_session
+from dart_metrics import REGISTRY
+from key_pool import load_api_keys
+from rate_limiter import QuotaExceededError
+from work_queue import DEFAULT_QUEUE_PATH, WorkQueue, default_worker_id
+
+load_dotenv(Path(__file__).resolve().parent.parent / ".env")
+
+logging.basicConfig(level=logging.INFO, format='%(asctime)s - %(levelname)s - %(message)s')
+logger = logging.getLogger(__name__)
+
+OUTPUT_DIR = Path(__file__).resolve().parent.parent / "data" / "team_downloads" / "statements"
+
+
+async def init_queue(queue: WorkQueue, api_keys: List[str], unit_size: int, start_year: int, end_year: int) -> None:
+    """대상 기업을 작은 작업 단위로 나눠 큐에 등록"""
+    corp_df = await fetch_corp_codes(api_keys[0])
+    target_df = filter_kospi_kosdaq_non_financial(corp_df).sort_values("stock_code")
+    corp_codes = target_df["corp_code"].unique().tolist()
+    units = [
+        {"corp_codes": corp_codes[i:i + unit_size], "years": [start_year, end_year]}
+        for i in range(0, len(corp_codes), unit_size)
+    ]
+    added = queue.populate(units)
+    logger.info(f"📋 작업 단위 {added:,}개 등록 (기업 {len(corp_codes):,}개, 단위당 {unit_size}개)")
+    logger.info(f"📊 {queue.progress()}")
+
+
+async def run_worker(queue: WorkQueue, api_keys: List[str], worker_id: str, workers: int, poll: float) -> None:
+    """큐가 빌 때까지 작업 단위를 임대해 처리"""
+    while True:
+        lease = queue.claim(worker_id)
+        if lease is None:
+            progress = queue.progress()
+            if progress.finished:
+                logger.info(f"✅ 처리할 작업이 없습니다. {progress}")
+                return
+            # 다른 작업자가 처리 중인 단위가 끝나거나 임대가 만료될 때까지 대기
+            await asyncio.sleep(poll)
+            continue
+
+        corp_codes = lease.payload["corp_codes"]
+        start_year, end_year = lease.payload["years"]
+        logger.info(
+            f"🚀 단위 {lease.unit_id} 시작 (기업 {len(corp_codes)}개, "
+            f"{start_year}~{end_year}, 시도 {lease.attempts})"
+        )
+        # 시도마다 별도 파일에 기록해, 반납·실패한 시도의 행은 지워 재실행 시 중복되지 않게 한다.
+        sink = ColumnarSink(OUTPUT_DIR, basename=f"worker-{worker_id}-unit-{lease.unit_id}")
+        try:
+            async with queue.keep_alive(lease):
+                # 실패한 키가 하나라도 있으면 FetchFailedError가 올라와 단위를 완료로 표시하지 않는다.
+                await fetch_bulk_statements(
+                    api_keys,
+                    corp_codes,
+                    range(start_year, end_year + 1),
+                    workers=workers,
+                    include_corp_names=True,
+                    sink=sink,
+                )
+                # 디스크에 기록된 뒤에만 완료로 표시한다.
+                sink.close()
+        except QuotaExceededError as e:
+            sink.discard()
+            queue.release(lease)
+            logger.error(f"📉 일일 한도 도달로 작업자를 종료합니다: {e}")
+            return
+        except Exception as e:
+            sink.discard()
+            queue.fail(lease, str(e))
+            logger.error(f"❌ 단위 {lease.unit_id} 실패: {e}")
+            continue
+        except BaseException:
+            sink.discard()
+            raise
+
+        rows = sink.rows_written
+        if not queue.complete(lease, rows):
+            # 임대가 만료돼 다른 작업자가 이 단위를 맡았으므로 그쪽 결과만 남긴다.
+            sink.discard()
+            logger.warning(f"⚠️ 단위 {lease.unit_id}의 임대를 잃어 이번 결과를 버립니다")
+            continue
+        logger.info(f"✅ 단위 {lease.unit_id} 완료: {rows:,}행 · {queue.progress()}")
+
+
+async def main():
+    parser = argparse.ArgumentParser(description="공유 작업 큐 기반 DART 다운로드 작업자")
+    parser.add_argument("--queue", type=Path, default=DEFAULT_QUEUE_PATH, help="작업 큐 SQLite 파일")
+    parser.add_argument("--init", action="store_true", help="대상 기업으로 작업 단위 등록")
+    parser.add_argument("--unit-size", type=int, default=10, help="작업 단위당 기업 수 (기본값: 10)")
+    parser.add_argument("--start-year", type=int, default=2015, help="시작 연도 (기본값: 2015)")
+    parser.add_argument("--end-year", type=int, default=2022, help="종료 연도 (기본값: 2022)")
+    parser.add_argument("--progress", action="store_true", help="전체 진행 상황만 표시")
+    parser.add_argument("--retry-failed", action="store_true", help="실패한 단위를 다시 대기열에 넣기")
+    parser.add_argument("--worker-id", default=default_worker_id(), help="작업자 식별자")
+    parser.add_argument("--workers", type=int, default=3, help="작업자당 초기 동시 요청 수 (기본값: 3)")
+    parser.add_argument("--lease", type=float, default=300.0, help="임대 시간(초, 기본값: 300)")
+    parser.add_argument("--poll", type=float, default=30.0, help="대기 중 재확인 간격(초)")
+    parser.add_argument("--no-wal", action="store_true", help="네트워크 공유 폴더의 큐 파일용 (WAL 비활성화)")
+    parser.add_argument("--metrics-port", type=int, help="이 포트의 /metrics로 Prometheus 지표 제공")
+    args = parser.parse_args()
+
+    with WorkQueue(args.queue, lease_seconds=args.lease, wal=not args.no_wal) as queue:
+        if args.progress:
+            print(f"📊 {queue.progress()}")
+            return
+        if args.retry_failed:
+            logger.info(f"🔁 실패한 단위 {queue.retry_failed():,}개를 다시 등록했습니다")
+            return
+
+        # DART_API_KEYS에 여러 키를 지정하면 작업자 하나가 키별 한도를 합쳐서 사용한다.
+        api_keys = load_api_keys()
+
+        if args.init:
+            await init_queue(queue, api_keys, args.unit_size, args.start_year, args.end_year)
+            return
+        metrics_runner = await REGISTRY.serve(port=args.metrics_port) if args.metrics_port else None
+        try:
+            await run_worker(queue, api_keys, args.worker_id, args.workers, args.poll)
+        finally:
+            REGISTRY.write_run_summary(f"queue_worker_{args.worker_id}")
+            if metrics_runner is not None:
+                await metrics_runner.cleanup()
+
+
+if __name__ == "__main__":
+    run_with_session(main())
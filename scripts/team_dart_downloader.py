@@ -1,6 +1,5 @@
 """팀별 DART 재무제표 병렬 다운로드 스크립트"""
 
-import asyncio
 import os
 from pathlib import Path
 from typing import List, Tuple
@@ -15,16 +14,8 @@ from dart_bulk_downloader import (
     fetch_bulk_statements,
     save_to_excel
 )
-
-
-def split_corps_for_teams(corp_codes: List[str], chunk_size: int = 100) -> List[Tuple[int, List[str]]]:
-    """기업 코드를 팀별로 분할"""
-    chunks = []
-    for i in range(0, len(corp_codes), chunk_size):
-        team_num = i // chunk_size + 1
-        chunk = corp_codes[i:i + chunk_size]
-        chunks.append((team_num, chunk))
-    return chunks
+from http_client import run_with_session
+from utils import split_corps_for_teams
 
 
 async def download_team_data(
@@ -166,4 +157,4 @@ async def main():
 
 
 if __name__ == "__main__":
-    asyncio.run(main())
+    run_with_session(main())
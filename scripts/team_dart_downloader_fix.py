@@ -1,4 +1,3 @@
-import asyncio
 import os
 import time
 from pathlib import Path
@@ -6,7 +5,6 @@ from typing import List, Tuple
 import pandas as pd
 from datetime import datetime
 import argparse
-import requests
 
 from dart_bulk_downloader import (
     fetch_corp_codes,
@@ -15,30 +13,8 @@ from dart_bulk_downloader import (
     save_to_excel,
     DART_SINGLE_ACCOUNT_URL,
 )
-
-# ✅ 동기 요청에 대한 초당 14~15회 제한 함수
-def rate_limited_get(url, params, delay=0.07):
-    time.sleep(delay)
-    return requests.get(url, params=params, timeout=10)
-
-# ✅ 유효 보고서 존재 여부 확인 (연도별 순차 요청 + 제한 적용)
-def has_report_for_any_year(api_key: str, corp_code: str, years: range) -> bool:
-    for year in years:
-        params = {
-            "crtfc_key": api_key,
-            "corp_code": corp_code,
-            "bsns_year": year,
-            "reprt_code": "11011",
-        }
-        try:
-            resp = rate_limited_get(DART_SINGLE_ACCOUNT_URL, params)
-            if resp.status_code == 200:
-                data = resp.json()
-                if data.get("status") == "000":
-                    return True
-        except Exception:
-            continue
-    return False
+from http_client import run_with_session
+from utils import filter_corps_with_reports
 
 # ✅ 기업을 팀 단위로 나누기
 def split_corps_for_teams(corp_codes: List[str], chunk_size: int = 500) -> List[Tuple[int, List[str]]]:
@@ -122,12 +98,17 @@ async def main():
     years = range(args.start_year, args.end_year + 1)
 
     print("\n📤 유효한 사업보고서가 있는 기업 필터링 중...")
-    valid_corp_codes = []
-    for i, corp_code in enumerate(target_df["corp_code"]):
-        if has_report_for_any_year(api_key, corp_code, years):
-            valid_corp_codes.append(corp_code)
-        if (i + 1) % 100 == 0:
-            print(f"   진행 중: {i + 1} / {len(target_df)}")
+    checked = 0
+
+    def report_progress():
+        nonlocal checked
+        checked += 1
+        if checked % 100 == 0:
+            print(f"   진행 중: {checked} / {len(target_df)}")
+
+    valid_corp_codes = await filter_corps_with_reports(
+        api_key, target_df["corp_code"].tolist(), years, on_progress=report_progress
+    )
 
     print(f"✅ 유효 기업 수: {len(valid_corp_codes)}개")
     if len(valid_corp_codes) == 0:
@@ -165,4 +146,4 @@ async def main():
             print(f"❌ 팀 {args.team} 정보를 찾을 수 없습니다.")
 
 if __name__ == "__main__":
-    asyncio.run(main())
+    run_with_session(main())
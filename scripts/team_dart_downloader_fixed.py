@@ -1,6 +1,5 @@
 """팀별 DART 재무제표 병렬 다운로드 스크립트 (개선 버전)"""
 
-import asyncio
 import os
 import time
 import logging
@@ -9,17 +8,19 @@ from typing import List, Tuple, Optional
 import pandas as pd
 from datetime import datetime
 import argparse
-import requests
 from tqdm import tqdm
-import aiohttp
 
 from dart_bulk_downloader import (
     fetch_corp_codes,
     filter_kospi_kosdaq_non_financial,
     fetch_bulk_statements,
     save_to_excel,
+    ColumnarSink,
+    read_statements,
     DART_SINGLE_ACCOUNT_URL,
 )
+from http_client import get_session, run_with_session
+from utils import filter_corps_with_reports
 
 # 로깅 설정
 def setup_logging(log_dir: Path) -> logging.Logger:
@@ -52,76 +53,42 @@ def setup_logging(log_dir: Path) -> logging.Logger:
     
     return logger
 
-# 동기 요청에 대한 속도 제한 함수 (개선된 버전)
-def rate_limited_get(url: str, params: dict, delay: float = 0.07, timeout: int = 10) -> Optional[requests.Response]:
-    """속도 제한이 적용된 GET 요청"""
-    time.sleep(delay)
-    try:
-        return requests.get(url, params=params, timeout=timeout)
-    except requests.exceptions.RequestException:
-        return None
-
-# 재시도 로직이 포함된 유효 보고서 확인
-def has_report_for_any_year(api_key: str, corp_code: str, years: range, max_retries: int = 2) -> bool:
-    """유효한 보고서가 있는지 확인 (재시도 로직 포함)"""
-    for year in years:
+# 단일 API 호출 테스트 함수
+async def test_single_api_call(api_key: str, corp_code: str, years: range, logger: logging.Logger) -> None:
+    """단일 API 호출을 테스트하여 문제를 진단"""
+    session = get_session()
+    for year in list(years)[:3]:  # 처음 3개 연도만 테스트
         params = {
             "crtfc_key": api_key,
             "corp_code": corp_code,
             "bsns_year": year,
             "reprt_code": "11011",
+            "fs_div": "CFS",
         }
         
-        for attempt in range(max_retries):
-            try:
-                resp = rate_limited_get(url=DART_SINGLE_ACCOUNT_URL, params=params)
-                if resp and resp.status_code == 200:
-                    data = resp.json()
-                    if data.get("status") == "000":
-                        return True
-                break  # 성공하면 재시도 중단
-            except Exception:
-                if attempt == max_retries - 1:
-                    continue  # 최종 시도 실패 시 다음 연도로
-                time.sleep(1)  # 재시도 전 대기
-    return False
-
-# 단일 API 호출 테스트 함수
-async def test_single_api_call(api_key: str, corp_code: str, years: range, logger: logging.Logger) -> None:
-    """단일 API 호출을 테스트하여 문제를 진단"""
-    async with aiohttp.ClientSession() as session:
-        for year in list(years)[:3]:  # 처음 3개 연도만 테스트
-            params = {
-                "crtfc_key": api_key,
-                "corp_code": corp_code,
-                "bsns_year": year,
-                "reprt_code": "11011",
-                "fs_div": "CFS",
-            }
-            
-            try:
-                async with session.get(DART_SINGLE_ACCOUNT_URL, params=params) as resp:
-                    logger.info(f"API 테스트 {corp_code} {year}: HTTP {resp.status}")
+        try:
+            async with session.get(DART_SINGLE_ACCOUNT_URL, params=params) as resp:
+                logger.info(f"API 테스트 {corp_code} {year}: HTTP {resp.status}")
+                
+                if resp.status == 200:
+                    data = await resp.json()
+                    status = data.get("status", "")
+                    message = data.get("message", "")
+                    list_data = data.get("list", [])
                     
-                    if resp.status == 200:
-                        data = await resp.json()
-                        status = data.get("status", "")
-                        message = data.get("message", "")
-                        list_data = data.get("list", [])
-                        
-                        logger.info(f"  API 상태: {status}, 메시지: {message}")
-                        logger.info(f"  데이터 항목 수: {len(list_data)}")
-                        
-                        if status == "000" and list_data:
-                            logger.info(f"  성공: {corp_code} {year}년 데이터 있음")
-                            return  # 성공하면 종료
-                        elif status != "000":
-                            logger.warning(f"  API 오류: {status} - {message}")
-                    else:
-                        logger.error(f"  HTTP 오류: {resp.status}")
-                        
-            except Exception as e:
-                logger.error(f"  요청 실패: {e}")
+                    logger.info(f"  API 상태: {status}, 메시지: {message}")
+                    logger.info(f"  데이터 항목 수: {len(list_data)}")
+                    
+                    if status == "000" and list_data:
+                        logger.info(f"  성공: {corp_code} {year}년 데이터 있음")
+                        return  # 성공하면 종료
+                    elif status != "000":
+                        logger.warning(f"  API 오류: {status} - {message}")
+                else:
+                    logger.error(f"  HTTP 오류: {resp.status}")
+                    
+        except Exception as e:
+            logger.error(f"  요청 실패: {e}")
     
     logger.error(f"모든 연도에서 {corp_code} 데이터 없음")
 
@@ -162,15 +129,26 @@ async def download_team_data(
     start_time = datetime.now()
 
     try:
-        statements = await fetch_bulk_statements(api_key, corp_codes, years, workers)
+        # 결과는 팀 공용 Parquet 데이터셋에 바로 기록하고, 검증용으로 이 팀의 데이터만 다시 읽는다.
+        dataset_dir = output_dir / "statements"
+        sink = ColumnarSink(dataset_dir, basename=f"team-{team_num:02d}")
+        try:
+            await fetch_bulk_statements(api_key, corp_codes, years, workers, sink=sink)
+        except BaseException:
+            # 실패한 실행의 부분 파일은 지워, 다시 실행할 때 같은 기업-연도가 중복되지 않게 한다.
+            sink.discard()
+            raise
+        sink.close()
+        statements = (
+            read_statements(dataset_dir, columns=["corp_code", "bsns_year"], filters={"corp_code": corp_codes})
+            if sink.rows_written
+            else pd.DataFrame()
+        )
         
         # 디버깅 정보 추가
         logger.info(f"팀 {team_num}: 원시 데이터 크기 - {len(statements)}행")
         
         if not statements.empty:
-            logger.info(f"팀 {team_num}: 데이터 컬럼 - {list(statements.columns)}")
-            logger.info(f"팀 {team_num}: 샘플 데이터 (처음 2행):\n{statements.head(2)}")
-            
             # 고유 기업 수 확인
             unique_corps = statements['corp_code'].nunique() if 'corp_code' in statements.columns else 0
             unique_years = statements['bsns_year'].nunique() if 'bsns_year' in statements.columns else 0
@@ -202,15 +180,11 @@ async def download_team_data(
 
         logger.info(f"팀 {team_num}: 수집된 재무제표 수 - {len(statements):,}행")
 
-        filename = f"dart_statements_team_{team_num:02d}.xlsx"
-        output_path = output_dir / filename
-        save_to_excel(statements, output_path)
-
         elapsed = datetime.now() - start_time
         logger.info(f"팀 {team_num} 완료 - {elapsed.total_seconds():.1f}초 소요")
-        logger.info(f"저장 위치: {output_path}")
+        logger.info(f"저장 위치: {dataset_dir}")
         
-        return output_path
+        return dataset_dir
         
     except Exception as e:
         logger.error(f"팀 {team_num} 다운로드 중 오류 발생: {e}")
@@ -218,7 +192,11 @@ async def download_team_data(
 
 # 팀별 파일 병합
 def merge_team_files(team_files: List[Path], output_path: Path, logger: Optional[logging.Logger] = None) -> None:
-    """팀별 파일들을 하나로 병합"""
+    """팀별 파일들을 하나로 병합
+
+    ``team_files`` may contain Parquet dataset directories written by
+    :func:`download_team_data` and legacy team Excel files.
+    """
     if not logger:
         logger = logging.getLogger('dart_downloader')
     
@@ -228,7 +206,10 @@ def merge_team_files(team_files: List[Path], output_path: Path, logger: Optional
     for file_path in sorted(team_files):
         if file_path.exists():
             try:
-                df = pd.read_excel(file_path, engine='openpyxl')
+                if file_path.is_dir():
+                    df = read_statements(file_path)
+                else:
+                    df = pd.read_excel(file_path, engine='openpyxl', dtype=str)
                 all_data.append(df)
                 logger.info(f"파일 로드: {file_path.name} - {len(df):,}행")
             except Exception as e:
@@ -285,6 +266,8 @@ async def main():
     # 병합만 수행하는 경우
     if args.merge_only:
         team_files = list(output_dir.glob("dart_statements_team_*.xlsx"))
+        if (output_dir / "statements").exists():
+            team_files.append(output_dir / "statements")
         if team_files:
             final_output = output_dir.parent / "dart_statements_merged.xlsx"
             merge_team_files(team_files, final_output, logger)
@@ -305,14 +288,15 @@ async def main():
     # 유효성 검증 (옵션)
     if not args.skip_validation:
         logger.info("유효한 사업보고서가 있는 기업 필터링 중...")
-        valid_corp_codes = []
-        
-        # 진행률 표시
+        # 공유 연결 풀로 여러 기업을 동시에 확인 (진행률 표시)
         with tqdm(total=len(target_df), desc="유효성 검증") as pbar:
-            for corp_code in target_df["corp_code"]:
-                if has_report_for_any_year(api_key, corp_code, years):
-                    valid_corp_codes.append(corp_code)
-                pbar.update(1)
+            valid_corp_codes = await filter_corps_with_reports(
+                api_key,
+                target_df["corp_code"].tolist(),
+                years,
+                workers=args.workers * 3,
+                on_progress=lambda: pbar.update(1),
+            )
         
         logger.info(f"유효 기업 수: {len(valid_corp_codes)}개")
         if len(valid_corp_codes) == 0:
@@ -361,4 +345,4 @@ async def main():
             logger.info(f"사용 가능한 팀: 1 ~ {len(team_chunks)}")
 
 if __name__ == "__main__":
-    asyncio.run(main())
+    run_with_session(main())
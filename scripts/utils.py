@@ -1,16 +1,43 @@
 """DART 다운로드 공통 유틸리티 함수들"""
 
+import asyncio
 import logging
-import time
+import sys
 from datetime import datetime
 from pathlib import Path
-from typing import List, Tuple, Optional
-import requests
+from typing import Callable, List, Tuple, Optional, Sequence
+import aiohttp
 import pandas as pd
 
 from config import (
-    MAX_ERROR_LOGS, LOG_FORMAT, API_TIMEOUT, MAX_RETRIES,
-    DART_SINGLE_ACCOUNT_URL
+    MAX_ERROR_LOGS, LOG_FORMAT, API_TIMEOUT, MAX_RETRIES, DART_API_BASE,
+    DART_SINGLE_ACCOUNT_URL, DEFAULT_WORKERS, API_RATE_LIMIT, API_RATE_PERIOD
+)
+
+SRC_PATH = Path(__file__).resolve().parent.parent / "src"
+if str(SRC_PATH) not in sys.path:
+    sys.path.append(str(SRC_PATH))
+
+from http_client import get_session
+from rate_limiter import (
+    DEFAULT_DAILY_LIMIT,
+    QuotaExceededError,
+    RateLimiter,
+    shared_state_path,
+)
+from retry_policy import (
+    QUOTA,
+    TRANSIENT,
+    DartStatusError,
+    RetryPolicy,
+    classify,
+    classify_status,
+    get_breaker,
+)
+
+# 같은 API 주소로 가는 모든 요청과 회로 차단기를 공유한다.
+REPORT_CHECK_RETRY = RetryPolicy(
+    max_attempts=MAX_RETRIES, base_delay=1.0, max_delay=30.0, breaker=get_breaker(DART_API_BASE)
 )
 
 def setup_logging(log_dir: Path, script_name: str = "dart_downloader") -> logging.Logger:
@@ -44,42 +71,98 @@ def setup_logging(log_dir: Path, script_name: str = "dart_downloader") -> loggin
     
     return logger
 
-def rate_limited_get(url: str, params: dict, delay: float = 0.07) -> Optional[requests.Response]:
-    """속도 제한이 적용된 GET 요청"""
-    time.sleep(delay)
+async def _fetch_json(
+    session: aiohttp.ClientSession,
+    url: str,
+    params: dict,
+    rate_limiter: Optional[RateLimiter] = None,
+) -> dict:
+    """속도 제한이 적용된 GET 요청 (실패 시 예외, DART 점검·시스템 오류는 DartStatusError)"""
+    if rate_limiter is not None:
+        await rate_limiter.wait()
+    async with session.get(url, params=params, timeout=aiohttp.ClientTimeout(total=API_TIMEOUT)) as resp:
+        resp.raise_for_status()
+        data = await resp.json(content_type=None)
+    if classify_status(data.get("status"), data.get("message", "")) == TRANSIENT:
+        raise DartStatusError(data.get("status"), data.get("message", ""))
+    return data
+
+async def rate_limited_get(
+    session: aiohttp.ClientSession,
+    url: str,
+    params: dict,
+    rate_limiter: Optional[RateLimiter] = None,
+) -> Optional[dict]:
+    """속도 제한이 적용된 GET 요청 (JSON 응답, 네트워크 오류 시 None)"""
     try:
-        return requests.get(url, params=params, timeout=API_TIMEOUT)
-    except requests.exceptions.RequestException as e:
+        return await _fetch_json(session, url, params, rate_limiter)
+    except (aiohttp.ClientError, asyncio.TimeoutError, ValueError, DartStatusError) as e:
         logging.getLogger().debug(f"Request failed: {e}")
         return None
 
-def has_report_for_any_year(api_key: str, corp_code: str, years: range) -> bool:
-    """유효한 보고서가 있는지 확인 (재시도 로직 포함)"""
-    for year in years:
+async def has_report_for_any_year(
+    session: aiohttp.ClientSession,
+    api_key: str,
+    corp_code: str,
+    years: range,
+    rate_limiter: Optional[RateLimiter] = None,
+) -> bool:
+    """유효한 보고서가 있는지 확인 (최근 연도부터, 찾으면 즉시 종료)
+
+    일시적 오류는 REPORT_CHECK_RETRY의 지수 백오프로 재시도하고, DART 장애 중에는
+    회로 차단기가 열려 요청이 기다린다. 한도 초과는 재시도하지 않고 바로 알린다.
+    """
+    for year in sorted(years, reverse=True):
         params = {
             "crtfc_key": api_key,
             "corp_code": corp_code,
             "bsns_year": year,
             "reprt_code": "11011",
         }
-        
-        for attempt in range(MAX_RETRIES):
-            try:
-                resp = rate_limited_get(url=DART_SINGLE_ACCOUNT_URL, params=params)
-                if resp and resp.status_code == 200:
-                    data = resp.json()
-                    if data.get("status") == "000":
-                        return True
-                break  # 성공하면 재시도 중단
-            except Exception as e:
-                if attempt == MAX_RETRIES - 1:
-                    logging.getLogger().debug(f"Final attempt failed for {corp_code} {year}: {e}")
-                    continue
-                time.sleep(1)  # 재시도 전 대기
+        try:
+            data = await REPORT_CHECK_RETRY.call(_fetch_json, session, DART_SINGLE_ACCOUNT_URL, params, rate_limiter)
+        except QuotaExceededError:
+            raise
+        except Exception as e:
+            logging.getLogger().debug(f"Final attempt failed for {corp_code} {year} ({classify(e)}): {e}")
+            continue
+        status = data.get("status")
+        if status == "000":
+            return True
+        if classify_status(status, data.get("message", "")) == QUOTA:
+            raise QuotaExceededError(f"API daily request limit reached: {data.get('message')}")
     return False
 
+async def filter_corps_with_reports(
+    api_key: str,
+    corp_codes: Sequence[str],
+    years: range,
+    workers: int = DEFAULT_WORKERS * 3,
+    on_progress: Optional[Callable[[], None]] = None,
+) -> List[str]:
+    """유효한 사업보고서가 있는 기업만 동시 요청으로 걸러서 입력 순서대로 반환"""
+    # 같은 API 키를 쓰는 모든 프로세스와 분당 한도를 공유한다.
+    rate_limiter = RateLimiter(
+        API_RATE_LIMIT,
+        API_RATE_PERIOD,
+        daily_limit=DEFAULT_DAILY_LIMIT,
+        state_path=shared_state_path(api_key),
+    )
+    session = get_session()
+    sem = asyncio.Semaphore(workers)
+
+    async def check(corp_code: str) -> bool:
+        async with sem:
+            found = await has_report_for_any_year(session, api_key, corp_code, years, rate_limiter)
+        if on_progress is not None:
+            on_progress()
+        return found
+
+    results = await asyncio.gather(*(check(corp_code) for corp_code in corp_codes))
+    return [corp_code for corp_code, found in zip(corp_codes, results) if found]
+
 def split_corps_for_teams(corp_codes: List[str], chunk_size: int = 100) -> List[Tuple[int, List[str]]]:
-    """기업 코드를 팀별로 분할"""
+    """기업 코드를 팀별로 분할 (레거시 고정 팀 방식, 새 수집은 queue_worker.py 사용)"""
     chunks = []
     for i in range(0, len(corp_codes), chunk_size):
         team_num = i // chunk_size + 1
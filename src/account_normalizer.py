@@ -0,0 +1,354 @@
+"""Vectorized account-name normalization and amount parsing.
+
+DART ``account_nm`` strings vary by company and year (``"Ⅰ. 유동자산"``,
+``"당기순이익(손실)"``, ``"수익(매출액)"``, ...). :class:`AccountNormalizer`
+maps them to canonical accounts without touching every row in Python:
+
+* names are factorized into categorical codes, so each distinct name is
+  resolved once, through a precompiled alias dictionary and then a regex
+  table, and the result is broadcast back with one ``take``;
+* in full statements the IFRS ``account_id`` is used first when known;
+* :func:`parse_amounts` turns ``thstrm_amount``-style strings (commas,
+  ``"-"`` for empty, ``"(1,234)"`` for negatives) into nullable ``Int64``
+  columns with Arrow compute kernels.
+
+Resolved names are memoized on the normalizer, so repeated calls only pay
+for names not seen before.
+"""
+
+from __future__ import annotations
+
+import re
+from dataclasses import dataclass
+from typing import Dict, Iterable, List, Mapping, Optional, Sequence, Tuple
+
+import numpy as np
+import pandas as pd
+import pyarrow as pa
+import pyarrow.compute as pc
+
+BS = ("BS",)
+IS = ("IS", "CIS")
+CF = ("CF",)
+
+
+@dataclass(frozen=True)
+class AccountRule:
+    """A canonical account, the names that map to it and where it may appear."""
+
+    account: str
+    statements: Tuple[str, ...]
+    aliases: Tuple[str, ...] = ()
+    patterns: Tuple[str, ...] = ()
+
+
+# 계정명은 공백과 앞 번호(Ⅰ., 1., 가.)를 지운 뒤 비교한다. 규칙 순서가 우선순위다.
+ACCOUNT_RULES: Tuple[AccountRule, ...] = (
+    AccountRule("자산총계", BS, ("자산총계", "자산합계", "자산총액", "총자산")),
+    AccountRule("유동자산", BS, ("유동자산",)),
+    AccountRule("비유동자산", BS, ("비유동자산", "고정자산")),
+    AccountRule("현금및현금성자산", BS, ("현금및현금성자산", "현금및현금등가물"), (r"^현금및현금성?자산$",)),
+    AccountRule("매출채권", BS, ("매출채권",)),
+    AccountRule("매출채권및기타유동채권", BS, (), (r"^(유동)?매출채권및기타(유동)?채권$",)),
+    AccountRule("재고자산", BS, ("재고자산",)),
+    AccountRule("부채총계", BS, ("부채총계", "부채합계", "총부채")),
+    AccountRule("유동부채", BS, ("유동부채",)),
+    AccountRule("비유동부채", BS, ("비유동부채", "고정부채")),
+    AccountRule("단기차입금", BS, ("단기차입금",)),
+    AccountRule("장기차입금", BS, ("장기차입금",)),
+    AccountRule("사채", BS, ("사채",)),
+    AccountRule("자본총계", BS, ("자본총계", "자본합계", "총자본")),
+    AccountRule("자본금", BS, ("자본금",)),
+    AccountRule(
+        "이익잉여금",
+        BS,
+        ("이익잉여금", "결손금", "미처리결손금", "미처분이익잉여금"),
+        (r"^이익잉여금\((미처리)?결손금\)$", r"^(미처분)?이익잉여금\(.*\)$"),
+    ),
+    AccountRule(
+        "매출액",
+        IS,
+        ("매출액", "매출", "영업수익", "수익(매출액)", "매출액(수익)", "매출및지분법손익"),
+        (r"^(매출액|영업수익)\(.*\)$",),
+    ),
+    AccountRule("매출원가", IS, ("매출원가", "영업원가")),
+    AccountRule("매출총이익", IS, ("매출총이익",), (r"^매출총(이익|손익|손실)(\(손실\))?$",)),
+    AccountRule(
+        "판매관리비",
+        IS,
+        ("판매비와관리비", "판매비및관리비", "판매관리비", "판관비"),
+    ),
+    AccountRule("영업이익", IS, ("영업이익",), (r"^영업(이익|손익|손실)(\(손실\))?$",)),
+    AccountRule(
+        "법인세차감전순이익",
+        IS,
+        ("법인세차감전순이익", "법인세비용차감전순이익"),
+        (r"^법인세(비용)?차감전(계속사업|계속영업)?(순)?(이익|손익|손실)(\(손실\))?$",),
+    ),
+    AccountRule(
+        "당기순이익",
+        IS,
+        ("당기순이익",),
+        (r"^(연결)?당기순(이익|손익|손실)(\((순)?손실\))?$",),
+    ),
+    AccountRule(
+        "영업활동현금흐름",
+        CF,
+        (),
+        (r"^영업활동(으로인한|으로부터의|에서의|으로부터|)(순)?현금(흐름|유입|유출)",),
+    ),
+    AccountRule(
+        "투자활동현금흐름",
+        CF,
+        (),
+        (r"^투자활동(으로인한|으로부터의|에서의|으로부터|)(순)?현금(흐름|유입|유출)",),
+    ),
+    AccountRule(
+        "재무활동현금흐름",
+        CF,
+        (),
+        (r"^재무활동(으로인한|으로부터의|에서의|으로부터|)(순)?현금(흐름|유입|유출)",),
+    ),
+)
+
+# 전체 재무제표(fnlttSinglAcntAll)의 XBRL 계정 ID. 있으면 계정명보다 먼저 쓴다.
+ACCOUNT_IDS: Dict[str, str] = {
+    "ifrs-full_Assets": "자산총계",
+    "ifrs-full_CurrentAssets": "유동자산",
+    "ifrs-full_NoncurrentAssets": "비유동자산",
+    "ifrs-full_CashAndCashEquivalents": "현금및현금성자산",
+    "ifrs-full_TradeAndOtherCurrentReceivables": "매출채권및기타유동채권",
+    "ifrs-full_Inventories": "재고자산",
+    "ifrs-full_Liabilities": "부채총계",
+    "ifrs-full_CurrentLiabilities": "유동부채",
+    "ifrs-full_NoncurrentLiabilities": "비유동부채",
+    "ifrs-full_ShorttermBorrowings": "단기차입금",
+    "ifrs-full_LongtermBorrowings": "장기차입금",
+    "ifrs-full_Equity": "자본총계",
+    "ifrs-full_IssuedCapital": "자본금",
+    "ifrs-full_RetainedEarnings": "이익잉여금",
+    "ifrs-full_Revenue": "매출액",
+    "ifrs-full_CostOfSales": "매출원가",
+    "ifrs-full_GrossProfit": "매출총이익",
+    "dart_TotalSellingGeneralAdministrativeExpenses": "판매관리비",
+    "dart_OperatingIncomeLoss": "영업이익",
+    "ifrs-full_ProfitLossBeforeTax": "법인세차감전순이익",
+    "ifrs-full_ProfitLoss": "당기순이익",
+    "ifrs-full_CashFlowsFromUsedInOperatingActivities": "영업활동현금흐름",
+    "ifrs-full_CashFlowsFromUsedInInvestingActivities": "투자활동현금흐름",
+    "ifrs-full_CashFlowsFromUsedInFinancingActivities": "재무활동현금흐름",
+}
+
+AMOUNT_COLUMNS = (
+    "thstrm_amount", "thstrm_add_amount", "frmtrm_amount",
+    "frmtrm_add_amount", "bfefrmtrm_amount",
+)
+WIDE_INDEX = ("corp_code", "bsns_year", "fs_div")
+
+_WHITESPACE = re.compile(r"[\s　]+")
+# "Ⅰ.", "1.", "(1)", "가." 같은 앞 번호와 "(주석 5)" 같은 뒤 주석
+_NUMBERING = re.compile(r"^(?:\(\d+\)|(?:[IVXⅠ-Ⅻ]+|\d+|[가나다라마바사아자차카타파하])[.)])")
+_NOTE = re.compile(r"\((?:주석|주)[\d,.\s]*\)$")
+_MINUS_SIGNS = ("−", "－")
+_MAX_AMOUNT = 1e18
+
+
+def clean_name(name: str) -> str:
+    """Strip whitespace, leading numbering and trailing note references."""
+    name = _WHITESPACE.sub("", name)
+    name = _NUMBERING.sub("", name)
+    return _NOTE.sub("", name)
+
+
+def _as_string_array(values: Iterable) -> pa.ChunkedArray:
+    if isinstance(values, pd.Series):
+        array = pa.chunked_array([pa.array(values, from_pandas=True)])
+    elif isinstance(values, (pa.Array, pa.ChunkedArray)):
+        array = values if isinstance(values, pa.ChunkedArray) else pa.chunked_array([values])
+    else:
+        array = pa.chunked_array([pa.array(list(values), from_pandas=True)])
+    if pa.types.is_dictionary(array.type):
+        array = array.cast(array.type.value_type)
+    return array.cast(pa.string())
+
+
+def parse_amounts(values: Iterable) -> pd.Series:
+    """Parse DART amount strings into a nullable ``Int64`` series.
+
+    Same rules as :func:`full_statements.parse_amount`: thousands
+    separators are dropped, ``"(1,234)"`` and ``"-1234"`` are negative,
+    blanks, ``"-"`` and anything unparsable are <NA>, and decimals are
+    truncated. A leading ``"+"`` is ignored. Amounts of 10**18 or more do
+    not fit ``Int64`` safely and are <NA> as well. Numeric input is
+    rounded toward zero and cast directly.
+    """
+    index = values.index if isinstance(values, pd.Series) else None
+    name = values.name if isinstance(values, pd.Series) else None
+    if isinstance(values, pd.Series) and pd.api.types.is_numeric_dtype(values.dtype):
+        return np.trunc(values.astype("Float64")).astype("Int64")
+
+    text = pc.utf8_trim_whitespace(_as_string_array(values))
+    text = pc.replace_substring(text, ",", "")
+    for sign in _MINUS_SIGNS:
+        text = pc.replace_substring(text, sign, "-")
+    negative = pc.fill_null(pc.match_substring_regex(text, r"^\(.*\)$"), False)
+    text = pc.if_else(negative, pc.utf8_slice_codeunits(text, 1, -1), text)
+    # int64 캐스트는 "+5"를 받지 않으므로 부호를 먼저 뗀다.
+    text = pc.replace_substring_regex(text, r"^\+", "")
+    null = pa.scalar(None, pa.string())
+    # 18자리까지는 항상 int64 범위 안이다. 그보다 긴 값은 캐스트 오류 대신 <NA>로 둔다.
+    integers = pc.cast(pc.if_else(pc.match_substring_regex(text, r"^-?\d{1,18}$"), text, null), pa.int64())
+    decimals = pc.if_else(pc.match_substring_regex(text, r"^-?(\d+\.\d*|\.\d+)([eE][+-]?\d+)?$"), text, null)
+    decimals = pc.trunc(pc.cast(decimals, pa.float64()))
+    decimals = pc.if_else(pc.less(pc.abs(decimals), _MAX_AMOUNT), decimals, pa.scalar(None, pa.float64()))
+    decimals = pc.cast(decimals, pa.int64())
+    amounts = pc.coalesce(integers, decimals)
+    amounts = pc.if_else(negative, pc.negate(amounts), amounts)
+    result = amounts.to_pandas(types_mapper={pa.int64(): pd.Int64Dtype()}.get)
+    if index is not None:
+        result.index = index
+    return result.rename(name)
+
+
+class AccountNormalizer:
+    """Map raw account names to canonical accounts, one lookup per unique name."""
+
+    def __init__(
+        self,
+        rules: Sequence[AccountRule] = ACCOUNT_RULES,
+        account_ids: Optional[Mapping[str, str]] = ACCOUNT_IDS,
+    ) -> None:
+        self.rules = list(rules)
+        self.accounts = list(dict.fromkeys(rule.account for rule in self.rules))
+        self.account_ids = dict(account_ids or {})
+        self._code = {account: i for i, account in enumerate(self.accounts)}
+        self._exact: Dict[str, int] = {}
+        self._patterns: List[Tuple[re.Pattern, int]] = []
+        for rule in self.rules:
+            code = self._code[rule.account]
+            for alias in rule.aliases:
+                self._exact.setdefault(clean_name(alias), code)
+            self._patterns.extend((re.compile(p), code) for p in rule.patterns)
+        self._statements = {self._code[rule.account]: rule.statements for rule in self.rules}
+        # 한 번 판정한 계정명은 다음 호출에서도 다시 정규식을 돌리지 않는다.
+        self._memo: Dict[str, int] = {}
+
+    def lookup(self, name: Optional[str]) -> Optional[str]:
+        """Canonical account for one name, or None."""
+        code = self._resolve(name)
+        return self.accounts[code] if code >= 0 else None
+
+    def _resolve(self, name: Optional[str]) -> int:
+        if not isinstance(name, str):
+            return -1
+        code = self._memo.get(name)
+        if code is None:
+            cleaned = clean_name(name)
+            code = self._exact.get(cleaned, -1)
+            if code < 0:
+                code = next((c for pattern, c in self._patterns if pattern.search(cleaned)), -1)
+            self._memo[name] = code
+        return code
+
+    def codes(self, names: Iterable) -> np.ndarray:
+        """Canonical account codes (-1 for unmapped), resolving each unique name once."""
+        codes, uniques = pd.factorize(pd.Series(names) if not isinstance(names, pd.Series) else names)
+        lookup = np.fromiter((self._resolve(u) for u in uniques), dtype=np.int32, count=len(uniques))
+        # factorize는 결측값을 -1로 주므로 끝에 -1을 하나 붙여 그대로 unmapped가 되게 한다.
+        return np.append(lookup, -1)[codes]
+
+    def _id_codes(self, ids: pd.Series) -> np.ndarray:
+        codes, uniques = pd.factorize(ids)
+        lookup = np.array(
+            [self._code.get(self.account_ids.get(u), -1) if isinstance(u, str) else -1 for u in uniques],
+            dtype=np.int32,
+        )
+        return np.append(lookup, -1)[codes]
+
+    def _allowed(self, codes: np.ndarray, sj_divs: pd.Series) -> np.ndarray:
+        """True where the mapped account may appear in the row's statement (sj_div)."""
+        sj_codes, sj_uniques = pd.factorize(sj_divs)
+        table = np.zeros((len(self.accounts) + 1, len(sj_uniques) + 1), dtype=bool)
+        for code, statements in self._statements.items():
+            for j, sj in enumerate(sj_uniques):
+                table[code, j] = sj in statements
+        return table[codes, sj_codes]
+
+    def map_names(self, names: Iterable) -> pd.Categorical:
+        """Canonical accounts as a categorical (NaN where unmapped)."""
+        return pd.Categorical.from_codes(self.codes(names), categories=self.accounts)
+
+    def normalize(
+        self,
+        df: pd.DataFrame,
+        amount_cols: Sequence[str] = AMOUNT_COLUMNS,
+        name_col: str = "account_nm",
+        keep_unmapped: bool = False,
+    ) -> pd.DataFrame:
+        """Add a categorical ``account`` column and parse amount columns to ``Int64``.
+
+        ``account_id`` is used before ``account_nm`` when present. Rows whose
+        account is not allowed in their ``sj_div`` (e.g. ``자본총계`` in the
+        statement of changes in equity) count as unmapped, and unmapped rows
+        are dropped unless ``keep_unmapped`` is set.
+        """
+        codes = self.codes(df[name_col])
+        if "account_id" in df.columns and self.account_ids:
+            by_id = self._id_codes(df["account_id"])
+            codes = np.where(by_id >= 0, by_id, codes)
+        if "sj_div" in df.columns:
+            codes = np.where(self._allowed(codes, df["sj_div"]), codes, -1)
+        mask = codes >= 0
+        out = df if keep_unmapped else df[mask]
+        codes = codes if keep_unmapped else codes[mask]
+        out = out.assign(account=pd.Categorical.from_codes(codes, categories=self.accounts))
+        for column in amount_cols:
+            if column in out.columns:
+                out[column] = parse_amounts(out[column])
+        return out.reset_index(drop=True)
+
+    def unmapped(self, df: pd.DataFrame, name_col: str = "account_nm") -> pd.Series:
+        """Counts of account names the rules do not map, most frequent first."""
+        codes = self.codes(df[name_col])
+        return df.loc[codes < 0, name_col].value_counts()
+
+
+def to_wide(
+    normalized: pd.DataFrame,
+    index: Sequence[str] = WIDE_INDEX,
+    value: str = "thstrm_amount",
+) -> pd.DataFrame:
+    """Pivot normalized rows into one column per canonical account.
+
+    When an account appears more than once for a key (IS and CIS both
+    report 당기순이익, or two aliases), the first row wins in the order
+    BS, IS, CIS, CF, then by ``ord``.
+    """
+    index = [c for c in index if c in normalized.columns]
+    order = [c for c in ("sj_div", "ord") if c in normalized.columns]
+    rows = normalized[index + ["account", value] + order]
+    if order:
+        sort_keys = []
+        if "sj_div" in order:
+            rank = {"BS": 0, "IS": 1, "CIS": 2, "CF": 3}
+            sort_keys.append(rows["sj_div"].astype(object).map(rank).fillna(len(rank)).rename("_sj"))
+        if "ord" in order:
+            sort_keys.append(pd.to_numeric(rows["ord"], errors="coerce").rename("_ord"))
+        rows = rows.iloc[np.lexsort([k.to_numpy() for k in reversed(sort_keys)])]
+    rows = rows.drop_duplicates(index + ["account"], keep="first")
+    wide = rows.set_index(index + ["account"])[value].unstack("account")
+    wide.columns = wide.columns.astype(str)
+    wide.columns.name = None
+    return wide.reset_index()
+
+
+__all__ = [
+    "ACCOUNT_IDS",
+    "ACCOUNT_RULES",
+    "AMOUNT_COLUMNS",
+    "AccountNormalizer",
+    "AccountRule",
+    "clean_name",
+    "parse_amounts",
+    "to_wide",
+]
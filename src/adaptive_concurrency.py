@@ -0,0 +1,149 @@
+"""AIMD (additive-increase / multiplicative-decrease) concurrency control.
+
+The controller caps the number of in-flight requests. While responses are
+fast and error-free the cap grows by about one request per round trip;
+when DART throttles us (HTTP 429, quota messages) or requests time out, the
+cap is cut in half, at most once per cooldown window.
+"""
+
+from __future__ import annotations
+
+import asyncio
+import time
+from contextlib import asynccontextmanager
+from dataclasses import dataclass
+from typing import AsyncIterator, Optional
+
+
+@dataclass
+class ConcurrencyReport:
+    final_limit: int
+    peak_limit: int
+    mean_limit: float
+    increases: int
+    decreases: int
+    latency_ewma: Optional[float]
+
+    def __str__(self) -> str:
+        latency = f"{self.latency_ewma * 1000:.0f}ms" if self.latency_ewma else "-"
+        return (
+            f"최종 {self.final_limit} / 최대 {self.peak_limit} / 평균 {self.mean_limit:.1f} "
+            f"(증가 {self.increases}회, 감소 {self.decreases}회, 평균 지연 {latency})"
+        )
+
+
+class AdaptiveConcurrency:
+    """Async slot limiter whose limit follows an AIMD policy."""
+
+    def __init__(
+        self,
+        initial: int = 5,
+        min_limit: int = 1,
+        max_limit: int = 50,
+        decrease_factor: float = 0.5,
+        latency_tolerance: float = 2.0,
+        error_threshold: float = 0.2,
+        cooldown: float = 2.0,
+    ) -> None:
+        self.min_limit = min_limit
+        self.max_limit = max(max_limit, min_limit)
+        self.limit = float(min(max(initial, min_limit), self.max_limit))
+        self.decrease_factor = decrease_factor
+        self.latency_tolerance = latency_tolerance
+        self.error_threshold = error_threshold
+        self.cooldown = cooldown
+
+        self._inflight = 0
+        self._cond: Optional[asyncio.Condition] = None
+        self._last_decrease = 0.0
+        self._min_latency: Optional[float] = None
+        self._latency_ewma: Optional[float] = None
+        self._error_ewma = 0.0
+        self._peak = int(self.limit)
+        self._limit_sum = 0.0
+        self._samples = 0
+        self._increases = 0
+        self._decreases = 0
+
+    @property
+    def current(self) -> int:
+        return max(self.min_limit, int(self.limit))
+
+    @property
+    def inflight(self) -> int:
+        return self._inflight
+
+    @asynccontextmanager
+    async def slot(self) -> AsyncIterator[None]:
+        """Hold one in-flight slot for the duration of the block."""
+        if self._cond is None:
+            self._cond = asyncio.Condition()
+        async with self._cond:
+            await self._cond.wait_for(lambda: self._inflight < self.current)
+            self._inflight += 1
+        try:
+            yield
+        finally:
+            async with self._cond:
+                self._inflight -= 1
+                self._cond.notify_all()
+
+    def record_success(self, latency: float) -> None:
+        """Record a healthy response and grow the limit if latency allows."""
+        self._observe_latency(latency)
+        self._error_ewma *= 0.9
+        healthy = (
+            self._latency_ewma <= self._min_latency * self.latency_tolerance
+            and self._error_ewma < self.error_threshold
+        )
+        # 한도가 실제로 사용 중일 때만 늘린다 (유휴 상태에서의 무한 증가 방지).
+        if healthy and self._inflight >= self.current - 1 and self.limit < self.max_limit:
+            before = self.current
+            self.limit = min(float(self.max_limit), self.limit + 1.0 / self.limit)
+            if self.current > before:
+                self._increases += 1
+        self._sample()
+
+    def record_error(self) -> None:
+        """Record a failure that is not a sign of overload (e.g. a parse error)."""
+        self._error_ewma = 0.9 * self._error_ewma + 0.1
+        self._sample()
+
+    def record_overload(self) -> None:
+        """Record throttling or a timeout and cut the limit multiplicatively."""
+        self._error_ewma = 0.9 * self._error_ewma + 0.1
+        now = time.monotonic()
+        if now - self._last_decrease >= self.cooldown:
+            self._last_decrease = now
+            before = self.current
+            self.limit = max(float(self.min_limit), self.limit * self.decrease_factor)
+            if self.current < before:
+                self._decreases += 1
+        self._sample()
+
+    def report(self) -> ConcurrencyReport:
+        mean = self._limit_sum / self._samples if self._samples else self.limit
+        return ConcurrencyReport(
+            final_limit=self.current,
+            peak_limit=self._peak,
+            mean_limit=mean,
+            increases=self._increases,
+            decreases=self._decreases,
+            latency_ewma=self._latency_ewma,
+        )
+
+    def _observe_latency(self, latency: float) -> None:
+        if self._min_latency is None or latency < self._min_latency:
+            self._min_latency = latency
+        if self._latency_ewma is None:
+            self._latency_ewma = latency
+        else:
+            self._latency_ewma = 0.8 * self._latency_ewma + 0.2 * latency
+
+    def _sample(self) -> None:
+        self._peak = max(self._peak, self.current)
+        self._limit_sum += self.limit
+        self._samples += 1
+
+
+__all__ = ["AdaptiveConcurrency", "ConcurrencyReport"]
@@ -0,0 +1,141 @@
+"""Daily-quota-aware planning for long backfills.
+
+A full corp x year x fs_div backfill needs more requests than one day's
+DART quota allows. The planner reads the unfinished keys from the
+checkpoint store, estimates the remaining request cost (one request per
+key), orders the keys by how much they matter for modelling and hands out
+only as many as today's budget covers:
+
+1. delisted firms (``data/raw/상장폐지기업_v2.csv``), the positive class,
+2. the most recent business years,
+3. consolidated (CFS) statements before separate (OFS) ones.
+
+With an :class:`FsDivProfile`, keys predicted to be empty (a variant the
+company has never filed in other years) go to the back of the queue.
+
+:func:`wait_for_quota_reset` sleeps until the quota resets at KST midnight
+so a run can pick up the next day's slice on its own.
+"""
+
+from __future__ import annotations
+
+import asyncio
+import math
+from dataclasses import dataclass, field
+from datetime import datetime, timedelta
+from pathlib import Path
+from typing import Iterable, List, Optional, Set
+
+import pandas as pd
+
+try:
+    from .checkpoint_store import CheckpointStore, TaskKey
+    from .corp_code_index import CorpCodeIndex, get_corp_code_index
+    from .fs_div_profile import FsDivProfile
+    from .rate_limiter import KST, seconds_until_quota_reset
+except ImportError:  # ``src``가 sys.path에 직접 추가된 경우
+    from checkpoint_store import CheckpointStore, TaskKey
+    from corp_code_index import CorpCodeIndex, get_corp_code_index
+    from fs_div_profile import FsDivProfile
+    from rate_limiter import KST, seconds_until_quota_reset
+
+DELISTED_PATH = Path(__file__).resolve().parent.parent / "data" / "raw" / "상장폐지기업_v2.csv"
+
+
+def load_delisted_corp_codes(
+    path: Path = DELISTED_PATH,
+    index: Optional[CorpCodeIndex] = None,
+) -> Set[str]:
+    """Map the delisted-firm list (종목코드, 회사명) to DART corp codes.
+
+    Stock codes lost their leading zeros in the CSV and are padded back;
+    firms whose stock code is no longer in the index are matched by name.
+    """
+    path = Path(path)
+    if not path.exists():
+        return set()
+    delisted = pd.read_csv(path, dtype=str)
+    index = index or get_corp_code_index()
+    stock_map = index.stock_map()
+    frame = index.frame()
+    name_map = dict(zip(frame["corp_name"], frame["corp_code"]))
+
+    corp_codes = set()
+    for stock_code, name in zip(delisted["종목코드"].fillna(""), delisted["회사명"].fillna("")):
+        corp_code = stock_map.get(stock_code.strip().zfill(6)) or name_map.get(name.strip())
+        if corp_code:
+            corp_codes.add(corp_code)
+    return corp_codes
+
+
+@dataclass
+class BackfillPlan:
+    pending: int
+    budget_today: Optional[int]
+    daily_budget: Optional[int]
+    delisted_pending: int = 0
+    scheduled: List[TaskKey] = field(default_factory=list)
+
+    @property
+    def days_needed(self) -> int:
+        """Days until the backfill is done, counting today."""
+        if not self.pending:
+            return 0
+        if self.budget_today is None or not self.daily_budget:
+            return 1
+        rest = max(0, self.pending - self.budget_today)
+        return (1 if self.budget_today else 0) + math.ceil(rest / self.daily_budget)
+
+    def __str__(self) -> str:
+        budget = "무제한" if self.budget_today is None else f"{self.budget_today:,}회"
+        finish = datetime.now(KST).date() + timedelta(days=max(0, self.days_needed - 1))
+        return (
+            f"남은 요청 약 {self.pending:,}회 (상장폐지 기업 {self.delisted_pending:,}회) / "
+            f"오늘 남은 한도 {budget} → 오늘 {len(self.scheduled):,}건 처리, "
+            f"예상 {self.days_needed}일 소요 (완료 예정 {finish:%Y-%m-%d})"
+        )
+
+
+def plan_backfill(
+    store: CheckpointStore,
+    budget_today: Optional[int],
+    daily_budget: Optional[int],
+    years: Optional[Iterable[int]] = None,
+    delisted: Optional[Set[str]] = None,
+    profile: Optional[FsDivProfile] = None,
+) -> BackfillPlan:
+    """Order the unfinished keys by priority and schedule what fits today."""
+    delisted = delisted or set()
+    keys = list(store.pending(years=years))
+
+    def priority(key: TaskKey):
+        corp_code, year, reprt_code, fs_div = key
+        likely_empty = profile is not None and profile.likely_empty(corp_code, year, fs_div, reprt_code)
+        return (likely_empty, corp_code not in delisted, -int(year), fs_div != "CFS", corp_code)
+
+    keys.sort(key=priority)
+    plan = BackfillPlan(
+        pending=len(keys),
+        budget_today=budget_today,
+        daily_budget=daily_budget,
+        delisted_pending=sum(1 for key in keys if key[0] in delisted),
+    )
+    plan.scheduled = keys if budget_today is None else keys[:max(0, budget_today)]
+    return plan
+
+
+async def wait_for_quota_reset(margin: float = 60.0) -> None:
+    """Sleep until shortly after the daily quota resets (KST midnight)."""
+    delay = seconds_until_quota_reset() + margin
+    resume_at = datetime.now(KST) + timedelta(seconds=delay)
+    print(f"⏳ 일일 한도 초기화 대기: {resume_at:%Y-%m-%d %H:%M} (KST)에 자동으로 이어서 수집합니다")
+    await asyncio.sleep(delay)
+
+
+__all__ = [
+    "BackfillPlan",
+    "DELISTED_PATH",
+    "load_delisted_corp_codes",
+    "plan_backfill",
+    "wait_for_quota_reset",
+]
@@ -1,4 +1,3 @@
-import pandas as pd
 from sklearn.model_selection import train_test_split
 from sklearn.metrics import accuracy_score
 from sklearn.linear_model import LogisticRegression
@@ -8,14 +7,25 @@ import torch
 from torch import nn
 from torch.utils.data import DataLoader, TensorDataset
 
+try:
+    from .feature_store import open_panel
+except ImportError:  # ``src``가 sys.path에 직접 추가된 경우
+    from feature_store import open_panel
+
 
 def load_dataset(path: str):
-    """Load dataset from an Excel file. The file must contain a 'target' column."""
-    df = pd.read_excel(path)
-    if 'target' not in df.columns:
-        raise ValueError("Excel file must contain a 'target' column")
-    X = df.drop('target', axis=1).values
-    y = df['target'].values
+    """Load dataset from an Excel/CSV file or a feature store directory.
+
+    The data must contain a 'target' column. A file is converted once into a
+    memory-mapped feature store next to it, so later runs skip parsing the
+    spreadsheet. Numeric columns other than 'target' become float32 features.
+    """
+    store = open_panel(path)
+    if 'target' not in store.columns:
+        raise ValueError("Dataset must contain a 'target' column")
+    features = [c for c in store.numeric_columns() if c != 'target']
+    X = store.to_numpy(features)
+    y = store.arrays(['target'])['target']
     X_train, X_test, y_train, y_test = train_test_split(
         X, y, test_size=0.2, random_state=42
     )
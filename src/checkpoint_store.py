@@ -0,0 +1,225 @@
+"""Indexed checkpoint store for resumable DART downloads.
+
+Each (corp_code, bsns_year, reprt_code, fs_div) key has a status row in an
+SQLite database running in WAL mode. Status updates are queued and written
+by a background thread in batched transactions, so the event loop never
+waits on disk I/O. Resuming is an indexed query for the unfinished keys.
+"""
+
+from __future__ import annotations
+
+import queue
+import sqlite3
+import threading
+import time
+from pathlib import Path
+from typing import Dict, Iterable, Iterator, Optional, Tuple
+
+DEFAULT_CHECKPOINT_PATH = (
+    Path(__file__).resolve().parent.parent / "data" / "cache" / "checkpoints.sqlite"
+)
+
+PENDING = "pending"
+DONE = "done"
+EMPTY = "empty"  # 요청은 성공했지만 데이터가 없는 경우 (status 013)
+FAILED = "failed"
+FINISHED_STATUSES = (DONE, EMPTY)
+
+TaskKey = Tuple[str, int, str, str]  # corp_code, bsns_year, reprt_code, fs_div
+
+_SCHEMA = """
+CREATE TABLE IF NOT EXISTS tasks (
+    corp_code TEXT NOT NULL,
+    bsns_year INTEGER NOT NULL,
+    reprt_code TEXT NOT NULL,
+    fs_div TEXT NOT NULL,
+    status TEXT NOT NULL DEFAULT 'pending',
+    rows INTEGER NOT NULL DEFAULT 0,
+    attempts INTEGER NOT NULL DEFAULT 0,
+    updated_at REAL,
+    PRIMARY KEY (corp_code, bsns_year, reprt_code, fs_div)
+) WITHOUT ROWID;
+CREATE INDEX IF NOT EXISTS idx_tasks_status ON tasks (status, bsns_year);
+CREATE TABLE IF NOT EXISTS meta (
+    key TEXT PRIMARY KEY,
+    value TEXT
+);
+"""
+
+_UPSERT = """
+INSERT INTO tasks (corp_code, bsns_year, reprt_code, fs_div, status, rows, attempts, updated_at)
+VALUES (?, ?, ?, ?, ?, ?, 1, ?)
+ON CONFLICT (corp_code, bsns_year, reprt_code, fs_div) DO UPDATE SET
+    status = excluded.status,
+    rows = excluded.rows,
+    attempts = tasks.attempts + 1,
+    updated_at = excluded.updated_at
+"""
+
+
+class CheckpointStore:
+    """Track per-key download status with background batched writes."""
+
+    def __init__(
+        self,
+        path: Path = DEFAULT_CHECKPOINT_PATH,
+        batch_size: int = 500,
+        flush_interval: float = 1.0,
+    ) -> None:
+        self.path = Path(path)
+        self.path.parent.mkdir(parents=True, exist_ok=True)
+        self.batch_size = batch_size
+        self.flush_interval = flush_interval
+        self._conn = self._connect()
+        self._conn.executescript(_SCHEMA)
+        self._conn.commit()
+        self._queue: "queue.Queue" = queue.Queue()
+        self._error: Optional[BaseException] = None
+        self._writer = threading.Thread(target=self._write_loop, name="checkpoint-writer", daemon=True)
+        self._writer.start()
+
+    def _connect(self) -> sqlite3.Connection:
+        conn = sqlite3.connect(str(self.path), timeout=30)
+        conn.execute("PRAGMA journal_mode=WAL")
+        conn.execute("PRAGMA synchronous=NORMAL")
+        return conn
+
+    # ----- reads (caller thread) -----
+
+    def seed(self, keys: Iterable[TaskKey]) -> int:
+        """Register keys as pending unless they are already known."""
+        before = self._conn.total_changes
+        with self._conn:
+            self._conn.executemany(
+                "INSERT OR IGNORE INTO tasks (corp_code, bsns_year, reprt_code, fs_div) VALUES (?, ?, ?, ?)",
+                ((c, int(y), r, f) for c, y, r, f in keys),
+            )
+        return self._conn.total_changes - before
+
+    def pending(
+        self,
+        years: Optional[Iterable[int]] = None,
+        include_failed: bool = True,
+        chunk_size: int = 10_000,
+    ) -> Iterator[TaskKey]:
+        """Yield unfinished keys using the status index."""
+        statuses = [PENDING, FAILED] if include_failed else [PENDING]
+        sql = (
+            "SELECT corp_code, bsns_year, reprt_code, fs_div FROM tasks "
+            f"WHERE status IN ({','.join('?' * len(statuses))})"
+        )
+        args: list = list(statuses)
+        if years is not None:
+            years = [int(y) for y in years]
+            sql += f" AND bsns_year IN ({','.join('?' * len(years))})"
+            args += years
+        cursor = self._conn.execute(sql, args)
+        while True:
+            rows = cursor.fetchmany(chunk_size)
+            if not rows:
+                return
+            for row in rows:
+                yield row
+
+    def counts(self) -> Dict[str, int]:
+        """Return the number of keys in each status."""
+        return dict(self._conn.execute("SELECT status, COUNT(*) FROM tasks GROUP BY status"))
+
+    def get_meta(self, key: str, default: Optional[str] = None) -> Optional[str]:
+        row = self._conn.execute("SELECT value FROM meta WHERE key = ?", (key,)).fetchone()
+        return row[0] if row else default
+
+    def set_meta(self, key: str, value: str) -> None:
+        with self._conn:
+            self._conn.execute("INSERT OR REPLACE INTO meta (key, value) VALUES (?, ?)", (key, value))
+
+    def requeue(self, keys: Iterable[TaskKey]) -> int:
+        """Mark already known keys as pending again; unknown keys are ignored."""
+        self.flush()
+        before = self._conn.total_changes
+        with self._conn:
+            self._conn.executemany(
+                "UPDATE tasks SET status = ?, updated_at = ? "
+                "WHERE corp_code = ? AND bsns_year = ? AND reprt_code = ? AND fs_div = ?",
+                ((PENDING, time.time(), c, int(y), r, f) for c, y, r, f in keys),
+            )
+        return self._conn.total_changes - before
+
+    def reset(self) -> None:
+        """Forget every key."""
+        self.flush()
+        with self._conn:
+            self._conn.execute("DELETE FROM tasks")
+
+    # ----- writes (background thread) -----
+
+    def mark(self, key: TaskKey, status: str, rows: int = 0) -> None:
+        """Queue a status update; it is committed by the writer thread."""
+        if self._error is not None:
+            raise RuntimeError("checkpoint writer failed") from self._error
+        corp_code, year, reprt_code, fs_div = key
+        self._queue.put((corp_code, int(year), reprt_code, fs_div, status, rows, time.time()))
+
+    def flush(self) -> None:
+        """Block until every queued update has been committed."""
+        done = threading.Event()
+        self._queue.put(done)
+        done.wait()
+        if self._error is not None:
+            raise RuntimeError("checkpoint writer failed") from self._error
+
+    def close(self) -> None:
+        self._queue.put(None)
+        self._writer.join()
+        self._conn.close()
+        if self._error is not None:
+            raise RuntimeError("checkpoint writer failed") from self._error
+
+    def __enter__(self) -> "CheckpointStore":
+        return self
+
+    def __exit__(self, *exc) -> None:
+        self.close()
+
+    def _write_loop(self) -> None:
+        conn = self._connect()
+        batch: list = []
+        waiters: list = []
+        stop = False
+        deadline = time.monotonic() + self.flush_interval
+        while not stop:
+            try:
+                item = self._queue.get(timeout=max(0.0, deadline - time.monotonic()))
+            except queue.Empty:
+                item = ...
+            if item is None:
+                stop = True
+            elif isinstance(item, threading.Event):
+                waiters.append(item)
+            elif item is not ...:
+                batch.append(item)
+            if stop or waiters or len(batch) >= self.batch_size or time.monotonic() >= deadline:
+                if batch and self._error is None:
+                    try:
+                        with conn:
+                            conn.executemany(_UPSERT, batch)
+                    except BaseException as e:  # 호출 스레드에서 다시 발생시킨다
+                        self._error = e
+                batch = []
+                for waiter in waiters:
+                    waiter.set()
+                waiters = []
+                deadline = time.monotonic() + self.flush_interval
+        conn.close()
+
+
+__all__ = [
+    "CheckpointStore",
+    "DEFAULT_CHECKPOINT_PATH",
+    "DONE",
+    "EMPTY",
+    "FAILED",
+    "FINISHED_STATUSES",
+    "PENDING",
+    "TaskKey",
+]
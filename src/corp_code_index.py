@@ -0,0 +1,170 @@
+"""Shared, incrementally refreshed index of DART corp codes.
+
+``CORPCODE.xml`` is parsed with ``iterparse`` straight out of the zip
+archive, so neither the decompressed XML nor a full DOM is ever held in
+memory. The result is stored as a small Parquet file together with the
+``modify_date`` watermark of the newest record; later refreshes only upsert
+records whose ``modify_date`` moved past it. Each process loads the index
+once and memoizes it, so corp-name lookups are free after the first call.
+"""
+
+from __future__ import annotations
+
+import io
+import threading
+import time
+import xml.etree.ElementTree as ET
+import zipfile
+from pathlib import Path
+from typing import IO, Dict, Iterator, Optional, Union
+
+import pandas as pd
+import pyarrow as pa
+import pyarrow.parquet as pq
+
+DEFAULT_INDEX_PATH = Path(__file__).resolve().parent.parent / "data" / "cache" / "corp_codes.parquet"
+INDEX_COLUMNS = ["corp_code", "corp_name", "corp_eng_name", "stock_code", "corp_cls", "modify_date"]
+# 기업 코드 목록은 하루에 한 번 갱신하면 충분하다.
+DEFAULT_MAX_AGE = 24 * 60 * 60
+
+_META_WATERMARK = b"modify_date_watermark"
+_META_REFRESHED = b"refreshed_at"
+
+ZipSource = Union[bytes, str, Path, IO[bytes]]
+
+
+def iter_corp_codes(source: ZipSource, since: Optional[str] = None) -> Iterator[Dict[str, Optional[str]]]:
+    """Stream records from a ``CORPCODE.zip`` archive.
+
+    ``source`` is the archive as bytes, a path, or a seekable binary file.
+    When ``since`` (``YYYYMMDD``) is given, records modified before that day
+    are skipped without building a dict for them. Records from the
+    watermark day itself are kept, since it may have been only partly seen.
+    """
+    if isinstance(source, (bytes, bytearray)):
+        source = io.BytesIO(source)
+    with zipfile.ZipFile(source) as zf:
+        name = next((n for n in zf.namelist() if n.upper().endswith(".XML")), "CORPCODE.xml")
+        with zf.open(name) as xml_stream:
+            for _, elem in ET.iterparse(xml_stream, events=("end",)):
+                if elem.tag != "list":
+                    continue
+                modify_date = (elem.findtext("modify_date") or "").strip() or None
+                if since is None or (modify_date or "") >= since:
+                    record = {}
+                    for column in INDEX_COLUMNS:
+                        text = elem.findtext(column)
+                        record[column] = (text.strip() or None) if text is not None else None
+                    yield record
+                # 처리한 요소는 바로 비워 메모리를 일정하게 유지한다.
+                elem.clear()
+
+
+class CorpCodeIndex:
+    """Columnar corp-code table with a ``modify_date`` watermark."""
+
+    def __init__(self, path: Path = DEFAULT_INDEX_PATH) -> None:
+        self.path = Path(path)
+        self._lock = threading.Lock()
+        self._frame: Optional[pd.DataFrame] = None
+        self._name_map: Optional[Dict[str, str]] = None
+        self._stock_map: Optional[Dict[str, str]] = None
+        self.watermark: Optional[str] = None
+        self.refreshed_at: Optional[float] = None
+        if self.path.exists():
+            metadata = pq.read_schema(self.path).metadata or {}
+            self.watermark = metadata.get(_META_WATERMARK, b"").decode() or None
+            refreshed = metadata.get(_META_REFRESHED)
+            self.refreshed_at = float(refreshed) if refreshed else None
+
+    @property
+    def exists(self) -> bool:
+        return self.path.exists()
+
+    def is_stale(self, max_age: float = DEFAULT_MAX_AGE) -> bool:
+        return self.refreshed_at is None or time.time() - self.refreshed_at > max_age
+
+    def frame(self) -> pd.DataFrame:
+        """Return the whole index; read from disk only on first use."""
+        with self._lock:
+            if self._frame is None:
+                if self.path.exists():
+                    self._frame = pq.read_table(self.path).to_pandas()
+                else:
+                    self._frame = pd.DataFrame(columns=INDEX_COLUMNS, dtype=object)
+            return self._frame
+
+    def name_map(self) -> Dict[str, str]:
+        """Memoized ``corp_code -> corp_name`` mapping."""
+        if self._name_map is None:
+            df = self.frame()
+            self._name_map = dict(zip(df["corp_code"], df["corp_name"]))
+        return self._name_map
+
+    def stock_map(self) -> Dict[str, str]:
+        """Memoized ``stock_code -> corp_code`` mapping for listed firms."""
+        if self._stock_map is None:
+            df = self.frame()
+            listed = df[df["stock_code"].notna()]
+            self._stock_map = dict(zip(listed["stock_code"], listed["corp_code"]))
+        return self._stock_map
+
+    def update(self, source: ZipSource) -> int:
+        """Upsert records changed since the watermark; return how many changed."""
+        changed = pd.DataFrame(list(iter_corp_codes(source, since=self.watermark)), columns=INDEX_COLUMNS)
+        current = self.frame()
+        with self._lock:
+            if not changed.empty:
+                merged = pd.concat([current, changed], ignore_index=True)
+                merged = merged.drop_duplicates("corp_code", keep="last").reset_index(drop=True)
+                watermark = merged["modify_date"].dropna().max()
+                self.watermark = watermark if isinstance(watermark, str) else self.watermark
+            else:
+                merged = current
+            self.refreshed_at = time.time()
+            self._write(merged)
+            self._frame = merged
+            self._name_map = None
+            self._stock_map = None
+        return len(changed)
+
+    def _write(self, df: pd.DataFrame) -> None:
+        table = pa.Table.from_pandas(df[INDEX_COLUMNS].astype(object), preserve_index=False)
+        table = table.cast(pa.schema([(c, pa.string()) for c in INDEX_COLUMNS]))
+        table = table.replace_schema_metadata({
+            _META_WATERMARK: (self.watermark or "").encode(),
+            _META_REFRESHED: repr(self.refreshed_at).encode(),
+        })
+        self.path.parent.mkdir(parents=True, exist_ok=True)
+        tmp = self.path.with_suffix(".tmp")
+        pq.write_table(table, tmp, compression="zstd")
+        tmp.replace(self.path)
+
+
+_INDEXES: Dict[Path, CorpCodeIndex] = {}
+_INDEXES_LOCK = threading.Lock()
+
+
+def get_corp_code_index(path: Path = DEFAULT_INDEX_PATH) -> CorpCodeIndex:
+    """Return the per-process index for ``path``."""
+    path = Path(path).resolve()
+    with _INDEXES_LOCK:
+        if path not in _INDEXES:
+            _INDEXES[path] = CorpCodeIndex(path)
+        return _INDEXES[path]
+
+
+def corp_name_map(path: Path = DEFAULT_INDEX_PATH) -> Dict[str, str]:
+    """Shortcut for ``get_corp_code_index(path).name_map()``."""
+    return get_corp_code_index(path).name_map()
+
+
+__all__ = [
+    "CorpCodeIndex",
+    "DEFAULT_INDEX_PATH",
+    "DEFAULT_MAX_AGE",
+    "INDEX_COLUMNS",
+    "corp_name_map",
+    "get_corp_code_index",
+    "iter_corp_codes",
+]
@@ -1,37 +1,288 @@
-"""DART API client for fetching Samsung Electronics data."""
+"""DART API client for looking up companies and fetching their statements.
+
+Company records come from the shared corp-code index (see
+:mod:`corp_code_index`), which is downloaded at most once a day and then
+memoized per process. :class:`CorpLookup` resolves a corp_code, stock_code
+or corp_name to its record in O(1) and supports prefix search on names.
+Statements for any list of companies are fetched over one pooled
+``requests.Session``, with the same retry policy and circuit breaker as the
+async downloaders. The Samsung Electronics helpers are kept as thin
+wrappers.
+"""
 
 from __future__ import annotations
 
-import io
+import bisect
 import os
-import zipfile
-from typing import Any, Dict
+import re
+import tempfile
+import threading
+from concurrent.futures import ThreadPoolExecutor
+from dataclasses import dataclass
+from typing import Any, Dict, Iterable, List, Optional, Tuple
 from pathlib import Path
-from xml.etree import ElementTree
 
 import pandas as pd
 import requests
 from dotenv import load_dotenv
+from requests.adapters import HTTPAdapter
+
+try:
+    from .corp_code_index import CorpCodeIndex, get_corp_code_index
+    from .dart_cache import ResponseCache
+    from .dart_metrics import REQUEST_SECONDS, RESPONSE_BYTES, ROWS_PARSED
+    from .rate_limiter import DEFAULT_DAILY_LIMIT, QuotaExceededError, RateLimiter, shared_state_path
+    from .retry_policy import QUOTA, DartStatusError, FetchFailedError, RetryPolicy, classify_status, get_breaker
+except ImportError:  # ``src``가 sys.path에 직접 추가된 경우
+    from corp_code_index import CorpCodeIndex, get_corp_code_index
+    from dart_cache import ResponseCache
+    from dart_metrics import REQUEST_SECONDS, RESPONSE_BYTES, ROWS_PARSED
+    from rate_limiter import DEFAULT_DAILY_LIMIT, QuotaExceededError, RateLimiter, shared_state_path
+    from retry_policy import QUOTA, DartStatusError, FetchFailedError, RetryPolicy, classify_status, get_breaker
 
 # .env 파일 경로 설정 (src의 상위 디렉토리)
 dotenv_path = Path(__file__).resolve().parent.parent / '.env'
 load_dotenv(dotenv_path)
 
+DART_API_BASE = os.environ.get("DART_API_BASE", "https://opendart.fss.or.kr/api").rstrip("/")
+DART_CORPCODE_URL = f"{DART_API_BASE}/corpCode.xml"
+DART_SINGLE_ACCOUNT_URL = f"{DART_API_BASE}/fnlttSinglAcnt.json"
+# 비동기 다운로더와 같은 API 주소의 회로 차단기를 공유한다.
+REQUEST_RETRY = RetryPolicy(max_attempts=3, base_delay=1.0, max_delay=30.0, breaker=get_breaker(DART_API_BASE))
+
+_CORP_CODE_RE = re.compile(r"^\d{8}$")
+_STOCK_CODE_RE = re.compile(r"^\d{6}$")
+
+
+@dataclass(frozen=True)
+class CorpRecord:
+    corp_code: str
+    corp_name: str
+    stock_code: Optional[str] = None
+    modify_date: Optional[str] = None
+
+    @property
+    def listed(self) -> bool:
+        return bool(self.stock_code)
+
+
+class CorpLookup:
+    """In-memory lookup tables over the corp-code index."""
+
+    def __init__(self, df: pd.DataFrame) -> None:
+        self.by_code: Dict[str, CorpRecord] = {}
+        self.by_stock: Dict[str, CorpRecord] = {}
+        self.by_name: Dict[str, List[CorpRecord]] = {}
+        for corp_code, corp_name, stock_code, modify_date in zip(
+            df["corp_code"], df["corp_name"], df["stock_code"], df["modify_date"]
+        ):
+            record = CorpRecord(
+                corp_code,
+                corp_name or "",
+                stock_code if isinstance(stock_code, str) and stock_code.strip() else None,
+                modify_date if isinstance(modify_date, str) else None,
+            )
+            self.by_code[corp_code] = record
+            if record.stock_code:
+                self.by_stock[record.stock_code] = record
+            self.by_name.setdefault(record.corp_name, []).append(record)
+        # 같은 이름이 여럿이면 상장사를 먼저 돌려준다.
+        for records in self.by_name.values():
+            records.sort(key=lambda r: not r.listed)
+        self._names = sorted(self.by_name)
+
+    def __len__(self) -> int:
+        return len(self.by_code)
+
+    def get(self, query: str) -> Optional[CorpRecord]:
+        """Resolve a corp_code, stock_code or exact corp_name."""
+        query = query.strip()
+        if _CORP_CODE_RE.match(query) and query in self.by_code:
+            return self.by_code[query]
+        if _STOCK_CODE_RE.match(query) and query in self.by_stock:
+            return self.by_stock[query]
+        records = self.by_name.get(query)
+        return records[0] if records else None
+
+    def resolve(self, query: str) -> CorpRecord:
+        """Like :meth:`get` but raise ``ValueError`` if nothing matches."""
+        record = self.get(query)
+        if record is None:
+            raise ValueError(f"{query} not found in DART corp codes")
+        return record
+
+    def search(self, prefix: str, limit: Optional[int] = 20, listed_only: bool = False) -> List[CorpRecord]:
+        """Return records whose corp_name starts with ``prefix``, in name order."""
+        start = bisect.bisect_left(self._names, prefix)
+        results: List[CorpRecord] = []
+        for name in self._names[start:]:
+            if not name.startswith(prefix):
+                break
+            for record in self.by_name[name]:
+                if listed_only and not record.listed:
+                    continue
+                results.append(record)
+                if limit is not None and len(results) >= limit:
+                    return results
+        return results
+
+
+_LOOKUPS: Dict[Tuple[str, Optional[float]], CorpLookup] = {}
+
+
+def refresh_corp_codes(api_key: str, index: Optional[CorpCodeIndex] = None) -> int:
+    """Download CORPCODE.zip and update the shared index; return changed rows."""
+    index = index or get_corp_code_index()
+    with tempfile.SpooledTemporaryFile(max_size=8 * 1024 * 1024) as buffer:
+        with requests.get(DART_CORPCODE_URL, params={"crtfc_key": api_key}, stream=True, timeout=120) as resp:
+            resp.raise_for_status()
+            for chunk in resp.iter_content(64 * 1024):
+                buffer.write(chunk)
+        buffer.seek(0)
+        return index.update(buffer)
+
+
+def get_corp_lookup(api_key: Optional[str] = None, force_refresh: bool = False) -> CorpLookup:
+    """Return the memoized lookup, refreshing the index if it is stale.
+
+    Without an API key a stale index is used as is.
+    """
+    index = get_corp_code_index()
+    if api_key and (force_refresh or index.is_stale()):
+        refresh_corp_codes(api_key, index)
+    key = (str(index.path), index.refreshed_at)
+    if key not in _LOOKUPS:
+        _LOOKUPS.clear()
+        _LOOKUPS[key] = CorpLookup(index.frame())
+    return _LOOKUPS[key]
+
+
 def get_corp_code(api_key: str, corp_name: str = "삼성전자") -> str:
-    """Return the DART corp_code for the given corporation name."""
-    url = f"https://opendart.fss.or.kr/api/corpCode.xml?crtfc_key={api_key}"
-    resp = requests.get(url)
-    resp.raise_for_status()
-    with zipfile.ZipFile(io.BytesIO(resp.content)) as zf:
-        xml_data = zf.read("CORPCODE.xml").decode("utf-8")
-    root = ElementTree.fromstring(xml_data)
-    for item in root.iter("list"):
-        name = item.findtext("corp_name")
-        if name == corp_name:
-            code = item.findtext("corp_code")
-            if code:
-                return code
-    raise ValueError(f"{corp_name} not found in DART corp codes")
+    """Return the DART corp_code for a corporation name or stock code."""
+    return get_corp_lookup(api_key).resolve(corp_name).corp_code
+
+
+def make_session(pool_size: int = 10) -> requests.Session:
+    """Create a session whose connection pool fits ``pool_size`` threads."""
+    session = requests.Session()
+    adapter = HTTPAdapter(pool_connections=1, pool_maxsize=pool_size)
+    session.mount("https://", adapter)
+    session.mount("http://", adapter)
+    return session
+
+
+def _check_status(data: Dict[str, Any]) -> None:
+    """Raise for a DART answer that is neither data (000) nor "no data" (013)."""
+    status, message = data.get("status"), data.get("message", "")
+    kind = classify_status(status, message)
+    if kind == QUOTA:
+        raise QuotaExceededError(f"API daily request limit reached: {message}")
+    if kind is not None:
+        # 800/900은 재시도되고, 키·파라미터 오류는 그대로 호출자에게 올라간다.
+        raise DartStatusError(status, message)
+
+
+def fetch_statements(
+    api_key: str,
+    companies: Iterable[str],
+    years: Iterable[int],
+    reprt_code: str = "11011",
+    max_workers: int = 4,
+    session: Optional[requests.Session] = None,
+    rate_limiter: Optional[RateLimiter] = None,
+    cache: Optional[ResponseCache] = None,
+    lookup: Optional[CorpLookup] = None,
+    retry: RetryPolicy = REQUEST_RETRY,
+) -> pd.DataFrame:
+    """Fetch key accounts for every company and year.
+
+    ``companies`` may mix corp codes, stock codes and corp names, resolved
+    with ``lookup`` (the shared index by default). All requests share one
+    pooled session and the cross-process rate limiter.
+
+    Timeouts, HTTP 429/5xx and DART system errors are retried with
+    ``retry``. A company-year that still fails, or gets a permanent API
+    error, does not stop the others; :class:`FetchFailedError` is raised
+    at the end with the fetched rows in ``result``. A quota answer stops
+    the remaining requests and raises :class:`QuotaExceededError`.
+    """
+    lookup = lookup or get_corp_lookup(api_key)
+    records = [lookup.resolve(c) for c in companies]
+    jobs = [(record, year) for record in records for year in years]
+    if not jobs:
+        return pd.DataFrame()
+
+    owns_session = session is None
+    session = session or make_session(max_workers)
+    rate_limiter = rate_limiter or RateLimiter(
+        max_calls=600,
+        period=60,
+        daily_limit=DEFAULT_DAILY_LIMIT,
+        state_path=shared_state_path(api_key),
+    )
+    failures: Dict[Tuple[str, int], BaseException] = {}
+    quota_errors: List[QuotaExceededError] = []
+    stop = threading.Event()
+
+    def request(params: Dict[str, Any]) -> Dict[str, Any]:
+        rate_limiter.wait_sync()
+        resp = session.get(DART_SINGLE_ACCOUNT_URL, params=params, timeout=30)
+        if not resp.ok:
+            REQUEST_SECONDS.observe(resp.elapsed.total_seconds(), endpoint="fnlttSinglAcnt", status=f"http_{resp.status_code}")
+        resp.raise_for_status()
+        data = resp.json()
+        REQUEST_SECONDS.observe(resp.elapsed.total_seconds(), endpoint="fnlttSinglAcnt", status=str(data.get("status")))
+        RESPONSE_BYTES.inc(len(resp.content), endpoint="fnlttSinglAcnt")
+        _check_status(data)
+        return data
+
+    def fetch_one(job: Tuple[CorpRecord, int]) -> pd.DataFrame:
+        record, year = job
+        params = {
+            "crtfc_key": api_key,
+            "corp_code": record.corp_code,
+            "bsns_year": year,
+            "reprt_code": reprt_code,
+        }
+        data = cache.get(DART_SINGLE_ACCOUNT_URL, params) if cache else None
+        if data is None:
+            data = retry.call_sync(request, params)
+            if cache:
+                cache.put(DART_SINGLE_ACCOUNT_URL, params, data)
+        df = pd.DataFrame(data.get("list", []))
+        if not df.empty:
+            ROWS_PARSED.inc(len(df), endpoint="fnlttSinglAcnt")
+            df["corp_code"] = record.corp_code
+            df["corp_name"] = record.corp_name
+            df["bsns_year"] = year
+        return df
+
+    def run(job: Tuple[CorpRecord, int]) -> pd.DataFrame:
+        if stop.is_set():
+            return pd.DataFrame()
+        try:
+            return fetch_one(job)
+        except QuotaExceededError as e:
+            # 한도를 넘긴 뒤의 요청은 모두 같은 답이므로 나머지는 보내지 않는다.
+            quota_errors.append(e)
+            stop.set()
+        except Exception as e:
+            # 한 요청의 실패로 이미 받은 결과를 버리지 않도록 모아 두었다가 끝에서 알린다.
+            failures[(job[0].corp_code, job[1])] = e
+        return pd.DataFrame()
+
+    try:
+        with ThreadPoolExecutor(max_workers=max(1, max_workers)) as executor:
+            frames = [df for df in executor.map(run, jobs) if not df.empty]
+    finally:
+        if owns_session:
+            session.close()
+    if quota_errors:
+        raise quota_errors[0]
+    result = pd.concat(frames, ignore_index=True) if frames else pd.DataFrame()
+    if failures:
+        raise FetchFailedError(failures, result)
+    return result
 
 
 def fetch_samsung_statements(
@@ -40,18 +291,7 @@ def fetch_samsung_statements(
     reprt_code: str = "11011",
 ) -> pd.DataFrame:
     """Fetch Samsung Electronics financial statements for the given year."""
-    corp_code = get_corp_code(api_key, corp_name="삼성전자")
-    url = "https://opendart.fss.or.kr/api/fnlttSinglAcnt.json"
-    params = {
-        "crtfc_key": api_key,
-        "corp_code": corp_code,
-        "bsns_year": year,
-        "reprt_code": reprt_code,
-    }
-    resp = requests.get(url, params=params)
-    resp.raise_for_status()
-    data: Dict[str, Any] = resp.json()
-    return pd.DataFrame(data.get("list", []))
+    return fetch_statements(api_key, ["삼성전자"], [year], reprt_code=reprt_code, max_workers=1)
 
 
 def fetch_samsung_statements_range(
@@ -61,14 +301,22 @@ def fetch_samsung_statements_range(
     reprt_code: str = "11011",
 ) -> pd.DataFrame:
     """Return Samsung Electronics statements for all years in the range."""
-    frames = []
-    for year in range(start_year, end_year + 1):
-        df_year = fetch_samsung_statements(api_key, year=year, reprt_code=reprt_code)
-        df_year["bsns_year"] = year
-        frames.append(df_year)
-    if frames:
-        return pd.concat(frames, ignore_index=True)
-    return pd.DataFrame()
+    return fetch_statements(
+        api_key, ["삼성전자"], range(start_year, end_year + 1), reprt_code=reprt_code
+    )
+
+
+__all__ = [
+    "CorpLookup",
+    "CorpRecord",
+    "fetch_samsung_statements",
+    "fetch_samsung_statements_range",
+    "fetch_statements",
+    "get_corp_code",
+    "get_corp_lookup",
+    "make_session",
+    "refresh_corp_codes",
+]
 
 
 if __name__ == "__main__":
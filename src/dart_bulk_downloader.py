@@ -3,61 +3,47 @@
 from __future__ import annotations
 
 import asyncio
-import io
-import zipfile
-from collections import deque
+import os
+import tempfile
 from pathlib import Path
-from typing import Iterable, List
+from typing import Iterable, List, Optional
 
 import aiohttp
 import pandas as pd
 from dotenv import load_dotenv
 
+try:
+    from .corp_code_index import get_corp_code_index
+    from .dart_cache import ResponseCache
+    from .http_client import DOWNLOAD_TIMEOUT, get_session, run_with_session
+    from .rate_limiter import DEFAULT_DAILY_LIMIT, RateLimiter, shared_state_path
+except ImportError:  # ``src``가 sys.path에 직접 추가된 경우
+    from corp_code_index import get_corp_code_index
+    from dart_cache import ResponseCache
+    from http_client import DOWNLOAD_TIMEOUT, get_session, run_with_session
+    from rate_limiter import DEFAULT_DAILY_LIMIT, RateLimiter, shared_state_path
+
 # Load API key from .env at project root
 load_dotenv(Path(__file__).resolve().parent.parent / ".env")
 
-DART_CORPCODE_URL = "https://opendart.fss.or.kr/api/corpCode.xml"
-DART_SINGLE_ACCOUNT_URL = "https://opendart.fss.or.kr/api/fnlttSinglAcnt.json"
-
-
-class RateLimiter:
-    """Simple asyncio rate limiter for API calls."""
-
-    def __init__(self, max_calls: int, period: float) -> None:
-        self.max_calls = max_calls
-        self.period = period
-        self.calls: deque[float] = deque()
-        self._lock = asyncio.Lock()
-
-    async def wait(self) -> None:
-        async with self._lock:
-            now = asyncio.get_event_loop().time()
-            while self.calls and self.calls[0] <= now - self.period:
-                self.calls.popleft()
-            if len(self.calls) >= self.max_calls:
-                wait_for = self.period - (now - self.calls[0])
-                await asyncio.sleep(wait_for)
-                now = asyncio.get_event_loop().time()
-                while self.calls and self.calls[0] <= now - self.period:
-                    self.calls.popleft()
-            self.calls.append(now)
-
-
-async def fetch_corp_codes(api_key: str) -> pd.DataFrame:
-    """Download and parse DART corp code list."""
-    url = f"{DART_CORPCODE_URL}?crtfc_key={api_key}"
-    async with aiohttp.ClientSession() as session:
-        async with session.get(url) as resp:
-            resp.raise_for_status()
-            data = await resp.read()
+DART_API_BASE = os.environ.get("DART_API_BASE", "https://opendart.fss.or.kr/api").rstrip("/")
+DART_CORPCODE_URL = f"{DART_API_BASE}/corpCode.xml"
+DART_SINGLE_ACCOUNT_URL = f"{DART_API_BASE}/fnlttSinglAcnt.json"
+
 
-    with zipfile.ZipFile(io.BytesIO(data)) as zf:
-        xml_data = zf.read("CORPCODE.xml").decode("utf-8")
-    # ``read_xml`` expects a file-like object when parsing a string literal.
-    # Using the built-in ``etree`` parser avoids the optional ``lxml``
-    # dependency, which may not be available on all platforms.
-    root = pd.read_xml(io.StringIO(xml_data), parser="etree")
-    return root
+async def fetch_corp_codes(api_key: str, force_refresh: bool = False) -> pd.DataFrame:
+    """Return the DART corp code list, refreshing the shared index if stale."""
+    index = get_corp_code_index()
+    if force_refresh or index.is_stale():
+        url = f"{DART_CORPCODE_URL}?crtfc_key={api_key}"
+        with tempfile.SpooledTemporaryFile(max_size=8 * 1024 * 1024) as buffer:
+            async with get_session().get(url, timeout=DOWNLOAD_TIMEOUT) as resp:
+                resp.raise_for_status()
+                async for chunk in resp.content.iter_chunked(64 * 1024):
+                    buffer.write(chunk)
+            buffer.seek(0)
+            index.update(buffer)
+    return index.frame()
 
 
 def filter_kospi_kosdaq_non_financial(df: pd.DataFrame) -> pd.DataFrame:
@@ -73,6 +59,7 @@ async def fetch_single_statement(
     api_key: str,
     corp_code: str,
     year: int,
+    cache: Optional[ResponseCache] = None,
 ) -> pd.DataFrame:
     params = {
         "crtfc_key": api_key,
@@ -80,12 +67,17 @@ async def fetch_single_statement(
         "bsns_year": year,
         "reprt_code": "11011",
     }
-    await rate_limiter.wait()
-    async with session.get(DART_SINGLE_ACCOUNT_URL, params=params) as resp:
-        if resp.status == 429:
-            raise RuntimeError("API daily request limit reached (HTTP 429)")
-        resp.raise_for_status()
-        data = await resp.json()
+    # 캐시를 속도 제한보다 먼저 확인해 캐시 적중 시 API 호출을 하지 않는다.
+    data = cache.get(DART_SINGLE_ACCOUNT_URL, params) if cache else None
+    if data is None:
+        await rate_limiter.wait()
+        async with session.get(DART_SINGLE_ACCOUNT_URL, params=params) as resp:
+            if resp.status == 429:
+                raise RuntimeError("API daily request limit reached (HTTP 429)")
+            resp.raise_for_status()
+            data = await resp.json()
+        if cache:
+            cache.put(DART_SINGLE_ACCOUNT_URL, params, data)
 
     if data.get("status") != "000":
         msg = data.get("message", "")
@@ -101,18 +93,34 @@ async def fetch_bulk_statements(
     corp_codes: Iterable[str],
     years: Iterable[int],
     workers: int = 5,
+    cache: Optional[ResponseCache] = None,
+    use_cache: bool = True,
 ) -> pd.DataFrame:
-    """Download statements for multiple companies in parallel."""
-    rate_limiter = RateLimiter(1000, 60.0)
+    """Download statements for multiple companies in parallel.
+
+    Responses are served from ``cache`` when possible. If no cache is given
+    and ``use_cache`` is True, the default on-disk cache is used.
+    """
+    # 같은 API 키를 쓰는 모든 프로세스가 하나의 토큰 버킷을 공유한다.
+    rate_limiter = RateLimiter(
+        1000,
+        60.0,
+        daily_limit=DEFAULT_DAILY_LIMIT,
+        state_path=shared_state_path(api_key),
+    )
     results: List[pd.DataFrame] = []
     sem = asyncio.Semaphore(workers)
+    owns_cache = cache is None and use_cache
+    if owns_cache:
+        cache = ResponseCache()
 
-    async with aiohttp.ClientSession() as session:
+    try:
+        session = get_session()
 
         async def worker(corp: str, year: int) -> None:
             async with sem:
                 df = await fetch_single_statement(
-                    session, rate_limiter, api_key, corp, year
+                    session, rate_limiter, api_key, corp, year, cache=cache
                 )
                 df.insert(0, "corp_code", corp)
                 df.insert(1, "bsns_year", year)
@@ -120,6 +128,11 @@ async def fetch_bulk_statements(
 
         tasks = [worker(corp, year) for corp in corp_codes for year in years]
         await asyncio.gather(*tasks)
+    finally:
+        if cache is not None:
+            print(f"응답 캐시: {cache.stats}")
+        if owns_cache:
+            cache.close()
 
     if results:
         return pd.concat(results, ignore_index=True)
@@ -146,14 +159,14 @@ if __name__ == "__main__":
     if not api_key:
         raise EnvironmentError("Set the DART_API_KEY environment variable")
 
-    corp_df = asyncio.run(fetch_corp_codes(api_key))
+    corp_df = run_with_session(fetch_corp_codes(api_key))
     target_df = filter_kospi_kosdaq_non_financial(corp_df)
 
     # 예시: 처음 100개 기업을 선택합니다. 팀별로 리스트를 분할해 사용하세요.
     corp_codes = target_df["corp_code"].unique()[:100]
     years = range(2015, 2025)
 
-    statements = asyncio.run(
+    statements = run_with_session(
         fetch_bulk_statements(api_key, corp_codes, years, workers=10)
     )
 
@@ -0,0 +1,244 @@
+"""Persistent on-disk cache for DART API responses.
+
+Responses are stored content-addressed: an SQLite index maps each request
+(endpoint + parameters, without the API key) to the digest of its payload,
+and payloads are kept once per digest, compressed with zstd when the
+``zstandard`` package is available and zlib otherwise.
+"""
+
+from __future__ import annotations
+
+import hashlib
+import json
+import sqlite3
+import threading
+import time
+import zlib
+from dataclasses import dataclass
+from datetime import date
+from pathlib import Path
+from typing import Any, Dict, Iterator, Mapping, Optional, Tuple
+
+try:
+    import zstandard
+except ImportError:  # zstd는 선택 사항, 없으면 zlib 사용
+    zstandard = None
+
+DEFAULT_CACHE_PATH = (
+    Path(__file__).resolve().parent.parent / "data" / "cache" / "dart_responses.sqlite"
+)
+# 아직 확정되지 않은 사업연도 응답의 유효 기간 (초)
+OPEN_YEAR_TTL = 6 * 60 * 60
+# 정상 응답(000)과 데이터 없음(013)만 캐시한다. 한도 초과 등은 저장하지 않는다.
+CACHEABLE_STATUSES = frozenset({"000", "013"})
+_IGNORED_PARAMS = frozenset({"crtfc_key"})
+
+_SCHEMA = """
+CREATE TABLE IF NOT EXISTS payloads (
+    digest TEXT PRIMARY KEY,
+    codec TEXT NOT NULL,
+    data BLOB NOT NULL
+);
+CREATE TABLE IF NOT EXISTS responses (
+    key TEXT PRIMARY KEY,
+    endpoint TEXT NOT NULL,
+    params TEXT NOT NULL,
+    digest TEXT NOT NULL REFERENCES payloads(digest),
+    status TEXT,
+    fetched_at REAL NOT NULL,
+    expires_at REAL
+);
+"""
+
+
+def is_closed_year(bsns_year: Any, today: Optional[date] = None) -> bool:
+    """Return True once the annual report for ``bsns_year`` is due.
+
+    Annual reports are filed within 90 days of the fiscal year end, so a
+    year is treated as closed from April 1st of the following year.
+    """
+    try:
+        year = int(bsns_year)
+    except (TypeError, ValueError):
+        return False
+    today = today or date.today()
+    return today >= date(year + 1, 4, 1)
+
+
+@dataclass
+class CacheStats:
+    hits: int = 0
+    misses: int = 0
+    expired: int = 0
+    stores: int = 0
+
+    @property
+    def hit_rate(self) -> float:
+        lookups = self.hits + self.misses
+        return self.hits / lookups if lookups else 0.0
+
+    def __str__(self) -> str:
+        return (
+            f"hits={self.hits:,} misses={self.misses:,} expired={self.expired:,} "
+            f"stores={self.stores:,} hit_rate={self.hit_rate:.1%}"
+        )
+
+
+class ResponseCache:
+    """SQLite-indexed, compressed cache of DART JSON responses."""
+
+    def __init__(
+        self,
+        path: Path = DEFAULT_CACHE_PATH,
+        open_year_ttl: float = OPEN_YEAR_TTL,
+    ) -> None:
+        self.path = Path(path)
+        self.path.parent.mkdir(parents=True, exist_ok=True)
+        self.open_year_ttl = open_year_ttl
+        self.stats = CacheStats()
+        self._lock = threading.Lock()
+        self._conn = sqlite3.connect(str(self.path), check_same_thread=False)
+        self._conn.execute("PRAGMA journal_mode=WAL")
+        self._conn.execute("PRAGMA synchronous=NORMAL")
+        self._conn.executescript(_SCHEMA)
+        self._conn.commit()
+
+    @staticmethod
+    def make_key(endpoint: str, params: Mapping[str, Any]) -> str:
+        """Return a stable key for a request, ignoring the API key."""
+        canonical = json.dumps(
+            {k: str(v) for k, v in params.items() if k not in _IGNORED_PARAMS},
+            sort_keys=True,
+            ensure_ascii=False,
+        )
+        return hashlib.sha256(f"{endpoint}?{canonical}".encode("utf-8")).hexdigest()
+
+    def ttl_for(self, params: Mapping[str, Any]) -> Optional[float]:
+        """Return the TTL in seconds for a request, or None if immutable."""
+        if is_closed_year(params.get("bsns_year")):
+            return None
+        return self.open_year_ttl
+
+    def get(self, endpoint: str, params: Mapping[str, Any]) -> Optional[Dict[str, Any]]:
+        """Return the cached response, or None on a miss or expired entry."""
+        key = self.make_key(endpoint, params)
+        with self._lock:
+            row = self._conn.execute(
+                "SELECT p.codec, p.data, r.expires_at FROM responses r "
+                "JOIN payloads p ON p.digest = r.digest WHERE r.key = ?",
+                (key,),
+            ).fetchone()
+            if row is None:
+                self.stats.misses += 1
+                return None
+            codec, blob, expires_at = row
+            if expires_at is not None and expires_at <= time.time():
+                self.stats.expired += 1
+                self.stats.misses += 1
+                return None
+            self.stats.hits += 1
+        return json.loads(_decompress(codec, blob))
+
+    def put(self, endpoint: str, params: Mapping[str, Any], data: Mapping[str, Any]) -> bool:
+        """Store a response. Returns False if the response is not cacheable."""
+        status = data.get("status")
+        if status not in CACHEABLE_STATUSES:
+            return False
+        raw = json.dumps(data, ensure_ascii=False, separators=(",", ":")).encode("utf-8")
+        digest = hashlib.sha256(raw).hexdigest()
+        codec, blob = _compress(raw)
+        now = time.time()
+        ttl = self.ttl_for(params)
+        expires_at = None if ttl is None else now + ttl
+        stored_params = json.dumps(
+            {k: str(v) for k, v in params.items() if k not in _IGNORED_PARAMS},
+            sort_keys=True,
+            ensure_ascii=False,
+        )
+        with self._lock, self._conn:
+            self._conn.execute(
+                "INSERT OR IGNORE INTO payloads (digest, codec, data) VALUES (?, ?, ?)",
+                (digest, codec, blob),
+            )
+            self._conn.execute(
+                "INSERT OR REPLACE INTO responses "
+                "(key, endpoint, params, digest, status, fetched_at, expires_at) "
+                "VALUES (?, ?, ?, ?, ?, ?, ?)",
+                (self.make_key(endpoint, params), endpoint, stored_params, digest, status, now, expires_at),
+            )
+            self.stats.stores += 1
+        return True
+
+    def invalidate(self, endpoint: str, params: Mapping[str, Any]) -> None:
+        """Drop the cached response for a single request."""
+        with self._lock, self._conn:
+            self._conn.execute(
+                "DELETE FROM responses WHERE key = ?", (self.make_key(endpoint, params),)
+            )
+
+    def invalidate_matching(self, **match: Any) -> int:
+        """Drop every cached response whose params match ``match``.
+
+        Comma-separated params (the multi-company ``corp_code``) match if
+        any of their items does. Returns the number of dropped responses.
+        """
+        wanted = {k: str(v) for k, v in match.items()}
+        with self._lock, self._conn:
+            probe = wanted.get("corp_code", "")
+            rows = self._conn.execute(
+                "SELECT key, params FROM responses WHERE params LIKE ?", (f"%{probe}%",)
+            ).fetchall()
+            stale = []
+            for key, params in rows:
+                params = json.loads(params)
+                if all(v in str(params.get(k, "")).split(",") for k, v in wanted.items()):
+                    stale.append((key,))
+            self._conn.executemany("DELETE FROM responses WHERE key = ?", stale)
+        return len(stale)
+
+    def iter_responses(self, endpoint_suffix: str = "") -> Iterator[Tuple[str, Dict[str, str], Dict[str, Any]]]:
+        """Yield ``(endpoint, params, data)`` for every stored response.
+
+        Only endpoints ending with ``endpoint_suffix`` are returned; expired
+        entries are included (used to replay recorded responses).
+        """
+        with self._lock:
+            rows = self._conn.execute(
+                "SELECT r.endpoint, r.params, p.codec, p.data FROM responses r "
+                "JOIN payloads p ON p.digest = r.digest WHERE r.endpoint LIKE ?",
+                (f"%{endpoint_suffix}",),
+            ).fetchall()
+        for endpoint, params, codec, blob in rows:
+            yield endpoint, json.loads(params), json.loads(_decompress(codec, blob))
+
+    def close(self) -> None:
+        with self._lock:
+            self._conn.close()
+
+    def __enter__(self) -> "ResponseCache":
+        return self
+
+    def __exit__(self, *exc: Any) -> None:
+        self.close()
+
+
+def _compress(raw: bytes) -> tuple[str, bytes]:
+    if zstandard is not None:
+        return "zstd", zstandard.ZstdCompressor(level=10).compress(raw)
+    return "zlib", zlib.compress(raw, 6)
+
+
+def _decompress(codec: str, blob: bytes) -> bytes:
+    if codec == "zstd":
+        if zstandard is None:
+            raise RuntimeError("zstandard 패키지가 필요합니다 (zstd로 압축된 캐시 항목)")
+        return zstandard.ZstdDecompressor().decompress(blob)
+    return zlib.decompress(blob)
+
+
+__all__ = [
+    "CacheStats",
+    "ResponseCache",
+    "DEFAULT_CACHE_PATH",
+    "is_closed_year",
+]
@@ -1,7 +1,332 @@
-import pandas as pd
+"""Corp list filtering and single-pass statement splitting.
+
+:func:`split_statements` splits downloaded statements into one output per
+(fs_div, sj_div) pair: consolidated (CFS) and separate (OFS) statements x
+balance sheet, income statement, comprehensive income, cash flow and
+equity changes. Each input chunk is split with a single hash group-by and
+its partitions are written in parallel, so a multi-GB dump can be fed
+chunk by chunk without ever holding the whole frame in memory.
+
+Outputs are a hive-partitioned Parquet layout
+(``fs_div=.../sj_div=.../part-0.parquet``) and, optionally, the UTF-8-BOM
+CSV files the notebooks read (``연결재무제표_재무상태표.csv``, ...).
+"""
+
 import asyncio
+import os
 import xml.etree.ElementTree as ET
+from concurrent.futures import ThreadPoolExecutor
 from pathlib import Path
+from typing import Any, Dict, Iterable, Iterator, Optional, Sequence, Tuple, Union
+
+import numpy as np
+import pandas as pd
+import pyarrow as pa
+import pyarrow.compute as pc
+import pyarrow.csv as pa_csv
+import pyarrow.dataset as ds
+import pyarrow.parquet as pq
+
+try:
+    from .dart_sink import open_dataset
+except ImportError:  # ``src``가 sys.path에 직접 추가된 경우
+    from dart_sink import open_dataset
+
+SPLIT_DIR = Path(__file__).resolve().parent.parent / "data" / "raw" / "statements_by_type"
+SPLIT_KEYS = ("fs_div", "sj_div")
+SPLIT_WORKERS = min(8, os.cpu_count() or 1)
+REPORT_KEYS = ("corp_code", "bsns_year", "reprt_code", "fs_div")
+FS_DIV_NAMES = {"CFS": "연결재무제표", "OFS": "재무제표"}
+SJ_DIV_NAMES = {
+    "BS": "재무상태표",
+    "IS": "손익계산서",
+    "CIS": "포괄손익계산서",
+    "CF": "현금흐름표",
+    "SCE": "자본변동표",
+}
+FORMATS = ("parquet", "csv")
+_MISSING = "unknown"
+_ROW = "__row"
+_UTF8_BOM = b"\xef\xbb\xbf"
+
+Chunk = Union[pd.DataFrame, pa.Table, pa.RecordBatch]
+
+
+def csv_name(fs_div: str, sj_div: str) -> str:
+    """``("CFS", "BS")`` -> ``연결재무제표_재무상태표.csv``."""
+    return f"{FS_DIV_NAMES.get(fs_div, fs_div)}_{SJ_DIV_NAMES.get(sj_div, sj_div)}.csv"
+
+
+def _to_table(chunk: Chunk) -> pa.Table:
+    if isinstance(chunk, pd.DataFrame):
+        return pa.Table.from_pandas(chunk, preserve_index=False)
+    if isinstance(chunk, pa.RecordBatch):
+        return pa.Table.from_batches([chunk])
+    return chunk
+
+
+def _plain(column: pa.ChunkedArray) -> pa.ChunkedArray:
+    """String view of a column with nulls filled, for use as a group key."""
+    return pc.fill_null(column.cast(pa.string()), _MISSING)
+
+
+def _row_numbers(n: int) -> pa.Array:
+    return pa.array(np.arange(n, dtype=np.int64))
+
+
+def latest_filings(table: pa.Table, keys: Sequence[str] = REPORT_KEYS) -> pa.Table:
+    """Arrow counterpart of :func:`dart_sink.drop_superseded`.
+
+    Keeps only the rows of the latest filing (highest ``rcept_no``) per
+    report key, drops exact duplicates and preserves the input order.
+    """
+    keys = [k for k in keys if k in table.column_names]
+    if not table.num_rows or "rcept_no" not in table.column_names or not keys:
+        return table
+    plain = pa.table(
+        {c: _plain(table[c]) if c in keys else table[c].cast(pa.string()) for c in table.column_names}
+    ).append_column(_ROW, _row_numbers(table.num_rows))
+    latest = plain.group_by(keys, use_threads=False).aggregate([("rcept_no", "max")])
+    current = plain.join(latest, keys, join_type="inner")
+    current = current.filter(pc.equal(current["rcept_no"], current["rcept_no_max"]))
+    # 같은 보고서를 다시 받아 생긴 완전히 같은 행은 처음 것만 남긴다.
+    first = current.group_by(table.column_names, use_threads=False).aggregate([(_ROW, "min")])
+    rows = first[f"{_ROW}_min"]
+    return table.take(rows.take(pc.sort_indices(rows)))
+
+
+def partitions(table: pa.Table, keys: Sequence[str] = SPLIT_KEYS) -> Iterator[Tuple[Tuple[str, ...], pa.Table]]:
+    """Yield ``(key, rows)`` for every (fs_div, sj_div) group in one hash pass."""
+    if not table.num_rows:
+        return
+    columns = {
+        k: _plain(table[k]) if k in table.column_names else pa.chunked_array([pa.array([_MISSING] * table.num_rows)])
+        for k in keys
+    }
+    columns[_ROW] = _row_numbers(table.num_rows)
+    groups = pa.table(columns).group_by(list(keys), use_threads=False).aggregate([(_ROW, "list")])
+    for i, rows in enumerate(groups[f"{_ROW}_list"].to_pylist()):
+        yield tuple(groups[k][i].as_py() for k in keys), table.take(rows)
+
+
+def _string_schema(schema: pa.Schema) -> pa.Schema:
+    """``schema`` with every column stored as (dictionary-encoded) strings.
+
+    DART values are all strings, but a pandas chunk infers its own types:
+    a column that is empty in one chunk comes in as null or float and an
+    amount without thousands separators as int. Pinning every column to
+    strings lets later chunks of the same partition always be cast.
+    """
+    return pa.schema([
+        f if pa.types.is_dictionary(f.type) and pa.types.is_string(f.type.value_type) else pa.field(f.name, pa.string())
+        for f in schema
+    ])
+
+
+def _conform(table: pa.Table, schema: pa.Schema) -> pa.Table:
+    """Reorder, add missing (null) columns and cast to ``schema``."""
+    arrays = [
+        table[f.name].cast(f.type) if f.name in table.column_names else pa.nulls(table.num_rows, f.type)
+        for f in schema
+    ]
+    return pa.table(arrays, schema=schema)
+
+
+class _PartitionWriter:
+    """Append the rows of one (fs_div, sj_div) partition to its output files.
+
+    Files are written under a temporary name and moved into place by
+    :meth:`close`, so an interrupted split never leaves half-written output.
+    """
+
+    def __init__(
+        self,
+        key: Tuple[str, ...],
+        keys: Sequence[str],
+        out_dir: Path,
+        csv_dir: Path,
+        formats: Sequence[str],
+    ) -> None:
+        self.keys = list(keys)
+        self.key = key
+        self.paths: Dict[str, Path] = {}
+        if "parquet" in formats:
+            directory = Path(out_dir).joinpath(*(f"{k}={v}" for k, v in zip(keys, key)))
+            self.paths["parquet"] = directory / "part-0.parquet"
+        if "csv" in formats:
+            name = csv_name(*key) if len(key) == 2 else "_".join(key) + ".csv"
+            self.paths["csv"] = Path(csv_dir) / name
+        self.rows = 0
+        self._schema: Optional[pa.Schema] = None
+        self._parquet: Optional[pq.ParquetWriter] = None
+        self._csv: Optional[pa_csv.CSVWriter] = None
+        self._csv_file: Optional[Any] = None
+
+    @staticmethod
+    def _tmp(path: Path) -> Path:
+        return path.with_name(path.name + ".tmp")
+
+    def write(self, table: pa.Table) -> None:
+        if self._schema is None:
+            self._schema = _string_schema(table.schema)
+        extra = [c for c in table.column_names if c not in self._schema.names]
+        if extra:
+            # 이미 기록한 Parquet/CSV에는 컬럼을 더할 수 없으므로 조용히 버리지 않고 알린다.
+            raise ValueError(
+                f"{'/'.join(self.key)} 파티션의 첫 청크에 없던 컬럼이 나타났습니다: {extra}. "
+                "모든 청크가 같은 컬럼을 갖도록 맞춰 주세요"
+            )
+        table = _conform(table, self._schema)
+        if "parquet" in self.paths:
+            # 분할 키는 디렉터리 이름에 있으므로 파일에서는 뺀다.
+            part = table.drop_columns([k for k in self.keys if k in table.column_names])
+            if self._parquet is None:
+                path = self.paths["parquet"]
+                path.parent.mkdir(parents=True, exist_ok=True)
+                self._parquet = pq.ParquetWriter(self._tmp(path), part.schema, compression="zstd")
+            self._parquet.write_table(part)
+        if "csv" in self.paths:
+            plain = pa.table(
+                [c.cast(pa.string()) if pa.types.is_dictionary(c.type) else c for c in table.columns],
+                names=table.column_names,
+            )
+            if self._csv is None:
+                path = self.paths["csv"]
+                path.parent.mkdir(parents=True, exist_ok=True)
+                # 엑셀에서 한글이 깨지지 않도록 기존 CSV처럼 BOM을 붙인다.
+                self._csv_file = open(self._tmp(path), "wb")
+                self._csv_file.write(_UTF8_BOM)
+                self._csv = pa_csv.CSVWriter(self._csv_file, plain.schema)
+            self._csv.write_table(plain)
+        self.rows += table.num_rows
+
+    def _close_writers(self) -> None:
+        if self._parquet is not None:
+            self._parquet.close()
+        if self._csv is not None:
+            self._csv.close()
+        if self._csv_file is not None:
+            self._csv_file.close()
+
+    def close(self) -> None:
+        self._close_writers()
+        for path in self.paths.values():
+            if self._tmp(path).exists():
+                os.replace(self._tmp(path), path)
+
+    def abort(self) -> None:
+        self._close_writers()
+        for path in self.paths.values():
+            self._tmp(path).unlink(missing_ok=True)
+
+
+def _year_tables(root: Path) -> Iterator[pa.Table]:
+    """Read a :class:`ColumnarSink` dataset one ``bsns_year`` partition at a time.
+
+    The dataset is opened with the union of every file's columns, so a
+    column that only some files have is in every year's table instead of
+    being dropped.
+    """
+    dataset = open_dataset(root)
+    fragments = list(dataset.get_fragments())
+    if fragments:
+        schema = pa.unify_schemas(
+            [f.physical_schema for f in fragments] + [dataset.partitioning.schema],
+            promote_options="permissive",
+        )
+        dataset = ds.dataset(str(root), schema=schema, format="parquet", partitioning=dataset.partitioning)
+    years = sorted({
+        ds.get_partition_keys(fragment.partition_expression).get("bsns_year")
+        for fragment in fragments
+    }, key=str)
+    for year in years:
+        condition = ds.field("bsns_year").is_null() if year is None else ds.field("bsns_year") == year
+        yield dataset.to_table(filter=condition)
+
+
+def _chunks(source: Union[str, Path, Chunk, Iterable[Chunk]]) -> Iterator[pa.Table]:
+    if isinstance(source, (str, Path)):
+        yield from _year_tables(Path(source))
+    elif isinstance(source, (pd.DataFrame, pa.Table, pa.RecordBatch)):
+        yield _to_table(source)
+    else:
+        for chunk in source:
+            yield _to_table(chunk)
+
+
+def split_statements(
+    source: Union[str, Path, Chunk, Iterable[Chunk]],
+    out_dir: Path = SPLIT_DIR,
+    formats: Sequence[str] = ("parquet",),
+    csv_dir: Optional[Path] = None,
+    latest_only: bool = True,
+    workers: int = SPLIT_WORKERS,
+    keys: Sequence[str] = SPLIT_KEYS,
+) -> Dict[Tuple[str, ...], int]:
+    """Split statements into one output per (fs_div, sj_div) in a single pass.
+
+    ``source`` is a :class:`ColumnarSink` dataset directory, one frame or
+    table, or any iterable of DataFrames / Arrow tables / record batches
+    (e.g. ``pd.read_csv(path, dtype=str, chunksize=...)``). Each chunk is
+    grouped once and its partitions are written concurrently by ``workers``
+    threads; only one chunk is held in memory at a time. A dataset
+    directory is read one business year at a time. Every column is written
+    as strings, whatever type a single chunk was read with. Columns are
+    fixed by the first chunk of each partition (all files' columns for a
+    dataset directory); a later chunk with extra columns raises
+    ``ValueError`` instead of losing them.
+
+    ``formats`` picks the outputs: ``"parquet"`` writes
+    ``out_dir/fs_div=.../sj_div=.../part-0.parquet`` and ``"csv"`` writes
+    ``csv_dir/연결재무제표_재무상태표.csv`` style files (``csv_dir``
+    defaults to ``out_dir``). With ``latest_only`` superseded filings and
+    duplicate rows are dropped per chunk; this is exact for dataset
+    directories because every report lives in a single year.
+
+    Returns the number of rows written per partition key.
+    """
+    unknown = set(formats) - set(FORMATS)
+    if unknown:
+        raise ValueError(f"지원하지 않는 형식입니다: {sorted(unknown)}")
+    out_dir = Path(out_dir)
+    csv_dir = Path(csv_dir) if csv_dir is not None else out_dir
+    writers: Dict[Tuple[str, ...], _PartitionWriter] = {}
+
+    with ThreadPoolExecutor(max_workers=max(1, workers), thread_name_prefix="dart-split") as pool:
+        try:
+            for table in _chunks(source):
+                if latest_only:
+                    table = latest_filings(table)
+                futures = []
+                for key, rows in partitions(table, keys):
+                    writer = writers.get(key)
+                    if writer is None:
+                        writer = writers[key] = _PartitionWriter(key, keys, out_dir, csv_dir, formats)
+                    # 한 청크 안에서 파티션마다 작업이 하나뿐이라 파일별 기록 순서가 유지된다.
+                    futures.append(pool.submit(writer.write, rows))
+                for future in futures:
+                    future.result()
+        except BaseException:
+            for writer in writers.values():
+                writer.abort()
+            raise
+        for future in [pool.submit(writer.close) for writer in writers.values()]:
+            future.result()
+
+    if "parquet" in formats and out_dir.exists():
+        # 이번 분할에 없는 파티션의 이전 결과는 지워 데이터셋이 입력과 일치하게 한다.
+        written = {w.paths["parquet"] for w in writers.values()}
+        for path in out_dir.rglob("part-0.parquet"):
+            if path not in written:
+                path.unlink()
+    return {key: writer.rows for key, writer in writers.items()}
+
+
+def open_split(root: Path = SPLIT_DIR, keys: Sequence[str] = SPLIT_KEYS) -> ds.Dataset:
+    """Open the Parquet layout written by :func:`split_statements`."""
+    partitioning = ds.partitioning(pa.schema([(k, pa.string()) for k in keys]), flavor="hive")
+    return ds.dataset(str(root), format="parquet", partitioning=partitioning)
+
 
 ### 📌 1. CORPCODE.xml 파싱 함수 (corp_cls None 문제 해결됨)
 def parse_corp_code_xml(xml_path: str) -> pd.DataFrame:
@@ -67,6 +392,21 @@ async def main():
     print("📄 필터링 결과 saved to 'filtered_corp_list.csv'")
 
 
+__all__ = [
+    "FS_DIV_NAMES",
+    "SJ_DIV_NAMES",
+    "SPLIT_DIR",
+    "csv_name",
+    "filter_kospi_kosdaq_non_financial",
+    "latest_filings",
+    "open_split",
+    "parse_corp_code_xml",
+    "partitions",
+    "split_statements",
+]
+
+
 ### 📌 4. 실행
 if __name__ == "__main__":
     asyncio.run(main())
+
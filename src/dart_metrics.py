@@ -0,0 +1,374 @@
+"""Request-level metrics for DART downloads.
+
+A small, dependency-free registry of counters, gauges and histograms that
+the rate limiter and the fetch path update as they go:
+
+* ``dart_request_seconds``: request latency by endpoint and DART status
+* ``dart_ratelimit_wait_seconds``: time spent waiting for a limiter token
+* ``dart_retries_total``: retries by cause (timeout, HTTP 429, bad ZIP, ...)
+* ``dart_response_bytes_total`` / ``dart_rows_parsed_total`` by endpoint
+* ``dart_quota_remaining``: calls left in today's budget per bucket
+* ``dart_circuit_state``: circuit breaker state per API base
+
+The registry renders the Prometheus text format, which can be written to a
+file for the node_exporter textfile collector or served on a local
+``/metrics`` endpoint. :meth:`MetricsRegistry.write_run_summary` writes a
+JSON summary and a final ``.prom`` snapshot to ``logs/`` at the end of a run.
+"""
+
+from __future__ import annotations
+
+import json
+import math
+import os
+import threading
+import time
+from datetime import datetime
+from pathlib import Path
+from typing import Any, Dict, Iterator, List, Mapping, Optional, Sequence, Tuple
+
+LOG_DIR = Path(__file__).resolve().parent.parent / "logs"
+LATENCY_BUCKETS = (0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0, 30.0)
+WAIT_BUCKETS = (0.001, 0.01, 0.05, 0.1, 0.5, 1.0, 5.0, 30.0, 120.0)
+
+LabelKey = Tuple[str, ...]
+
+
+def _escape(value: str) -> str:
+    return value.replace("\\", "\\\\").replace("\n", "\\n").replace('"', '\\"')
+
+
+def _format_labels(names: Sequence[str], values: Sequence[str], extra: str = "") -> str:
+    parts = [f'{n}="{_escape(v)}"' for n, v in zip(names, values)]
+    if extra:
+        parts.append(extra)
+    return "{" + ",".join(parts) + "}" if parts else ""
+
+
+def _format_value(value: float) -> str:
+    if math.isinf(value):
+        return "+Inf" if value > 0 else "-Inf"
+    return repr(float(value)) if not float(value).is_integer() else str(int(value))
+
+
+class _Metric:
+    kind = ""
+
+    def __init__(self, name: str, help: str, labelnames: Sequence[str] = ()) -> None:
+        self.name = name
+        self.help = help
+        self.labelnames = tuple(labelnames)
+        self._lock = threading.Lock()
+
+    def _key(self, labels: Mapping[str, Any]) -> LabelKey:
+        if set(labels) != set(self.labelnames):
+            raise ValueError(f"{self.name}: 레이블은 {self.labelnames} 이어야 합니다 (받은 값: {tuple(labels)})")
+        return tuple(str(labels[n]) for n in self.labelnames)
+
+    def render(self) -> Iterator[str]:
+        yield f"# HELP {self.name} {self.help}"
+        yield f"# TYPE {self.name} {self.kind}"
+
+
+class Counter(_Metric):
+    kind = "counter"
+
+    def __init__(self, name: str, help: str, labelnames: Sequence[str] = ()) -> None:
+        super().__init__(name, help, labelnames)
+        self._values: Dict[LabelKey, float] = {}
+
+    def inc(self, amount: float = 1.0, **labels: Any) -> None:
+        key = self._key(labels)
+        with self._lock:
+            self._values[key] = self._values.get(key, 0.0) + amount
+
+    def value(self, **labels: Any) -> float:
+        """Value of one series, or the total over all series without labels."""
+        with self._lock:
+            if not labels and self.labelnames:
+                return sum(self._values.values())
+            return self._values.get(self._key(labels), 0.0)
+
+    def series(self) -> Dict[LabelKey, float]:
+        with self._lock:
+            return dict(self._values)
+
+    def render(self) -> Iterator[str]:
+        yield from super().render()
+        for key, value in sorted(self.series().items()):
+            yield f"{self.name}{_format_labels(self.labelnames, key)} {_format_value(value)}"
+
+
+class Gauge(Counter):
+    kind = "gauge"
+
+    def set(self, value: float, **labels: Any) -> None:
+        key = self._key(labels)
+        with self._lock:
+            self._values[key] = float(value)
+
+
+class Histogram(_Metric):
+    kind = "histogram"
+
+    def __init__(
+        self,
+        name: str,
+        help: str,
+        labelnames: Sequence[str] = (),
+        buckets: Sequence[float] = LATENCY_BUCKETS,
+    ) -> None:
+        super().__init__(name, help, labelnames)
+        self.buckets = tuple(sorted(buckets)) + (math.inf,)
+        # 레이블 조합별 [버킷별 개수..., 합계, 개수]
+        self._series: Dict[LabelKey, List[float]] = {}
+
+    def observe(self, value: float, **labels: Any) -> None:
+        key = self._key(labels)
+        with self._lock:
+            state = self._series.get(key)
+            if state is None:
+                state = self._series[key] = [0.0] * (len(self.buckets) + 2)
+            for i, bound in enumerate(self.buckets):
+                if value <= bound:
+                    state[i] += 1
+                    break
+            state[-2] += value
+            state[-1] += 1
+
+    def _merged(self, labels: Mapping[str, Any]) -> List[float]:
+        """Bucket counts, sum and count of matching series (partial labels allowed)."""
+        wanted = {self.labelnames.index(n): str(v) for n, v in labels.items()}
+        merged = [0.0] * (len(self.buckets) + 2)
+        with self._lock:
+            for key, state in self._series.items():
+                if all(key[i] == v for i, v in wanted.items()):
+                    merged = [a + b for a, b in zip(merged, state)]
+        return merged
+
+    def count(self, **labels: Any) -> int:
+        return int(self._merged(labels)[-1])
+
+    def total(self, **labels: Any) -> float:
+        return self._merged(labels)[-2]
+
+    def quantile(self, q: float, **labels: Any) -> Optional[float]:
+        """Estimate a quantile by linear interpolation inside the buckets."""
+        merged = self._merged(labels)
+        count = merged[-1]
+        if not count:
+            return None
+        rank = q * count
+        seen = 0.0
+        lower = 0.0
+        for i, bound in enumerate(self.buckets):
+            in_bucket = merged[i]
+            if seen + in_bucket >= rank and in_bucket:
+                if math.isinf(bound):
+                    return lower  # 마지막 버킷은 상한이 없어 하한으로 근사한다
+                return lower + (bound - lower) * (rank - seen) / in_bucket
+            seen += in_bucket
+            lower = bound
+        return lower
+
+    def render(self) -> Iterator[str]:
+        yield from super().render()
+        with self._lock:
+            series = {k: list(v) for k, v in self._series.items()}
+        for key, state in sorted(series.items()):
+            cumulative = 0.0
+            for i, bound in enumerate(self.buckets):
+                cumulative += state[i]
+                le = f'le="{_format_value(bound)}"'
+                yield f"{self.name}_bucket{_format_labels(self.labelnames, key, le)} {_format_value(cumulative)}"
+            labels = _format_labels(self.labelnames, key)
+            yield f"{self.name}_sum{labels} {_format_value(state[-2])}"
+            yield f"{self.name}_count{labels} {_format_value(state[-1])}"
+
+
+class MetricsRegistry:
+    """Named collection of metrics with Prometheus and JSON export."""
+
+    def __init__(self) -> None:
+        self._metrics: Dict[str, _Metric] = {}
+        self._lock = threading.Lock()
+        self.started_at = time.time()
+
+    def _register(self, metric: _Metric) -> Any:
+        with self._lock:
+            existing = self._metrics.get(metric.name)
+            if existing is not None:
+                if type(existing) is not type(metric) or existing.labelnames != metric.labelnames:
+                    raise ValueError(f"이미 다른 형식으로 등록된 지표입니다: {metric.name}")
+                return existing
+            self._metrics[metric.name] = metric
+            return metric
+
+    def counter(self, name: str, help: str, labelnames: Sequence[str] = ()) -> Counter:
+        return self._register(Counter(name, help, labelnames))
+
+    def gauge(self, name: str, help: str, labelnames: Sequence[str] = ()) -> Gauge:
+        return self._register(Gauge(name, help, labelnames))
+
+    def histogram(
+        self,
+        name: str,
+        help: str,
+        labelnames: Sequence[str] = (),
+        buckets: Sequence[float] = LATENCY_BUCKETS,
+    ) -> Histogram:
+        return self._register(Histogram(name, help, labelnames, buckets))
+
+    def render(self) -> str:
+        """Return every metric in the Prometheus text exposition format."""
+        with self._lock:
+            metrics = list(self._metrics.values())
+        lines = [line for metric in metrics for line in metric.render()]
+        return "\n".join(lines) + "\n"
+
+    def write_textfile(self, path: Path) -> Path:
+        """Write :meth:`render` atomically (for the node_exporter textfile collector)."""
+        path = Path(path)
+        path.parent.mkdir(parents=True, exist_ok=True)
+        tmp = path.with_name(f".{path.name}.{os.getpid()}.tmp")
+        tmp.write_text(self.render(), encoding="utf-8")
+        os.replace(tmp, path)
+        return path
+
+    def reset(self) -> None:
+        """Clear all recorded values, keeping the registered metrics."""
+        with self._lock:
+            for metric in self._metrics.values():
+                with metric._lock:
+                    if isinstance(metric, Histogram):
+                        metric._series.clear()
+                    else:
+                        metric._values.clear()
+            self.started_at = time.time()
+
+    def summary(self) -> Dict[str, Any]:
+        """Condensed view of the download metrics for logs."""
+        elapsed = time.time() - self.started_at
+        requests = REQUEST_SECONDS.count()
+        summary: Dict[str, Any] = {
+            "elapsed_seconds": round(elapsed, 1),
+            "requests": requests,
+            "requests_per_second": round(requests / elapsed, 2) if elapsed > 0 else None,
+            "latency_seconds": {
+                f"p{int(q * 100)}": _round(REQUEST_SECONDS.quantile(q)) for q in (0.5, 0.95, 0.99)
+            },
+            "ratelimit_wait_seconds": {
+                "total": round(RATE_LIMIT_WAIT_SECONDS.total(), 3),
+                "p95": _round(RATE_LIMIT_WAIT_SECONDS.quantile(0.95)),
+            },
+            "retries": {key[0]: int(v) for key, v in sorted(RETRIES.series().items())},
+            "response_bytes": int(RESPONSE_BYTES.value()),
+            "rows_parsed": int(ROWS_PARSED.value()),
+            "quota_remaining": {key[0]: int(v) for key, v in sorted(QUOTA_REMAINING.series().items())},
+            "statuses": {},
+        }
+        with REQUEST_SECONDS._lock:
+            keys = list(REQUEST_SECONDS._series)
+        for endpoint, status in keys:
+            summary["statuses"].setdefault(endpoint, {})[status] = REQUEST_SECONDS.count(
+                endpoint=endpoint, status=status
+            )
+        return summary
+
+    def write_run_summary(self, run_name: str, log_dir: Path = LOG_DIR) -> Path:
+        """Write ``<run>_<time>.metrics.json`` and ``.prom`` to ``log_dir`` and print a summary."""
+        log_dir = Path(log_dir)
+        log_dir.mkdir(parents=True, exist_ok=True)
+        stem = f"{run_name}_{datetime.now():%Y%m%d_%H%M%S}"
+        summary = self.summary()
+        path = log_dir / f"{stem}.metrics.json"
+        path.write_text(json.dumps(summary, ensure_ascii=False, indent=2), encoding="utf-8")
+        self.write_textfile(log_dir / f"{stem}.prom")
+        for line in format_summary(summary):
+            print(line)
+        print(f"📁 요청 지표 저장: {path}")
+        return path
+
+    async def serve(self, host: str = "127.0.0.1", port: int = 9108):
+        """Serve ``/metrics`` from the running event loop; returns the aiohttp runner."""
+        from aiohttp import web
+
+        async def handle(request: web.Request) -> web.Response:
+            return web.Response(text=self.render(), content_type="text/plain", charset="utf-8")
+
+        app = web.Application()
+        app.router.add_get("/metrics", handle)
+        runner = web.AppRunner(app, access_log=None)
+        await runner.setup()
+        await web.TCPSite(runner, host, port).start()
+        print(f"📈 지표 엔드포인트: http://{host}:{port}/metrics")
+        return runner
+
+
+def _round(value: Optional[float], digits: int = 3) -> Optional[float]:
+    return None if value is None else round(value, digits)
+
+
+def format_summary(summary: Mapping[str, Any]) -> List[str]:
+    """Human-readable summary lines (Korean, like the rest of the run output)."""
+    latency = summary["latency_seconds"]
+
+    def ms(value: Optional[float]) -> str:
+        return "-" if value is None else f"{value * 1000:.0f}ms"
+
+    lines = [
+        f"📈 요청 {summary['requests']:,}회 ({summary['requests_per_second'] or 0:.1f}/s), "
+        f"지연 p50 {ms(latency['p50'])} / p95 {ms(latency['p95'])} / p99 {ms(latency['p99'])}",
+        f"⏱️ 속도 제한 대기 합계 {summary['ratelimit_wait_seconds']['total']:.1f}초 "
+        f"(p95 {ms(summary['ratelimit_wait_seconds']['p95'])})",
+        f"📦 수신 {summary['response_bytes'] / 1024 / 1024:.1f}MB, 파싱 {summary['rows_parsed']:,}행",
+    ]
+    if summary["retries"]:
+        causes = ", ".join(f"{cause} {count:,}" for cause, count in summary["retries"].items())
+        lines.append(f"🔁 재시도: {causes}")
+    if summary["quota_remaining"]:
+        remaining = ", ".join(f"{bucket} {count:,}" for bucket, count in summary["quota_remaining"].items())
+        lines.append(f"🎫 남은 일일 한도: {remaining}")
+    return lines
+
+
+def endpoint_name(url: str) -> str:
+    """``https://.../api/fnlttSinglAcnt.json`` -> ``fnlttSinglAcnt``."""
+    return url.rsplit("/", 1)[-1].split("?", 1)[0].rsplit(".", 1)[0]
+
+
+REGISTRY = MetricsRegistry()
+REQUEST_SECONDS = REGISTRY.histogram(
+    "dart_request_seconds", "DART API request latency in seconds.", ("endpoint", "status")
+)
+RATE_LIMIT_WAIT_SECONDS = REGISTRY.histogram(
+    "dart_ratelimit_wait_seconds", "Time spent waiting for a rate-limiter token.", buckets=WAIT_BUCKETS
+)
+RETRIES = REGISTRY.counter("dart_retries_total", "Retried DART requests by cause.", ("cause",))
+RESPONSE_BYTES = REGISTRY.counter("dart_response_bytes_total", "Response body bytes received.", ("endpoint",))
+ROWS_PARSED = REGISTRY.counter("dart_rows_parsed_total", "Statement rows parsed from responses.", ("endpoint",))
+QUOTA_REMAINING = REGISTRY.gauge(
+    "dart_quota_remaining", "Calls left in today's budget per rate-limiter bucket.", ("bucket",)
+)
+CIRCUIT_STATE = REGISTRY.gauge(
+    "dart_circuit_state", "Circuit breaker state (0 closed, 1 half-open, 2 open).", ("circuit",)
+)
+
+
+__all__ = [
+    "CIRCUIT_STATE",
+    "Counter",
+    "Gauge",
+    "Histogram",
+    "LOG_DIR",
+    "MetricsRegistry",
+    "QUOTA_REMAINING",
+    "RATE_LIMIT_WAIT_SECONDS",
+    "REGISTRY",
+    "REQUEST_SECONDS",
+    "RESPONSE_BYTES",
+    "RETRIES",
+    "ROWS_PARSED",
+    "endpoint_name",
+    "format_summary",
+]
@@ -0,0 +1,120 @@
+"""Bounded producer/consumer pipeline for large download grids.
+
+Jobs are pulled lazily from an iterable into a bounded work queue, handled by
+a fixed set of long-lived workers, and their results pass through a bounded
+results queue to a single writer. Only ``queue_size + workers +
+result_queue_size`` jobs are alive at any time, regardless of the size of
+the corp x year grid.
+"""
+
+from __future__ import annotations
+
+import asyncio
+import inspect
+from dataclasses import dataclass
+from typing import Any, Awaitable, Callable, Generic, Iterable, Optional, TypeVar
+
+T = TypeVar("T")
+R = TypeVar("R")
+
+_DONE = object()
+
+
+@dataclass
+class PipelineStats:
+    submitted: int = 0
+    completed: int = 0
+    written: int = 0
+
+
+class Pipeline(Generic[T, R]):
+    """Run ``handler`` over ``jobs`` and feed non-None results to ``sink``."""
+
+    def __init__(
+        self,
+        handler: Callable[[T], Awaitable[Optional[R]]],
+        sink: Callable[[R], Any],
+        workers: int,
+        queue_size: Optional[int] = None,
+        result_queue_size: Optional[int] = None,
+        on_progress: Optional[Callable[[PipelineStats], None]] = None,
+        stop_event: Optional[asyncio.Event] = None,
+    ) -> None:
+        self.handler = handler
+        self.sink = sink
+        self.workers = max(1, workers)
+        self.queue_size = queue_size or self.workers * 2
+        self.result_queue_size = result_queue_size or self.workers * 2
+        self.on_progress = on_progress
+        self.stop_event = stop_event or asyncio.Event()
+        self.stats = PipelineStats()
+
+    async def run(self, jobs: Iterable[T]) -> PipelineStats:
+        work_q: asyncio.Queue = asyncio.Queue(maxsize=self.queue_size)
+        result_q: asyncio.Queue = asyncio.Queue(maxsize=self.result_queue_size)
+
+        async def produce() -> None:
+            for job in jobs:
+                if self.stop_event.is_set():
+                    break
+                await work_q.put(job)
+                self.stats.submitted += 1
+            for _ in range(self.workers):
+                await work_q.put(_DONE)
+
+        async def work() -> None:
+            while True:
+                job = await work_q.get()
+                if job is _DONE:
+                    return
+                if self.stop_event.is_set():
+                    continue  # 중단 후에는 남은 작업을 소비만 한다
+                result = await self.handler(job)
+                self.stats.completed += 1
+                if result is not None:
+                    await result_q.put(result)
+                if self.on_progress:
+                    self.on_progress(self.stats)
+
+        async def write() -> None:
+            while True:
+                result = await result_q.get()
+                if result is _DONE:
+                    return
+                outcome = self.sink(result)
+                if inspect.isawaitable(outcome):
+                    await outcome
+                self.stats.written += 1
+
+        tasks = [asyncio.create_task(produce())]
+        tasks += [asyncio.create_task(work()) for _ in range(self.workers)]
+
+        async def finish() -> None:
+            await asyncio.gather(*tasks)
+            await result_q.put(_DONE)
+
+        # 작업자나 기록기 중 하나라도 실패하면 전체를 취소한다.
+        supervisors = [asyncio.create_task(finish()), asyncio.create_task(write())]
+        try:
+            await asyncio.gather(*supervisors)
+        except BaseException:
+            self.stop_event.set()
+            for task in tasks + supervisors:
+                task.cancel()
+            await asyncio.gather(*tasks, *supervisors, return_exceptions=True)
+            raise
+        return self.stats
+
+
+async def run_pipeline(
+    jobs: Iterable[T],
+    handler: Callable[[T], Awaitable[Optional[R]]],
+    sink: Callable[[R], Any],
+    workers: int,
+    **kwargs: Any,
+) -> PipelineStats:
+    """Convenience wrapper around :class:`Pipeline`."""
+    return await Pipeline(handler, sink, workers, **kwargs).run(jobs)
+
+
+__all__ = ["Pipeline", "PipelineStats", "run_pipeline"]
@@ -0,0 +1,277 @@
+"""Streaming columnar output for downloaded DART statements.
+
+Rows are appended to a hive-partitioned dataset
+(``bsns_year=.../fs_div=.../sj_div=.../part-*.parquet``) while a download
+is still running. String columns with few distinct values are stored
+dictionary-encoded. Each sink writes its own part files, so several
+processes can append to the same dataset. Excel export is a final view
+over the dataset, see :func:`export_excel`.
+"""
+
+from __future__ import annotations
+
+import os
+import time
+import uuid
+from pathlib import Path
+from typing import Any, Dict, Iterable, List, Mapping, Optional, Sequence, Tuple, Union
+
+import pandas as pd
+import pyarrow as pa
+import pyarrow.compute as pc
+import pyarrow.dataset as ds
+import pyarrow.parquet as pq
+
+STATEMENTS_DIR = Path(__file__).resolve().parent.parent / "data" / "statements"
+
+STATEMENT_COLUMNS = [
+    "corp_code", "corp_name", "stock_code", "bsns_year", "rcept_no", "reprt_code",
+    "fs_div", "fs_nm", "sj_div", "sj_nm", "account_nm",
+    "thstrm_nm", "thstrm_dt", "thstrm_amount", "thstrm_add_amount",
+    "frmtrm_nm", "frmtrm_dt", "frmtrm_amount", "frmtrm_add_amount",
+    "bfefrmtrm_nm", "bfefrmtrm_dt", "bfefrmtrm_amount", "ord", "currency",
+]
+PARTITION_COLUMNS = ("bsns_year", "fs_div", "sj_div")
+# 고유값이 많은 컬럼(금액, 접수번호)을 제외한 문자열 컬럼은 사전 인코딩한다.
+PLAIN_COLUMNS = frozenset({
+    "rcept_no", "thstrm_amount", "thstrm_add_amount", "frmtrm_amount",
+    "frmtrm_add_amount", "bfefrmtrm_amount",
+})
+EXCEL_MAX_ROWS = 1_048_575
+_FORMATS = {"parquet": ".parquet", "arrow": ".arrow"}
+_MISSING = "unknown"
+
+
+class ColumnarSink:
+    """Append DataFrames or Arrow batches to a partitioned Parquet or Arrow IPC dataset."""
+
+    def __init__(
+        self,
+        root: Path = STATEMENTS_DIR,
+        columns: Sequence[str] = STATEMENT_COLUMNS,
+        partition_cols: Sequence[str] = PARTITION_COLUMNS,
+        fmt: str = "parquet",
+        basename: Optional[str] = None,
+        row_group_size: int = 50_000,
+        dictionary_cols: Optional[Iterable[str]] = None,
+    ) -> None:
+        if fmt not in _FORMATS:
+            raise ValueError(f"지원하지 않는 형식입니다: {fmt}")
+        self.root = Path(root)
+        self.columns = list(columns)
+        self.partition_cols = list(partition_cols)
+        self.file_columns = [c for c in self.columns if c not in self.partition_cols]
+        self.fmt = fmt
+        self.row_group_size = row_group_size
+        if dictionary_cols is None:
+            dictionary_cols = [c for c in self.file_columns if c not in PLAIN_COLUMNS]
+        dictionary_cols = set(dictionary_cols)
+        self.schema = pa.schema([
+            pa.field(c, pa.dictionary(pa.int32(), pa.string()) if c in dictionary_cols else pa.string())
+            for c in self.file_columns
+        ])
+        run_id = f"{time.strftime('%Y%m%d%H%M%S')}-{os.getpid()}-{uuid.uuid4().hex[:6]}"
+        self.basename = f"{basename}-{run_id}" if basename else f"part-{run_id}"
+        self.rows_written = 0
+        self._buffers: Dict[Tuple[str, ...], List[Union[pd.DataFrame, pa.Table]]] = {}
+        self._buffered_rows: Dict[Tuple[str, ...], int] = {}
+        self._writers: Dict[Tuple[str, ...], Any] = {}
+        self._paths: List[Path] = []
+        self._warned_columns: set = set()
+
+    def write(self, df: pd.DataFrame) -> None:
+        """Buffer a batch of rows; full row groups are flushed to disk."""
+        if df is None or df.empty:
+            return
+        unknown = set(df.columns) - set(self.columns) - self._warned_columns
+        if unknown:
+            print(f"⚠️ 저장 스키마에 없는 컬럼은 제외됩니다: {sorted(unknown)}")
+            self._warned_columns |= unknown
+        df = df.reindex(columns=self.columns)
+        keys = df[self.partition_cols].astype("string").fillna(_MISSING)
+        for key, index in keys.groupby(self.partition_cols, sort=False).groups.items():
+            key = key if isinstance(key, tuple) else (key,)
+            self._buffer(key, df.loc[index, self.file_columns], len(index))
+
+    __call__ = write
+
+    def write_batch(self, batch: Union[pa.RecordBatch, pa.Table]) -> None:
+        """Buffer Arrow rows (string columns) without going through pandas."""
+        table = pa.Table.from_batches([batch]) if isinstance(batch, pa.RecordBatch) else batch
+        if not table.num_rows:
+            return
+        unknown = set(table.column_names) - set(self.columns) - self._warned_columns
+        if unknown:
+            print(f"⚠️ 저장 스키마에 없는 컬럼은 제외됩니다: {sorted(unknown)}")
+            self._warned_columns |= unknown
+        keys = {
+            c: pc.fill_null(table[c].cast(pa.string()), _MISSING)
+            if c in table.column_names
+            else pa.chunked_array([pa.nulls(table.num_rows, pa.string()).fill_null(_MISSING)])
+            for c in self.partition_cols
+        }
+        unique = pa.table(keys).group_by(self.partition_cols).aggregate([])
+        for values in unique.to_pylist():
+            mask = None
+            for c in self.partition_cols:
+                clause = pc.equal(keys[c], values[c])
+                mask = clause if mask is None else pc.and_(mask, clause)
+            part = table.filter(mask)
+            columns = [
+                part[c] if c in part.column_names else pa.nulls(part.num_rows, pa.string())
+                for c in self.file_columns
+            ]
+            key = tuple(values[c] for c in self.partition_cols)
+            self._buffer(key, pa.table(columns, names=self.file_columns), part.num_rows)
+
+    def _buffer(self, key: Tuple[str, ...], part: Union[pd.DataFrame, pa.Table], rows: int) -> None:
+        self._buffers.setdefault(key, []).append(part)
+        self._buffered_rows[key] = self._buffered_rows.get(key, 0) + rows
+        if self._buffered_rows[key] >= self.row_group_size:
+            self._flush(key)
+
+    def flush(self) -> None:
+        for key in list(self._buffers):
+            self._flush(key)
+
+    def close(self) -> None:
+        self.flush()
+        for writer in self._writers.values():
+            writer.close()
+        self._writers.clear()
+
+    def discard(self) -> None:
+        """Drop buffered rows and delete every file this sink has written.
+
+        Used when a download attempt fails part-way and will be repeated,
+        so the retry does not leave duplicate rows in the dataset.
+        """
+        self._buffers.clear()
+        self._buffered_rows.clear()
+        for writer in self._writers.values():
+            writer.close()
+        self._writers.clear()
+        for path in self._paths:
+            path.unlink(missing_ok=True)
+        self._paths.clear()
+        self.rows_written = 0
+
+    def __enter__(self) -> "ColumnarSink":
+        return self
+
+    def __exit__(self, *exc: Any) -> None:
+        self.close()
+
+    def _flush(self, key: Tuple[str, ...]) -> None:
+        parts = self._buffers.pop(key, [])
+        self._buffered_rows.pop(key, None)
+        if not parts:
+            return
+        tables = []
+        frames = [p for p in parts if isinstance(p, pd.DataFrame)]
+        if frames:
+            part = pd.concat(frames, ignore_index=True).astype("string")
+            tables.append(pa.Table.from_pandas(part, schema=self.schema, preserve_index=False))
+        tables += [p.cast(self.schema) for p in parts if isinstance(p, pa.Table)]
+        table = pa.concat_tables(tables, promote_options="permissive").unify_dictionaries() if len(tables) > 1 else tables[0]
+        writer = self._writers.get(key)
+        if writer is None:
+            directory = self.root.joinpath(*(f"{c}={v}" for c, v in zip(self.partition_cols, key)))
+            directory.mkdir(parents=True, exist_ok=True)
+            path = directory / f"{self.basename}{_FORMATS[self.fmt]}"
+            if self.fmt == "parquet":
+                writer = pq.ParquetWriter(path, self.schema, compression="zstd")
+            else:
+                writer = pa.ipc.new_file(str(path), self.schema)
+            self._writers[key] = writer
+            self._paths.append(path)
+        writer.write_table(table)
+        self.rows_written += table.num_rows
+
+
+def open_dataset(
+    root: Path = STATEMENTS_DIR,
+    partition_cols: Sequence[str] = PARTITION_COLUMNS,
+    fmt: str = "parquet",
+) -> ds.Dataset:
+    """Open a dataset written by :class:`ColumnarSink`."""
+    partitioning = ds.partitioning(
+        pa.schema([(c, pa.string()) for c in partition_cols]), flavor="hive"
+    )
+    return ds.dataset(str(root), format="ipc" if fmt == "arrow" else fmt, partitioning=partitioning)
+
+
+def read_statements(
+    root: Path = STATEMENTS_DIR,
+    columns: Optional[Sequence[str]] = None,
+    filters: Optional[Mapping[str, Any]] = None,
+    partition_cols: Sequence[str] = PARTITION_COLUMNS,
+    fmt: str = "parquet",
+) -> pd.DataFrame:
+    """Read (a projection of) the dataset into a DataFrame.
+
+    ``filters`` maps column names to a value or a list of values, e.g.
+    ``{"bsns_year": ["2022", "2023"], "fs_div": "CFS"}``.
+    """
+    dataset = open_dataset(root, partition_cols, fmt)
+    expression = None
+    for column, value in (filters or {}).items():
+        values = [str(v) for v in value] if isinstance(value, (list, tuple, set)) else [str(value)]
+        clause = ds.field(column).isin(values)
+        expression = clause if expression is None else expression & clause
+    table = dataset.to_table(columns=list(columns) if columns else None, filter=expression)
+    return table.to_pandas()
+
+
+def drop_superseded(
+    df: pd.DataFrame,
+    keys: Sequence[str] = ("corp_code", "bsns_year", "reprt_code", "fs_div"),
+) -> pd.DataFrame:
+    """Keep only the latest filing (highest ``rcept_no``) per report key.
+
+    Re-fetching a report after an amendment appends new rows to the
+    dataset; this drops the superseded ones and exact duplicates.
+    """
+    keys = [k for k in keys if k in df.columns]
+    if df.empty or "rcept_no" not in df.columns or not keys:
+        return df
+    latest = df.groupby(keys, observed=True, dropna=False)["rcept_no"].transform("max")
+    return df[df["rcept_no"] == latest].drop_duplicates().reset_index(drop=True)
+
+
+def export_excel(
+    root: Path,
+    path: Path,
+    filters: Optional[Mapping[str, Any]] = None,
+    fmt: str = "parquet",
+) -> int:
+    """Write the dataset (optionally filtered) to an Excel workbook.
+
+    Rows beyond Excel's sheet limit spill over into additional sheets.
+    Returns the number of rows written.
+    """
+    df = read_statements(root, filters=filters, fmt=fmt)
+    columns = [c for c in STATEMENT_COLUMNS if c in df.columns]
+    df = df[columns + [c for c in df.columns if c not in columns]]
+    path = Path(path)
+    path.parent.mkdir(parents=True, exist_ok=True)
+    with pd.ExcelWriter(path, engine="openpyxl") as writer:
+        if df.empty:
+            df.to_excel(writer, index=False, sheet_name="data")
+        for n, start in enumerate(range(0, len(df), EXCEL_MAX_ROWS), start=1):
+            sheet = "data" if n == 1 else f"data_{n}"
+            df.iloc[start:start + EXCEL_MAX_ROWS].to_excel(writer, index=False, sheet_name=sheet)
+    print(f"Saved {len(df):,} rows to {path}")
+    return len(df)
+
+
+__all__ = [
+    "ColumnarSink",
+    "PARTITION_COLUMNS",
+    "STATEMENTS_DIR",
+    "STATEMENT_COLUMNS",
+    "drop_superseded",
+    "export_excel",
+    "open_dataset",
+    "read_statements",
+]
@@ -0,0 +1,218 @@
+"""Incremental sync driven by the DART disclosure list.
+
+Instead of re-requesting every corp x year, a sync asks DART's disclosure
+search (``list.json``) which periodic reports were filed or amended since
+the last sync, maps each filing to the ``(corp_code, bsns_year,
+reprt_code)`` key it affects, drops the cached responses for those keys and
+puts them back into the checkpoint store as pending. The regular download
+loop then re-fetches only those keys. The sync watermark is kept in the
+checkpoint store's ``meta`` table.
+"""
+
+from __future__ import annotations
+
+import os
+import re
+from dataclasses import dataclass, field
+from datetime import date, datetime, timedelta
+from typing import Any, Dict, Iterable, List, Optional, Sequence, Set, Tuple
+
+import aiohttp
+
+try:
+    from .checkpoint_store import CheckpointStore
+    from .dart_cache import ResponseCache
+    from .fs_div_profile import FsDivProfile
+    from .rate_limiter import KST, QuotaExceededError, RateLimiter, is_quota_message
+except ImportError:  # ``src``가 sys.path에 직접 추가된 경우
+    from checkpoint_store import CheckpointStore
+    from dart_cache import ResponseCache
+    from fs_div_profile import FsDivProfile
+    from rate_limiter import KST, QuotaExceededError, RateLimiter, is_quota_message
+
+DART_API_BASE = os.environ.get("DART_API_BASE", "https://opendart.fss.or.kr/api").rstrip("/")
+DART_LIST_URL = f"{DART_API_BASE}/list.json"
+WATERMARK_KEY = "delta_sync_watermark"
+# corp_code 없이 조회할 때 DART가 허용하는 최대 검색 기간은 3개월이다.
+MAX_WINDOW_DAYS = 90
+PAGE_COUNT = 100
+
+ANNUAL = "11011"
+HALF_YEAR = "11012"
+FIRST_QUARTER = "11013"
+THIRD_QUARTER = "11014"
+
+# "[기재정정]사업보고서 (2023.12)" 형태의 보고서명에서 종류와 결산 기간을 뽑는다.
+_REPORT_RE = re.compile(r"(사업보고서|반기보고서|분기보고서)\s*\((\d{4})\.(\d{2})\)")
+
+ReportKey = Tuple[str, int, str]  # corp_code, bsns_year, reprt_code
+
+
+def parse_report_name(report_nm: str) -> Optional[Tuple[int, str]]:
+    """Map a periodic report name to ``(bsns_year, reprt_code)``.
+
+    Returns None for anything that is not an annual, half-year or
+    quarterly report.
+    """
+    match = _REPORT_RE.search(report_nm or "")
+    if match is None:
+        return None
+    kind, year, month = match.group(1), int(match.group(2)), int(match.group(3))
+    if kind == "사업보고서":
+        return year, ANNUAL
+    if kind == "반기보고서":
+        return year, HALF_YEAR
+    if "1분기" in report_nm:
+        return year, FIRST_QUARTER
+    if "3분기" in report_nm:
+        return year, THIRD_QUARTER
+    # 12월 결산법인 기준: 3월 → 1분기, 9월 → 3분기
+    return year, FIRST_QUARTER if month <= 6 else THIRD_QUARTER
+
+
+def affected_keys(
+    disclosures: Iterable[Dict[str, Any]],
+    reprt_codes: Optional[Sequence[str]] = None,
+) -> Set[ReportKey]:
+    """Return the report keys touched by a list of disclosures."""
+    keys: Set[ReportKey] = set()
+    for item in disclosures:
+        parsed = parse_report_name(item.get("report_nm", ""))
+        if parsed is None or not item.get("corp_code"):
+            continue
+        year, reprt_code = parsed
+        if reprt_codes is None or reprt_code in reprt_codes:
+            keys.add((item["corp_code"], year, reprt_code))
+    return keys
+
+
+def _windows(since: date, until: date) -> Iterable[Tuple[date, date]]:
+    start = since
+    while start <= until:
+        end = min(until, start + timedelta(days=MAX_WINDOW_DAYS - 1))
+        yield start, end
+        start = end + timedelta(days=1)
+
+
+async def fetch_disclosures(
+    session: aiohttp.ClientSession,
+    api_key: str,
+    since: date,
+    until: date,
+    rate_limiter: Optional[RateLimiter] = None,
+    pblntf_ty: str = "A",
+) -> List[Dict[str, Any]]:
+    """Return every disclosure of type ``pblntf_ty`` (A: 정기공시) in the range."""
+    results: List[Dict[str, Any]] = []
+    for bgn, end in _windows(since, until):
+        page = 1
+        while True:
+            params = {
+                "crtfc_key": api_key,
+                "bgn_de": bgn.strftime("%Y%m%d"),
+                "end_de": end.strftime("%Y%m%d"),
+                "pblntf_ty": pblntf_ty,
+                "page_no": page,
+                "page_count": PAGE_COUNT,
+            }
+            if rate_limiter is not None:
+                await rate_limiter.wait()
+            async with session.get(DART_LIST_URL, params=params) as resp:
+                resp.raise_for_status()
+                data = await resp.json(content_type=None)
+            status = data.get("status")
+            if status == "013":  # 조회된 데이터 없음
+                break
+            if status != "000":
+                message = data.get("message", "")
+                if status == "020" or is_quota_message(message):
+                    raise QuotaExceededError(f"API daily request limit reached: {message}")
+                raise RuntimeError(f"공시 검색 실패 ({status}): {message}")
+            results.extend(data.get("list", []))
+            if page >= int(data.get("total_page", 1)):
+                break
+            page += 1
+    return results
+
+
+@dataclass
+class DeltaPlan:
+    since: date
+    until: date
+    disclosures: int = 0
+    keys: Set[ReportKey] = field(default_factory=set)
+    requeued: int = 0
+    invalidated: int = 0
+
+    def __str__(self) -> str:
+        return (
+            f"{self.since:%Y-%m-%d}~{self.until:%Y-%m-%d} 정기공시 {self.disclosures:,}건 → "
+            f"영향 키 {len(self.keys):,}개, 재수집 대상 {self.requeued:,}개, "
+            f"캐시 무효화 {self.invalidated:,}건"
+        )
+
+
+async def plan_delta_sync(
+    session: aiohttp.ClientSession,
+    api_key: str,
+    store: CheckpointStore,
+    cache: Optional[ResponseCache] = None,
+    rate_limiter: Optional[RateLimiter] = None,
+    since: Optional[date] = None,
+    fs_divs: Sequence[str] = ("CFS", "OFS"),
+    reprt_codes: Optional[Sequence[str]] = None,
+    default_lookback_days: int = 7,
+    profile: Optional[FsDivProfile] = None,
+) -> DeltaPlan:
+    """Requeue the keys affected by filings since the watermark.
+
+    Only keys the store already tracks are requeued. Negative results for
+    those keys are dropped from ``profile`` so they are asked again. The
+    watermark is not advanced here; call :func:`commit_watermark` once the re-fetch is done.
+    """
+    today = datetime.now(KST).date()
+    if since is None:
+        watermark = store.get_meta(WATERMARK_KEY)
+        if watermark:
+            since = datetime.strptime(watermark, "%Y%m%d").date()
+        else:
+            since = today - timedelta(days=default_lookback_days)
+    plan = DeltaPlan(since=since, until=today)
+
+    disclosures = await fetch_disclosures(session, api_key, since, today, rate_limiter)
+    plan.disclosures = len(disclosures)
+    plan.keys = affected_keys(disclosures, reprt_codes)
+
+    for corp_code, year, reprt_code in plan.keys:
+        if cache is not None:
+            plan.invalidated += cache.invalidate_matching(
+                corp_code=corp_code, bsns_year=year, reprt_code=reprt_code
+            )
+        if profile is not None:
+            profile.forget(corp_code, year, reprt_code)
+    plan.requeued = store.requeue(
+        (corp_code, year, reprt_code, fs_div)
+        for corp_code, year, reprt_code in plan.keys
+        for fs_div in fs_divs
+    )
+    return plan
+
+
+def commit_watermark(store: CheckpointStore, plan: DeltaPlan) -> None:
+    """Record that filings up to ``plan.until`` have been synced.
+
+    The next sync starts on that same day, so filings made later that day
+    are picked up as well.
+    """
+    store.set_meta(WATERMARK_KEY, plan.until.strftime("%Y%m%d"))
+
+
+__all__ = [
+    "DART_LIST_URL",
+    "DeltaPlan",
+    "affected_keys",
+    "commit_watermark",
+    "fetch_disclosures",
+    "parse_report_name",
+    "plan_delta_sync",
+]
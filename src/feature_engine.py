@@ -0,0 +1,246 @@
+"""Declarative financial-ratio features over canonical accounts.
+
+Each feature is a :class:`FeatureSpec`: a name and an arithmetic
+expression over canonical account names from :mod:`account_normalizer`,
+e.g. ``"(유동자산 - 유동부채) / 자산총계"``. Expressions are parsed once
+with :mod:`ast` (only arithmetic, numbers, account names and a few safe
+functions are allowed) and compiled into NumPy closures. :class:`FeatureEngine`
+then evaluates every spec in one pass over a wide (company, year) x account
+matrix.
+
+NaN semantics: a missing account gives NaN, division by zero gives NaN
+instead of ``inf``, and ``log`` of a non-positive value gives NaN. The
+hand-made ``data/processed/features_v1.csv`` contains ``inf``/``-inf`` in
+those cases.
+"""
+
+from __future__ import annotations
+
+import ast
+from dataclasses import dataclass, field
+from typing import Callable, Dict, FrozenSet, Iterable, List, Mapping, Optional, Sequence, Tuple
+
+import numpy as np
+import pandas as pd
+
+try:
+    from .account_normalizer import AccountNormalizer, to_wide
+except ImportError:  # ``src``가 sys.path에 직접 추가된 경우
+    from account_normalizer import AccountNormalizer, to_wide
+
+Columns = Mapping[str, np.ndarray]
+Compiled = Callable[[Columns], np.ndarray]
+
+
+def safe_divide(numerator: np.ndarray, denominator: np.ndarray) -> np.ndarray:
+    """Element-wise division with NaN where the denominator is 0 or NaN."""
+    numerator, denominator = np.broadcast_arrays(
+        np.asarray(numerator, dtype=np.float64), np.asarray(denominator, dtype=np.float64)
+    )
+    out = np.full(numerator.shape, np.nan)
+    np.divide(numerator, denominator, out=out, where=denominator != 0)
+    return out
+
+
+def safe_log(values: np.ndarray) -> np.ndarray:
+    """Natural log with NaN for values <= 0."""
+    values = np.asarray(values, dtype=np.float64)
+    out = np.full(values.shape, np.nan)
+    np.log(values, out=out, where=values > 0)
+    return out
+
+
+def safe_sqrt(values: np.ndarray) -> np.ndarray:
+    """Square root with NaN for negative values."""
+    values = np.asarray(values, dtype=np.float64)
+    out = np.full(values.shape, np.nan)
+    np.sqrt(values, out=out, where=values >= 0)
+    return out
+
+
+FUNCTIONS: Dict[str, Callable[..., np.ndarray]] = {
+    "log": safe_log,
+    "sqrt": safe_sqrt,
+    "abs": np.abs,
+}
+_BINARY = {
+    ast.Add: np.add,
+    ast.Sub: np.subtract,
+    ast.Mult: np.multiply,
+    ast.Div: safe_divide,
+}
+
+
+def _compile(node: ast.AST, accounts: List[str]) -> Compiled:
+    """Turn an expression AST into a closure over account columns."""
+    if isinstance(node, ast.Expression):
+        return _compile(node.body, accounts)
+    if isinstance(node, ast.BinOp) and type(node.op) in _BINARY:
+        op = _BINARY[type(node.op)]
+        left, right = _compile(node.left, accounts), _compile(node.right, accounts)
+        return lambda cols: op(left(cols), right(cols))
+    if isinstance(node, ast.UnaryOp) and isinstance(node.op, (ast.USub, ast.UAdd)):
+        operand = _compile(node.operand, accounts)
+        if isinstance(node.op, ast.UAdd):
+            return operand
+        return lambda cols: np.negative(operand(cols))
+    if isinstance(node, ast.Name):
+        if node.id not in accounts:
+            accounts.append(node.id)
+        name = node.id
+        return lambda cols: cols[name]
+    if isinstance(node, ast.Constant) and isinstance(node.value, (int, float)) and not isinstance(node.value, bool):
+        value = float(node.value)
+        return lambda cols: value
+    if (
+        isinstance(node, ast.Call)
+        and isinstance(node.func, ast.Name)
+        and node.func.id in FUNCTIONS
+        and not node.keywords
+    ):
+        fn = FUNCTIONS[node.func.id]
+        args = [_compile(arg, accounts) for arg in node.args]
+        return lambda cols: fn(*(arg(cols) for arg in args))
+    raise ValueError(f"지원하지 않는 식입니다: {ast.dump(node)}")
+
+
+@dataclass(frozen=True)
+class FeatureSpec:
+    """A named ratio defined by an expression over canonical accounts."""
+
+    name: str
+    expression: str
+    description: str = ""
+    accounts: Tuple[str, ...] = field(init=False, compare=False)
+    _fn: Compiled = field(init=False, repr=False, compare=False)
+
+    def __post_init__(self) -> None:
+        accounts: List[str] = []
+        fn = _compile(ast.parse(self.expression, mode="eval"), accounts)
+        object.__setattr__(self, "accounts", tuple(accounts))
+        object.__setattr__(self, "_fn", fn)
+
+    def evaluate(self, columns: Columns) -> np.ndarray:
+        """Evaluate over ``{account: float64 array}``."""
+        return self._fn(columns)
+
+
+FEATURES_V1: Tuple[FeatureSpec, ...] = (
+    FeatureSpec("부채비율", "부채총계 / 자본총계", "건전성"),
+    FeatureSpec("유동비율", "유동자산 / 유동부채", "건전성"),
+    FeatureSpec("자기자본비율", "자본총계 / 자산총계", "건전성"),
+    FeatureSpec("고정자산비율", "비유동자산 / 자산총계", "건전성"),
+    FeatureSpec("고정비율", "비유동자산 / 자본총계", "건전성"),
+    FeatureSpec("순운전자본비율", "(유동자산 - 유동부채) / 자산총계", "건전성"),
+    FeatureSpec("ln자산총계", "log(자산총계)", "규모"),
+    FeatureSpec("총자산이익잉여금비율", "이익잉여금 / 자산총계", "수익성"),
+    FeatureSpec("ln매출액", "log(매출액)", "규모"),
+    FeatureSpec("매출액순이익률", "당기순이익 / 매출액", "수익성"),
+)
+PANEL_INDEX = ("corp_code", "corp_name", "bsns_year")
+FS_DIV_PREFERENCE = ("CFS", "OFS")
+
+
+class FeatureEngine:
+    """Evaluate a set of :class:`FeatureSpec` over a wide account table."""
+
+    def __init__(self, specs: Sequence[FeatureSpec] = FEATURES_V1) -> None:
+        names = [spec.name for spec in specs]
+        if len(set(names)) != len(names):
+            raise ValueError("피처 이름이 중복되었습니다")
+        self.specs = list(specs)
+        self.names = names
+        self.accounts = list(dict.fromkeys(a for spec in self.specs for a in spec.accounts))
+
+    def dependencies(self) -> Dict[str, FrozenSet[str]]:
+        """Accounts each feature reads, by feature name."""
+        return {spec.name: frozenset(spec.accounts) for spec in self.specs}
+
+    def affected(self, accounts: Iterable[str]) -> List[str]:
+        """Features that depend on any of ``accounts``."""
+        changed = set(accounts)
+        return [spec.name for spec in self.specs if changed.intersection(spec.accounts)]
+
+    def subset(self, names: Iterable[str]) -> "FeatureEngine":
+        """Engine restricted to the named features (in this engine's order)."""
+        wanted = set(names)
+        return FeatureEngine([spec for spec in self.specs if spec.name in wanted])
+
+    def matrix(self, wide: pd.DataFrame) -> np.ndarray:
+        """The (rows x accounts) float64 input matrix; missing accounts are NaN."""
+        matrix = np.full((len(wide), len(self.accounts)), np.nan)
+        for j, account in enumerate(self.accounts):
+            if account in wide.columns:
+                matrix[:, j] = pd.to_numeric(wide[account], errors="coerce").to_numpy(dtype=np.float64, na_value=np.nan)
+        return matrix
+
+    def evaluate(self, matrix: np.ndarray) -> np.ndarray:
+        """All features for an input matrix laid out as :attr:`accounts`."""
+        columns = {account: matrix[:, j] for j, account in enumerate(self.accounts)}
+        out = np.empty((matrix.shape[0], len(self.specs)))
+        with np.errstate(all="ignore"):
+            for i, spec in enumerate(self.specs):
+                out[:, i] = spec.evaluate(columns)
+        return out
+
+    def compute(self, wide: pd.DataFrame, index: Sequence[str] = PANEL_INDEX) -> pd.DataFrame:
+        """Index columns of ``wide`` followed by one column per feature."""
+        index = [c for c in index if c in wide.columns]
+        values = self.evaluate(self.matrix(wide))
+        features = pd.DataFrame(values, columns=self.names, index=wide.index)
+        return pd.concat([wide[index], features], axis=1).reset_index(drop=True)
+
+
+def select_fs_div(wide: pd.DataFrame, prefer: Sequence[str] = FS_DIV_PREFERENCE) -> pd.DataFrame:
+    """Keep one row per company-year, preferring consolidated statements."""
+    if "fs_div" not in wide.columns:
+        return wide
+    rank = wide["fs_div"].map({fs: i for i, fs in enumerate(prefer)}).fillna(len(prefer))
+    keys = [c for c in ("corp_code", "bsns_year") if c in wide.columns]
+    order = np.lexsort((rank.to_numpy(), *(wide[k].to_numpy() for k in reversed(keys))))
+    return wide.iloc[order].drop_duplicates(keys, keep="first").reset_index(drop=True)
+
+
+def pivot_normalized(normalized: pd.DataFrame, prefer: Sequence[str] = FS_DIV_PREFERENCE) -> pd.DataFrame:
+    """One row per (corp_code, bsns_year) from already normalized rows."""
+    index = [c for c in ("corp_code", "bsns_year", "fs_div") if c in normalized.columns]
+    return select_fs_div(to_wide(normalized, index=index), prefer)
+
+
+def build_wide(
+    statements: pd.DataFrame,
+    normalizer: Optional[AccountNormalizer] = None,
+    prefer: Sequence[str] = FS_DIV_PREFERENCE,
+) -> pd.DataFrame:
+    """Normalize raw statement rows into one row per (corp_code, bsns_year)."""
+    normalizer = normalizer or AccountNormalizer()
+    normalized = normalizer.normalize(statements, amount_cols=("thstrm_amount",))
+    wide = pivot_normalized(normalized, prefer)
+    if "corp_name" in statements.columns:
+        # 기업명은 정정 공시 등으로 행마다 다를 수 있어 기업별 마지막 값을 붙인다.
+        names = statements.drop_duplicates("corp_code", keep="last").set_index("corp_code")["corp_name"]
+        wide.insert(1, "corp_name", wide["corp_code"].map(names))
+    return wide
+
+
+def to_features_v1_layout(features: pd.DataFrame) -> pd.DataFrame:
+    """Rename to the ``features_v1.csv`` layout: 사업연도, 회사명, features."""
+    out = features.rename(columns={"bsns_year": "사업연도", "corp_name": "회사명"})
+    out["사업연도"] = pd.to_numeric(out["사업연도"], errors="coerce").astype("Int64")
+    feature_cols = [c for c in out.columns if c not in ("corp_code", "사업연도", "회사명")]
+    out = out[["사업연도", "회사명"] + feature_cols]
+    return out.sort_values(["사업연도", "회사명"], kind="stable").reset_index(drop=True)
+
+
+__all__ = [
+    "FEATURES_V1",
+    "FUNCTIONS",
+    "FeatureEngine",
+    "FeatureSpec",
+    "build_wide",
+    "pivot_normalized",
+    "safe_divide",
+    "safe_log",
+    "select_fs_div",
+    "to_features_v1_layout",
+]
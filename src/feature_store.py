@@ -0,0 +1,398 @@
+"""Year-partitioned, memory-mappable store for computed features.
+
+Each business year is one uncompressed Arrow IPC file
+(``bsns_year=YYYY/part-0.arrow``); a panel without a year column is a
+single ``part-0.arrow``. Columns are stored compactly: float features as
+``float32`` (NaN, never null), strings such as corp names
+dictionary-encoded (categorical in pandas) and the year, which lives in
+the directory name, comes back as ``int16``.
+
+Reads are memory-mapped. :meth:`FeatureStore.arrays` returns NumPy views
+straight onto the mapped file when one year is selected (one copy per
+column otherwise), and :meth:`FeatureStore.to_numpy` fills a single
+contiguous matrix with one copy per column. Both accept a column
+projection and a year predicate, so only the selected bytes are touched.
+
+:meth:`FeatureStore.upsert` rewrites only the years it touches. A frame
+that carries a subset of the feature columns updates just those columns
+of existing rows, so an incremental run can recompute a single ratio
+without touching the others. :func:`open_panel` converts an Excel or CSV
+training panel into a store once and reuses it until the source changes.
+"""
+
+from __future__ import annotations
+
+import json
+import os
+import shutil
+from pathlib import Path
+from typing import Dict, Iterable, List, Optional, Sequence, Union
+
+import numpy as np
+import pandas as pd
+import pyarrow as pa
+import pyarrow.feather as feather
+
+FEATURE_STORE_DIR = Path(__file__).resolve().parent.parent / "data" / "processed" / "feature_store"
+KEY_COLUMNS = ("corp_code", "bsns_year")
+YEAR_COLUMN = "bsns_year"
+PART_NAME = "part-0.arrow"
+# Excel/CSV 패널에서 연도 파티션으로 쓸 컬럼 후보
+PANEL_YEAR_COLUMNS = ("bsns_year", "사업연도", "회계년도")
+SOURCE_STAMP = "_source.json"
+_ORDER_KEY = b"columns"
+
+
+def _column_array(series: pd.Series) -> pa.Array:
+    """Compact Arrow array for one pandas column."""
+    dtype = series.dtype
+    if pd.api.types.is_float_dtype(dtype):
+        # NaN을 그대로 두어야(null 비트맵 없이) NumPy로 복사 없이 읽을 수 있다.
+        return pa.array(series.to_numpy(dtype=np.float32, na_value=np.nan))
+    if not (
+        pd.api.types.is_object_dtype(dtype)
+        or pd.api.types.is_string_dtype(dtype)
+        or isinstance(dtype, pd.CategoricalDtype)
+    ):
+        return pa.array(series, from_pandas=True)
+    values = series.astype(object).where(series.notna(), None)
+    return pa.array(values.to_numpy(), type=pa.string()).dictionary_encode()
+
+
+class FeatureStore:
+    """(corp_code, year) x feature table, one memory-mappable file per year."""
+
+    def __init__(self, root: Path = FEATURE_STORE_DIR, year_column: Optional[str] = YEAR_COLUMN) -> None:
+        self.root = Path(root)
+        self.year_column = year_column
+
+    # ----- layout -----
+
+    def path(self, year: Optional[int]) -> Path:
+        if year is None:
+            return self.root / PART_NAME
+        return self.root / f"{self.year_column}={int(year)}" / PART_NAME
+
+    def years(self) -> List[int]:
+        """Years present in the store, ascending."""
+        if not self.root.exists() or self.year_column is None:
+            return []
+        years = []
+        for part in self.root.glob(f"{self.year_column}=*/{PART_NAME}"):
+            value = part.parent.name.split("=", 1)[1]
+            if value.lstrip("-").isdigit():
+                years.append(int(value))
+        return sorted(years)
+
+    def _partitions(
+        self,
+        years: Optional[Iterable[int]] = None,
+        start: Optional[int] = None,
+        end: Optional[int] = None,
+    ) -> List[Optional[int]]:
+        """Partitions matching the year predicate (``start``/``end`` inclusive)."""
+        if self.year_column is None:
+            return [None] if self.path(None).exists() else []
+        selected = self.years()
+        if years is not None:
+            wanted = {int(y) for y in years}
+            selected = [y for y in selected if y in wanted]
+        if start is not None:
+            selected = [y for y in selected if y >= start]
+        if end is not None:
+            selected = [y for y in selected if y <= end]
+        return selected
+
+    def _open(self, year: Optional[int]) -> pa.Table:
+        # 압축하지 않은 IPC 파일을 메모리 매핑하면 버퍼가 파일을 그대로 가리킨다.
+        return feather.read_table(self.path(year), memory_map=True)
+
+    @property
+    def columns(self) -> List[str]:
+        """All columns in stored order, including the year column."""
+        order: List[str] = []
+        for year in self._partitions():
+            table = self._open(year)
+            names = self._order(table.schema, year)
+            order.extend(c for c in names if c not in order)
+        return order
+
+    def numeric_columns(self) -> List[str]:
+        """Stored columns that are not dictionary-encoded strings."""
+        kinds: Dict[str, bool] = {}
+        for year in self._partitions():
+            for field in self._part(year, None).schema:
+                kinds[field.name] = kinds.get(field.name, True) and not pa.types.is_dictionary(field.type)
+        return [c for c in self.columns if kinds.get(c, False)]
+
+    def _order(self, schema: pa.Schema, year: Optional[int]) -> List[str]:
+        metadata = schema.metadata or {}
+        names = json.loads(metadata[_ORDER_KEY]) if _ORDER_KEY in metadata else list(schema.names)
+        if year is not None and self.year_column not in names:
+            names.insert(min(1, len(names)), self.year_column)
+        return [c for c in names if c in schema.names or c == self.year_column]
+
+    # ----- reading -----
+
+    def _part(self, year: Optional[int], columns: Optional[Sequence[str]]) -> pa.Table:
+        table = self._open(year)
+        names = self._order(table.schema, year) if columns is None else list(columns)
+        arrays, fields = [], []
+        for name in names:
+            if name == self.year_column and year is not None:
+                arrays.append(pa.array(np.full(table.num_rows, year, dtype=np.int16)))
+                fields.append(pa.field(name, pa.int16()))
+            elif name in table.schema.names:
+                arrays.append(table[name])
+                fields.append(table.schema.field(name))
+        return pa.Table.from_arrays(arrays, schema=pa.schema(fields))
+
+    def table(
+        self,
+        columns: Optional[Sequence[str]] = None,
+        years: Optional[Iterable[int]] = None,
+        start: Optional[int] = None,
+        end: Optional[int] = None,
+    ) -> pa.Table:
+        """Selected columns and years as one (memory-mapped) Arrow table."""
+        parts = [self._part(year, columns) for year in self._partitions(years, start, end)]
+        if not parts:
+            return pa.table({c: pa.array([], pa.float32()) for c in (columns or [])})
+        table = pa.concat_tables(parts, promote_options="default")
+        return table.unify_dictionaries()
+
+    def read(
+        self,
+        years: Optional[Iterable[int]] = None,
+        columns: Optional[Sequence[str]] = None,
+        start: Optional[int] = None,
+        end: Optional[int] = None,
+    ) -> pd.DataFrame:
+        """Selected rows as a DataFrame (float32 features, categorical strings)."""
+        return self.table(columns, years, start, end).to_pandas()
+
+    def arrays(
+        self,
+        columns: Sequence[str],
+        years: Optional[Iterable[int]] = None,
+        start: Optional[int] = None,
+        end: Optional[int] = None,
+    ) -> Dict[str, np.ndarray]:
+        """One contiguous NumPy array per column.
+
+        With a single partition selected, numeric columns are read-only views
+        onto the memory-mapped file; otherwise partitions are concatenated.
+        Dictionary columns come back as integer codes into one dictionary
+        shared by all selected years.
+        """
+        chunks: Dict[str, List[np.ndarray]] = {c: [] for c in columns}
+        dictionary: List[str] = []
+        for year in self._partitions(years, start, end):
+            table = self._part(year, columns)
+            for name in columns:
+                if name not in table.schema.names:
+                    # 나중에 추가된 피처는 예전 연도 파일에 없으므로 NaN으로 채운다.
+                    chunks[name].append(np.full(table.num_rows, np.nan, dtype=np.float32))
+                    continue
+                column = table[name].combine_chunks()
+                if pa.types.is_dictionary(column.type):
+                    if name not in dictionary:
+                        dictionary.append(name)
+                    continue
+                chunks[name].append(column.to_numpy(zero_copy_only=column.null_count == 0))
+        if dictionary:
+            # 연도 파일마다 사전이 다르므로 통합한 뒤의 코드를 돌려준다.
+            unified = self.table(dictionary, years, start, end)
+            for name in dictionary:
+                chunks[name] = [c.indices.to_numpy(zero_copy_only=False) for c in unified[name].chunks]
+        out = {}
+        for name, parts in chunks.items():
+            if len(parts) == 1:
+                out[name] = parts[0]
+            elif parts:
+                out[name] = np.concatenate(parts)
+            else:
+                out[name] = np.empty(0, dtype=np.float32)
+        return out
+
+    def to_numpy(
+        self,
+        columns: Sequence[str],
+        years: Optional[Iterable[int]] = None,
+        start: Optional[int] = None,
+        end: Optional[int] = None,
+        dtype: np.dtype = np.float32,
+    ) -> np.ndarray:
+        """(rows x columns) matrix, column-major, one copy per column."""
+        arrays = self.arrays(columns, years, start, end)
+        rows = len(next(iter(arrays.values()))) if arrays else 0
+        matrix = np.empty((rows, len(columns)), dtype=dtype, order="F")
+        for j, name in enumerate(columns):
+            matrix[:, j] = arrays[name]
+        return matrix
+
+    # ----- writing -----
+
+    def _write_part(self, year: Optional[int], frame: pd.DataFrame, order: Sequence[str]) -> None:
+        path = self.path(year)
+        path.parent.mkdir(parents=True, exist_ok=True)
+        tmp = path.with_suffix(".arrow.tmp")
+        frame = frame.drop(columns=self.year_column, errors="ignore") if year is not None else frame
+        table = pa.Table.from_arrays(
+            [_column_array(frame[c]) for c in frame.columns],
+            names=[str(c) for c in frame.columns],
+        ).replace_schema_metadata({_ORDER_KEY: json.dumps([str(c) for c in order], ensure_ascii=False)})
+        feather.write_feather(table, tmp, compression="uncompressed")
+        # Windows에서는 다른 프로세스가 매핑 중인 파일을 바꿀 수 없으므로 읽기와 갱신을 분리한다.
+        os.replace(tmp, path)
+
+    def write(self, frame: pd.DataFrame) -> Dict[Optional[int], int]:
+        """Replace the whole store with ``frame``, one file per year."""
+        if self.root.exists():
+            for part in [self.path(y) for y in self._partitions()]:
+                part.unlink()
+        order = list(frame.columns)
+        counts: Dict[Optional[int], int] = {}
+        if self.year_column is None or self.year_column not in frame.columns:
+            self.year_column = None
+            self._write_part(None, frame.reset_index(drop=True), order)
+            counts[None] = len(frame)
+            return counts
+        years = pd.to_numeric(frame[self.year_column], errors="raise").astype(np.int64)
+        for year, rows in frame.groupby(years.to_numpy(), sort=True):
+            self._write_part(int(year), rows.reset_index(drop=True), order)
+            counts[int(year)] = len(rows)
+        return counts
+
+    def _plain_part(self, year: int) -> pd.DataFrame:
+        """Stored rows of one year with categoricals as objects, for merging."""
+        if not self.path(year).exists():
+            return pd.DataFrame()
+        frame = self._part(year, None).to_pandas()
+        for column in frame.columns:
+            if isinstance(frame[column].dtype, pd.CategoricalDtype):
+                frame[column] = frame[column].astype(object)
+        return frame
+
+    def _require_year_column(self, action: str) -> None:
+        if self.year_column is None:
+            # open_panel로 만든 연도 컬럼 없는 패널은 한 파일뿐이라 (corp_code, 연도) 키가 없다.
+            raise ValueError(
+                f"연도 컬럼 없이 저장된 스토어에는 {action}할 수 없습니다 ({self.root}). "
+                "write()로 전체를 다시 쓰세요"
+            )
+
+    def upsert(self, frame: pd.DataFrame) -> Dict[int, int]:
+        """Insert or update rows keyed by (corp_code, year).
+
+        Only the non-key columns present in ``frame`` are written; other
+        columns of existing rows keep their values and new rows get NaN.
+        Returns the number of upserted rows per year. Stores without a
+        year column (e.g. panels cached by :func:`open_panel`) raise
+        ``ValueError``.
+        """
+        self._require_year_column("upsert")
+        keys = ("corp_code", self.year_column)
+        missing = [c for c in keys if c not in frame.columns]
+        if missing:
+            raise ValueError(f"키 컬럼이 없습니다: {missing}")
+        if frame.duplicated(list(keys)).any():
+            raise ValueError("같은 (corp_code, 연도) 행이 여러 번 있습니다")
+        counts: Dict[int, int] = {}
+        years = pd.to_numeric(frame[self.year_column], errors="raise").astype(np.int64)
+        for year, rows in frame.groupby(years.to_numpy(), sort=True):
+            year = int(year)
+            rows = rows.drop(columns=self.year_column).set_index("corp_code")
+            existing = self._plain_part(year)
+            if len(existing):
+                order = [c for c in existing.columns] + [c for c in frame.columns if c not in existing.columns]
+                existing = existing.drop(columns=self.year_column).set_index("corp_code")
+                merged = existing.reindex(existing.index.union(rows.index, sort=False))
+                for column in rows.columns:
+                    if column not in merged.columns:
+                        merged[column] = np.nan if rows[column].dtype.kind == "f" else None
+                    elif merged[column].dtype != rows[column].dtype:
+                        # 저장된 float32 컬럼에 float64 값을 넣을 수 있도록 넓은 타입으로 맞춘다.
+                        both = (merged[column].dtype, rows[column].dtype)
+                        numeric = all(pd.api.types.is_numeric_dtype(d) and not pd.api.types.is_bool_dtype(d) for d in both)
+                        merged[column] = merged[column].astype(np.float64 if numeric else object)
+                    merged.loc[rows.index, column] = rows[column]
+            else:
+                order = list(frame.columns)
+                merged = rows
+            self._write_part(year, merged.reset_index(), order)
+            counts[year] = len(rows)
+        return counts
+
+    def delete(self, keys: pd.DataFrame) -> int:
+        """Remove rows whose (corp_code, year) appear in ``keys``."""
+        self._require_year_column("delete")
+        removed = 0
+        years = pd.to_numeric(keys[self.year_column], errors="raise").astype(np.int64)
+        for year, rows in keys.groupby(years.to_numpy()):
+            existing = self._plain_part(int(year))
+            if not len(existing):
+                continue
+            keep = ~existing["corp_code"].isin(rows["corp_code"])
+            removed += int((~keep).sum())
+            self._write_part(int(year), existing[keep], list(existing.columns))
+        return removed
+
+
+def _year_column(frame: pd.DataFrame) -> Optional[str]:
+    """First integral, non-null year-like column of ``frame``."""
+    for column in PANEL_YEAR_COLUMNS:
+        if column not in frame.columns:
+            continue
+        years = pd.to_numeric(frame[column], errors="coerce")
+        if years.notna().all() and (years % 1 == 0).all() and years.between(1900, 2100).all():
+            return column
+    return None
+
+
+def _stamp(source: Path) -> Dict[str, Union[str, int]]:
+    stat = source.stat()
+    return {"source": source.name, "size": stat.st_size, "mtime_ns": stat.st_mtime_ns}
+
+
+def _read_source(source: Path) -> pd.DataFrame:
+    if source.suffix.lower() in (".xlsx", ".xls", ".xlsm"):
+        return pd.read_excel(source)
+    return pd.read_csv(source, encoding="utf-8-sig")
+
+
+def open_panel(source: Union[str, Path], store_dir: Optional[Path] = None) -> FeatureStore:
+    """Feature store for a panel directory, Excel or CSV file.
+
+    A file is converted once into ``<file>.store/`` (or ``store_dir``),
+    partitioned by its year column if it has one, and reused until the
+    file's size or modification time changes.
+    """
+    source = Path(source)
+    if source.is_dir():
+        years = [p.parent.name.split("=", 1)[0] for p in source.glob(f"*=*/{PART_NAME}")]
+        return FeatureStore(source, year_column=years[0] if years else None)
+    if not source.exists():
+        raise FileNotFoundError(source)
+    store_dir = Path(store_dir) if store_dir else source.with_name(source.name + ".store")
+    stamp_path = store_dir / SOURCE_STAMP
+    stamp = _stamp(source)
+    if stamp_path.exists() and json.loads(stamp_path.read_text(encoding="utf-8")) == stamp:
+        return open_panel(store_dir)
+    frame = _read_source(source)
+    if store_dir.exists():
+        shutil.rmtree(store_dir)
+    store = FeatureStore(store_dir, year_column=_year_column(frame))
+    store.write(frame)
+    stamp_path.write_text(json.dumps(stamp, ensure_ascii=False), encoding="utf-8")
+    print(f"💾 {source.name} -> {store_dir} ({len(frame):,}행, 이후 실행부터 메모리 매핑으로 읽습니다)")
+    return store
+
+
+__all__ = [
+    "FEATURE_STORE_DIR",
+    "FeatureStore",
+    "KEY_COLUMNS",
+    "PANEL_YEAR_COLUMNS",
+    "open_panel",
+]
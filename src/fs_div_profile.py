@@ -0,0 +1,195 @@
+"""Negative-result cache and fs_div availability prediction.
+
+Many small KOSDAQ firms never file consolidated statements, so asking for
+CFS first wastes one call per corp-year on "조회된 데이타가 없습니다"
+(status 013). The profile remembers, per (corp_code, bsns_year,
+reprt_code, fs_div), whether DART returned data. From those observations:
+
+* a key known to be empty is skipped outright (for open business years
+  only until ``open_year_ttl`` passes, since the report may still arrive);
+* for a new year, the variant the company has actually filed in earlier
+  years is tried first.
+
+Observations are kept in memory and written to SQLite in batches.
+"""
+
+from __future__ import annotations
+
+import sqlite3
+import threading
+import time
+from dataclasses import dataclass
+from pathlib import Path
+from typing import Dict, List, Sequence, Tuple
+
+try:
+    from .dart_cache import OPEN_YEAR_TTL, is_closed_year
+except ImportError:  # ``src``가 sys.path에 직접 추가된 경우
+    from dart_cache import OPEN_YEAR_TTL, is_closed_year
+
+DEFAULT_PROFILE_PATH = Path(__file__).resolve().parent.parent / "data" / "cache" / "fs_div_profile.sqlite"
+
+_SCHEMA = """
+CREATE TABLE IF NOT EXISTS observations (
+    corp_code TEXT NOT NULL,
+    bsns_year INTEGER NOT NULL,
+    reprt_code TEXT NOT NULL,
+    fs_div TEXT NOT NULL,
+    has_data INTEGER NOT NULL,
+    observed_at REAL NOT NULL,
+    PRIMARY KEY (corp_code, bsns_year, reprt_code, fs_div)
+) WITHOUT ROWID;
+"""
+
+ObservationKey = Tuple[str, int, str, str]  # corp_code, bsns_year, reprt_code, fs_div
+
+
+@dataclass
+class ProfileStats:
+    skipped: int = 0
+    reordered: int = 0
+    observations: int = 0
+
+    def __str__(self) -> str:
+        return (
+            f"빈 결과로 건너뛴 요청 {self.skipped:,}회, "
+            f"순서 변경 {self.reordered:,}회, 관측 {self.observations:,}건"
+        )
+
+
+class FsDivProfile:
+    """Per-company record of which fs_div variants return data."""
+
+    def __init__(
+        self,
+        path: Path = DEFAULT_PROFILE_PATH,
+        open_year_ttl: float = OPEN_YEAR_TTL,
+        min_evidence: int = 2,
+        flush_every: int = 200,
+    ) -> None:
+        self.path = Path(path)
+        self.path.parent.mkdir(parents=True, exist_ok=True)
+        self.open_year_ttl = open_year_ttl
+        self.min_evidence = min_evidence
+        self.flush_every = flush_every
+        self.stats = ProfileStats()
+        self._lock = threading.Lock()
+        self._conn = sqlite3.connect(str(self.path), timeout=30, check_same_thread=False)
+        self._conn.execute("PRAGMA journal_mode=WAL")
+        self._conn.executescript(_SCHEMA)
+        self._observed: Dict[ObservationKey, Tuple[bool, float]] = {}
+        self._by_corp: Dict[str, List[ObservationKey]] = {}
+        self._dirty: List[Tuple[str, int, str, str, int, float]] = []
+        for corp_code, year, reprt_code, fs_div, has_data, observed_at in self._conn.execute(
+            "SELECT corp_code, bsns_year, reprt_code, fs_div, has_data, observed_at FROM observations"
+        ):
+            self._remember((corp_code, year, reprt_code, fs_div), bool(has_data), observed_at)
+
+    def _remember(self, key: ObservationKey, has_data: bool, observed_at: float) -> None:
+        if key not in self._observed:
+            self._by_corp.setdefault(key[0], []).append(key)
+        self._observed[key] = (has_data, observed_at)
+
+    def record(self, corp_code: str, year: int, fs_div: str, has_data: bool, reprt_code: str = "11011") -> None:
+        """Remember whether a request returned data (status 000) or not (013)."""
+        now = time.time()
+        key = (corp_code, int(year), reprt_code, fs_div)
+        with self._lock:
+            self._remember(key, has_data, now)
+            self._dirty.append((*key, int(has_data), now))
+            self.stats.observations += 1
+            if len(self._dirty) >= self.flush_every:
+                self._flush_locked()
+
+    def is_known_empty(self, corp_code: str, year: int, fs_div: str, reprt_code: str = "11011") -> bool:
+        """True if this exact key returned no data and the answer is still valid."""
+        seen = self._observed.get((corp_code, int(year), reprt_code, fs_div))
+        if seen is None or seen[0]:
+            return False
+        has_data, observed_at = seen
+        return is_closed_year(year) or time.time() - observed_at < self.open_year_ttl
+
+    def likely_empty(self, corp_code: str, year: int, fs_div: str, reprt_code: str = "11011") -> bool:
+        """Predict an empty result from the company's other years.
+
+        True when the key is known empty, or when the variant was empty in
+        at least ``min_evidence`` other years and never returned data.
+        """
+        if self.is_known_empty(corp_code, year, fs_div, reprt_code):
+            return True
+        found = empty = 0
+        for key in self._by_corp.get(corp_code, ()):
+            if key[2] != reprt_code or key[3] != fs_div or key[1] == int(year):
+                continue
+            if self._observed[key][0]:
+                found += 1
+            else:
+                empty += 1
+        return found == 0 and empty >= self.min_evidence
+
+    def order(
+        self,
+        corp_code: str,
+        year: int,
+        fs_divs: Sequence[str],
+        reprt_code: str = "11011",
+    ) -> List[str]:
+        """Return ``fs_divs`` without known-empty variants, likely ones first."""
+        candidates = []
+        for fs_div in fs_divs:
+            if self.is_known_empty(corp_code, year, fs_div, reprt_code):
+                self.stats.skipped += 1
+            else:
+                candidates.append(fs_div)
+        ordered = sorted(
+            candidates,
+            key=lambda fs_div: self.likely_empty(corp_code, year, fs_div, reprt_code),
+        )
+        if ordered != candidates:
+            self.stats.reordered += 1
+        return ordered
+
+    def forget(self, corp_code: str, year: int, reprt_code: str = "11011") -> int:
+        """Drop every observation for a report (e.g. it was filed or amended)."""
+        year = int(year)
+        with self._lock:
+            self._flush_locked()
+            keys = [k for k in self._by_corp.get(corp_code, ()) if k[1] == year and k[2] == reprt_code]
+            for key in keys:
+                del self._observed[key]
+                self._by_corp[corp_code].remove(key)
+            with self._conn:
+                self._conn.execute(
+                    "DELETE FROM observations WHERE corp_code = ? AND bsns_year = ? AND reprt_code = ?",
+                    (corp_code, year, reprt_code),
+                )
+        return len(keys)
+
+    def _flush_locked(self) -> None:
+        if not self._dirty:
+            return
+        with self._conn:
+            self._conn.executemany(
+                "INSERT OR REPLACE INTO observations "
+                "(corp_code, bsns_year, reprt_code, fs_div, has_data, observed_at) VALUES (?, ?, ?, ?, ?, ?)",
+                self._dirty,
+            )
+        self._dirty = []
+
+    def flush(self) -> None:
+        with self._lock:
+            self._flush_locked()
+
+    def close(self) -> None:
+        with self._lock:
+            self._flush_locked()
+            self._conn.close()
+
+    def __enter__(self) -> "FsDivProfile":
+        return self
+
+    def __exit__(self, *exc: object) -> None:
+        self.close()
+
+
+__all__ = ["DEFAULT_PROFILE_PATH", "FsDivProfile", "ProfileStats"]
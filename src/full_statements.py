@@ -0,0 +1,461 @@
+"""Full-statement (``fnlttSinglAcntAll``) ingestion into a long table.
+
+Full statements are 10-50x larger than the key-account responses, so this
+path never builds a response dict or a DataFrame per request:
+
+* :class:`JsonListStream` decodes the ``list`` array of a DART response
+  item by item from the raw byte stream with ``JSONDecoder.raw_decode``;
+* each item is appended to a :class:`RowBatch` (one Python list per
+  column), and only requests that finished cleanly are moved into the
+  :class:`LongTableWriter`, which writes Arrow record batches into a
+  ``bsns_year=...`` partitioned Parquet dataset;
+* :func:`compact` rewrites a year partition without superseded filings
+  and duplicates, sorted by corp code, so Parquet row-group statistics
+  serve as a corp/year index for :func:`read_long`.
+
+Every row is one amount: (corp, year, report, fs_div, sj_div, account).
+"""
+
+from __future__ import annotations
+
+import asyncio
+import codecs
+import json
+import os
+import time
+import uuid
+from pathlib import Path
+from typing import Any, Dict, Iterable, List, Optional, Sequence, Tuple
+
+import aiohttp
+import pyarrow as pa
+import pyarrow.compute as pc
+import pyarrow.dataset as ds
+import pyarrow.parquet as pq
+
+try:
+    from .dart_metrics import REQUEST_SECONDS, RESPONSE_BYTES, ROWS_PARSED
+    from .rate_limiter import QuotaExceededError, RateLimiter, is_quota_message
+    from .retry_policy import TRANSIENT, DartStatusError, RetryPolicy, classify_status, get_breaker
+except ImportError:  # ``src``가 sys.path에 직접 추가된 경우
+    from dart_metrics import REQUEST_SECONDS, RESPONSE_BYTES, ROWS_PARSED
+    from rate_limiter import QuotaExceededError, RateLimiter, is_quota_message
+    from retry_policy import TRANSIENT, DartStatusError, RetryPolicy, classify_status, get_breaker
+
+DART_API_BASE = os.environ.get("DART_API_BASE", "https://opendart.fss.or.kr/api").rstrip("/")
+DART_FULL_STATEMENT_URL = f"{DART_API_BASE}/fnlttSinglAcntAll.json"
+FULL_STATEMENTS_DIR = Path(__file__).resolve().parent.parent / "data" / "full_statements"
+# 주요계정 수집과 같은 API 주소의 회로 차단기를 공유해 장애 중에는 함께 기다린다.
+FULL_STATEMENT_RETRY = RetryPolicy(max_attempts=3, base_delay=1.0, max_delay=30.0, breaker=get_breaker(DART_API_BASE))
+
+_DICT = pa.dictionary(pa.int32(), pa.string())
+LONG_SCHEMA = pa.schema([
+    pa.field("corp_code", _DICT),
+    pa.field("reprt_code", _DICT),
+    pa.field("fs_div", _DICT),
+    pa.field("sj_div", _DICT),
+    pa.field("account_id", _DICT),
+    pa.field("account_nm", _DICT),
+    pa.field("account_detail", _DICT),
+    pa.field("ord", pa.int32()),
+    pa.field("amount", pa.int64()),
+    pa.field("currency", _DICT),
+    pa.field("rcept_no", pa.string()),
+])
+_PLAIN_SCHEMA = pa.schema([
+    pa.field(f.name, pa.string()) if pa.types.is_dictionary(f.type) else f for f in LONG_SCHEMA
+])
+PARTITION_SCHEMA = pa.schema([pa.field("bsns_year", pa.int16())])
+# 같은 보고서 안에서 한 금액을 식별하는 컬럼 (정정 공시는 rcept_no로 구분)
+ROW_KEY = ("corp_code", "reprt_code", "fs_div", "sj_div", "account_id", "account_nm", "account_detail", "ord")
+REPORT_KEY = ("corp_code", "reprt_code", "fs_div")
+SORT_KEY = [("corp_code", "ascending"), ("fs_div", "ascending"), ("sj_div", "ascending"), ("ord", "ascending")]
+
+_WHITESPACE = " \t\r\n"
+
+
+def parse_amount(text: Any) -> Optional[int]:
+    """``"1,234"`` -> 1234, ``"(1,234)"``/``"-1234"`` -> -1234, blank or ``"-"`` -> None."""
+    if text is None:
+        return None
+    text = str(text).strip().replace(",", "")
+    if not text or text == "-":
+        return None
+    negative = text.startswith("(") and text.endswith(")")
+    if negative:
+        text = text[1:-1]
+    try:
+        value = int(text)
+    except ValueError:
+        try:
+            value = int(float(text))
+        except ValueError:
+            return None
+    return -value if negative else value
+
+
+class JsonListStream:
+    """Incrementally decode ``{"status": ..., "list": [{...}, ...]}``.
+
+    Feed raw bytes as they arrive; :meth:`feed` returns the list items that
+    became complete. Top-level scalar fields end up in :attr:`header`. Only
+    the current, not yet complete item is kept in memory.
+    """
+
+    def __init__(self, list_key: str = "list") -> None:
+        self.list_key = list_key
+        self.header: Dict[str, Any] = {}
+        self._decoder = json.JSONDecoder()
+        self._utf8 = codecs.getincrementaldecoder("utf-8")()
+        self._buf = ""
+        self._pos = 0
+        # object: 최상위 키 대기, items: list 배열 안, done: 닫는 괄호까지 읽음
+        self._state = "start"
+        self._finished = False
+
+    def _skip(self) -> None:
+        while self._pos < len(self._buf) and self._buf[self._pos] in _WHITESPACE:
+            self._pos += 1
+
+    def _peek(self) -> Optional[str]:
+        self._skip()
+        return self._buf[self._pos] if self._pos < len(self._buf) else None
+
+    def _value(self) -> Tuple[bool, Any]:
+        """Decode one JSON value at the cursor; (False, None) if more input is needed."""
+        self._skip()
+        try:
+            value, end = self._decoder.raw_decode(self._buf, self._pos)
+        except json.JSONDecodeError:
+            if self._finished:
+                raise
+            return False, None
+        # 버퍼 끝에서 끝난 숫자는 다음 조각에서 이어질 수 있다.
+        if end >= len(self._buf) and not self._finished and not isinstance(value, (dict, list, str)):
+            return False, None
+        self._pos = end
+        return True, value
+
+    def feed(self, data: bytes, final: bool = False) -> List[Dict[str, Any]]:
+        self._buf = self._buf[self._pos:] + self._utf8.decode(data, final)
+        self._pos = 0
+        self._finished = final
+        items: List[Dict[str, Any]] = []
+        while True:
+            char = self._peek()
+            if char is None:
+                break
+            if self._state == "start":
+                if char != "{":
+                    raise ValueError(f"JSON 객체가 아닌 응답입니다: {self._buf[self._pos:self._pos + 80]!r}")
+                self._pos += 1
+                self._state = "object"
+            elif self._state == "object":
+                if char == ",":
+                    self._pos += 1
+                    continue
+                if char == "}":
+                    self._pos += 1
+                    self._state = "done"
+                    continue
+                mark = self._pos
+                ok, key = self._value()
+                if not ok or self._peek() is None:
+                    self._pos = mark
+                    break
+                if self._buf[self._pos] != ":":
+                    raise ValueError("JSON 키 뒤에 ':'가 없습니다")
+                self._pos += 1
+                if key == self.list_key:
+                    if self._peek() is None:
+                        self._pos = mark
+                        break
+                    if self._buf[self._pos] != "[":
+                        raise ValueError(f"'{self.list_key}' 값이 배열이 아닙니다")
+                    self._pos += 1
+                    self._state = "items"
+                    continue
+                ok, value = self._value()
+                if not ok:
+                    self._pos = mark
+                    break
+                self.header[key] = value
+            elif self._state == "items":
+                if char == ",":
+                    self._pos += 1
+                    continue
+                if char == "]":
+                    self._pos += 1
+                    self._state = "object"
+                    continue
+                ok, item = self._value()
+                if not ok:
+                    break
+                items.append(item)
+            else:  # done
+                if char not in _WHITESPACE:
+                    raise ValueError("JSON 객체 뒤에 불필요한 데이터가 있습니다")
+                self._pos += 1
+        if final and self._state != "done":
+            raise ValueError("응답 JSON이 중간에 끊겼습니다")
+        return items
+
+
+class RowBatch:
+    """Column lists for the rows of one request (no per-row dicts are kept)."""
+
+    def __init__(self, corp_code: str, bsns_year: int, reprt_code: str, fs_div: str) -> None:
+        self.corp_code = corp_code
+        self.bsns_year = int(bsns_year)
+        self.reprt_code = reprt_code
+        self.fs_div = fs_div
+        self.columns: Dict[str, list] = {f.name: [] for f in LONG_SCHEMA if f.name not in REPORT_KEY}
+
+    def __len__(self) -> int:
+        return len(self.columns["sj_div"])
+
+    def append(self, item: Dict[str, Any]) -> None:
+        columns = self.columns
+        columns["sj_div"].append(item.get("sj_div") or "")
+        columns["account_id"].append(item.get("account_id") or "")
+        columns["account_nm"].append((item.get("account_nm") or "").strip())
+        columns["account_detail"].append(item.get("account_detail") or "-")
+        try:
+            columns["ord"].append(int(item.get("ord")))
+        except (TypeError, ValueError):
+            columns["ord"].append(None)
+        columns["amount"].append(parse_amount(item.get("thstrm_amount")))
+        columns["currency"].append(item.get("currency") or "KRW")
+        columns["rcept_no"].append(item.get("rcept_no") or "")
+
+
+class LongTableWriter:
+    """Write :class:`RowBatch` es as record batches into year partitions."""
+
+    def __init__(self, root: Path = FULL_STATEMENTS_DIR, batch_rows: int = 100_000) -> None:
+        self.root = Path(root)
+        self.batch_rows = batch_rows
+        self.basename = f"part-{time.strftime('%Y%m%d%H%M%S')}-{os.getpid()}-{uuid.uuid4().hex[:6]}"
+        self.rows_written = 0
+        self._pending: Dict[int, List[RowBatch]] = {}
+        self._pending_rows: Dict[int, int] = {}
+        self._writers: Dict[int, pq.ParquetWriter] = {}
+
+    def add(self, batch: RowBatch) -> None:
+        if not len(batch):
+            return
+        year = batch.bsns_year
+        self._pending.setdefault(year, []).append(batch)
+        self._pending_rows[year] = self._pending_rows.get(year, 0) + len(batch)
+        if self._pending_rows[year] >= self.batch_rows:
+            self._flush_year(year)
+
+    def _record_batch(self, batches: List[RowBatch]) -> pa.RecordBatch:
+        arrays = []
+        for field in LONG_SCHEMA:
+            if field.name in REPORT_KEY:
+                values = [getattr(b, field.name) for b in batches for _ in range(len(b))]
+            else:
+                values = [v for b in batches for v in b.columns[field.name]]
+            if pa.types.is_dictionary(field.type):
+                arrays.append(pa.array(values, pa.string()).dictionary_encode())
+            else:
+                arrays.append(pa.array(values, field.type))
+        return pa.RecordBatch.from_arrays(arrays, schema=LONG_SCHEMA)
+
+    def _flush_year(self, year: int) -> None:
+        batches = self._pending.pop(year, [])
+        self._pending_rows.pop(year, None)
+        if not batches:
+            return
+        record_batch = self._record_batch(batches)
+        writer = self._writers.get(year)
+        if writer is None:
+            directory = self.root / f"bsns_year={year}"
+            directory.mkdir(parents=True, exist_ok=True)
+            writer = pq.ParquetWriter(directory / f"{self.basename}.parquet", LONG_SCHEMA, compression="zstd")
+            self._writers[year] = writer
+        writer.write_batch(record_batch)
+        self.rows_written += record_batch.num_rows
+
+    def flush(self) -> None:
+        for year in list(self._pending):
+            self._flush_year(year)
+
+    def close(self) -> None:
+        self.flush()
+        for writer in self._writers.values():
+            writer.close()
+        self._writers.clear()
+
+    def __enter__(self) -> "LongTableWriter":
+        return self
+
+    def __exit__(self, *exc: Any) -> None:
+        self.close()
+
+
+async def stream_full_statement(
+    session: aiohttp.ClientSession,
+    api_key: str,
+    corp_code: str,
+    year: int,
+    fs_div: str,
+    reprt_code: str = "11011",
+    rate_limiter: Optional[RateLimiter] = None,
+    chunk_size: int = 64 * 1024,
+    retry: RetryPolicy = FULL_STATEMENT_RETRY,
+) -> Tuple[str, RowBatch]:
+    """Stream one fnlttSinglAcntAll response into a :class:`RowBatch`.
+
+    Returns the DART status and the rows. Raises
+    :class:`QuotaExceededError` when DART reports a usage limit.
+
+    Timeouts, HTTP 429/5xx, truncated bodies and DART system errors are
+    retried with ``retry`` (by default through the breaker shared with the
+    key-account requests); the last error is raised once attempts run out.
+    Every attempt starts a fresh batch, so a retried request never mixes
+    rows from a broken response.
+    """
+    params = {
+        "crtfc_key": api_key,
+        "corp_code": corp_code,
+        "bsns_year": year,
+        "reprt_code": reprt_code,
+        "fs_div": fs_div,
+    }
+    return await retry.call(_stream_once, session, params, rate_limiter, chunk_size)
+
+
+async def _stream_once(
+    session: aiohttp.ClientSession,
+    params: Dict[str, Any],
+    rate_limiter: Optional[RateLimiter],
+    chunk_size: int,
+) -> Tuple[str, RowBatch]:
+    """One attempt of :func:`stream_full_statement`."""
+    if rate_limiter is not None:
+        await rate_limiter.wait()
+    batch = RowBatch(params["corp_code"], params["bsns_year"], params["reprt_code"], params["fs_div"])
+    stream = JsonListStream()
+    received = 0
+    started = time.perf_counter()
+    try:
+        async with session.get(DART_FULL_STATEMENT_URL, params=params) as resp:
+            resp.raise_for_status()
+            async for chunk in resp.content.iter_chunked(chunk_size):
+                received += len(chunk)
+                for item in stream.feed(chunk):
+                    batch.append(item)
+            for item in stream.feed(b"", final=True):
+                batch.append(item)
+    except aiohttp.ClientResponseError as e:
+        REQUEST_SECONDS.observe(time.perf_counter() - started, endpoint="fnlttSinglAcntAll", status=f"http_{e.status}")
+        raise
+    except (aiohttp.ClientError, asyncio.TimeoutError):
+        REQUEST_SECONDS.observe(time.perf_counter() - started, endpoint="fnlttSinglAcntAll", status="error")
+        raise
+    status = str(stream.header.get("status", ""))
+    REQUEST_SECONDS.observe(time.perf_counter() - started, endpoint="fnlttSinglAcntAll", status=status)
+    RESPONSE_BYTES.inc(received, endpoint="fnlttSinglAcntAll")
+    ROWS_PARSED.inc(len(batch), endpoint="fnlttSinglAcntAll")
+    message = str(stream.header.get("message", ""))
+    if status == "020" or (status not in ("000", "013") and is_quota_message(message)):
+        raise QuotaExceededError(f"API daily request limit reached: {message}")
+    if classify_status(status, message) == TRANSIENT:
+        # 점검·시스템 오류는 회로 차단기에 실패로 기록되고 다시 요청한다.
+        raise DartStatusError(status, message)
+    return status, batch
+
+
+def open_long_dataset(root: Path = FULL_STATEMENTS_DIR) -> ds.Dataset:
+    return ds.dataset(
+        str(root),
+        format="parquet",
+        partitioning=ds.partitioning(PARTITION_SCHEMA, flavor="hive"),
+    )
+
+
+def _year_dirs(root: Path, years: Optional[Iterable[int]] = None) -> List[Tuple[int, Path]]:
+    wanted = None if years is None else {int(y) for y in years}
+    found = []
+    for directory in sorted(Path(root).glob("bsns_year=*")):
+        year = int(directory.name.split("=", 1)[1])
+        if wanted is None or year in wanted:
+            found.append((year, directory))
+    return found
+
+
+def compact(root: Path = FULL_STATEMENTS_DIR, years: Optional[Iterable[int]] = None, row_group_size: int = 50_000) -> int:
+    """Deduplicate and sort each year partition into a single file.
+
+    Only the latest filing (highest ``rcept_no``) per report is kept, exact
+    duplicates are dropped and rows are sorted by corp code so row-group
+    statistics let :func:`read_long` skip unrelated corps. Returns the
+    number of rows after compaction.
+    """
+    total = 0
+    for year, directory in _year_dirs(root, years):
+        files = sorted(directory.glob("*.parquet"))
+        if not files:
+            continue
+        # 그룹 연산은 사전 인코딩 컬럼을 키로 받지 않으므로 평문 문자열로 푼다.
+        table = pa.concat_tables(pq.read_table(f, schema=LONG_SCHEMA) for f in files).cast(_PLAIN_SCHEMA)
+        if table.num_rows:
+            table = table.append_column("_row", pa.array(range(table.num_rows), pa.int64()))
+            latest = table.group_by(list(REPORT_KEY)).aggregate([("rcept_no", "max")])
+            table = table.join(latest, list(REPORT_KEY))
+            table = table.filter(pc.equal(table["rcept_no"], table["rcept_no_max"])).drop_columns(["rcept_no_max"])
+            # 같은 금액 행이 여러 번 들어온 경우 처음 들어온 행만 남긴다.
+            first = table.group_by(list(ROW_KEY), use_threads=False).aggregate([("_row", "min")])
+            keep = pc.is_in(table["_row"], value_set=first["_row_min"])
+            table = table.filter(keep).drop_columns(["_row"]).sort_by(SORT_KEY)
+        table = pa.Table.from_arrays(
+            [
+                col.combine_chunks().dictionary_encode() if pa.types.is_dictionary(field.type) else col
+                for col, field in zip(table.columns, LONG_SCHEMA)
+            ],
+            schema=LONG_SCHEMA,
+        )
+        tmp = directory / f".compact-{uuid.uuid4().hex[:6]}.parquet.tmp"
+        pq.write_table(table.combine_chunks(), tmp, compression="zstd", row_group_size=row_group_size)
+        target = directory / "part-compacted.parquet"
+        os.replace(tmp, target)
+        for f in files:
+            if f != target:
+                f.unlink()
+        total += table.num_rows
+    return total
+
+
+def read_long(
+    root: Path = FULL_STATEMENTS_DIR,
+    corp_codes: Optional[Sequence[str]] = None,
+    years: Optional[Sequence[int]] = None,
+    columns: Optional[Sequence[str]] = None,
+    sj_divs: Optional[Sequence[str]] = None,
+) -> pa.Table:
+    """Read (a projection of) the long table, filtered by corp, year and statement."""
+    expression = None
+    for column, values in (("corp_code", corp_codes), ("bsns_year", years), ("sj_div", sj_divs)):
+        if values is None:
+            continue
+        clause = ds.field(column).isin(list(values))
+        expression = clause if expression is None else expression & clause
+    return open_long_dataset(root).to_table(columns=list(columns) if columns else None, filter=expression)
+
+
+__all__ = [
+    "DART_FULL_STATEMENT_URL",
+    "FULL_STATEMENTS_DIR",
+    "FULL_STATEMENT_RETRY",
+    "JsonListStream",
+    "LONG_SCHEMA",
+    "LongTableWriter",
+    "RowBatch",
+    "compact",
+    "open_long_dataset",
+    "parse_amount",
+    "read_long",
+    "stream_full_statement",
+]
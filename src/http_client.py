@@ -0,0 +1,108 @@
+"""Shared pooled aiohttp client for DART requests.
+
+Opening a ``ClientSession`` per call throws away the connection pool, so
+every request pays for DNS, TCP and TLS again. :func:`get_session` returns
+one session per event loop with a tuned ``TCPConnector`` (keep-alive,
+connection limits, DNS cache), gzip-encoded responses and default timeouts.
+Callers borrow it and never close it; entry points run their coroutine
+with :func:`run_with_session`, which closes it before the loop ends.
+"""
+
+from __future__ import annotations
+
+import asyncio
+import weakref
+from typing import Awaitable, TypeVar
+
+import aiohttp
+
+# 한 호스트(opendart.fss.or.kr)에 유지할 최대 연결 수
+DEFAULT_LIMIT = 64
+DEFAULT_LIMIT_PER_HOST = 32
+DNS_CACHE_TTL = 300
+KEEPALIVE_TIMEOUT = 60.0
+DEFAULT_TIMEOUT = aiohttp.ClientTimeout(total=60, connect=10, sock_read=30)
+# CORPCODE.zip처럼 큰 응답에 요청 단위로 넘기는 타임아웃
+DOWNLOAD_TIMEOUT = aiohttp.ClientTimeout(total=120, connect=30)
+DEFAULT_HEADERS = {
+    "Accept-Encoding": "gzip, deflate",
+    "User-Agent": "Mozilla/5.0 (compatible; xai-bankruptcy-prediction DART client)",
+}
+
+T = TypeVar("T")
+
+_SESSIONS: "weakref.WeakKeyDictionary[asyncio.AbstractEventLoop, aiohttp.ClientSession]" = (
+    weakref.WeakKeyDictionary()
+)
+
+
+def make_connector(
+    limit: int = DEFAULT_LIMIT,
+    limit_per_host: int = DEFAULT_LIMIT_PER_HOST,
+) -> aiohttp.TCPConnector:
+    """Return a keep-alive connector with a bounded pool and a DNS cache."""
+    return aiohttp.TCPConnector(
+        limit=limit,
+        limit_per_host=limit_per_host,
+        ttl_dns_cache=DNS_CACHE_TTL,
+        use_dns_cache=True,
+        keepalive_timeout=KEEPALIVE_TIMEOUT,
+    )
+
+
+def create_session(
+    limit: int = DEFAULT_LIMIT,
+    limit_per_host: int = DEFAULT_LIMIT_PER_HOST,
+    timeout: aiohttp.ClientTimeout = DEFAULT_TIMEOUT,
+    **kwargs,
+) -> aiohttp.ClientSession:
+    """Create a new pooled session; the caller owns and closes it."""
+    headers = {**DEFAULT_HEADERS, **kwargs.pop("headers", {})}
+    return aiohttp.ClientSession(
+        connector=make_connector(limit, limit_per_host),
+        timeout=timeout,
+        headers=headers,
+        auto_decompress=True,
+        **kwargs,
+    )
+
+
+def get_session() -> aiohttp.ClientSession:
+    """Return the shared session of the running event loop, creating it lazily."""
+    loop = asyncio.get_running_loop()
+    session = _SESSIONS.get(loop)
+    if session is None or session.closed:
+        session = create_session()
+        _SESSIONS[loop] = session
+    return session
+
+
+async def close_session() -> None:
+    """Close the running loop's shared session, if one was created."""
+    session = _SESSIONS.pop(asyncio.get_running_loop(), None)
+    if session is not None and not session.closed:
+        await session.close()
+
+
+def run_with_session(main: Awaitable[T]) -> T:
+    """``asyncio.run`` that closes the shared session before the loop ends."""
+
+    async def runner() -> T:
+        try:
+            return await main
+        finally:
+            await close_session()
+
+    return asyncio.run(runner())
+
+
+__all__ = [
+    "DEFAULT_HEADERS",
+    "DEFAULT_TIMEOUT",
+    "DOWNLOAD_TIMEOUT",
+    "close_session",
+    "create_session",
+    "get_session",
+    "make_connector",
+    "run_with_session",
+]
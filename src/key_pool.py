@@ -0,0 +1,187 @@
+"""Pool of DART API keys used by a single scheduler.
+
+Every key keeps its own token bucket and daily budget (shared with other
+processes through :func:`rate_limiter.shared_state_path`). Each request is
+routed to the active key with the most budget left today; a key that runs
+out, locally or according to DART, is retired and the run continues on the
+remaining keys. Only when every key is retired does :meth:`acquire` raise
+:class:`QuotaExceededError`.
+"""
+
+from __future__ import annotations
+
+import asyncio
+import os
+import re
+import time
+from dataclasses import dataclass, field
+from typing import Dict, List, Optional, Sequence, Tuple
+
+try:
+    from .dart_metrics import RATE_LIMIT_WAIT_SECONDS
+    from .rate_limiter import DEFAULT_DAILY_LIMIT, QuotaExceededError, RateLimiter, shared_state_path
+except ImportError:  # ``src``가 sys.path에 직접 추가된 경우
+    from dart_metrics import RATE_LIMIT_WAIT_SECONDS
+    from rate_limiter import DEFAULT_DAILY_LIMIT, QuotaExceededError, RateLimiter, shared_state_path
+
+
+def load_api_keys(environ: Optional[Dict[str, str]] = None) -> List[str]:
+    """Read API keys from ``DART_API_KEYS`` (comma or whitespace separated).
+
+    Falls back to the single ``DART_API_KEY``. Raises ``EnvironmentError``
+    when neither is set.
+    """
+    environ = os.environ if environ is None else environ
+    keys = [k for k in re.split(r"[\s,;]+", environ.get("DART_API_KEYS", "")) if k]
+    if not keys and environ.get("DART_API_KEY"):
+        keys = [environ["DART_API_KEY"].strip()]
+    if not keys:
+        raise EnvironmentError("DART_API_KEYS 또는 DART_API_KEY 환경변수를 설정하세요")
+    # 순서를 유지하면서 중복 제거
+    return list(dict.fromkeys(keys))
+
+
+def mask_key(api_key: str) -> str:
+    return f"{api_key[:4]}…{api_key[-4:]}" if len(api_key) > 8 else "****"
+
+
+@dataclass
+class KeyState:
+    api_key: str
+    limiter: RateLimiter
+    requests: int = 0
+    retired_at: Optional[float] = None
+    reason: str = ""
+
+    @property
+    def active(self) -> bool:
+        return self.retired_at is None
+
+
+@dataclass
+class PoolReport:
+    keys: List[KeyState] = field(default_factory=list)
+
+    def __str__(self) -> str:
+        parts = []
+        for state in self.keys:
+            status = "사용 중" if state.active else f"중지({state.reason or '한도 소진'})"
+            remaining = state.limiter.remaining_today()
+            left = f", 남은 한도 {remaining:,}" if remaining is not None else ""
+            parts.append(f"{mask_key(state.api_key)}: {state.requests:,}회{left}, {status}")
+        return " / ".join(parts)
+
+
+class ApiKeyPool:
+    """Route requests across several API keys by remaining headroom."""
+
+    def __init__(
+        self,
+        api_keys: Sequence[str],
+        max_calls: int = 600,
+        period: float = 60.0,
+        daily_limit: Optional[int] = DEFAULT_DAILY_LIMIT,
+        shared: bool = True,
+    ) -> None:
+        if not api_keys:
+            raise ValueError("API 키가 하나 이상 필요합니다")
+        self._states: Dict[str, KeyState] = {
+            key: KeyState(
+                key,
+                RateLimiter(
+                    max_calls,
+                    period,
+                    daily_limit=daily_limit,
+                    state_path=shared_state_path(key) if shared else None,
+                ),
+            )
+            for key in dict.fromkeys(api_keys)
+        }
+
+    def __len__(self) -> int:
+        return len(self._states)
+
+    @property
+    def primary_key(self) -> str:
+        """First key, used for calls that are not worth routing (e.g. corp codes)."""
+        return next(iter(self._states))
+
+    @property
+    def active_keys(self) -> List[str]:
+        return [k for k, s in self._states.items() if s.active]
+
+    def retire(self, api_key: str, reason: str = "") -> None:
+        """Stop routing requests to ``api_key`` for the rest of the run."""
+        state = self._states.get(api_key)
+        if state is None or not state.active:
+            return
+        state.retired_at = time.time()
+        state.reason = reason
+        print(f"🔑 API 키 {mask_key(api_key)} 사용 중지: {reason or '한도 소진'} (남은 키 {len(self.active_keys)}개)")
+
+    def revive(self) -> None:
+        """Put every retired key back into rotation (after the quota reset)."""
+        for state in self._states.values():
+            state.retired_at = None
+            state.reason = ""
+
+    def try_acquire(self) -> Tuple[Optional[str], float]:
+        """Return ``(api_key, 0.0)`` on success or ``(None, wait_seconds)``."""
+        candidates = [s for s in self._states.values() if s.active]
+        if not candidates:
+            raise QuotaExceededError("API daily request limit reached: 모든 API 키의 한도를 소진했습니다")
+        # 오늘 남은 한도가 가장 많은 키부터 토큰을 시도한다.
+        candidates.sort(key=lambda s: s.limiter.remaining_today() or 0, reverse=True)
+        shortest = None
+        for state in candidates:
+            try:
+                delay = state.limiter.try_acquire()
+            except QuotaExceededError as e:
+                self.retire(state.api_key, str(e))
+                continue
+            if delay <= 0:
+                state.requests += 1
+                return state.api_key, 0.0
+            shortest = delay if shortest is None else min(shortest, delay)
+        if shortest is None:
+            return self.try_acquire()  # 방금 모든 키가 중지된 경우 예외를 발생시킨다
+        return None, shortest
+
+    async def acquire(self) -> str:
+        """Wait for a token on the key with the most headroom and return the key."""
+        started = time.perf_counter()
+        while True:
+            api_key, delay = self.try_acquire()
+            if api_key is not None:
+                RATE_LIMIT_WAIT_SECONDS.observe(time.perf_counter() - started)
+                return api_key
+            await asyncio.sleep(delay)
+
+    def acquire_sync(self) -> str:
+        """Blocking variant of :meth:`acquire`."""
+        started = time.perf_counter()
+        while True:
+            api_key, delay = self.try_acquire()
+            if api_key is not None:
+                RATE_LIMIT_WAIT_SECONDS.observe(time.perf_counter() - started)
+                return api_key
+            time.sleep(delay)
+
+    def remaining_today(self) -> Optional[int]:
+        """Combined budget left across active keys."""
+        remaining = [s.limiter.remaining_today() for s in self._states.values() if s.active]
+        if any(r is None for r in remaining):
+            return None
+        return sum(remaining)
+
+    def report(self) -> PoolReport:
+        return PoolReport(list(self._states.values()))
+
+
+__all__ = [
+    "ApiKeyPool",
+    "KeyState",
+    "PoolReport",
+    "load_api_keys",
+    "mask_key",
+]
@@ -0,0 +1,217 @@
+"""Token-bucket rate limiter that can be shared across processes.
+
+The bucket holds up to ``burst`` tokens and refills at ``max_calls / period``
+tokens per second. An optional daily budget caps the number of calls per
+calendar day (KST, when the DART quota resets). When ``state_path`` is given,
+the bucket state lives in a small file guarded by an OS file lock, so every
+downloader process on the host draws from the same bucket.
+"""
+
+from __future__ import annotations
+
+import asyncio
+import hashlib
+import os
+import struct
+import threading
+import time
+from contextlib import contextmanager
+from datetime import datetime, timedelta, timezone
+from pathlib import Path
+from typing import Iterator, List, Optional
+
+if os.name == "nt":
+    import msvcrt
+else:
+    import fcntl
+
+try:
+    from .dart_metrics import QUOTA_REMAINING, RATE_LIMIT_WAIT_SECONDS
+except ImportError:  # ``src``가 sys.path에 직접 추가된 경우
+    from dart_metrics import QUOTA_REMAINING, RATE_LIMIT_WAIT_SECONDS
+
+KST = timezone(timedelta(hours=9))
+# OpenDART 개인 인증키 기준 일일 요청 한도
+DEFAULT_DAILY_LIMIT = 20_000
+DEFAULT_STATE_DIR = Path(__file__).resolve().parent.parent / "data" / "cache"
+
+# tokens, updated_at, day ordinal, calls made today
+_STATE = struct.Struct("<ddqq")
+# DART가 일일 한도 초과(020) 시 돌려주는 문구. "초과"·"제한" 같은 단어만으로는
+# 조회 회사 수 초과(021) 등 다른 오류와 구분되지 않으므로 문구 전체로 비교한다.
+QUOTA_MESSAGES = ("요청 제한을 초과",)
+
+
+class QuotaExceededError(RuntimeError):
+    """Raised when the daily request budget has been used up."""
+
+
+def is_quota_message(message: str) -> bool:
+    """Return True if a DART error message is the daily usage-limit (020) message."""
+    return any(phrase in (message or "") for phrase in QUOTA_MESSAGES)
+
+
+def shared_state_path(api_key: str, state_dir: Path = DEFAULT_STATE_DIR) -> Path:
+    """Return the shared bucket file for an API key.
+
+    The key is hashed so it never appears in the file name.
+    """
+    digest = hashlib.sha1(api_key.encode("utf-8")).hexdigest()[:12]
+    return Path(state_dir) / f"ratelimit_{digest}.bin"
+
+
+def _today() -> int:
+    return datetime.now(KST).date().toordinal()
+
+
+def seconds_until_quota_reset() -> float:
+    """Seconds until the next KST midnight, when the daily quota resets."""
+    now = datetime.now(KST)
+    midnight = (now + timedelta(days=1)).replace(hour=0, minute=0, second=0, microsecond=0)
+    return (midnight - now).total_seconds()
+
+
+class RateLimiter:
+    """Token-bucket limiter with burst capacity and a per-day budget."""
+
+    def __init__(
+        self,
+        max_calls: int,
+        period: float = 60.0,
+        burst: Optional[int] = None,
+        daily_limit: Optional[int] = None,
+        state_path: Optional[Path] = None,
+    ) -> None:
+        self.max_calls = max_calls
+        self.period = period
+        self.rate = max_calls / period
+        # 기본 버스트 용량은 5초 분량의 요청
+        self.burst = burst if burst is not None else max(1, round(self.rate * 5))
+        self.daily_limit = daily_limit
+        self.state_path = Path(state_path) if state_path is not None else None
+        # 지표 레이블 (공유 버킷은 키 해시가 들어간 파일 이름)
+        self.bucket = self.state_path.stem if self.state_path is not None else "local"
+        self._thread_lock = threading.Lock()
+        self._local: List[float] = [float(self.burst), time.time(), _today(), 0]
+        if self.state_path is not None:
+            self.state_path.parent.mkdir(parents=True, exist_ok=True)
+            # 파일이 없을 때만 가득 찬 버킷으로 초기화한다.
+            fd = os.open(self.state_path, os.O_RDWR | os.O_CREAT, 0o644)
+            try:
+                with _locked(fd):
+                    if os.fstat(fd).st_size < _STATE.size:
+                        _write_at(fd, _STATE.pack(*self._local))
+            finally:
+                os.close(fd)
+
+    @contextmanager
+    def _state(self) -> Iterator[List[float]]:
+        """Yield the mutable bucket state, persisting it on exit."""
+        with self._thread_lock:
+            if self.state_path is None:
+                yield self._local
+                return
+            fd = os.open(self.state_path, os.O_RDWR | os.O_CREAT, 0o644)
+            try:
+                with _locked(fd):
+                    raw = _read_at(fd, _STATE.size)
+                    state = list(_STATE.unpack(raw)) if len(raw) == _STATE.size else list(self._local)
+                    yield state
+                    _write_at(fd, _STATE.pack(state[0], state[1], int(state[2]), int(state[3])))
+            finally:
+                os.close(fd)
+
+    def try_acquire(self) -> float:
+        """Take one token if available.
+
+        Returns 0.0 on success, otherwise the number of seconds to wait
+        before trying again. Raises :class:`QuotaExceededError` when the
+        daily budget is exhausted.
+        """
+        with self._state() as state:
+            now = time.time()
+            tokens, updated_at, day, used = state
+            today = _today()
+            if day != today:
+                day, used = today, 0
+            tokens = min(float(self.burst), tokens + max(0.0, now - updated_at) * self.rate)
+            if self.daily_limit is not None and used >= self.daily_limit:
+                state[:] = [tokens, now, day, used]
+                raise QuotaExceededError(
+                    f"API daily request limit reached: 일일 한도 {self.daily_limit:,}회 사용"
+                )
+            if tokens >= 1.0:
+                state[:] = [tokens - 1.0, now, day, used + 1]
+                if self.daily_limit is not None:
+                    QUOTA_REMAINING.set(self.daily_limit - used - 1, bucket=self.bucket)
+                return 0.0
+            state[:] = [tokens, now, day, used]
+            return (1.0 - tokens) / self.rate
+
+    async def wait(self) -> None:
+        """Wait until a token is available. The lock is never held while sleeping."""
+        started = time.perf_counter()
+        while True:
+            delay = self.try_acquire()
+            if delay <= 0:
+                RATE_LIMIT_WAIT_SECONDS.observe(time.perf_counter() - started)
+                return
+            await asyncio.sleep(delay)
+
+    def wait_sync(self) -> None:
+        """Blocking variant of :meth:`wait` for synchronous callers."""
+        started = time.perf_counter()
+        while True:
+            delay = self.try_acquire()
+            if delay <= 0:
+                RATE_LIMIT_WAIT_SECONDS.observe(time.perf_counter() - started)
+                return
+            time.sleep(delay)
+
+    def remaining_today(self) -> Optional[int]:
+        """Return the number of calls left in today's budget, if one is set."""
+        if self.daily_limit is None:
+            return None
+        with self._state() as state:
+            used = 0 if state[2] != _today() else int(state[3])
+        remaining = max(0, self.daily_limit - used)
+        QUOTA_REMAINING.set(remaining, bucket=self.bucket)
+        return remaining
+
+
+def _read_at(fd: int, size: int) -> bytes:
+    os.lseek(fd, 0, os.SEEK_SET)
+    return os.read(fd, size)
+
+
+def _write_at(fd: int, data: bytes) -> None:
+    os.lseek(fd, 0, os.SEEK_SET)
+    os.write(fd, data)
+
+
+@contextmanager
+def _locked(fd: int) -> Iterator[None]:
+    if os.name == "nt":
+        os.lseek(fd, 0, os.SEEK_SET)
+        msvcrt.locking(fd, msvcrt.LK_LOCK, 1)
+        try:
+            yield
+        finally:
+            os.lseek(fd, 0, os.SEEK_SET)
+            msvcrt.locking(fd, msvcrt.LK_UNLCK, 1)
+    else:
+        fcntl.flock(fd, fcntl.LOCK_EX)
+        try:
+            yield
+        finally:
+            fcntl.flock(fd, fcntl.LOCK_UN)
+
+
+__all__ = [
+    "DEFAULT_DAILY_LIMIT",
+    "QuotaExceededError",
+    "RateLimiter",
+    "is_quota_message",
+    "seconds_until_quota_reset",
+    "shared_state_path",
+]
@@ -0,0 +1,145 @@
+"""Off-loop response decoding and columnar row building.
+
+At several hundred requests per minute, decoding JSON and building a
+DataFrame per response on the event loop thread delays the network I/O of
+every other request. This module moves that work to a small thread pool:
+
+* :func:`decode_json` parses a response body with ``orjson`` when it is
+  installed (standard ``json`` otherwise), off the loop for large bodies;
+* :class:`RecordBatchBuilder` appends the raw records of many responses to
+  per-column lists and hands out Arrow record batches once enough rows are
+  collected, so no DataFrame is built per request.
+"""
+
+from __future__ import annotations
+
+import asyncio
+import functools
+import json
+import os
+import threading
+from concurrent.futures import ThreadPoolExecutor
+from typing import Any, Callable, Dict, List, Mapping, Optional, Sequence, TypeVar, Union
+
+import pyarrow as pa
+
+try:
+    from .dart_sink import STATEMENT_COLUMNS
+except ImportError:  # ``src``가 sys.path에 직접 추가된 경우
+    from dart_sink import STATEMENT_COLUMNS
+
+try:
+    import orjson
+except ImportError:  # orjson은 선택 사항, 없으면 표준 json 사용
+    orjson = None
+
+T = TypeVar("T")
+
+# 이보다 작은 응답(예: status 013)은 스레드 전환 비용이 더 커서 바로 디코딩한다.
+INLINE_DECODE_BYTES = 4096
+DECODE_WORKERS = min(4, os.cpu_count() or 1)
+
+_executor: Optional[ThreadPoolExecutor] = None
+_executor_lock = threading.Lock()
+
+
+def loads(body: Union[bytes, str]) -> Any:
+    """Parse JSON with orjson if available."""
+    if orjson is not None:
+        return orjson.loads(body)
+    return json.loads(body)
+
+
+def decode_executor() -> ThreadPoolExecutor:
+    """Return the process-wide decoding thread pool, creating it lazily."""
+    global _executor
+    with _executor_lock:
+        if _executor is None:
+            _executor = ThreadPoolExecutor(max_workers=DECODE_WORKERS, thread_name_prefix="dart-decode")
+        return _executor
+
+
+async def offload(fn: Callable[..., T], *args: Any, **kwargs: Any) -> T:
+    """Run CPU-bound ``fn`` in the decoding pool without blocking the loop."""
+    loop = asyncio.get_running_loop()
+    return await loop.run_in_executor(decode_executor(), functools.partial(fn, *args, **kwargs))
+
+
+async def decode_json(body: bytes) -> Any:
+    """Parse a response body, in the decoding pool unless it is tiny."""
+    if len(body) < INLINE_DECODE_BYTES:
+        return loads(body)
+    return await offload(loads, body)
+
+
+def _text(value: Any) -> Optional[str]:
+    if value is None or isinstance(value, str):
+        return value
+    return str(value)
+
+
+class RecordBatchBuilder:
+    """Collect raw DART records column by column and emit Arrow batches.
+
+    :meth:`append` is thread-safe, so it can run in the decoding pool right
+    after the response is parsed. It returns a record batch whenever
+    ``batch_rows`` rows have accumulated; :meth:`flush` returns the rest.
+    Every column is stored as a string, like :class:`ColumnarSink` does.
+    """
+
+    def __init__(self, columns: Sequence[str] = STATEMENT_COLUMNS, batch_rows: int = 50_000) -> None:
+        self.columns = list(columns)
+        self.batch_rows = batch_rows
+        self.schema = pa.schema([pa.field(c, pa.string()) for c in self.columns])
+        self.rows_built = 0
+        self._lock = threading.Lock()
+        self._values: Dict[str, List[Optional[str]]] = {c: [] for c in self.columns}
+        self._rows = 0
+
+    def append(
+        self,
+        records: Sequence[Mapping[str, Any]],
+        overrides: Optional[Mapping[str, Any]] = None,
+        defaults: Optional[Mapping[str, Any]] = None,
+    ) -> Optional[pa.RecordBatch]:
+        """Append records; ``overrides`` replace and ``defaults`` fill in values."""
+        if not records:
+            return None
+        overrides = overrides or {}
+        defaults = defaults or {}
+        n = len(records)
+        with self._lock:
+            for column, values in self._values.items():
+                if column in overrides:
+                    values.extend([_text(overrides[column])] * n)
+                elif column in defaults:
+                    default = _text(defaults[column])
+                    values.extend(_text(r.get(column)) or default for r in records)
+                else:
+                    values.extend(_text(r.get(column)) for r in records)
+            self._rows += n
+            self.rows_built += n
+            if self._rows >= self.batch_rows:
+                return self._take()
+        return None
+
+    def flush(self) -> Optional[pa.RecordBatch]:
+        """Return the buffered rows as a batch (None when empty)."""
+        with self._lock:
+            return self._take() if self._rows else None
+
+    def _take(self) -> pa.RecordBatch:
+        arrays = [pa.array(self._values[c], pa.string()) for c in self.columns]
+        self._values = {c: [] for c in self.columns}
+        self._rows = 0
+        return pa.RecordBatch.from_arrays(arrays, schema=self.schema)
+
+
+__all__ = [
+    "DECODE_WORKERS",
+    "RecordBatchBuilder",
+    "decode_executor",
+    "decode_json",
+    "loads",
+    "offload",
+]
@@ -0,0 +1,402 @@
+"""Shared retry policy and circuit breaker for DART requests.
+
+Every failure is classified before deciding what to do with it:
+
+* ``transient``: timeouts, connection errors, HTTP 429/5xx, truncated or
+  garbled bodies and DART system errors (status 800/900). These are retried
+  with exponential backoff and full jitter, so concurrent workers do not
+  retry in lockstep.
+* ``quota``: the daily request limit. Retrying only burns more calls, so the
+  error is raised immediately and the run resumes after the quota resets.
+* ``permanent``: invalid keys or parameters and other HTTP 4xx answers.
+  Retrying cannot help.
+
+A :class:`CircuitBreaker` shared by all requests to one API base opens after
+consecutive transient failures. While it is open, requests wait instead of
+hammering DART. After ``reset_timeout`` one probe request is let through
+(half-open); if it succeeds the circuit closes, otherwise it opens again for
+twice as long, up to ``max_reset_timeout``.
+
+The breaker only delays requests; it does not save a request whose retries
+run out. The last error is raised to the caller, which must record the key
+as failed rather than empty. Bulk downloads collect those per-key errors and
+raise :class:`FetchFailedError` at the end, so batch and queue runners do not
+mark a unit complete while some of its keys are missing.
+"""
+
+from __future__ import annotations
+
+import asyncio
+import random
+import threading
+import time
+import zipfile
+from contextlib import asynccontextmanager, contextmanager
+from typing import Any, AsyncIterator, Awaitable, Callable, Dict, Iterator, Optional, TypeVar
+
+import aiohttp
+import requests
+
+try:
+    from .dart_metrics import CIRCUIT_STATE, RETRIES
+    from .rate_limiter import QuotaExceededError, is_quota_message
+except ImportError:  # ``src``가 sys.path에 직접 추가된 경우
+    from dart_metrics import CIRCUIT_STATE, RETRIES
+    from rate_limiter import QuotaExceededError, is_quota_message
+
+T = TypeVar("T")
+
+TRANSIENT = "transient"
+QUOTA = "quota"
+PERMANENT = "permanent"
+
+# DART 상태 코드: 800 시스템 점검, 900 정의되지 않은 오류, 020 요청 제한 초과
+TRANSIENT_STATUSES = frozenset({"800", "900"})
+QUOTA_STATUSES = frozenset({"020"})
+TRANSIENT_HTTP_STATUSES = frozenset({408, 425, 429})
+
+CLOSED = "closed"
+HALF_OPEN = "half_open"
+OPEN = "open"
+_STATE_VALUES = {CLOSED: 0, HALF_OPEN: 1, OPEN: 2}
+
+
+class DartStatusError(RuntimeError):
+    """A DART response whose ``status`` is neither success nor "no data"."""
+
+    def __init__(self, status: str, message: str = "") -> None:
+        super().__init__(f"DART status {status}: {message}")
+        self.status = status
+        self.message = message
+
+
+class FetchFailedError(RuntimeError):
+    """Some keys of a bulk download failed after all retries.
+
+    ``failures`` maps each failed key to its last error. Rows of the keys
+    that succeeded have already been handed to the sink, or, for callers
+    that return their rows instead, are kept in ``result``.
+    """
+
+    def __init__(self, failures: Dict[Any, BaseException], result: Any = None) -> None:
+        first = next(iter(failures.values()), None)
+        super().__init__(f"{len(failures):,}개 요청 실패 (예: {first})")
+        self.failures = failures
+        self.result = result
+
+
+def classify_status(status: Optional[str], message: str = "") -> Optional[str]:
+    """Classify a DART response status; None for "000" (ok) and "013" (no data)."""
+    if status in ("000", "013"):
+        return None
+    # 상태 코드로 판정하고, 메시지는 020 문구와 정확히 일치할 때만 본다.
+    # 021(조회 회사 수 초과)·100(잘못된 파라미터)은 그 요청만의 영구 오류다.
+    if status in QUOTA_STATUSES or is_quota_message(message):
+        return QUOTA
+    if status in TRANSIENT_STATUSES:
+        return TRANSIENT
+    return PERMANENT
+
+
+def classify(error: BaseException) -> str:
+    """Classify a failed request as transient, quota or permanent."""
+    if isinstance(error, QuotaExceededError):
+        return QUOTA
+    if isinstance(error, DartStatusError):
+        return classify_status(error.status, error.message) or PERMANENT
+    if isinstance(error, FetchFailedError):
+        # 일시적 오류로 실패한 키가 하나라도 있으면 다시 받을 가치가 있다.
+        kinds = {classify(e) for e in error.failures.values()}
+        return TRANSIENT if TRANSIENT in kinds else PERMANENT
+    if isinstance(error, aiohttp.ClientResponseError):
+        if error.status in TRANSIENT_HTTP_STATUSES or error.status >= 500:
+            return TRANSIENT
+        return PERMANENT
+    if isinstance(error, requests.HTTPError) and error.response is not None:
+        status = error.response.status_code
+        return TRANSIENT if status in TRANSIENT_HTTP_STATUSES or status >= 500 else PERMANENT
+    if isinstance(error, (asyncio.TimeoutError, aiohttp.ClientError, ConnectionError)):
+        return TRANSIENT
+    if isinstance(error, (requests.ConnectionError, requests.Timeout)):
+        return TRANSIENT
+    # 잘린 응답, 깨진 JSON·ZIP은 다시 받으면 대개 정상이다.
+    if isinstance(error, (zipfile.BadZipFile, ValueError)):
+        return TRANSIENT
+    return PERMANENT
+
+
+def retry_cause(error: BaseException) -> str:
+    """Label a failed request for the ``dart_retries_total`` metric."""
+    if isinstance(error, asyncio.TimeoutError):
+        return "timeout"
+    if isinstance(error, QuotaExceededError):
+        return "quota"
+    if isinstance(error, DartStatusError):
+        return f"api_{error.status}"
+    if isinstance(error, FetchFailedError):
+        return "failed_keys"
+    if isinstance(error, aiohttp.ClientResponseError):
+        return "http_429" if error.status == 429 else f"http_{error.status // 100}xx"
+    if isinstance(error, requests.HTTPError) and error.response is not None:
+        status = error.response.status_code
+        return "http_429" if status == 429 else f"http_{status // 100}xx"
+    if isinstance(error, requests.Timeout):
+        return "timeout"
+    if isinstance(error, (aiohttp.ClientError, requests.ConnectionError)):
+        return "network"
+    if isinstance(error, zipfile.BadZipFile):
+        return "bad_zip"
+    if isinstance(error, ValueError):
+        return "bad_response"
+    return "other"
+
+
+class CircuitBreaker:
+    """Closed / open / half-open breaker counting consecutive transient failures.
+
+    Call :meth:`wait` before a request and :meth:`record` with its outcome,
+    or wrap the request in :meth:`guard`. Thread-pool callers use
+    :meth:`wait_sync` and :meth:`guard_sync` instead. Only transient
+    failures count: a quota or permanent error still proves the server is
+    answering.
+    """
+
+    def __init__(
+        self,
+        name: str = "dart",
+        failure_threshold: int = 5,
+        reset_timeout: float = 15.0,
+        max_reset_timeout: float = 300.0,
+    ) -> None:
+        self.name = name
+        self.failure_threshold = failure_threshold
+        self.base_reset_timeout = reset_timeout
+        self.max_reset_timeout = max_reset_timeout
+        self.reset_timeout = reset_timeout
+        self.state = CLOSED
+        self.failures = 0
+        self.opened = 0
+        self._opened_at = 0.0
+        self._probing = False
+        # 스레드 풀에서 쓰는 동기 호출자와 상태를 함께 바꾸므로 잠금으로 보호한다.
+        self._lock = threading.Lock()
+        CIRCUIT_STATE.set(_STATE_VALUES[CLOSED], circuit=self.name)
+
+    def _set_state(self, state: str) -> None:
+        self.state = state
+        CIRCUIT_STATE.set(_STATE_VALUES[state], circuit=self.name)
+
+    def _admit(self) -> float:
+        """Return 0 if a request may go now, else how long to wait."""
+        with self._lock:
+            return self._admit_locked()
+
+    def _admit_locked(self) -> float:
+        if self.state == CLOSED:
+            return 0.0
+        if self.state == OPEN:
+            remaining = self._opened_at + self.reset_timeout - time.monotonic()
+            if remaining > 0:
+                return remaining
+            self._set_state(HALF_OPEN)
+        if self._probing:
+            # 시험 요청 결과가 나올 때까지 나머지는 잠시 기다린다.
+            return min(1.0, self.base_reset_timeout)
+        self._probing = True
+        return 0.0
+
+    async def wait(self) -> None:
+        """Wait until the circuit lets a request through."""
+        while True:
+            delay = self._admit()
+            if delay <= 0:
+                return
+            await asyncio.sleep(delay)
+
+    def wait_sync(self) -> None:
+        """Blocking :meth:`wait` for threads."""
+        while True:
+            delay = self._admit()
+            if delay <= 0:
+                return
+            time.sleep(delay)
+
+    def record(self, error: Optional[BaseException] = None) -> None:
+        """Record the outcome of a request admitted by :meth:`wait`."""
+        with self._lock:
+            if isinstance(error, asyncio.CancelledError):
+                # 취소된 시험 요청은 결과 없이 다음 요청에 기회를 넘긴다.
+                if self.state == HALF_OPEN:
+                    self._probing = False
+                return
+            if error is not None and classify(error) == TRANSIENT:
+                self._record_failure()
+            else:
+                self._record_success()
+
+    def _record_success(self) -> None:
+        self.failures = 0
+        if self.state != CLOSED:
+            print(f"✅ DART 응답 회복: 회로를 닫습니다 ({self.name})")
+            self.reset_timeout = self.base_reset_timeout
+            self._probing = False
+            self._set_state(CLOSED)
+
+    def _record_failure(self) -> None:
+        self.failures += 1
+        if self.state == HALF_OPEN:
+            # 시험 요청도 실패하면 더 오래 열어 둔다.
+            self.reset_timeout = min(self.reset_timeout * 2, self.max_reset_timeout)
+            self._open()
+        elif self.state == CLOSED and self.failures >= self.failure_threshold:
+            self._open()
+
+    def _open(self) -> None:
+        self.opened += 1
+        self._opened_at = time.monotonic()
+        self._probing = False
+        self._set_state(OPEN)
+        print(f"⛔ DART 연속 오류 {self.failures}회: {self.reset_timeout:.0f}초 동안 요청을 멈춥니다 ({self.name})")
+
+    @asynccontextmanager
+    async def guard(self) -> AsyncIterator[None]:
+        """Wait for the circuit, then record how the wrapped request ended."""
+        await self.wait()
+        try:
+            yield
+        except BaseException as e:
+            self.record(e)
+            raise
+        self.record()
+
+    @contextmanager
+    def guard_sync(self) -> Iterator[None]:
+        """Blocking :meth:`guard` for threads."""
+        self.wait_sync()
+        try:
+            yield
+        except BaseException as e:
+            self.record(e)
+            raise
+        self.record()
+
+
+_breakers: Dict[str, CircuitBreaker] = {}
+
+
+def get_breaker(name: str, **kwargs: Any) -> CircuitBreaker:
+    """Return the process-wide breaker for ``name`` (e.g. an API base URL)."""
+    breaker = _breakers.get(name)
+    if breaker is None:
+        breaker = _breakers[name] = CircuitBreaker(name, **kwargs)
+    return breaker
+
+
+class RetryPolicy:
+    """Exponential backoff with full jitter, retrying transient failures only.
+
+    The delay before retry ``n`` (0-based) is drawn uniformly from
+    ``[0, min(max_delay, base_delay * 2**n)]``. With a ``breaker``, every
+    attempt waits for the circuit and reports its outcome to it.
+    """
+
+    def __init__(
+        self,
+        max_attempts: int = 3,
+        base_delay: float = 1.0,
+        max_delay: float = 30.0,
+        breaker: Optional[CircuitBreaker] = None,
+        rng: Optional[random.Random] = None,
+    ) -> None:
+        self.max_attempts = max(1, max_attempts)
+        self.base_delay = base_delay
+        self.max_delay = max_delay
+        self.breaker = breaker
+        self._rng = rng or random.Random()
+
+    def delay(self, attempt: int) -> float:
+        """Jittered delay before retrying after failed attempt ``attempt``."""
+        return self._rng.uniform(0.0, min(self.max_delay, self.base_delay * (2 ** attempt)))
+
+    def should_retry(self, error: BaseException, attempt: int) -> bool:
+        """True if ``error`` is transient and attempts are left."""
+        return attempt < self.max_attempts - 1 and classify(error) == TRANSIENT
+
+    async def backoff(self, attempt: int, cause: str) -> float:
+        """Count a retry under ``cause`` and sleep the jittered delay."""
+        RETRIES.inc(cause=cause)
+        delay = self.delay(attempt)
+        await asyncio.sleep(delay)
+        return delay
+
+    async def call(
+        self,
+        fn: Callable[..., Awaitable[T]],
+        *args: Any,
+        on_retry: Optional[Callable[[int, BaseException, float], None]] = None,
+        **kwargs: Any,
+    ) -> T:
+        """Await ``fn(*args, **kwargs)``, retrying transient failures.
+
+        ``on_retry(attempt, error, delay)`` is called before each backoff.
+        Quota and permanent errors, and the last transient one, are raised.
+        """
+        attempt = 0
+        while True:
+            try:
+                if self.breaker is not None:
+                    async with self.breaker.guard():
+                        return await fn(*args, **kwargs)
+                return await fn(*args, **kwargs)
+            except Exception as e:
+                if not self.should_retry(e, attempt):
+                    raise
+                delay = self.delay(attempt)
+                if on_retry is not None:
+                    on_retry(attempt, e, delay)
+                RETRIES.inc(cause=retry_cause(e))
+                await asyncio.sleep(delay)
+                attempt += 1
+
+    def call_sync(
+        self,
+        fn: Callable[..., T],
+        *args: Any,
+        on_retry: Optional[Callable[[int, BaseException, float], None]] = None,
+        **kwargs: Any,
+    ) -> T:
+        """Blocking :meth:`call` for thread-pool callers (e.g. ``requests``)."""
+        attempt = 0
+        while True:
+            try:
+                if self.breaker is not None:
+                    with self.breaker.guard_sync():
+                        return fn(*args, **kwargs)
+                return fn(*args, **kwargs)
+            except Exception as e:
+                if not self.should_retry(e, attempt):
+                    raise
+                delay = self.delay(attempt)
+                if on_retry is not None:
+                    on_retry(attempt, e, delay)
+                RETRIES.inc(cause=retry_cause(e))
+                time.sleep(delay)
+                attempt += 1
+
+
+__all__ = [
+    "CLOSED",
+    "CircuitBreaker",
+    "DartStatusError",
+    "FetchFailedError",
+    "HALF_OPEN",
+    "OPEN",
+    "PERMANENT",
+    "QUOTA",
+    "RetryPolicy",
+    "TRANSIENT",
+    "classify",
+    "classify_status",
+    "get_breaker",
+    "retry_cause",
+]
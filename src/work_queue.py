@@ -0,0 +1,269 @@
+"""Lease-based work queue shared by any number of download workers.
+
+Work units (small groups of companies x years) live in one SQLite file.
+A worker claims a unit by taking a time-limited lease and keeps it alive
+with heartbeats while downloading. If a worker dies, its lease expires and
+the unit goes back to the queue for someone else, so one slow or crashed
+worker never stalls the collection. Progress is a single aggregate query.
+
+Workers on one host can use WAL mode. When the file sits on a network
+share used by several machines, open it with ``wal=False``: WAL needs
+shared memory and does not work over network file systems.
+"""
+
+from __future__ import annotations
+
+import asyncio
+import json
+import os
+import socket
+import sqlite3
+import time
+from contextlib import asynccontextmanager
+from dataclasses import dataclass
+from pathlib import Path
+from typing import Any, AsyncIterator, Iterable, Optional
+
+DEFAULT_QUEUE_PATH = Path(__file__).resolve().parent.parent / "data" / "cache" / "work_queue.sqlite"
+DEFAULT_LEASE_SECONDS = 300.0
+
+QUEUED = "queued"
+LEASED = "leased"
+DONE = "done"
+FAILED = "failed"
+
+_SCHEMA = """
+CREATE TABLE IF NOT EXISTS units (
+    unit_id INTEGER PRIMARY KEY,
+    payload TEXT NOT NULL UNIQUE,
+    status TEXT NOT NULL DEFAULT 'queued',
+    owner TEXT,
+    lease_expires REAL,
+    attempts INTEGER NOT NULL DEFAULT 0,
+    rows INTEGER NOT NULL DEFAULT 0,
+    error TEXT,
+    updated_at REAL
+);
+CREATE INDEX IF NOT EXISTS idx_units_status ON units (status, lease_expires);
+"""
+
+
+def default_worker_id() -> str:
+    return f"{socket.gethostname()}-{os.getpid()}"
+
+
+@dataclass
+class Lease:
+    unit_id: int
+    payload: Any
+    worker_id: str
+    expires_at: float
+    attempts: int
+
+
+@dataclass
+class QueueProgress:
+    queued: int = 0
+    leased: int = 0
+    done: int = 0
+    failed: int = 0
+    rows: int = 0
+    workers: int = 0
+
+    @property
+    def total(self) -> int:
+        return self.queued + self.leased + self.done + self.failed
+
+    @property
+    def finished(self) -> bool:
+        return self.queued == 0 and self.leased == 0
+
+    def __str__(self) -> str:
+        pct = (self.done + self.failed) / self.total * 100 if self.total else 100.0
+        return (
+            f"완료 {self.done:,} / 실패 {self.failed:,} / 진행 중 {self.leased:,} / "
+            f"대기 {self.queued:,} (전체 {self.total:,}, {pct:.1f}%) · "
+            f"수집 {self.rows:,}행 · 활성 작업자 {self.workers}명"
+        )
+
+
+class WorkQueue:
+    """SQLite-backed queue with leases, heartbeats and expiry-based requeue."""
+
+    def __init__(
+        self,
+        path: Path = DEFAULT_QUEUE_PATH,
+        lease_seconds: float = DEFAULT_LEASE_SECONDS,
+        max_attempts: int = 3,
+        wal: bool = True,
+    ) -> None:
+        self.path = Path(path)
+        self.path.parent.mkdir(parents=True, exist_ok=True)
+        self.lease_seconds = lease_seconds
+        self.max_attempts = max_attempts
+        # 트랜잭션은 직접 관리한다 (BEGIN IMMEDIATE로 쓰기 잠금을 먼저 잡는다).
+        self._conn = sqlite3.connect(str(self.path), timeout=60, isolation_level=None)
+        if wal:
+            self._conn.execute("PRAGMA journal_mode=WAL")
+        self._conn.executescript(_SCHEMA)
+
+    def _write(self, sql: str, args: Iterable[Any] = ()) -> int:
+        self._conn.execute("BEGIN IMMEDIATE")
+        try:
+            changed = self._conn.execute(sql, tuple(args)).rowcount
+            self._conn.execute("COMMIT")
+        except BaseException:
+            self._conn.execute("ROLLBACK")
+            raise
+        return changed
+
+    def populate(self, payloads: Iterable[Any]) -> int:
+        """Add work units; payloads already in the queue are skipped."""
+        self._conn.execute("BEGIN IMMEDIATE")
+        try:
+            before = self._conn.total_changes
+            self._conn.executemany(
+                "INSERT OR IGNORE INTO units (payload, updated_at) VALUES (?, ?)",
+                ((json.dumps(p, sort_keys=True), time.time()) for p in payloads),
+            )
+            added = self._conn.total_changes - before
+            self._conn.execute("COMMIT")
+        except BaseException:
+            self._conn.execute("ROLLBACK")
+            raise
+        return added
+
+    def requeue_expired(self) -> int:
+        """Return units whose lease has expired to the queue."""
+        return self._write(
+            "UPDATE units SET status = ?, owner = NULL, lease_expires = NULL, updated_at = ? "
+            "WHERE status = ? AND lease_expires < ?",
+            (QUEUED, time.time(), LEASED, time.time()),
+        )
+
+    def claim(self, worker_id: Optional[str] = None) -> Optional[Lease]:
+        """Lease the next queued unit, or return None if nothing is available."""
+        worker_id = worker_id or default_worker_id()
+        now = time.time()
+        self._conn.execute("BEGIN IMMEDIATE")
+        try:
+            self._conn.execute(
+                "UPDATE units SET status = ?, owner = NULL, lease_expires = NULL, updated_at = ? "
+                "WHERE status = ? AND lease_expires < ?",
+                (QUEUED, now, LEASED, now),
+            )
+            row = self._conn.execute(
+                "SELECT unit_id, payload, attempts FROM units WHERE status = ? ORDER BY unit_id LIMIT 1",
+                (QUEUED,),
+            ).fetchone()
+            if row is None:
+                self._conn.execute("COMMIT")
+                return None
+            unit_id, payload, attempts = row
+            expires_at = now + self.lease_seconds
+            self._conn.execute(
+                "UPDATE units SET status = ?, owner = ?, lease_expires = ?, attempts = attempts + 1, "
+                "updated_at = ? WHERE unit_id = ?",
+                (LEASED, worker_id, expires_at, now, unit_id),
+            )
+            self._conn.execute("COMMIT")
+        except BaseException:
+            self._conn.execute("ROLLBACK")
+            raise
+        return Lease(unit_id, json.loads(payload), worker_id, expires_at, attempts + 1)
+
+    def heartbeat(self, lease: Lease) -> bool:
+        """Extend a lease. Returns False if it was lost (expired and re-claimed)."""
+        expires_at = time.time() + self.lease_seconds
+        changed = self._write(
+            "UPDATE units SET lease_expires = ?, updated_at = ? "
+            "WHERE unit_id = ? AND owner = ? AND status = ?",
+            (expires_at, time.time(), lease.unit_id, lease.worker_id, LEASED),
+        )
+        if changed:
+            lease.expires_at = expires_at
+        return bool(changed)
+
+    def complete(self, lease: Lease, rows: int = 0) -> bool:
+        return bool(self._write(
+            "UPDATE units SET status = ?, rows = ?, owner = NULL, lease_expires = NULL, error = NULL, "
+            "updated_at = ? WHERE unit_id = ? AND owner = ?",
+            (DONE, rows, time.time(), lease.unit_id, lease.worker_id),
+        ))
+
+    def fail(self, lease: Lease, error: str = "") -> bool:
+        """Requeue a failed unit, or mark it failed after ``max_attempts``."""
+        status = FAILED if lease.attempts >= self.max_attempts else QUEUED
+        return bool(self._write(
+            "UPDATE units SET status = ?, error = ?, owner = NULL, lease_expires = NULL, "
+            "updated_at = ? WHERE unit_id = ? AND owner = ?",
+            (status, error[:500], time.time(), lease.unit_id, lease.worker_id),
+        ))
+
+    def release(self, lease: Lease) -> bool:
+        """Give a unit back without counting the attempt (e.g. quota exhausted)."""
+        return bool(self._write(
+            "UPDATE units SET status = ?, attempts = MAX(0, attempts - 1), owner = NULL, "
+            "lease_expires = NULL, updated_at = ? WHERE unit_id = ? AND owner = ?",
+            (QUEUED, time.time(), lease.unit_id, lease.worker_id),
+        ))
+
+    def retry_failed(self) -> int:
+        return self._write(
+            "UPDATE units SET status = ?, attempts = 0, error = NULL, updated_at = ? WHERE status = ?",
+            (QUEUED, time.time(), FAILED),
+        )
+
+    def progress(self) -> QueueProgress:
+        progress = QueueProgress()
+        for status, count, rows in self._conn.execute(
+            "SELECT status, COUNT(*), COALESCE(SUM(rows), 0) FROM units GROUP BY status"
+        ):
+            setattr(progress, status, count)
+            progress.rows += rows
+        progress.workers = self._conn.execute(
+            "SELECT COUNT(DISTINCT owner) FROM units WHERE status = ? AND lease_expires >= ?",
+            (LEASED, time.time()),
+        ).fetchone()[0]
+        return progress
+
+    def close(self) -> None:
+        self._conn.close()
+
+    def __enter__(self) -> "WorkQueue":
+        return self
+
+    def __exit__(self, *exc: Any) -> None:
+        self.close()
+
+    @asynccontextmanager
+    async def keep_alive(self, lease: Lease, interval: Optional[float] = None) -> AsyncIterator[None]:
+        """Send heartbeats in the background while the block runs."""
+        interval = interval or self.lease_seconds / 3
+
+        async def beat() -> None:
+            while True:
+                await asyncio.sleep(interval)
+                if not self.heartbeat(lease):
+                    print(f"⚠️ 작업 단위 {lease.unit_id}의 임대가 만료되어 다른 작업자에게 넘어갔습니다")
+                    return
+
+        task = asyncio.create_task(beat())
+        try:
+            yield
+        finally:
+            task.cancel()
+            await asyncio.gather(task, return_exceptions=True)
+
+
+__all__ = [
+    "DEFAULT_QUEUE_PATH",
+    "DONE",
+    "FAILED",
+    "LEASED",
+    "Lease",
+    "QUEUED",
+    "QueueProgress",
+    "WorkQueue",
+    "default_worker_id",
+]
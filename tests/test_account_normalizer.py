@@ -0,0 +1,46 @@
+import sys
+from pathlib import Path
+
+import pandas as pd
+import pytest
+
+SRC_PATH = Path(__file__).resolve().parent.parent / "src"
+sys.path.append(str(SRC_PATH))
+
+from account_normalizer import parse_amounts
+
+
+@pytest.mark.parametrize(
+    "raw, expected",
+    [
+        ("1,234", 1234),
+        ("(1,234)", -1234),
+        ("-", pd.NA),
+        ("", pd.NA),
+        (None, pd.NA),
+        ("+5", 5),
+        ("1.9", 1),
+        ("−3", -3),
+        ("12345678901234567890", pd.NA),
+        ("abc", pd.NA),
+    ],
+)
+def test_parse_amounts(raw, expected):
+    result = parse_amounts([raw])
+
+    assert str(result.dtype) == "Int64"
+    if expected is pd.NA:
+        assert result.isna().iloc[0]
+    else:
+        assert result.iloc[0] == expected
+
+
+def test_parse_amounts_keeps_series_index():
+    values = pd.Series(["1,234", "(1,234)", "-", "", None, "+5", "1.9", "−3", "12345678901234567890", "abc"],
+                       index=range(10, 20), name="thstrm_amount")
+
+    result = parse_amounts(values)
+
+    assert result.index.tolist() == list(range(10, 20))
+    assert result.name == "thstrm_amount"
+    assert result.tolist() == [1234, -1234, pd.NA, pd.NA, pd.NA, 5, 1, -3, pd.NA, pd.NA]
@@ -0,0 +1,71 @@
+import asyncio
+import sys
+from pathlib import Path
+
+import pytest
+
+SRC_PATH = Path(__file__).resolve().parent.parent / "src"
+sys.path.append(str(SRC_PATH))
+
+import adaptive_concurrency
+from adaptive_concurrency import AdaptiveConcurrency
+
+
+class FakeClock:
+    """Stands in for the ``time`` module inside adaptive_concurrency."""
+
+    def __init__(self, now: float = 1_000.0) -> None:
+        self.now = now
+
+    def monotonic(self) -> float:
+        return self.now
+
+
+@pytest.fixture
+def clock(monkeypatch):
+    clock = FakeClock()
+    monkeypatch.setattr(adaptive_concurrency, "time", clock)
+    return clock
+
+
+def test_overload_halves_limit_once_per_cooldown(clock):
+    limiter = AdaptiveConcurrency(initial=16, cooldown=2.0)
+
+    limiter.record_overload()
+    assert limiter.current == 8
+    # 같은 혼잡에서 연달아 온 429는 한 번만 반영한다.
+    clock.now += 1.0
+    limiter.record_overload()
+    assert limiter.current == 8
+
+    clock.now += 1.0
+    limiter.record_overload()
+    assert limiter.current == 4
+    assert limiter.report().decreases == 2
+
+
+def test_overload_never_goes_below_min_limit(clock):
+    limiter = AdaptiveConcurrency(initial=3, min_limit=2, cooldown=0.0)
+    for _ in range(5):
+        clock.now += 1.0
+        limiter.record_overload()
+    assert limiter.current == 2
+
+
+def test_success_grows_limit_only_when_slots_are_used(clock):
+    limiter = AdaptiveConcurrency(initial=2, max_limit=3)
+
+    # 유휴 상태의 성공은 한도를 늘리지 않는다.
+    for _ in range(10):
+        limiter.record_success(0.1)
+    assert limiter.current == 2
+
+    async def busy() -> None:
+        async with limiter.slot(), limiter.slot():
+            for _ in range(10):
+                limiter.record_success(0.1)
+
+    asyncio.run(busy())
+    assert limiter.current == 3
+    report = limiter.report()
+    assert (report.peak_limit, report.increases) == (3, 1)
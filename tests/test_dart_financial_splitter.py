@@ -0,0 +1,77 @@
+import sys
+from pathlib import Path
+
+import pandas as pd
+import pyarrow as pa
+import pyarrow.parquet as pq
+import pytest
+
+SRC_PATH = Path(__file__).resolve().parent.parent / "src"
+sys.path.append(str(SRC_PATH))
+
+from dart_financial_splitter import split_statements
+
+
+def _write_csv(path: Path) -> None:
+    # 첫 청크는 금액이 모두 비어 있고 ord는 숫자만 있어 pandas가 float/int로 읽는다.
+    rows = [
+        {"corp_code": "00126380", "bsns_year": "2022", "rcept_no": "20230301000001", "reprt_code": "11011",
+         "fs_div": "CFS", "sj_div": "BS", "account_nm": "자산총계", "thstrm_amount": "", "ord": "1"},
+        {"corp_code": "00126380", "bsns_year": "2022", "rcept_no": "20230301000001", "reprt_code": "11011",
+         "fs_div": "CFS", "sj_div": "BS", "account_nm": "부채총계", "thstrm_amount": "", "ord": "2"},
+        {"corp_code": "00164779", "bsns_year": "2022", "rcept_no": "20230302000001", "reprt_code": "11011",
+         "fs_div": "CFS", "sj_div": "BS", "account_nm": "자산총계", "thstrm_amount": "2,000", "ord": "1"},
+        {"corp_code": "00164779", "bsns_year": "2022", "rcept_no": "20230302000001", "reprt_code": "11011",
+         "fs_div": "CFS", "sj_div": "BS", "account_nm": "부채총계", "thstrm_amount": "1,500", "ord": "x"},
+    ]
+    pd.DataFrame(rows).to_csv(path, index=False)
+
+
+def test_split_chunked_csv_with_inferred_types(tmp_path):
+    source = tmp_path / "statements.csv"
+    _write_csv(source)
+    out_dir = tmp_path / "split"
+
+    counts = split_statements(pd.read_csv(source, chunksize=2), out_dir, formats=("parquet", "csv"))
+
+    assert counts == {("CFS", "BS"): 4}
+    table = pq.read_table(out_dir / "fs_div=CFS" / "sj_div=BS" / "part-0.parquet")
+    assert table.column("thstrm_amount").to_pylist() == [None, None, "2,000", "1,500"]
+    assert table.column("ord").to_pylist() == ["1", "2", "1", "x"]
+    csv = pd.read_csv(out_dir / "연결재무제표_재무상태표.csv", encoding="utf-8-sig", dtype=str)
+    assert csv["thstrm_amount"].tolist()[2:] == ["2,000", "1,500"]
+
+
+def test_split_chunked_csv_as_strings(tmp_path):
+    source = tmp_path / "statements.csv"
+    _write_csv(source)
+    out_dir = tmp_path / "split"
+
+    split_statements(pd.read_csv(source, dtype=str, chunksize=2), out_dir)
+
+    table = pq.read_table(out_dir / "fs_div=CFS" / "sj_div=BS" / "part-0.parquet")
+    assert table.column("corp_code").to_pylist() == ["00126380", "00126380", "00164779", "00164779"]
+
+
+def test_split_rejects_columns_missing_from_first_chunk(tmp_path):
+    first = pd.DataFrame({"corp_code": ["00126380"], "fs_div": ["CFS"], "sj_div": ["BS"], "thstrm_amount": ["1"]})
+    second = first.assign(currency=["KRW"])
+
+    with pytest.raises(ValueError, match="currency"):
+        split_statements([first, second], tmp_path / "split", latest_only=False)
+    assert not list((tmp_path / "split").rglob("*.parquet"))
+
+
+def test_split_dataset_keeps_columns_of_later_files(tmp_path):
+    dataset_dir = tmp_path / "statements"
+    rows = {"corp_code": ["00126380"], "thstrm_amount": ["1"]}
+    for year, extra in (("2021", {}), ("2022", {"currency": ["KRW"]})):
+        directory = dataset_dir / f"bsns_year={year}" / "fs_div=CFS" / "sj_div=BS"
+        directory.mkdir(parents=True)
+        pq.write_table(pa.table({**rows, **extra}), directory / "part-0.parquet")
+    out_dir = tmp_path / "split"
+
+    split_statements(dataset_dir, out_dir, latest_only=False)
+
+    table = pq.read_table(out_dir / "fs_div=CFS" / "sj_div=BS" / "part-0.parquet")
+    assert table.column("currency").to_pylist() == [None, "KRW"]
@@ -0,0 +1,58 @@
+import sys
+from pathlib import Path
+
+import pandas as pd
+
+SRC_PATH = Path(__file__).resolve().parent.parent / "src"
+sys.path.append(str(SRC_PATH))
+
+from feature_materializer import IncrementalMaterializer
+from feature_store import FeatureStore
+
+ACCOUNTS = [
+    ("BS", "자산총계", "1,000"),
+    ("BS", "유동자산", "400"),
+    ("BS", "비유동자산", "600"),
+    ("BS", "부채총계", "500"),
+    ("BS", "유동부채", "300"),
+    ("BS", "자본총계", "500"),
+    ("BS", "이익잉여금", "200"),
+    ("IS", "매출액", "2,000"),
+    ("IS", "당기순이익", "100"),
+]
+
+
+def _statements() -> pd.DataFrame:
+    rows = [
+        {"corp_code": corp, "bsns_year": "2022", "fs_div": "CFS", "sj_div": sj_div,
+         "account_nm": account, "ord": str(i), "thstrm_amount": amount}
+        for corp in ("00126380", "00164779")
+        for i, (sj_div, account, amount) in enumerate(ACCOUNTS)
+    ]
+    return pd.DataFrame(rows)
+
+
+def test_materialize_rewrites_only_dependent_features(tmp_path):
+    store = FeatureStore(tmp_path / "store")
+    materializer = IncrementalMaterializer(store)
+    statements = _statements()
+
+    first = materializer.materialize(statements)
+    assert (first.input_keys, first.changed_keys, first.features_written) == (2, 2, 20)
+
+    second = materializer.materialize(statements)
+    assert (second.changed_keys, second.features_written) == (0, 0)
+
+    changed = statements.copy()
+    target = (changed["corp_code"] == "00164779") & (changed["account_nm"] == "자산총계")
+    changed.loc[target, "thstrm_amount"] = "2,000"
+    before = store.read().set_index("corp_code")
+    third = materializer.materialize(changed)
+    after = store.read().set_index("corp_code")
+
+    assert (third.changed_keys, third.features_written) == (1, 5)
+    moved = sorted(name for name in after.columns
+                   if not pd.Series(before[name]).equals(pd.Series(after[name])))
+    assert moved == sorted(["자기자본비율", "고정자산비율", "순운전자본비율", "ln자산총계", "총자산이익잉여금비율"])
+    assert after.loc["00126380"].equals(before.loc["00126380"])
+    assert after.loc["00164779", "자기자본비율"] == 0.25
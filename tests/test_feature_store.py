@@ -0,0 +1,36 @@
+import sys
+from pathlib import Path
+
+import numpy as np
+import pandas as pd
+import pytest
+
+SRC_PATH = Path(__file__).resolve().parent.parent / "src"
+sys.path.append(str(SRC_PATH))
+
+from feature_store import FeatureStore
+
+
+def test_upsert_updates_only_given_columns(tmp_path):
+    store = FeatureStore(tmp_path / "store")
+    store.write(pd.DataFrame({
+        "corp_code": ["A", "B"],
+        "bsns_year": [2022, 2022],
+        "부채비율": [1.0, 2.0],
+        "유동비율": [3.0, 4.0],
+    }))
+
+    store.upsert(pd.DataFrame({"corp_code": ["B", "C"], "bsns_year": [2022, 2022], "부채비율": [5.0, 6.0]}))
+
+    frame = store.read().set_index("corp_code")
+    assert frame["부채비율"].tolist() == [1.0, 5.0, 6.0]
+    assert frame.loc["B", "유동비율"] == 4.0
+    assert np.isnan(frame.loc["C", "유동비율"])
+
+
+def test_upsert_without_year_column_raises(tmp_path):
+    store = FeatureStore(tmp_path / "store", year_column=None)
+    store.write(pd.DataFrame({"회사명": ["가"], "부채비율": [1.0]}))
+
+    with pytest.raises(ValueError, match="연도 컬럼"):
+        store.upsert(pd.DataFrame({"corp_code": ["A"], "부채비율": [2.0]}))
@@ -0,0 +1,87 @@
+import sys
+from pathlib import Path
+
+import pytest
+
+SRC_PATH = Path(__file__).resolve().parent.parent / "src"
+sys.path.append(str(SRC_PATH))
+
+import rate_limiter
+from rate_limiter import QuotaExceededError, RateLimiter, is_quota_message
+
+
+class FakeClock:
+    """Stands in for the ``time`` module inside rate_limiter."""
+
+    def __init__(self, now: float = 1_700_000_000.0) -> None:
+        self.now = now
+
+    def time(self) -> float:
+        return self.now
+
+    def perf_counter(self) -> float:
+        return self.now
+
+
+@pytest.fixture
+def clock(monkeypatch):
+    clock = FakeClock()
+    monkeypatch.setattr(rate_limiter, "time", clock)
+    return clock
+
+
+@pytest.fixture
+def day(monkeypatch):
+    day = {"today": 739_000}
+    monkeypatch.setattr(rate_limiter, "_today", lambda: day["today"])
+    return day
+
+
+def test_bucket_refills_at_rate(clock, day):
+    limiter = RateLimiter(max_calls=2, period=1.0, burst=2)
+
+    assert limiter.try_acquire() == 0
+    assert limiter.try_acquire() == 0
+    assert limiter.try_acquire() == pytest.approx(0.5)
+
+    clock.now += 0.25
+    assert limiter.try_acquire() == pytest.approx(0.25)
+    clock.now += 0.25
+    assert limiter.try_acquire() == 0
+
+    # 오래 쉬어도 burst 이상은 쌓이지 않는다.
+    clock.now += 60
+    waits = [limiter.try_acquire() for _ in range(3)]
+    assert waits[:2] == [0, 0]
+    assert waits[2] == pytest.approx(0.5)
+
+
+def test_daily_budget_resets_on_kst_date_change(clock, day, tmp_path):
+    limiter = RateLimiter(max_calls=100, period=1.0, daily_limit=2, state_path=tmp_path / "bucket.bin")
+
+    assert limiter.try_acquire() == 0
+    assert limiter.try_acquire() == 0
+    assert limiter.remaining_today() == 0
+    with pytest.raises(QuotaExceededError):
+        limiter.try_acquire()
+
+    day["today"] += 1
+    assert limiter.remaining_today() == 2
+    assert limiter.try_acquire() == 0
+    # 다른 프로세스도 같은 파일에서 오늘 사용량을 이어 받는다.
+    other = RateLimiter(max_calls=100, period=1.0, daily_limit=2, state_path=tmp_path / "bucket.bin")
+    assert other.remaining_today() == 1
+
+
+@pytest.mark.parametrize(
+    "message, expected",
+    [
+        ("요청 제한을 초과하였습니다.", True),
+        ("조회 가능한 회사 개수가 초과하였습니다.(최대 100건)", False),
+        ("필드의 부적절한 값입니다.", False),
+        ("", False),
+        (None, False),
+    ],
+)
+def test_is_quota_message(message, expected):
+    assert is_quota_message(message) is expected
@@ -0,0 +1,126 @@
+import asyncio
+import sys
+import zipfile
+from pathlib import Path
+
+import aiohttp
+import pytest
+import requests
+
+SRC_PATH = Path(__file__).resolve().parent.parent / "src"
+sys.path.append(str(SRC_PATH))
+
+from rate_limiter import QuotaExceededError
+from retry_policy import (
+    CLOSED,
+    HALF_OPEN,
+    OPEN,
+    PERMANENT,
+    QUOTA,
+    TRANSIENT,
+    CircuitBreaker,
+    DartStatusError,
+    FetchFailedError,
+    classify,
+    classify_status,
+)
+
+
+@pytest.mark.parametrize(
+    "status, message, expected",
+    [
+        ("000", "정상", None),
+        ("013", "조회된 데이타가 없습니다.", None),
+        ("020", "요청 제한을 초과하였습니다.", QUOTA),
+        ("020", "", QUOTA),
+        ("021", "조회 가능한 회사 개수가 초과하였습니다.(최대 100건)", PERMANENT),
+        ("100", "필드의 부적절한 값입니다. 필드 설명에 없는 값을 사용한 경우에 발생하는 메시지입니다.", PERMANENT),
+        ("010", "등록되지 않은 키입니다.", PERMANENT),
+        ("800", "시스템 점검으로 인한 서비스가 중지 중입니다.", TRANSIENT),
+        ("900", "정의되지 않은 오류가 발생하였습니다.", TRANSIENT),
+    ],
+)
+def test_classify_status(status, message, expected):
+    assert classify_status(status, message) == expected
+
+
+def _aiohttp_error(status: int) -> aiohttp.ClientResponseError:
+    return aiohttp.ClientResponseError(None, (), status=status)
+
+
+def _requests_error(status: int) -> requests.HTTPError:
+    response = requests.Response()
+    response.status_code = status
+    return requests.HTTPError(response=response)
+
+
+@pytest.mark.parametrize(
+    "error, expected",
+    [
+        (_aiohttp_error(429), TRANSIENT),
+        (_aiohttp_error(503), TRANSIENT),
+        (_aiohttp_error(404), PERMANENT),
+        (_requests_error(429), TRANSIENT),
+        (_requests_error(502), TRANSIENT),
+        (_requests_error(403), PERMANENT),
+        (aiohttp.ClientConnectionError(), TRANSIENT),
+        (requests.ConnectionError(), TRANSIENT),
+        (requests.Timeout(), TRANSIENT),
+        (asyncio.TimeoutError(), TRANSIENT),
+        (ValueError("깨진 JSON"), TRANSIENT),
+        (zipfile.BadZipFile(), TRANSIENT),
+        (DartStatusError("020", "요청 제한을 초과하였습니다."), QUOTA),
+        (DartStatusError("021"), PERMANENT),
+        (DartStatusError("800"), TRANSIENT),
+        (QuotaExceededError("일일 한도 소진"), QUOTA),
+        (FetchFailedError({"a": DartStatusError("010"), "b": requests.Timeout()}), TRANSIENT),
+        (FetchFailedError({"a": DartStatusError("010")}), PERMANENT),
+        (KeyError("status"), PERMANENT),
+    ],
+)
+def test_classify(error, expected):
+    assert classify(error) == expected
+
+
+def _expire(breaker: CircuitBreaker) -> None:
+    # 실제로 기다리지 않고 열린 시각을 reset_timeout만큼 앞당긴다.
+    breaker._opened_at -= breaker.reset_timeout + 1
+
+
+def test_breaker_opens_probes_and_closes():
+    breaker = CircuitBreaker("test", failure_threshold=2, reset_timeout=10.0)
+    for _ in range(2):
+        assert breaker._admit() == 0
+        breaker.record(requests.Timeout())
+    assert breaker.state == OPEN
+    assert breaker._admit() > 0
+
+    _expire(breaker)
+    assert breaker._admit() == 0
+    assert breaker.state == HALF_OPEN
+    # 시험 요청이 끝나기 전에는 다른 요청을 들이지 않는다.
+    assert breaker._admit() > 0
+
+    breaker.record()
+    assert breaker.state == CLOSED
+    assert breaker.failures == 0
+    assert breaker._admit() == 0
+
+
+def test_breaker_failed_probe_reopens_longer():
+    breaker = CircuitBreaker("test", failure_threshold=1, reset_timeout=10.0, max_reset_timeout=15.0)
+    breaker.record(requests.Timeout())
+    _expire(breaker)
+    assert breaker._admit() == 0
+
+    breaker.record(requests.Timeout())
+    assert breaker.state == OPEN
+    assert breaker.reset_timeout == 15.0
+    assert breaker.opened == 2
+
+
+def test_breaker_ignores_permanent_and_quota_errors():
+    breaker = CircuitBreaker("test", failure_threshold=1)
+    breaker.record(DartStatusError("021"))
+    breaker.record(QuotaExceededError("일일 한도 소진"))
+    assert breaker.state == CLOSED
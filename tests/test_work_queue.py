@@ -0,0 +1,87 @@
+import sys
+import threading
+from pathlib import Path
+
+import pytest
+
+SRC_PATH = Path(__file__).resolve().parent.parent / "src"
+sys.path.append(str(SRC_PATH))
+
+import work_queue
+from work_queue import WorkQueue
+
+
+class FakeClock:
+    """Stands in for the ``time`` module inside work_queue."""
+
+    def __init__(self, now: float = 1_700_000_000.0) -> None:
+        self.now = now
+
+    def time(self) -> float:
+        return self.now
+
+
+def test_expired_lease_is_reclaimed_by_another_worker(tmp_path, monkeypatch):
+    clock = FakeClock()
+    monkeypatch.setattr(work_queue, "time", clock)
+    path = tmp_path / "queue.sqlite"
+    with WorkQueue(path, lease_seconds=30) as a, WorkQueue(path, lease_seconds=30) as b:
+        a.populate([{"corps": ["00126380"], "years": [2022]}])
+        lease = a.claim("worker-a")
+        assert lease.payload == {"corps": ["00126380"], "years": [2022]}
+        assert b.claim("worker-b") is None
+
+        clock.now += 31
+        stolen = b.claim("worker-b")
+        assert stolen.unit_id == lease.unit_id
+        assert stolen.attempts == 2
+
+        # 임대를 잃은 작업자는 연장도 완료도 할 수 없다.
+        assert not a.heartbeat(lease)
+        assert not a.complete(lease, rows=10)
+        assert b.complete(stolen, rows=7)
+        progress = b.progress()
+        assert (progress.done, progress.leased, progress.rows) == (1, 0, 7)
+
+
+def test_heartbeat_keeps_lease(tmp_path, monkeypatch):
+    clock = FakeClock()
+    monkeypatch.setattr(work_queue, "time", clock)
+    path = tmp_path / "queue.sqlite"
+    with WorkQueue(path, lease_seconds=30) as a, WorkQueue(path, lease_seconds=30) as b:
+        a.populate([1])
+        lease = a.claim("worker-a")
+        clock.now += 20
+        assert a.heartbeat(lease)
+        clock.now += 20
+        assert b.claim("worker-b") is None
+
+
+@pytest.mark.parametrize("units", [1, 20])
+def test_concurrent_claims_are_exclusive(tmp_path, units):
+    path = tmp_path / "queue.sqlite"
+    with WorkQueue(path) as queue:
+        queue.populate(range(units))
+
+    claimed = []
+    barrier = threading.Barrier(8)
+
+    def worker(i: int) -> None:
+        with WorkQueue(path) as queue:
+            barrier.wait()
+            while True:
+                lease = queue.claim(f"worker-{i}")
+                if lease is None:
+                    return
+                claimed.append(lease.payload)
+                queue.complete(lease)
+
+    threads = [threading.Thread(target=worker, args=(i,)) for i in range(8)]
+    for thread in threads:
+        thread.start()
+    for thread in threads:
+        thread.join()
+
+    assert sorted(claimed) == list(range(units))
+    with WorkQueue(path) as queue:
+        assert queue.progress().done == units